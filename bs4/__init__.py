@@ -27,6 +27,7 @@ __all__ = [
     "Declaration",
     "ProcessingInstruction",
     "ResultSet",
+    "LazyResultSet",
     "CSS",
     "Script",
     "Stylesheet",
@@ -35,13 +36,17 @@ __all__ = [
     "ElementFilter",
     "SoupReplacer",  # NEW (Milestone2Part3) Xiyao LI
     "UnicodeDammit",
+    "EncodingCache",
     "CData",
     "Doctype",
+    "parse_many",
+    "parse_records",
 
     # Exceptions
     "FeatureNotFound",
     "ParserRejectedMarkup",
     "StopParsing",
+    "XPathError",
 
     # Warnings
     "AttributeResemblesVariableWarning",
@@ -51,7 +56,18 @@ __all__ = [
     "XMLParsedAsHTMLWarning",
 ]
 
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+import io
+import itertools
+import mmap
+import os
+import re
 import sys
 import warnings
 
@@ -67,7 +83,14 @@ from .builder import (
     TreeBuilder,
 )
 from .builder._htmlparser import HTMLParserTreeBuilder
-from .dammit import UnicodeDammit
+from . import serialize
+from .index import TreeIndex
+from .dammit import (
+    EncodingCache,
+    EncodingDetector,
+    IncrementalUnicodeDammit,
+    UnicodeDammit,
+)
 from .css import CSS
 from ._deprecation import (
     _deprecated,
@@ -82,6 +105,7 @@ from .element import (
     PageElement,
     ProcessingInstruction,
     PYTHON_SPECIFIC_ENCODINGS,
+    LazyResultSet,
     ResultSet,
     Script,
     Stylesheet,
@@ -96,13 +120,19 @@ from .filter import (
 from .replacer import SoupReplacer  # NEW Xiyao LI milestone2part3
 from typing import (
     Any,
+    Callable,
     cast,
     Counter as CounterType,
+    Deque,
     Dict,
+    Hashable,
+    IO,
+    Iterable,
     Iterator,
     List,
     Sequence,
     Optional,
+    Tuple,
     Type,
     Union,
 )
@@ -113,6 +143,7 @@ from bs4._typing import (
     _IncomingMarkup,
     _InsertableElement,
     _RawAttributeValue,
+    _RawAttributePairs,
     _RawAttributeValues,
     _RawMarkup,
 )
@@ -122,6 +153,7 @@ from bs4.exceptions import (
     FeatureNotFound,
     ParserRejectedMarkup,
     StopParsing,
+    XPathError,
 )
 from bs4._warnings import (
     AttributeResemblesVariableWarning,
@@ -192,6 +224,10 @@ class BeautifulSoup(Tag):
     preserve_whitespace_tag_stack: List[Tag]  #: :meta private:
     string_container_stack: List[Tag]  #: :meta private:
     _most_recent_element: Optional[PageElement]  #: :meta private:
+    _from_encoding: Optional[_Encoding]  #: :meta private:
+    _exclude_encodings: Optional[_Encodings]  #: :meta private:
+    _incremental_dammit: Optional[IncrementalUnicodeDammit]  #: :meta private:
+    _builder_is_fed: bool  #: :meta private:
 
     #: Beautiful Soup's best guess as to the character encoding of the
     #: original document.
@@ -208,6 +244,13 @@ class BeautifulSoup(Tag):
     #: could not be represented in Unicode.
     contains_replacement_characters: bool
 
+    #: Whether a `bs4.index.TreeIndex` is kept for this document.
+    indexed: bool = False
+
+    #: Whether `Tag.get_text` and `Tag.strings` cache their results
+    #: for this document.
+    cache_text: bool = False
+
     def __init__(
         self,
         markup: _IncomingMarkup = "",
@@ -218,12 +261,21 @@ class BeautifulSoup(Tag):
         from_encoding: Optional[_Encoding] = None,
         exclude_encodings: Optional[_Encodings] = None,
         element_classes: Optional[Dict[Type[PageElement], Type[PageElement]]] = None,
+        encoding_cache: Optional[EncodingCache] = None,
+        encoding_cache_key: Optional[Hashable] = None,
+        indexed: bool = False,
+        cache_text: bool = False,
         **kwargs: Any,
     ):
         """Constructor.
 
         :param markup: A string or a file-like object representing
-         markup to be parsed.
+         markup to be parsed. This may also be a `pathlib.Path` (or
+         other `os.PathLike` object), or a buffer such as a
+         `memoryview` or `mmap.mmap`. If the tree builder supports it
+         (the lxml builders do), files will be memory-mapped and
+         buffers parsed in place, instead of being copied into a
+         bytestring.
 
         :param features: Desirable features of the parser to be
          used. This may be the name of a specific parser ("lxml",
@@ -258,6 +310,31 @@ class BeautifulSoup(Tag):
          built. This is useful for subclassing Tag or NavigableString
          to modify default behavior.
 
+        :param encoding_cache: An `EncodingCache`. If a bytestring is
+         parsed, the encoding that worked for the last similar
+         document is tried first, and the encoding that ends up
+         working for this one is remembered. When the cached
+         encoding works, the document isn't searched for a declared
+         encoding, so `BeautifulSoup.declared_html_encoding` will be
+         None.
+
+        :param encoding_cache_key: Tells ``encoding_cache`` where
+         this document came from, for instance the hostname of the
+         site it was downloaded from.
+
+        :param indexed: If this is True, a `bs4.index.TreeIndex` of
+         the tags in the document, by name, id and class, is built
+         once the document is parsed. `Tag.find_all` and `Tag.find`
+         use it to answer simple queries, such as ``find_all("a")``,
+         ``find(id="x")`` and ``find_all(class_="item")``, without
+         looking at every element in the tree.
+
+        :param cache_text: If this is True, once the document is
+         parsed, the strings and text found by `Tag.strings`,
+         `Tag.get_text` and `Tag.text` are cached on each `Tag`. Asking
+         for the text of a `Tag` again costs nothing until the tree
+         beneath it is modified.
+
         :param kwargs: For backwards compatibility purposes, the
          constructor accepts certain keyword arguments used in
          Beautiful Soup 3. None of these arguments do anything in
@@ -333,12 +410,14 @@ class BeautifulSoup(Tag):
                     UserWarning,
                     stacklevel=3,
                 )
+            # It's going to be checked against a lot of tags.
+            parse_only.compile()
 
         from_encoding = from_encoding or deprecated_argument(
             "fromEncoding", "from_encoding"
         )
 
-        if from_encoding and isinstance(markup, str):
+        if from_encoding and isinstance(markup, str) and markup:
             warnings.warn(
                 "You provided Unicode markup but also provided a value for from_encoding. Your from_encoding will be ignored."
             )
@@ -439,9 +518,26 @@ class BeautifulSoup(Tag):
         self._namespaces = dict()
         self.parse_only = parse_only
         self.replacer = replacer  # NEW Xiyao LI milestone2part3
-
-        if hasattr(markup, "read"):  # It's a file-type object.
-            markup = markup.read()
+        self.indexed = indexed
+        self.cache_text = cache_text
+
+        # Hold on to these in case the document is later fed in
+        # through feed().
+        self._from_encoding = from_encoding
+        self._exclude_encodings = exclude_encodings
+        self._incremental_dammit = None
+        self._builder_is_fed = False
+
+        if isinstance(markup, os.PathLike):
+            with open(markup, "rb") as fh:
+                markup = self._buffer_for_file(fh) or fh.read()
+        elif hasattr(markup, "read"):  # It's a file-type object.
+            markup = self._buffer_for_file(markup) or markup.read()
+        elif isinstance(markup, (bytearray, memoryview, mmap.mmap)):
+            if self.builder.ACCEPTS_BUFFERS:
+                markup = memoryview(markup).cast("B")
+            else:
+                markup = bytes(markup)
         elif not isinstance(markup, (bytes, str)) and not hasattr(markup, "__len__"):
             raise TypeError(
                 f"Incoming markup is of an invalid type: {markup!r}. Markup must be a string, a bytestring, or an open filehandle."
@@ -457,10 +553,27 @@ class BeautifulSoup(Tag):
             if not self._markup_is_url(markup):
                 self._markup_resembles_filename(markup)
 
-        # At this point we know markup is a string or bytestring.  If
-        # it was a file-type object, we've read from it.
+        # At this point we know markup is a string or bytestring (or
+        # a memoryview the tree builder knows how to handle). If it
+        # was a file-type object, we've read from it or mapped it
+        # into memory.
         markup = cast(_RawMarkup, markup)
 
+        # Only a bytestring has an encoding worth remembering.
+        cacheable_markup: Optional[Union[bytes, memoryview]] = None
+        if encoding_cache is not None and isinstance(markup, (bytes, memoryview)):
+            cacheable_markup = markup
+        if (
+            encoding_cache is not None
+            and cacheable_markup is not None
+            and from_encoding is None
+        ):
+            from_encoding = encoding_cache.get(encoding_cache_key, cacheable_markup)
+            if from_encoding is not None and from_encoding in (
+                exclude_encodings or ()
+            ):
+                from_encoding = None
+
         rejections = []
         success = False
         for (
@@ -488,38 +601,84 @@ class BeautifulSoup(Tag):
                 + "\n ".join(other_exceptions)
             )
 
+        if (
+            encoding_cache is not None
+            and cacheable_markup is not None
+            and self.original_encoding is not None
+            and not self.contains_replacement_characters
+        ):
+            encoding_cache.put(
+                encoding_cache_key, cacheable_markup, self.original_encoding
+            )
+
+        if self.indexed:
+            self._index = TreeIndex(self)
+        self._caching_text = self.cache_text
+
         # Clear out the markup and remove the builder's circular
         # reference to this object.
         self.markup = None
         self.builder.soup = None
 
+    def _buffer_for_file(self, fh: Any) -> Optional[memoryview]:
+        """If the tree builder can parse a document straight out of a
+        buffer, memory-map an open binary file instead of reading it
+        into a bytestring.
+
+        :return: A `memoryview` of the rest of the file, or None if
+            the file can't be memory-mapped.
+        """
+        if not self.builder.ACCEPTS_BUFFERS or not isinstance(
+            fh, (io.BufferedReader, io.FileIO)
+        ):
+            return None
+        try:
+            position = fh.tell()
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files and special files can't be memory-mapped.
+            return None
+        return memoryview(mapped)[position:]
+
     def copy_self(self) -> "BeautifulSoup":
         """Create a new BeautifulSoup object with the same TreeBuilder,
         but not associated with any markup.
 
         This is the first step of the deepcopy process.
         """
-        clone = type(self)("", None, self.builder)
+        clone = type(self)(
+            "", None, self.builder, indexed=self.indexed, cache_text=self.cache_text
+        )
 
         # Keep track of the encoding of the original document,
         # since we won't be parsing it again.
         clone.original_encoding = self.original_encoding
         return clone
 
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        # Tag pickles itself with bs4.serialize.dumps; a BeautifulSoup
+        # object uses the default mechanism, which calls __getstate__.
+        return object.__reduce_ex__(self, protocol)
+
     def __getstate__(self) -> Dict[str, Any]:
         # Frequently a tree builder can't be pickled.
         d = dict(self.__dict__)
         if "builder" in d and d["builder"] is not None and not self.builder.picklable:
             d["builder"] = type(self.builder)
-        # Store the contents as a Unicode string.
-        d["contents"] = []
-        d["markup"] = self.decode()
+        # Store the contents in a compact binary format which can be
+        # turned back into a tree without parsing it again.
+        d["markup"] = None
+        d["_serialized_tree"] = serialize._dump_tree(self, False)
+        d["_serialized_tree_byteorder"] = sys.byteorder
 
         # If _most_recent_element is present, it's a Tag object left
         # over from initial parse. It might not be picklable and we
         # don't need it.
         if "_most_recent_element" in d:
             del d["_most_recent_element"]
+
+        # The index is rebuilt when the tree is loaded.
+        d.pop("_index", None)
         return d
 
     def __setstate__(self, state: Dict[str, Any]) -> None:
@@ -533,7 +692,17 @@ class BeautifulSoup(Tag):
             self.builder = HTMLParserTreeBuilder()
         self.builder.soup = self
         self.reset()
-        self._feed()
+        tree = state.pop("_serialized_tree", None)
+        byteorder = state.pop("_serialized_tree_byteorder", sys.byteorder)
+        if tree is None:
+            # This was pickled by an older version of Beautiful Soup,
+            # which stored the document as markup.
+            self._feed()
+        else:
+            serialize._load_tree(tree, byteorder, self, self.builder, type(self))
+        if self.indexed:
+            self._index = TreeIndex(self)
+        self._caching_text = self.cache_text
 
     @classmethod
     @_deprecated(
@@ -660,13 +829,191 @@ class BeautifulSoup(Tag):
 
         if self.markup is not None:
             self.builder.feed(self.markup)
-        # Close out any unfinished strings and close all the open tags.
+        self._close_open_tags()
+
+    def _close_open_tags(self) -> None:
+        """Close out any unfinished strings and close all the open tags."""
         self.endData()
         while (
             self.currentTag is not None and self.currentTag.name != self.ROOT_TAG_NAME
         ):
             self.popTag()
 
+    @classmethod
+    def iterparse(
+        cls,
+        source: Union[str, "os.PathLike[str]", IO[bytes], IO[str]],
+        features: Optional[Union[str, Sequence[str]]] = None,
+        parse_only: Optional[SoupStrainer] = None,
+        from_encoding: Optional[_Encoding] = None,
+        exclude_encodings: Optional[_Encodings] = None,
+        chunk_size: int = 64 * 1024,
+        **kwargs: Any,
+    ) -> Iterator[Tag]:
+        """Parse a document a chunk at a time, yielding each top-level
+        `Tag` as soon as its end tag has been seen.
+
+        Once you're done with a `Tag` (that is, once you ask for the
+        next one), it's extracted from the tree. As long as you don't
+        hold on to it, its memory can be reclaimed, so a huge
+        document can be processed in roughly constant memory.
+
+        This is most useful in conjunction with ``parse_only``. A
+        `SoupStrainer` like ``SoupStrainer("row")`` makes every
+        matching <row> tag a top-level tag, which means each one is
+        yielded as soon as it's complete. Without ``parse_only``,
+        the only top-level tag is generally the document's root
+        element, which won't be yielded until the whole document
+        has been parsed.
+
+        Top-level strings, comments and so on are discarded.
+
+        Only tree builders that implement `TreeBuilder.begin_feed`
+        can be used here; of the built-in tree builders, that's the
+        lxml and html.parser builders.
+
+        :param source: The name of a file, or an open filehandle.
+        :param features: Desirable features of the parser to be used,
+            as with the `BeautifulSoup` constructor.
+        :param parse_only: A `SoupStrainer`. Only parts of the document
+            matching the `SoupStrainer` will be considered.
+        :param from_encoding: The encoding of the document, if known.
+        :param exclude_encodings: Encodings known to be wrong.
+        :param chunk_size: Read this many bytes (or characters) from
+            ``source`` at a time.
+        :param kwargs: Passed into the `BeautifulSoup` constructor,
+            and from there into the `TreeBuilder` constructor.
+
+        :yield: A series of `Tag` objects.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as fh:
+                yield from cls.iterparse(
+                    fh,
+                    features,
+                    parse_only,
+                    from_encoding,
+                    exclude_encodings,
+                    chunk_size,
+                    **kwargs,
+                )
+            return
+
+        soup = cls(
+            "",
+            features,
+            parse_only=parse_only,
+            from_encoding=from_encoding,
+            exclude_encodings=exclude_encodings,
+            **kwargs,
+        )
+        try:
+            data = source.read(chunk_size)
+            while data:
+                soup.feed(data)
+                yield from soup._extract_completed_tags()
+                data = source.read(chunk_size)
+            soup.close()
+            yield from soup._extract_completed_tags()
+        finally:
+            soup.builder.soup = None
+
+    def feed(self, markup: _RawMarkup) -> None:
+        """Parse the next chunk of a document.
+
+        This lets you parse a document as it comes in (over a network
+        connection, say) rather than waiting for the whole thing::
+
+         soup = BeautifulSoup(features="lxml")
+         for chunk in response:
+             soup.feed(chunk)
+         soup.close()
+
+        The first call to feed() throws away anything that was
+        already in the tree. The tree is built as the chunks are
+        parsed, but the document isn't complete until you call
+        `BeautifulSoup.close`.
+
+        Only tree builders that implement `TreeBuilder.begin_feed`
+        can be used this way; of the built-in tree builders, that's
+        the lxml and html.parser builders.
+
+        :param markup: The next chunk of the document. If this is a
+            bytestring, the first few chunks may be held back until
+            there's enough data to guess at the document's encoding.
+        """
+        if self._incremental_dammit is None:
+            self.markup = None
+            self.original_encoding = None
+            self.declared_html_encoding = None
+            self.contains_replacement_characters = False
+            self.reset()
+            self.builder.initialize_soup(self)
+            self._incremental_dammit = IncrementalUnicodeDammit(
+                [self._from_encoding] if self._from_encoding else None,
+                is_html=not self.is_xml,
+                exclude_encodings=self._exclude_encodings,
+            )
+            self._builder_is_fed = False
+        self._feed_chunk(markup)
+
+    def close(self) -> None:
+        """Tell the parser there are no more chunks coming in the
+        document fed in through `BeautifulSoup.feed`.
+
+        Any tags still open at this point are closed.
+        """
+        if self._incremental_dammit is None:
+            # Nothing was ever fed in.
+            return
+        self._feed_chunk(b"", True)
+        self.builder.end_feed()
+        self._close_open_tags()
+        self._incremental_dammit = None
+        self.builder.soup = None
+        if self.indexed:
+            self._index = TreeIndex(self)
+        self._caching_text = self.cache_text
+
+    def _feed_chunk(self, markup: _RawMarkup, final: bool = False) -> None:
+        """Pass a chunk fed into `BeautifulSoup.feed` along to the tree
+        builder, once the document's encoding is known.
+        """
+        dammit = self._incremental_dammit
+        assert dammit is not None
+        if isinstance(markup, bytes):
+            markup = dammit.detect(markup, final)
+            if not markup and not final:
+                return
+        if not self._builder_is_fed:
+            self.original_encoding = dammit.original_encoding
+            self.declared_html_encoding = dammit.declared_html_encoding
+            self.contains_replacement_characters = (
+                dammit.contains_replacement_characters
+            )
+            self.builder.begin_feed(self.original_encoding)
+            self._builder_is_fed = True
+        if markup:
+            self.builder.feed_chunk(markup)
+
+    def _extract_completed_tags(self) -> Iterator[Tag]:
+        """Yield every top-level `Tag` that's been closed, then extract
+        it (and any other completed top-level elements) from the tree.
+
+        Used by `BeautifulSoup.iterparse`.
+        """
+        open_tag = self.tagStack[1] if len(self.tagStack) > 1 else None
+        completed = [x for x in self.contents if x is not open_tag]
+        for element in completed:
+            if isinstance(element, Tag):
+                yield element
+            if not element.decomposed and element.parent is self:
+                element.extract()
+
+        # Whatever is parsed next will go at the end of the tree, and
+        # must not be linked to anything that was just extracted.
+        self._most_recent_element = self._last_descendant()
+
     def reset(self) -> None:
         """Reset this object to a state as though it had never parsed any
         markup.
@@ -674,6 +1021,8 @@ class BeautifulSoup(Tag):
         Tag.__init__(self, self, self.builder, self.ROOT_TAG_NAME)
         self.hidden = True
         self.builder.reset()
+        self._index = None
+        self._caching_text = False
         self.current_data = []
         self.currentTag = None
         self.tagStack = []
@@ -683,6 +1032,21 @@ class BeautifulSoup(Tag):
         self._most_recent_element = None
         self.pushTag(self)
 
+    def reindex(self) -> None:
+        """Rebuild the `bs4.index.TreeIndex` for this document.
+
+        The index notices changes to the tree on its own, with one
+        exception: an attribute value that's a plain list, rather
+        than a `bs4.element.AttributeValueList`, being modified in
+        place. Call this after making a change like that to a
+        document created with ``indexed=True``.
+        """
+        if self._index is None:
+            raise ValueError(
+                "This document isn't indexed. Pass indexed=True into the BeautifulSoup constructor."
+            )
+        self._index.rebuild()
+
     def new_tag(
         self,
         name: str,
@@ -801,8 +1165,10 @@ class BeautifulSoup(Tag):
         # On top of that, we may be inside a tag that needs a special
         # container class.
         if self.string_container_stack and container is NavigableString:
-            container = self.builder.string_containers.get(
-                self.string_container_stack[-1].name, container
+            container = (
+                self.builder.tag_profile(self.string_container_stack[-1].name)
+                .string_container
+                or container
             )
         return container
 
@@ -844,8 +1210,8 @@ class BeautifulSoup(Tag):
             # Nothing to pop. This shouldn't happen.
             return None
         tag = self.tagStack.pop()
-        if tag.name in self.open_tag_counter:
-            self.open_tag_counter[tag.name] -= 1
+        if tag._name in self.open_tag_counter:
+            self.open_tag_counter[tag._name] -= 1
         if (
             self.preserve_whitespace_tag_stack
             and tag == self.preserve_whitespace_tag_stack[-1]
@@ -868,11 +1234,17 @@ class BeautifulSoup(Tag):
             self.currentTag.contents.append(tag)
         self.tagStack.append(tag)
         self.currentTag = self.tagStack[-1]
-        if tag.name != self.ROOT_TAG_NAME:
-            self.open_tag_counter[tag.name] += 1
-        if tag.name in self.builder.preserve_whitespace_tags:
+        name = tag._name
+        if name != self.ROOT_TAG_NAME:
+            self.open_tag_counter[name] += 1
+        profile = tag._profile
+        if profile.name != name:
+            # The tag was renamed after it was created, probably by a
+            # SoupReplacer.
+            profile = self.builder.tag_profile(name)
+        if profile.preserves_whitespace:
             self.preserve_whitespace_tag_stack.append(tag)
-        if tag.name in self.builder.string_containers:
+        if profile.string_container is not None:
             self.string_container_stack.append(tag)
 
     def endData(self, containerClass: Optional[Type[NavigableString]] = None) -> None:
@@ -1028,7 +1400,7 @@ class BeautifulSoup(Tag):
             if not self.open_tag_counter.get(name):
                 break
             t = self.tagStack[i]
-            if name == t.name and nsprefix == t.prefix:
+            if name == t._name and nsprefix == t.prefix:
                 if inclusivePop:
                     most_recently_popped = self.popTag()
                 break
@@ -1041,7 +1413,7 @@ class BeautifulSoup(Tag):
         name: str,
         namespace: Optional[str],
         nsprefix: Optional[str],
-        attrs: _RawAttributeValues,
+        attrs: Union[_RawAttributeValues, _RawAttributePairs],
         sourceline: Optional[int] = None,
         sourcepos: Optional[int] = None,
         namespaces: Optional[Dict[str, str]] = None,
@@ -1060,6 +1432,8 @@ class BeautifulSoup(Tag):
         :param attrs: A dictionary of attribute values. Note that
            attribute values are expected to be simple strings; processing
            of multi-valued attributes such as "class" comes later.
+           This may also be a tuple of (name, value) pairs, which
+           won't be processed at all unless the attributes are used.
         :param sourceline: The line number where this tag was found in its
             source document.
         :param sourcepos: The character position within `sourceline` where this
@@ -1077,12 +1451,14 @@ class BeautifulSoup(Tag):
         # print("Start tag %s: %s" % (name, attrs))
         self.endData()
 
-        if (
-            self.parse_only
-            and len(self.tagStack) <= 1
-            and not self.parse_only.allow_tag_creation(nsprefix, name, attrs)
-        ):
-            return None
+        if self.parse_only and len(self.tagStack) <= 1:
+            if isinstance(attrs, tuple):
+                # The filter needs to see a dictionary.
+                attrs = {
+                    key: ("" if value is None else value) for key, value in attrs
+                }
+            if not self.parse_only.allow_tag_creation(nsprefix, name, attrs):
+                return None
 
         tag_class = self.element_classes.get(Tag, Tag)
         # Assume that this is either Tag or a subclass of Tag. If not,
@@ -1225,6 +1601,363 @@ class BeautifulStoneSoup(BeautifulSoup):
         super(BeautifulStoneSoup, self).__init__(*args, **kwargs)
 
 
+
+def _parse_batch(
+    batch: List[_IncomingMarkup],
+    features: Optional[Union[str, Sequence[str]]],
+    parse_only: Optional[SoupStrainer],
+    extract: Optional[Callable[[BeautifulSoup], Any]],
+    kwargs: Dict[str, Any],
+) -> List[Any]:
+    """Parse a batch of documents on behalf of `parse_many`. This runs
+    in a worker process.
+    """
+    results = []
+    for markup in batch:
+        soup = BeautifulSoup(markup, features, parse_only=parse_only, **kwargs)
+        results.append(soup if extract is None else extract(soup))
+    return results
+
+
+def parse_many(
+    markups: Iterable[_IncomingMarkup],
+    features: Optional[Union[str, Sequence[str]]] = None,
+    parse_only: Optional[SoupStrainer] = None,
+    extract: Optional[Callable[[BeautifulSoup], Any]] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+    ordered: bool = True,
+    max_pending: Optional[int] = None,
+    **kwargs: Any,
+) -> Iterator[Any]:
+    """Parse a lot of documents at once, using a pool of worker
+    processes so that the work isn't limited by the global
+    interpreter lock.
+
+    Each document is parsed in a worker process with
+    ``BeautifulSoup(markup, features, parse_only=parse_only, **kwargs)``.
+    If you supply an ``extract`` function, it's called on the
+    `BeautifulSoup` object in the worker process, and only its return
+    value is sent back. This is usually much faster than sending back
+    the whole parse tree, which is what happens otherwise.
+
+    Documents are read from ``markups`` only as fast as the workers can
+    keep up, so ``markups`` can be an arbitrarily long iterator.
+
+    :param markups: The documents to parse. Each one can be anything
+        the `BeautifulSoup` constructor accepts, so long as it can be
+        pickled: a string, a bytestring, or the path to a file.
+    :param features: Passed into the `BeautifulSoup` constructor.
+    :param parse_only: Passed into the `BeautifulSoup` constructor.
+    :param extract: A function that takes a `BeautifulSoup` object
+        and returns whatever you actually want from the document. It
+        must be possible to pickle both this function and its return
+        value, so it can't be a lambda. Don't return a `PageElement`
+        such as ``soup.title.string``: it's connected to the rest of
+        the parse tree, which would be pickled along with it. Convert
+        it into a plain string first.
+    :param workers: The number of worker processes. The default is
+        the number of CPUs. If this is 0, documents are parsed in
+        this process, one at a time.
+    :param chunksize: The number of documents to send to a worker
+        process at once. Raising this reduces overhead when the
+        documents are small.
+    :param ordered: If True (the default), results are yielded in
+        the same order as ``markups``. If False, results are yielded
+        as soon as they're ready.
+    :param max_pending: The largest number of chunks that can be
+        waiting to be parsed, or waiting to be picked up, at any one
+        time. The default is twice the number of workers.
+    :param kwargs: Passed into the `BeautifulSoup` constructor.
+    :yield: For each document, the return value of ``extract``, or
+        the `BeautifulSoup` object itself if there's no ``extract``.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be at least 1.")
+    batches = _batched(markups, chunksize)
+    if workers == 0:
+        for batch in batches:
+            yield from _parse_batch(batch, features, parse_only, extract, kwargs)
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = workers * 2
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending: Deque[Future[List[Any]]] = deque()
+    try:
+        for batch in batches:
+            pending.append(
+                executor.submit(
+                    _parse_batch, batch, features, parse_only, extract, kwargs
+                )
+            )
+            while len(pending) >= max_pending:
+                yield from _next_finished_batch(pending, ordered)
+        while pending:
+            yield from _next_finished_batch(pending, ordered)
+    finally:
+        # If the caller stopped early, don't parse the batches that
+        # haven't been started yet. (shutdown() can only do this
+        # itself as of Python 3.9.)
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def _batched(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Split an iterable into lists of ``size`` items each, except
+    (possibly) the last one.
+    """
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _next_finished_batch(
+    pending: "Deque[Future[List[Any]]]", ordered: bool
+) -> List[Any]:
+    """Wait for one of the batches submitted by `parse_many`, remove
+    it from ``pending``, and return its results.
+
+    :param ordered: If True, wait for the oldest batch. Otherwise,
+        wait for whichever batch finishes first.
+    """
+    if ordered:
+        future = pending.popleft()
+    else:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        future = done.pop()
+        pending.remove(future)
+    return future.result()
+
+
+def parse_records(
+    markup: Union[_RawMarkup, "os.PathLike[str]", IO[bytes]],
+    features: Optional[Union[str, Sequence[str]]] = "xml",
+    extract: Optional[Callable[[Tag], Any]] = None,
+    workers: Optional[int] = None,
+    records_per_chunk: int = 1000,
+    ordered: bool = True,
+    max_pending: Optional[int] = None,
+    **kwargs: Any,
+) -> Iterator[Any]:
+    """Parse a large XML document that consists of a root element
+    containing a lot of independent records, using a pool of worker
+    processes.
+
+    This is meant for data dumps like this one, where each record can
+    be parsed without knowing anything about the others::
+
+     <?xml version="1.0" encoding="utf-8"?>
+     <posts>
+       <row Id="1" Title="..."/>
+       <row Id="2" Title="..."/>
+       ...
+     </posts>
+
+    The document is scanned (without being parsed) for the
+    boundaries between the children of the root element, and
+    ``records_per_chunk`` records at a time are sent to `parse_many`.
+    Each chunk is parsed as a document of its own, made up of
+    everything that came before the root element's children (so the
+    XML declaration, the doctype and any namespace prefixes defined on
+    the root element still apply), the records themselves, and the
+    root element's end tag.
+
+    The scanner only understands XML, and it has to be able to find
+    the characters ``<`` and ``>`` in the raw bytes, so the document
+    must be in an ASCII-compatible encoding or start with a byte-order
+    mark.
+
+    :param markup: The document. This can be a string, a bytestring,
+        a buffer such as an `mmap.mmap`, an open binary file, or the
+        path to a file. A file is memory-mapped if possible.
+    :param features: Passed into the `BeautifulSoup` constructor.
+    :param extract: A function that takes a single record (a `Tag`)
+        and returns whatever you actually want from it. The same
+        restrictions apply as for the ``extract`` argument to
+        `parse_many`.
+    :param workers: The number of worker processes. The default is
+        the number of CPUs. If this is 0, records are parsed in this
+        process.
+    :param records_per_chunk: The number of records to send to a
+        worker process at once.
+    :param ordered: If True (the default), records are yielded in
+        document order. If False, each chunk of records is yielded as
+        soon as it's ready.
+    :param max_pending: Passed into `parse_many`.
+    :param kwargs: Passed into the `BeautifulSoup` constructor.
+    :yield: For each record, the return value of ``extract``, or the
+        record itself (a `Tag` that's not part of any larger tree) if
+        there's no ``extract``.
+    """
+    if records_per_chunk < 1:
+        raise ValueError("records_per_chunk must be at least 1.")
+    source: Union[_RawMarkup, mmap.mmap]
+    if isinstance(markup, os.PathLike):
+        with open(markup, "rb") as fh:
+            source = _map_file(fh)
+    elif hasattr(markup, "read"):
+        source = _map_file(markup)
+    else:
+        source = cast(_RawMarkup, markup)
+    data, from_encoding = _ascii_compatible(source)
+    if from_encoding is not None:
+        kwargs.setdefault("from_encoding", from_encoding)
+
+    chunks = _record_chunks(data, records_per_chunk)
+    for records in parse_many(
+        chunks,
+        features,
+        extract=_RecordExtractor(extract),
+        workers=workers,
+        ordered=ordered,
+        max_pending=max_pending,
+        **kwargs,
+    ):
+        yield from records
+
+
+def _map_file(fh: Any) -> Union[bytes, mmap.mmap]:
+    """Memory-map an open binary file on behalf of `parse_records`, or
+    read it if it can't be mapped.
+    """
+    if isinstance(fh, (io.BufferedReader, io.FileIO)) and fh.tell() == 0:
+        try:
+            return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            # Empty files and special files can't be memory-mapped.
+            pass
+    return fh.read()
+
+
+def _ascii_compatible(
+    data: Union[_RawMarkup, mmap.mmap],
+) -> Tuple[Union[bytes, bytearray, memoryview, mmap.mmap], Optional[str]]:
+    """Make sure `parse_records` can look for markup in a document by
+    looking at its bytes.
+
+    :return: A 2-tuple (data, encoding). If the encoding is not None,
+        the document has been converted to that encoding and the
+        tree builder needs to be told about it.
+    """
+    if isinstance(data, str):
+        return data.encode("utf-8"), "utf-8"
+    stripped, encoding = EncodingDetector.strip_byte_order_mark(bytes(data[:4]))
+    if encoding is None:
+        return data, None
+    bom_length = 4 - len(stripped)
+    if encoding == "utf-8":
+        return memoryview(data)[bom_length:], encoding
+    return bytes(data[bom_length:]).decode(encoding).encode("utf-8"), "utf-8"
+
+
+# Matches one piece of XML markup, so that _record_chunks can keep
+# track of how deeply nested it is. A start or end tag has a "name"
+# group; an end tag also has an "end" group, and an empty-element
+# tag has an "empty" group.
+_XML_MARKUP = re.compile(
+    rb"<(?:"
+    rb"!--.*?--"  # A comment.
+    rb"|!\[CDATA\[.*?\]\]"  # A CDATA section.
+    rb"|\?.*?\?"  # A processing instruction or the XML declaration.
+    rb"|![^\[>]*(?:\[.*?\]\s*)?"  # A doctype, maybe with an internal subset.
+    rb"|(?P<end>/)?(?P<name>[^\s/>]+)"  # A start or end tag...
+    rb"[^>\"'/]*(?:(?:\"[^\"]*\"|'[^']*'|/(?!>))[^>\"'/]*)*"  # ...attributes...
+    rb"(?P<empty>/)?"  # ...and maybe a slash.
+    rb")>",
+    re.S,
+)
+
+
+def _record_chunks(
+    data: Union[bytes, bytearray, memoryview, mmap.mmap], records_per_chunk: int
+) -> Iterator[bytes]:
+    """Split a document into smaller documents on behalf of
+    `parse_records`.
+
+    :yield: A series of bytestrings, each a well-formed document
+        containing up to ``records_per_chunk`` of the original
+        document's records.
+    """
+    prolog = b""
+    epilog = b""
+    depth = 0
+    records = 0
+    chunk_start = 0
+    for match in _XML_MARKUP.finditer(data):
+        name = match.group("name")
+        if name is None:
+            continue
+        if match.group("end") is not None:
+            depth -= 1
+            if depth == 0:
+                # The root element is closed; that's the end of the
+                # records.
+                if records:
+                    yield prolog + bytes(data[chunk_start : match.start()]) + epilog
+                return
+        elif match.group("empty") is None:
+            depth += 1
+            if depth == 1:
+                # This is the root element. Every chunk will need
+                # everything up to this point.
+                prolog = bytes(data[: match.end()])
+                epilog = b"</" + name + b">"
+                chunk_start = match.end()
+            continue
+        elif depth == 0:
+            # The root element is empty, so there are no records.
+            return
+        if depth == 1:
+            records += 1
+            if records == records_per_chunk:
+                yield prolog + bytes(data[chunk_start : match.end()]) + epilog
+                chunk_start = match.end()
+                records = 0
+    if records:
+        # The document was cut off before the root element was
+        # closed. Let the parser deal with whatever records there are.
+        yield prolog + bytes(data[chunk_start:]) + epilog
+
+
+class _RecordExtractor(object):
+    """The ``extract`` function `parse_records` passes into
+    `parse_many`. It finds the records in one chunk of the document.
+
+    :param extract: The ``extract`` function passed into
+        `parse_records`, to be called on each record.
+    """
+
+    def __init__(self, extract: Optional[Callable[[Tag], Any]]):
+        self.extract = extract
+
+    def __call__(self, soup: BeautifulSoup) -> List[Any]:
+        root = soup.find(True, recursive=False)
+        if not isinstance(root, Tag):
+            return []
+        if self.extract is not None:
+            return [
+                self.extract(record)
+                for record in root.contents
+                if isinstance(record, Tag)
+            ]
+        records = []
+        # Working backwards means each record is at the end of
+        # root.contents when it's removed.
+        for index in range(len(root.contents) - 1, -1, -1):
+            record = root.contents[index]
+            if isinstance(record, Tag):
+                records.append(record.extract(_self_index=index))
+        records.reverse()
+        return records
+
+
 # If this file is run as a script, act as an HTML pretty-printer.
 if __name__ == "__main__":
     import sys
@@ -13,6 +13,8 @@
 #   but it's removed in 3.12, so to support the widest possible set of
 #   versions I'm not using it.
 
+import mmap
+import os
 from typing_extensions import (
     runtime_checkable,
     Protocol,
@@ -24,16 +26,19 @@ from typing import (
     Dict,
     IO,
     Iterable,
+    List,
     Mapping,
     Optional,
     Pattern,
     TYPE_CHECKING,
+    Tuple,
     Union,
 )
 
 if TYPE_CHECKING:
     from bs4.element import (
         AttributeValueList,
+        LazyResultSet,
         NamespacedAttribute,
         NavigableString,
         PageElement,
@@ -59,8 +64,11 @@ class _RegularExpressionProtocol(Protocol):
 
 # Aliases for markup in various stages of processing.
 #
-#: The rawest form of markup: either a string, bytestring, or an open filehandle.
-_IncomingMarkup: TypeAlias = Union[str, bytes, IO[str], IO[bytes]]
+#: The rawest form of markup: either a string, bytestring, an open
+#: filehandle, the path to a file, or a buffer containing a document.
+_IncomingMarkup: TypeAlias = Union[
+    str, bytes, IO[str], IO[bytes], "os.PathLike[str]", memoryview, mmap.mmap
+]
 
 #: Markup that is in memory but has (potentially) yet to be converted
 #: to Unicode.
@@ -105,6 +113,12 @@ _RawAttributeValues: TypeAlias = (
     "Mapping[Union[str, NamespacedAttribute], _RawAttributeValue]"
 )
 
+#: The attributes of a tag as a `TreeBuilder` may pass them along
+#: before any processing has been done: a tuple of (name, value) pairs,
+#: in which a value of None means the attribute had no value. A `Tag`
+#: only turns these into a dictionary if its attributes are used.
+_RawAttributePairs: TypeAlias = Tuple[Tuple[str, Optional[_RawAttributeValue]], ...]
+
 #: An attribute value in its final form, as stored in the
 # `Tag` class, after it has been processed and (in some cases)
 # split into a list of strings.
@@ -194,3 +208,9 @@ _StrainableAttributes: TypeAlias = Dict[str, _StrainableAttribute]
 _OneElement: TypeAlias = Union["PageElement", "Tag", "NavigableString"]
 _AtMostOneElement: TypeAlias = Optional[_OneElement]
 _QueryResults: TypeAlias = "ResultSet[_OneElement]"
+_LazyQueryResults: TypeAlias = "LazyResultSet[_OneElement]"
+
+#: The result of evaluating an XPath expression: a list of nodes
+#: (with attributes represented by their values), or a string, number
+#: or boolean.
+_XPathResult: TypeAlias = Union[List[Union["PageElement", str]], str, float, bool]
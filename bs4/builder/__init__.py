@@ -30,6 +30,7 @@ from bs4.element import (
     RubyTextString,
     Stylesheet,
     Script,
+    TagProfile,
     TemplateString,
     nonwhitespace_re,
 )
@@ -239,6 +240,7 @@ class TreeBuilder(object):
         self.string_containers = string_containers
         self.attribute_dict_class = attribute_dict_class
         self.attribute_value_list_class = attribute_value_list_class
+        self._tag_profiles = {}
 
     NAME: str = "[Unknown tree builder]"
     ALTERNATE_NAMES: Iterable[str] = []
@@ -256,6 +258,7 @@ class TreeBuilder(object):
     preserve_whitespace_tags: Set[str]  #: :meta private:
     string_containers: Dict[str, Type[NavigableString]]  #: :meta private:
     tracks_line_numbers: bool  #: :meta private:
+    _tag_profiles: Dict[str, TagProfile]  #: :meta private:
 
     #: A value for these tag/attribute combinations is a space- or
     #: comma-separated list of CDATA, rather than a single CDATA.
@@ -277,6 +280,11 @@ class TreeBuilder(object):
     #: Most parsers don't keep track of line numbers.
     TRACKS_LINE_NUMBERS: bool = False
 
+    #: Can this tree builder parse a document straight out of a
+    #: `memoryview`, such as a view of a memory-mapped file? If not,
+    #: the document will be copied into a bytestring first.
+    ACCEPTS_BUFFERS: bool = False
+
     def initialize_soup(self, soup: BeautifulSoup) -> None:
         """The BeautifulSoup object has been initialized and is now
         being associated with the TreeBuilder.
@@ -316,10 +324,55 @@ class TreeBuilder(object):
             return True
         return tag_name in self.empty_element_tags
 
+    def tag_profile(self, tag_name: str) -> TagProfile:
+        """Find out everything this TreeBuilder has to say about tags
+        with a certain name.
+
+        The answer is worked out the first time a name is seen, and the
+        same `TagProfile` is returned for every tag with that name
+        from then on. This means a subclass's `can_be_empty_element`
+        must depend only on the tag name.
+
+        :param tag_name: The name of a markup tag.
+        """
+        profile = self._tag_profiles.get(tag_name)
+        if profile is None:
+            profile = TagProfile.from_builder(self, tag_name)
+            self._tag_profiles[tag_name] = profile
+        return profile
+
     def feed(self, markup: _RawMarkup) -> None:
         """Run incoming markup through some parsing process."""
         raise NotImplementedError()
 
+    def begin_feed(self, encoding: Optional[_Encoding] = None) -> None:
+        """Get ready to receive a document one chunk at a time, through
+        `TreeBuilder.feed_chunk`, instead of all at once through
+        `TreeBuilder.feed`.
+
+        Tree builders that can't parse a document incrementally
+        don't need to implement this method.
+
+        :param encoding: The encoding of any bytestring chunks, if known.
+        """
+        raise NotImplementedError(
+            f"The {self.NAME} tree builder can't parse a document incrementally."
+        )
+
+    def feed_chunk(self, chunk: _RawMarkup) -> None:
+        """Run the next chunk of a document through the parser.
+
+        Any parse events made possible by this chunk are delivered
+        to the `BeautifulSoup` object before this method returns.
+
+        :param chunk: A string or bytestring.
+        """
+        raise NotImplementedError()
+
+    def end_feed(self) -> None:
+        """Tell the parser that there are no more chunks in the document."""
+        raise NotImplementedError()
+
     def prepare_markup(
         self,
         markup: _RawMarkup,
@@ -652,7 +705,7 @@ class HTMLTreeBuilder(TreeBuilder):
         :meta private:
         """
         # We are only interested in <meta> tags
-        if tag.name != "meta":
+        if tag._name != "meta":
             return False
 
         # TODO: This cast will fail in the (very unlikely) scenario
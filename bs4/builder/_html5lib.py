@@ -10,16 +10,17 @@ from typing import (
     cast,
     Dict,
     Iterable,
+    Iterator,
+    List,
     Optional,
     Sequence,
     TYPE_CHECKING,
     Tuple,
+    Type,
     Union,
 )
 from typing_extensions import TypeAlias
 from bs4._typing import (
-    _AttributeValue,
-    _AttributeValues,
     _Encoding,
     _Encodings,
     _NamespaceURL,
@@ -36,8 +37,6 @@ from bs4.builder import (
 )
 from bs4.element import (
     NamespacedAttribute,
-    PageElement,
-    nonwhitespace_re,
 )
 import html5lib
 from html5lib.constants import (
@@ -47,7 +46,6 @@ from bs4.element import (
     Comment,
     Doctype,
     NavigableString,
-    Tag,
 )
 
 if TYPE_CHECKING:
@@ -55,22 +53,24 @@ if TYPE_CHECKING:
 
 from html5lib.treebuilders import base as treebuilder_base
 
+# An html5lib attribute name may either be a single string,
+# or a tuple (namespace, name).
+_Html5libAttributeName: TypeAlias = Union[str, Tuple[str, str]]
+# Now we can define the type of the attributes dictionary html5lib
+# gives to an element: those attribute names mapped to single string
+# values.
+_Html5libAttributes: TypeAlias = Dict[_Html5libAttributeName, str]
+
 
 class HTML5TreeBuilder(HTMLTreeBuilder):
     """Use `html5lib <https://github.com/html5lib/html5lib-python>`_ to
     build a tree.
 
-    Note that `HTML5TreeBuilder` does not support some common HTML
-    `TreeBuilder` features. Some of these features could theoretically
-    be implemented, but at the very least it's quite difficult,
-    because html5lib moves the parse tree around as it's being built.
-
-    Specifically:
-
-    * This `TreeBuilder` doesn't use different subclasses of
-      `NavigableString` (e.g. `Script`) based on the name of the tag
-      in which the string was found.
-    * You can't use a `SoupStrainer` to parse only part of a document.
+    Note that `HTML5TreeBuilder` does not support one common HTML
+    `TreeBuilder` feature: you can't use a `SoupStrainer` to parse
+    only part of a document. html5lib moves the parse tree around as
+    it's being built, so it can't tell whether a tag will be wanted
+    until the whole document has been parsed.
     """
 
     NAME: str = "html5lib"
@@ -172,8 +172,20 @@ class HTML5TreeBuilder(HTMLTreeBuilder):
 
 
 class TreeBuilderForHtml5lib(treebuilder_base.TreeBuilder):
+    """The html5lib 'TreeBuilder' that builds a Beautiful Soup parse tree.
+
+    html5lib moves nodes around as it parses, so while it's working
+    it gets a lightweight tree of `Element` and `TextNode` objects in
+    which moving nodes is cheap. Once the document has been parsed,
+    that tree is turned into `Tag` and `NavigableString` objects in a
+    single pass, through the same `BeautifulSoup.handle_starttag` and
+    `BeautifulSoup.object_was_parsed` methods the other tree builders
+    use.
+    """
+
     soup: "BeautifulSoup"  #: :meta private:
     parser: Optional[html5lib.HTMLParser]  #: :meta private:
+    document: "Element"  #: :meta private:
 
     def __init__(
         self,
@@ -210,7 +222,7 @@ class TreeBuilderForHtml5lib(treebuilder_base.TreeBuilder):
 
     def documentClass(self) -> "Element":
         self.soup.reset()
-        return Element(self.soup, self.soup, None)
+        return Element(self.soup.ROOT_TAG_NAME, None)
 
     def insertDoctype(self, token: Dict[str, Any]) -> None:
         name: str = cast(str, token["name"])
@@ -218,27 +230,27 @@ class TreeBuilderForHtml5lib(treebuilder_base.TreeBuilder):
         systemId: Optional[str] = cast(Optional[str], token["systemId"])
 
         doctype = Doctype.for_name_and_ids(name, publicId, systemId)
-        self.soup.object_was_parsed(doctype)
+        self.document.appendChild(doctype)
 
     def elementClass(self, name: str, namespace: str) -> "Element":
-        sourceline: Optional[int] = None
-        sourcepos: Optional[int] = None
+        element = Element(name, namespace)
         if self.parser is not None and self.store_line_numbers:
             # This represents the point immediately after the end of the
             # tag. We don't know when the tag started, but we do know
             # where it ended -- the character just before this one.
             sourceline, sourcepos = self.parser.tokenizer.stream.position()
             assert sourcepos is not None
-            sourcepos = sourcepos - 1
-        tag = self.soup.new_tag(
-            name, namespace, sourceline=sourceline, sourcepos=sourcepos
+            element.sourceline = sourceline
+            element.sourcepos = sourcepos - 1
+        return element
+
+    def commentClass(self, data: str) -> Comment:
+        # A Comment never has to be merged with anything, so there's
+        # no need to wrap it in a node.
+        return cast(Type[Comment], self.soup.element_classes.get(Comment, Comment))(
+            data
         )
 
-        return Element(tag, self.soup, namespace)
-
-    def commentClass(self, data: str) -> "TextNode":
-        return TextNode(Comment(data), self.soup)
-
     def fragmentClass(self) -> "Element":
         """This is only used by html5lib HTMLParser.parseFragment(),
         which is never used by Beautiful Soup, only by the html5lib
@@ -254,17 +266,82 @@ class TreeBuilderForHtml5lib(treebuilder_base.TreeBuilder):
         """
         raise NotImplementedError()
 
-    def appendChild(self, node: "Element") -> None:
+    def appendChild(self, node: "_Html5libNode") -> None:
         # TODO: This code is not covered by the BS4 tests, and
         # apparently not triggered by the html5lib test suite either.
         # But it doesn't seem test-specific and there are calls to it
         # (or a method with the same name) all over html5lib, so I'm
         # leaving the implementation in place rather than replacing it
         # with NotImplementedError()
-        self.soup.append(node.element)
+        self.document.appendChild(node)
 
     def getDocument(self) -> "BeautifulSoup":
-        return self.soup
+        """Called by html5lib once the document has been parsed. Turns
+        the finished tree into a Beautiful Soup parse tree.
+        """
+        soup = self.soup
+        # html5lib doesn't support parse_only, and the whole document
+        # has to end up in the tree.
+        parse_only = soup.parse_only
+        soup.parse_only = None
+        try:
+            self._build(self.document)
+        finally:
+            soup.parse_only = parse_only
+        return soup
+
+    def _build(self, document: "Element") -> None:
+        """Create the `Tag` and `NavigableString` objects for everything
+        under the document node.
+        """
+        soup = self.soup
+        string_class = cast(
+            Type[NavigableString],
+            soup.element_classes.get(NavigableString, NavigableString),
+        )
+        iterators: List[Iterator[_Html5libNode]] = [iter(document.childNodes)]
+        while iterators:
+            for node in iterators[-1]:
+                if isinstance(node, Element):
+                    attrs: Any = node.attributes
+                    if attrs:
+                        attrs = tuple(
+                            [
+                                (
+                                    (
+                                        NamespacedAttribute(*key)
+                                        if isinstance(key, tuple)
+                                        else key
+                                    ),
+                                    value,
+                                )
+                                for key, value in attrs.items()
+                            ]
+                        )
+                    else:
+                        attrs = None
+                    soup.handle_starttag(
+                        node.name,
+                        node.namespace,
+                        None,
+                        attrs,
+                        sourceline=node.sourceline,
+                        sourcepos=node.sourcepos,
+                    )
+                    iterators.append(iter(node.childNodes))
+                    break
+                elif isinstance(node, TextNode):
+                    container = string_class
+                    if soup.string_container_stack:
+                        container = soup.string_container(container)
+                    soup.object_was_parsed(container("".join(node.parts)))
+                else:
+                    soup.object_was_parsed(node)
+            else:
+                # That's everything inside this node.
+                iterators.pop()
+                if iterators:
+                    soup.popTag()
 
     def testSerializer(self, element: "Element") -> str:
         """This is only used by the html5lib unit tests. Since we
@@ -274,306 +351,97 @@ class TreeBuilderForHtml5lib(treebuilder_base.TreeBuilder):
         raise NotImplementedError()
 
 
-class AttrList(object):
-    """Represents a Tag's attributes in a way compatible with html5lib."""
-
-    element: Tag
-    attrs: _AttributeValues
-
-    def __init__(self, element: Tag):
-        self.element = element
-        self.attrs = dict(self.element.attrs)
-
-    def __iter__(self) -> Iterable[Tuple[str, _AttributeValue]]:
-        return list(self.attrs.items()).__iter__()
-
-    def __setitem__(self, name: str, value: _AttributeValue) -> None:
-        # If this attribute is a multi-valued attribute for this element,
-        # turn its value into a list.
-        list_attr = self.element.cdata_list_attributes or {}
-        if name in list_attr.get("*", []) or (
-            self.element.name in list_attr
-            and name in list_attr.get(self.element.name, [])
-        ):
-            # A node that is being cloned may have already undergone
-            # this procedure. Check for this and skip it.
-            if not isinstance(value, list):
-                assert isinstance(value, str)
-                value = self.element.attribute_value_list_class(
-                    nonwhitespace_re.findall(value)
-                )
-        self.element[name] = value
-
-    def items(self) -> Iterable[Tuple[str, _AttributeValue]]:
-        return list(self.attrs.items())
-
-    def keys(self) -> Iterable[str]:
-        return list(self.attrs.keys())
-
-    def __len__(self) -> int:
-        return len(self.attrs)
-
-    def __getitem__(self, name: str) -> _AttributeValue:
-        return self.attrs[name]
-
-    def __contains__(self, name: str) -> bool:
-        return name in list(self.attrs.keys())
-
-
-class BeautifulSoupNode(treebuilder_base.Node):
-    element: PageElement
-    soup: "BeautifulSoup"
-    namespace: Optional[_NamespaceURL]
-
-    @property
-    def nodeType(self) -> int:
-        """Return the html5lib constant corresponding to the type of
-        the underlying DOM object.
-
-        NOTE: This property is only accessed by the html5lib test
-        suite, not by Beautiful Soup proper.
-        """
-        raise NotImplementedError()
-
-    # TODO-TYPING: typeshed stubs are incorrect about this;
-    # cloneNode returns a new Node, not None.
-    def cloneNode(self) -> treebuilder_base.Node:
-        raise NotImplementedError()
-
+class Element(treebuilder_base.Node):
+    """A tag in the tree html5lib works on while it's parsing. It
+    becomes a `Tag` once parsing is done.
+    """
 
-class Element(BeautifulSoupNode):
-    element: Tag
+    name: str
     namespace: Optional[_NamespaceURL]
-
-    def __init__(
-        self, element: Tag, soup: "BeautifulSoup", namespace: Optional[_NamespaceURL]
-    ):
-        treebuilder_base.Node.__init__(self, element.name)
-        self.element = element
-        self.soup = soup
+    parent: Optional["Element"]
+    attributes: _Html5libAttributes
+    childNodes: List["_Html5libNode"]
+    sourceline: Optional[int]
+    sourcepos: Optional[int]
+
+    def __init__(self, name: str, namespace: Optional[_NamespaceURL]):
+        # The superclass constructor sets up some attributes Beautiful
+        # Soup doesn't use, so it's not called.
+        self.name = name
         self.namespace = namespace
-
-    def appendChild(self, node: "BeautifulSoupNode") -> None:
-        string_child: Optional[NavigableString] = None
-        child: PageElement
-        if type(node.element) is NavigableString:
-            string_child = child = node.element
-        else:
-            child = node.element
-        node.parent = self
-
-        if (
-            child is not None
-            and child.parent is not None
-            and not isinstance(child, str)
-        ):
-            node.element.extract()
-
+        self.parent = None
+        self.attributes = {}
+        self.childNodes = []
+        self.sourceline = None
+        self.sourcepos = None
+
+    def appendChild(self, node: "_Html5libNode") -> None:
+        _detach(node)
+        children = self.childNodes
         if (
-            string_child is not None
-            and self.element.contents
-            and type(self.element.contents[-1]) is NavigableString
+            isinstance(node, TextNode)
+            and children
+            and isinstance(children[-1], TextNode)
         ):
             # We are appending a string onto another string.
-            # TODO This has O(n^2) performance, for input like
-            # "a</a>a</a>a</a>..."
-            old_element = self.element.contents[-1]
-            new_element = self.soup.new_string(old_element + string_child)
-            old_element.replace_with(new_element)
-            self.soup._most_recent_element = new_element
+            children[-1].parts.extend(node.parts)
         else:
-            if isinstance(node, str):
-                # Create a brand new NavigableString from this string.
-                child = self.soup.new_string(node)
-
-            # Tell Beautiful Soup to act as if it parsed this element
-            # immediately after the parent's last descendant. (Or
-            # immediately after the parent, if it has no children.)
-            if self.element.contents:
-                most_recent_element = self.element._last_descendant(False)
-            elif self.element.next_element is not None:
-                # Something from further ahead in the parse tree is
-                # being inserted into this earlier element. This is
-                # very annoying because it means an expensive search
-                # for the last element in the tree.
-                most_recent_element = self.soup._last_descendant()
-            else:
-                most_recent_element = self.element
-
-            self.soup.object_was_parsed(
-                child, parent=self.element, most_recent_element=most_recent_element
-            )
-
-    def getAttributes(self) -> AttrList:
-        if isinstance(self.element, Comment):
-            return {}
-        return AttrList(self.element)
-
-    # An HTML5lib attribute name may either be a single string,
-    # or a tuple (namespace, name).
-    _Html5libAttributeName: TypeAlias = Union[str, Tuple[str, str]]
-    # Now we can define the type this method accepts as a dictionary
-    # mapping those attribute names to single string values.
-    _Html5libAttributes: TypeAlias = Dict[_Html5libAttributeName, str]
-
-    def setAttributes(self, attributes: Optional[_Html5libAttributes]) -> None:
-        if attributes is not None and len(attributes) > 0:
-            # Replace any namespaced attributes with
-            # NamespacedAttribute objects.
-            for name, value in list(attributes.items()):
-                if isinstance(name, tuple):
-                    new_name = NamespacedAttribute(*name)
-                    del attributes[name]
-                    attributes[new_name] = value
-
-            # We can now cast attributes to the type of Dict
-            # used by Beautiful Soup.
-            normalized_attributes = cast(_AttributeValues, attributes)
-
-            # Values for tags like 'class' came in as single strings;
-            # replace them with lists of strings as appropriate.
-            self.soup.builder._replace_cdata_list_attribute_values(
-                self.name, normalized_attributes
-            )
-
-            # Then set the attributes on the Tag associated with this
-            # BeautifulSoupNode.
-            for name, value_or_values in list(normalized_attributes.items()):
-                self.element[name] = value_or_values
-
-            # The attributes may contain variables that need substitution.
-            # Call set_up_substitutions manually.
-            #
-            # The Tag constructor called this method when the Tag was created,
-            # but we just set/changed the attributes, so call it again.
-            self.soup.builder.set_up_substitutions(self.element)
-
-    attributes = property(getAttributes, setAttributes)
+            node.parent = self
+            children.append(node)
 
     def insertText(
-        self, data: str, insertBefore: Optional["BeautifulSoupNode"] = None
+        self, data: str, insertBefore: Optional["_Html5libNode"] = None
     ) -> None:
-        text = TextNode(self.soup.new_string(data), self.soup)
-        if insertBefore:
-            self.insertBefore(text, insertBefore)
+        children = self.childNodes
+        if insertBefore is None:
+            index = len(children)
         else:
-            self.appendChild(text)
-
-    def insertBefore(
-        self, node: "BeautifulSoupNode", refNode: "BeautifulSoupNode"
-    ) -> None:
-        index = self.element.index(refNode.element)
+            index = children.index(insertBefore)
+        if index > 0 and isinstance(children[index - 1], TextNode):
+            # Strings aren't joined together until parsing is done, so
+            # this doesn't get slower as the string gets longer.
+            cast(TextNode, children[index - 1]).parts.append(data)
+        else:
+            text = TextNode(data)
+            text.parent = self
+            children.insert(index, text)
+
+    def insertBefore(self, node: "_Html5libNode", refNode: "_Html5libNode") -> None:
+        _detach(node)
+        children = self.childNodes
+        index = children.index(refNode)
         if (
-            type(node.element) is NavigableString
-            and self.element.contents
-            and type(self.element.contents[index - 1]) is NavigableString
+            isinstance(node, TextNode)
+            and index > 0
+            and isinstance(children[index - 1], TextNode)
         ):
-            # (See comments in appendChild)
-            old_node = self.element.contents[index - 1]
-            assert type(old_node) is NavigableString
-            new_str = self.soup.new_string(old_node + node.element)
-            old_node.replace_with(new_str)
+            cast(TextNode, children[index - 1]).parts.extend(node.parts)
         else:
-            self.element.insert(index, node.element)
             node.parent = self
+            children.insert(index, node)
 
-    def removeChild(self, node: "Element") -> None:
-        node.element.extract()
+    def removeChild(self, node: "_Html5libNode") -> None:
+        self.childNodes.remove(node)
+        node.parent = None
 
     def reparentChildren(self, new_parent: "Element") -> None:
         """Move all of this tag's children into another tag."""
-        # print("MOVE", self.element.contents)
-        # print("FROM", self.element)
-        # print("TO", new_parent.element)
-
-        element = self.element
-        new_parent_element = new_parent.element
-        # Determine what this tag's next_element will be once all the children
-        # are removed.
-        final_next_element = element.next_sibling
-
-        new_parents_last_descendant = new_parent_element._last_descendant(False, False)
-        if len(new_parent_element.contents) > 0:
-            # The new parent already contains children. We will be
-            # appending this tag's children to the end.
-
-            # We can make this assertion since we know new_parent has
-            # children.
-            assert new_parents_last_descendant is not None
-            new_parents_last_child = new_parent_element.contents[-1]
-            new_parents_last_descendant_next_element = (
-                new_parents_last_descendant.next_element
-            )
-        else:
-            # The new parent contains no children.
-            new_parents_last_child = None
-            new_parents_last_descendant_next_element = new_parent_element.next_element
-
-        to_append = element.contents
-        if len(to_append) > 0:
-            # Set the first child's previous_element and previous_sibling
-            # to elements within the new parent
-            first_child = to_append[0]
-            if new_parents_last_descendant is not None:
-                first_child.previous_element = new_parents_last_descendant
-            else:
-                first_child.previous_element = new_parent_element
-            first_child.previous_sibling = new_parents_last_child
-            if new_parents_last_descendant is not None:
-                new_parents_last_descendant.next_element = first_child
-            else:
-                new_parent_element.next_element = first_child
-            if new_parents_last_child is not None:
-                new_parents_last_child.next_sibling = first_child
-
-            # Find the very last element being moved. It is now the
-            # parent's last descendant. It has no .next_sibling and
-            # its .next_element is whatever the previous last
-            # descendant had.
-            last_childs_last_descendant = to_append[-1]._last_descendant(
-                is_initialized=False, accept_self=True
-            )
-
-            # Since we passed accept_self=True into _last_descendant,
-            # there's no possibility that the result is None.
-            assert last_childs_last_descendant is not None
-            last_childs_last_descendant.next_element = (
-                new_parents_last_descendant_next_element
-            )
-            if new_parents_last_descendant_next_element is not None:
-                # TODO-COVERAGE: This code has no test coverage and
-                # I'm not sure how to get html5lib to go through this
-                # path, but it's just the other side of the previous
-                # line.
-                new_parents_last_descendant_next_element.previous_element = (
-                    last_childs_last_descendant
-                )
-            last_childs_last_descendant.next_sibling = None
-
-        for child in to_append:
-            child.parent = new_parent_element
-            new_parent_element.contents.append(child)
-
-        # Now that this element has no children, change its .next_element.
-        element.contents = []
-        element.next_element = final_next_element
-
-        # print("DONE WITH MOVE")
-        # print("FROM", self.element)
-        # print("TO", new_parent_element)
+        children = self.childNodes
+        for child in children:
+            child.parent = new_parent
+        new_parent.childNodes.extend(children)
+        self.childNodes = []
 
     # TODO-TYPING: typeshed stubs are incorrect about this;
     # hasContent returns a boolean, not None.
     def hasContent(self) -> bool:
-        return len(self.element.contents) > 0
+        return len(self.childNodes) > 0
 
     # TODO-TYPING: typeshed stubs are incorrect about this;
     # cloneNode returns a new Node, not None.
-    def cloneNode(self) -> treebuilder_base.Node:
-        tag = self.soup.new_tag(self.element.name, self.namespace)
-        node = Element(tag, self.soup, self.namespace)
-        for key, value in self.attributes:
-            node.attributes[key] = value
+    def cloneNode(self) -> "Element":
+        node = Element(self.name, self.namespace)
+        node.attributes = dict(self.attributes)
         return node
 
     def getNameTuple(self) -> Tuple[Optional[_NamespaceURL], str]:
@@ -585,10 +453,30 @@ class Element(BeautifulSoupNode):
     nameTuple = property(getNameTuple)
 
 
-class TextNode(BeautifulSoupNode):
-    element: NavigableString
+class TextNode(treebuilder_base.Node):
+    """A string in the tree html5lib works on while it's parsing. It
+    becomes a `NavigableString` once parsing is done.
+    """
+
+    parent: Optional[Element]
+
+    #: The pieces of the string, in order.
+    parts: List[str]
+
+    def __init__(self, data: str):
+        self.parent = None
+        self.parts = [data]
+
+
+#: Anything html5lib might put into an `Element`. A `Comment` or
+#: `Doctype` goes into the tree as-is.
+_Html5libNode: TypeAlias = Union[Element, TextNode, Comment, Doctype]
+
 
-    def __init__(self, element: NavigableString, soup: "BeautifulSoup"):
-        treebuilder_base.Node.__init__(self, None)
-        self.element = element
-        self.soup = soup
+def _detach(node: _Html5libNode) -> None:
+    """Remove a node from the `Element` that contains it, if any."""
+    # Until the tree is finished, a Comment or Doctype's parent is an
+    # Element, not a Tag.
+    parent = cast(Optional[Element], node.parent)
+    if parent is not None:
+        parent.removeChild(node)
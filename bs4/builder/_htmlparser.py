@@ -32,8 +32,13 @@ from bs4.element import (
     Declaration,
     Doctype,
     ProcessingInstruction,
+    intern_string,
+)
+from bs4.dammit import (
+    EntitySubstitution,
+    IncrementalUnicodeDammit,
+    UnicodeDammit,
 )
-from bs4.dammit import EntitySubstitution, UnicodeDammit
 
 from bs4.builder import (
     DetectsXMLParsedAsHTML,
@@ -50,6 +55,7 @@ if TYPE_CHECKING:
     from bs4._typing import (
         _Encoding,
         _Encodings,
+        _RawAttributePairs,
         _RawMarkup,
     )
 
@@ -152,26 +158,38 @@ class BeautifulSoupHTMLParser(HTMLParser, DetectsXMLParsedAsHTML):
             closing tag).
         """
         # TODO: handle namespaces here?
-        attr_dict: AttributeDict = self.attribute_dict_class()
-        for key, value in attrs:
-            # Change None attribute values to the empty string
-            # for consistency with the other tree builders.
-            if value is None:
-                value = ""
-            if key in attr_dict:
-                # A single attribute shows up multiple times in this
-                # tag. How to handle it depends on the
-                # on_duplicate_attribute setting.
-                on_dupe = self.on_duplicate_attribute
-                if on_dupe == self.IGNORE:
-                    pass
-                elif on_dupe in (None, self.REPLACE):
-                    attr_dict[key] = value
+        # Tag and attribute names are shared between documents, rather
+        # than having a new copy for every tag.
+        name = intern_string(name)
+        tag_attrs: Union[AttributeDict, _RawAttributePairs] = tuple(
+            [(intern_string(key), value) for key, value in attrs]
+        )
+        if len(attrs) > 1 and len(set(key for key, value in attrs)) < len(attrs):
+            # A single attribute shows up multiple times in this
+            # tag. How to handle it depends on the
+            # on_duplicate_attribute setting, so build the attribute
+            # dictionary now.
+            attr_dict: AttributeDict = self.attribute_dict_class()
+            for key, value in tag_attrs:
+                # Change None attribute values to the empty string
+                # for consistency with the other tree builders.
+                if value is None:
+                    value = ""
+                if key in attr_dict:
+                    on_dupe = self.on_duplicate_attribute
+                    if on_dupe == self.IGNORE:
+                        pass
+                    elif on_dupe in (None, self.REPLACE):
+                        attr_dict[key] = value
+                    else:
+                        on_dupe = cast(_DuplicateAttributeHandler, on_dupe)
+                        on_dupe(attr_dict, key, value)
                 else:
-                    on_dupe = cast(_DuplicateAttributeHandler, on_dupe)
-                    on_dupe(attr_dict, key, value)
-            else:
-                attr_dict[key] = value
+                    attr_dict[key] = value
+            tag_attrs = attr_dict
+        # Otherwise, the raw (name, value) pairs are passed along
+        # as-is, and only turned into a dictionary if the Tag's
+        # attributes are actually used.
         # print("START", name)
         sourceline: Optional[int]
         sourcepos: Optional[int]
@@ -180,7 +198,7 @@ class BeautifulSoupHTMLParser(HTMLParser, DetectsXMLParsedAsHTML):
         else:
             sourceline = sourcepos = None
         tag = self.soup.handle_starttag(
-            name, None, None, attr_dict, sourceline=sourceline, sourcepos=sourcepos
+            name, None, None, tag_attrs, sourceline=sourceline, sourcepos=sourcepos
         )
         if tag and tag.is_empty_element and handle_empty_element:
             # Unlike other parsers, html.parser doesn't send separate end tag
@@ -339,6 +357,8 @@ class HTMLParserTreeBuilder(HTMLTreeBuilder):
     NAME: str = HTMLPARSER
     features: Iterable[str] = [NAME, HTML, STRICT]
     parser_args: Tuple[Iterable[Any], Dict[str, Any]]
+    parser: Optional[BeautifulSoupHTMLParser] = None
+    _dammit: IncrementalUnicodeDammit
 
     #: The html.parser knows which line number and position in the
     #: original file is the source of an element.
@@ -447,8 +467,6 @@ class HTMLParserTreeBuilder(HTMLTreeBuilder):
             )
 
     def feed(self, markup: _RawMarkup) -> None:
-        args, kwargs = self.parser_args
-
         # HTMLParser.feed will only handle str, but
         # BeautifulSoup.markup is allowed to be _RawMarkup, because
         # it's set by the yield value of
@@ -456,19 +474,61 @@ class HTMLParserTreeBuilder(HTMLTreeBuilder):
         # HTMLParserTreeBuilder.prepare_markup always yields a str
         # (UnicodeDammit.unicode_markup).
         assert isinstance(markup, str)
+        self.begin_feed()
+        self.feed_chunk(markup)
+        self.end_feed()
+
+    def begin_feed(self, encoding: Optional[_Encoding] = None) -> None:
+        """Create a fresh `BeautifulSoupHTMLParser` to receive a
+        document one chunk at a time.
+
+        :param encoding: HTMLParser only handles Unicode, so any
+            bytestring chunks will be decoded using this encoding. If
+            no encoding is given, one will be chosen by
+            `IncrementalUnicodeDammit`.
+        """
+        args, kwargs = self.parser_args
 
         # We know BeautifulSoup calls TreeBuilder.initialize_soup
-        # before calling feed(), so we can assume self.soup
+        # before feeding any markup, so we can assume self.soup
         # is set.
         assert self.soup is not None
-        parser = BeautifulSoupHTMLParser(self.soup, *args, **kwargs)
+        self.parser = BeautifulSoupHTMLParser(self.soup, *args, **kwargs)
+        self._dammit = IncrementalUnicodeDammit(
+            [encoding] if encoding else None, is_html=True
+        )
 
+    def feed_chunk(self, chunk: _RawMarkup) -> None:
+        """Run the next chunk of a document through html.parser.
+
+        :param chunk: A string or bytestring.
+        """
+        assert self.parser is not None
+        if isinstance(chunk, bytes):
+            chunk = self._decode(chunk)
         try:
-            parser.feed(markup)
-            parser.close()
+            self.parser.feed(chunk)
         except AssertionError as e:
             # html.parser raises AssertionError in rare cases to
             # indicate a fatal problem with the markup, especially
             # when there's an error in the doctype declaration.
             raise ParserRejectedMarkup(e)
+
+    def _decode(self, chunk: bytes, final: bool = False) -> str:
+        assert self.soup is not None
+        data = self._dammit.decode(chunk, final)
+        if self._dammit.contains_replacement_characters:
+            self.soup.contains_replacement_characters = True
+        return data
+
+    def end_feed(self) -> None:
+        """Flush any markup html.parser is holding on to."""
+        assert self.parser is not None
+        parser = self.parser
+        self.parser = None
+        try:
+            parser.feed(self._decode(b"", True))
+            parser.close()
+        except AssertionError as e:
+            raise ParserRejectedMarkup(e)
         parser.already_closed_empty_element = []
@@ -5,17 +5,24 @@ from __future__ import annotations
 __license__ = "MIT"
 
 __all__ = [
+    "LXMLFastTreeBuilderForXML",
+    "LXMLFastTreeBuilder",
     "LXMLTreeBuilderForXML",
     "LXMLTreeBuilder",
 ]
 
 
+import codecs
+import itertools
+import re
 from typing import (
     Any,
+    cast,
     Dict,
     Iterable,
     List,
     Optional,
+    Pattern,
     Set,
     Tuple,
     Type,
@@ -24,8 +31,6 @@ from typing import (
 )
 from typing_extensions import TypeAlias
 
-from io import BytesIO
-from io import StringIO
 from lxml import etree
 from bs4.element import (
     AttributeDict,
@@ -33,8 +38,12 @@ from bs4.element import (
     Comment,
     Doctype,
     NamespacedAttribute,
+    NavigableString,
+    PageElement,
     ProcessingInstruction,
+    Tag,
     XMLProcessingInstruction,
+    intern_string,
 )
 from bs4.builder import (
     DetectsXMLParsedAsHTML,
@@ -45,7 +54,7 @@ from bs4.builder import (
     TreeBuilder,
     XML,
 )
-from bs4.dammit import EncodingDetector
+from bs4.dammit import EncodingDetector, UnicodeDammit
 from bs4.exceptions import ParserRejectedMarkup
 
 if TYPE_CHECKING:
@@ -56,9 +65,11 @@ if TYPE_CHECKING:
         _NamespaceURL,
         _NamespaceMapping,
         _InvertedNamespaceMapping,
+        _RawAttributeValues,
         _RawMarkup,
     )
     from bs4 import BeautifulSoup
+    from bs4.filter import ElementFilter
 
 LXML: str = "lxml"
 
@@ -87,19 +98,43 @@ class LXMLTreeBuilderForXML(TreeBuilder):
     # Well, it's permissive by XML parser standards.
     features: Iterable[str] = [NAME, LXML, XML, FAST, PERMISSIVE]
 
+    #: By default, feed the document to lxml this many bytes (or
+    #: characters) at a time. Pass ``chunk_size`` into the constructor
+    #: to change this.
     CHUNK_SIZE: int = 512
 
+    #: When given a `memoryview`, look this far into it to sniff the
+    #: document's encoding.
+    ENCODING_SAMPLE_SIZE: int = 64 * 1024
+
+    ACCEPTS_BUFFERS: bool = True
+
     # This namespace mapping is specified in the XML Namespace
     # standard.
     DEFAULT_NSMAPS: _NamespaceMapping = dict(xml="http://www.w3.org/XML/1998/namespace")
 
     DEFAULT_NSMAPS_INVERTED: _InvertedNamespaceMapping = _invert(DEFAULT_NSMAPS)
 
+    chunk_size: int
     nsmaps: List[Optional[_InvertedNamespaceMapping]]
     empty_element_tags: Set[str]
     parser: Any
     _default_parser: Optional[etree.XMLParser]
 
+    #: The `BeautifulSoup.parse_only` of the document being parsed.
+    #: :meta private:
+    _strainer: Optional[ElementFilter] = None
+
+    #: Whether `_strainer` rejects every string that's not inside a
+    #: `Tag` it accepted.
+    #: :meta private:
+    _strainer_excludes_strings: bool = False
+
+    #: Decodes the incoming chunks, if the document is in an encoding
+    #: lxml doesn't know about.
+    #: :meta private:
+    _decoder: Optional[codecs.IncrementalDecoder] = None
+
     # NOTE: If we parsed Element objects and looked at .sourceline,
     # we'd be able to see the line numbers from the original document.
     # But instead we build an XMLParser or HTMLParser object to serve
@@ -171,12 +206,22 @@ class LXMLTreeBuilderForXML(TreeBuilder):
         self,
         parser: Optional[etree.XMLParser] = None,
         empty_element_tags: Optional[Set[str]] = None,
+        chunk_size: Optional[int] = None,
         **kwargs: Any,
     ):
+        """Constructor.
+
+        :param parser: An lxml parser object, or a class to instantiate.
+        :param empty_element_tags: Tags to treat as empty-element tags.
+        :param chunk_size: Feed the document to lxml this many bytes
+            (or characters) at a time.
+        :param kwargs: Keyword arguments for the superclass constructor.
+        """
         # TODO: Issue a warning if parser is present but not a
         # callable, since that means there's no way to create new
         # parsers for different encodings.
         self._default_parser = parser
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
         self.soup = None
         self.nsmaps = [self.DEFAULT_NSMAPS_INVERTED]
         self.active_namespace_prefixes = [dict(self.DEFAULT_NSMAPS)]
@@ -212,7 +257,8 @@ class LXMLTreeBuilderForXML(TreeBuilder):
         encodings, and tell lxml to try to parse the document as each
         one in turn.
 
-        :param markup: Some markup -- hopefully a bytestring.
+        :param markup: Some markup -- hopefully a bytestring, or a
+            `memoryview` of a bytestring.
         :param user_specified_encoding: The user asked to try this encoding.
         :param document_declared_encoding: The markup itself claims to be
             in this encoding.
@@ -227,11 +273,20 @@ class LXMLTreeBuilderForXML(TreeBuilder):
             in turn.
         """
         is_html = not self.is_xml
+
+        # A memoryview might be a view of a huge memory-mapped file,
+        # so only the beginning of it is used to sniff the encoding.
+        sample: _RawMarkup
+        if isinstance(markup, memoryview):
+            sample = markup[: self.ENCODING_SAMPLE_SIZE].tobytes()
+        else:
+            sample = markup
+
         if is_html:
             self.processing_instruction_class = ProcessingInstruction
             # We're in HTML mode, so if we're given XML, that's worth
             # noting.
-            DetectsXMLParsedAsHTML.warn_if_markup_looks_like_xml(markup, stacklevel=3)
+            DetectsXMLParsedAsHTML.warn_if_markup_looks_like_xml(sample, stacklevel=3)
         else:
             self.processing_instruction_class = XMLProcessingInstruction
 
@@ -270,38 +325,145 @@ class LXMLTreeBuilderForXML(TreeBuilder):
             # lower-priority user encoding.
             user_encodings.append(document_declared_encoding)
 
+        # The markup isn't Unicode, so neither is the sample.
         detector = EncodingDetector(
-            markup,
+            cast(bytes, sample),
             known_definite_encodings=known_definite_encodings,
             user_encodings=user_encodings,
             is_html=is_html,
             exclude_encodings=exclude_encodings,
         )
+        if isinstance(markup, memoryview):
+            # Strip any byte-order mark without copying the document.
+            markup = markup[len(sample) - len(detector.markup) :]
+        else:
+            markup = detector.markup
+
+        # If lxml is told to use the wrong encoding, it may not
+        # give up until it's parsed most of the document. So any
+        # encoding that obviously can't decode the document is put
+        # off until the others have been tried. An encoding the user
+        # asked for, or one given by a byte-order mark, is tried in
+        # its usual place regardless. So is the encoding in an XML
+        # declaration: an XML document means what it says, and lxml
+        # can recover from the odd bad byte.
+        definite = set(known_definite_encodings)
+        if detector.sniffed_encoding is not None:
+            definite.add(detector.sniffed_encoding)
+        unlikely: List[_Encoding] = []
         for encoding in detector.encodings:
-            yield (detector.markup, encoding, document_declared_encoding, False)
+            if (
+                encoding in definite
+                or (not is_html and encoding == detector.declared_encoding)
+                or EncodingDetector.decodes_samples(markup, encoding)
+            ):
+                yield (markup, encoding, document_declared_encoding, False)
+            else:
+                unlikely.append(encoding)
+        for encoding in unlikely:
+            yield (markup, encoding, document_declared_encoding, False)
 
     def feed(self, markup: _RawMarkup) -> None:
-        io: Union[BytesIO, StringIO]
-        if isinstance(markup, bytes):
-            io = BytesIO(markup)
-        elif isinstance(markup, str):
-            io = StringIO(markup)
-
         # initialize_soup is called before feed, so we know this
         # is not None.
         assert self.soup is not None
 
-        # Call feed() at least once, even if the markup is empty,
-        # or the parser won't be initialized.
-        data = io.read(self.CHUNK_SIZE)
+        self.begin_feed(self.soup.original_encoding)
+
+        # Feed the markup to lxml chunk by chunk. Slicing copies only
+        # the current chunk, never the whole document. Call
+        # feed_chunk() at least once, even if the markup is empty, or
+        # the parser won't be initialized.
+        size = self.chunk_size
+        for start in range(0, max(len(markup), 1), size):
+            chunk = markup[start : start + size]
+            if isinstance(chunk, memoryview):
+                # lxml won't take a memoryview.
+                chunk = chunk.tobytes()
+            self.feed_chunk(chunk)
+        self.end_feed()
+
+    def begin_feed(self, encoding: Optional[_Encoding] = None) -> None:
+        """Create an lxml parser to receive a document one chunk at a time.
+
+        :param encoding: lxml will decode bytestring chunks using
+            this encoding. If no encoding is given, lxml will try to
+            figure it out on its own.
+        """
+        if self.is_xml:
+            self.processing_instruction_class = XMLProcessingInstruction
+        else:
+            self.processing_instruction_class = ProcessingInstruction
+        assert self.soup is not None
+        if getattr(self.soup, "replacer", None) is None:
+            self._strainer = self.soup.parse_only
+        else:
+            # A SoupReplacer can change a tag's name before the
+            # SoupStrainer sees it, so the BeautifulSoup object has
+            # to see every tag.
+            self._strainer = None
+        self._strainer_excludes_strings = (
+            self._strainer is not None and self._strainer.excludes_strings
+        )
+        self._decoder = None
         try:
-            self.parser = self.parser_for(self.soup.original_encoding)
-            self.parser.feed(data)
-            while len(data) != 0:
-                # Now call feed() on the rest of the data, chunk by chunk.
-                data = io.read(self.CHUNK_SIZE)
-                if len(data) != 0:
-                    self.parser.feed(data)
+            self.parser = self.parser_for(encoding)
+        except LookupError as e:
+            if encoding is None:
+                raise ParserRejectedMarkup(e)
+            self._begin_decoding(encoding, e)
+
+    def _begin_decoding(self, encoding: _Encoding, error: LookupError) -> None:
+        """Get ready to parse a document in an encoding libxml2 doesn't
+        recognize by name.
+
+        If Python knows the encoding by a name libxml2 does recognize
+        (e.g. "iso8859-1" rather than "latin-1"), lxml is told that
+        name. Otherwise the chunks are decoded as they come in, and
+        lxml is given Unicode. Either way, the document is only
+        decoded once.
+
+        :param encoding: The name lxml didn't recognize.
+        :param error: The exception lxml raised.
+        """
+        encoding = UnicodeDammit.CHARSET_ALIASES.get(encoding, encoding)
+        try:
+            codec = codecs.lookup(encoding)
+        except LookupError:
+            raise ParserRejectedMarkup(error)
+        try:
+            self.parser = self.parser_for(codec.name)
+            return
+        except LookupError:
+            pass
+        self._decoder = codec.incrementaldecoder("strict")
+        self.parser = self.parser_for(None)
+
+    def feed_chunk(self, chunk: _RawMarkup) -> None:
+        """Run the next chunk of a document through lxml.
+
+        :param chunk: A string or bytestring.
+        """
+        try:
+            if self._decoder is not None and not isinstance(chunk, str):
+                chunk = self._decoder.decode(chunk)
+            self.parser.feed(chunk)
+        except (UnicodeDecodeError, LookupError, etree.ParserError) as e:
+            raise ParserRejectedMarkup(e)
+
+    def _feed_remainder(self) -> None:
+        """Pass along anything `_decoder` is holding on to, such as
+        the start of a multibyte character.
+        """
+        if self._decoder is not None:
+            remainder = self._decoder.decode(b"", True)
+            if remainder:
+                self.parser.feed(remainder)
+
+    def end_feed(self) -> None:
+        """Tell lxml there's no more markup coming."""
+        try:
+            self._feed_remainder()
             self.parser.close()
         except (UnicodeDecodeError, LookupError, etree.ParserError) as e:
             raise ParserRejectedMarkup(e)
@@ -321,6 +483,119 @@ class LXMLTreeBuilderForXML(TreeBuilder):
         assert self.soup is not None
         assert isinstance(tag, str)
 
+        nsprefix: Optional[_NamespacePrefix] = None
+        namespace: Optional[_NamespaceURL] = None
+
+        self._start_namespaces(nsmap)
+        if len(nsmap) == 0:
+            for k in attrs:
+                if k[0] == "{":
+                    # A namespaced attribute.
+                    break
+            else:
+                # No namespaces are involved, so the attributes can
+                # be passed along as raw (name, value) pairs. They'll
+                # only be turned into a dictionary if they're used.
+                namespace, tag = self._getNsTag(tag)
+                nsprefix = self._prefix_for_namespace(namespace)
+                if (
+                    self._strainer is not None
+                    and len(self.soup.tagStack) == 1
+                    and not self._strainer.allow_tag_creation(
+                        nsprefix, tag, cast("_RawAttributeValues", attrs)
+                    )
+                ):
+                    # This tag won't be part of the tree. Don't
+                    # bother the BeautifulSoup object with it. Its
+                    # contents will be considered on their own merits.
+                    if self.soup.current_data:
+                        self.soup.endData()
+                    return
+                # Tag and attribute names are shared between
+                # documents, rather than having a new copy for every
+                # tag. lxml only ever gives us strings.
+                pairs = cast("Dict[str, str]", attrs).items()
+                self.soup.handle_starttag(
+                    intern_string(tag),
+                    namespace,
+                    nsprefix,
+                    tuple([(intern_string(k), v) for k, v in pairs]),
+                    namespaces=self.active_namespace_prefixes[-1],
+                )
+                return
+
+        final_attrs = self._namespaced_attributes(attrs, nsmap)
+        namespace, tag = self._getNsTag(tag)
+        nsprefix = self._prefix_for_namespace(namespace)
+        self.soup.handle_starttag(
+            intern_string(tag),
+            namespace,
+            nsprefix,
+            final_attrs,
+            namespaces=self.active_namespace_prefixes[-1],
+        )
+
+    def _start_namespaces(self, nsmap: _NamespaceMapping) -> None:
+        """Keep track of the namespace prefixes in scope as a tag starts.
+
+        :param nsmap: The namespace mappings declared on the tag.
+        """
+        if len(nsmap) == 0:
+            if len(self.nsmaps) > 1:
+                # There are no new namespaces for this tag, but
+                # non-default namespaces are in play, so we need a
+                # separate tag stack to know when they end.
+                self.nsmaps.append(None)
+            return
+
+        # A new namespace mapping has come into play.
+
+        # First, Let the BeautifulSoup object know about it.
+        self._register_namespaces(nsmap)
+
+        # Then, add it to our running list of inverted namespace
+        # mappings.
+        self.nsmaps.append(_invert(nsmap))
+
+        # The currently active namespace prefixes have
+        # changed. Calculate the new mapping so it can be stored
+        # with all Tag objects created while these prefixes are in
+        # scope.
+        current_mapping = dict(self.active_namespace_prefixes[-1])
+        current_mapping.update(nsmap)
+
+        # We should not track un-prefixed namespaces as we can only hold one
+        # and it will be recognized as the default namespace by soupsieve,
+        # which may be confusing in some situations.
+        if "" in current_mapping:
+            del current_mapping[""]
+        self.active_namespace_prefixes.append(current_mapping)
+
+    def _end_namespaces(self) -> None:
+        """Keep track of the namespace prefixes in scope as a tag ends."""
+        if len(self.nsmaps) > 1:
+            # This tag, or one of its parents, introduced a namespace
+            # mapping, so pop it off the stack.
+            out_of_scope_nsmap = self.nsmaps.pop()
+
+            if out_of_scope_nsmap is not None:
+                # This tag introduced a namespace mapping which is no
+                # longer in scope. Recalculate the currently active
+                # namespace prefixes.
+                self.active_namespace_prefixes.pop()
+
+    def _namespaced_attributes(
+        self, attrs: Dict[str | bytes, str | bytes], nsmap: _NamespaceMapping
+    ) -> AttributeDict:
+        """Build the attribute dictionary for a tag when namespaces are
+        in play.
+
+        Must be called after `_start_namespaces`, so the tag's own
+        namespace declarations are in scope.
+
+        :param attrs: The attributes as lxml reports them.
+        :param nsmap: The namespace mappings declared on the tag.
+        """
         # We need to recreate the attribute dict for three
         # reasons. First, for type checking, so we can assert there
         # are no bytestrings in the keys or values. Second, because we
@@ -335,68 +610,27 @@ class LXMLTreeBuilderForXML(TreeBuilder):
             assert isinstance(v, str)
             new_attrs[k] = v
 
-        nsprefix: Optional[_NamespacePrefix] = None
-        namespace: Optional[_NamespaceURL] = None
-        # Invert each namespace map as it comes in.
-        if len(nsmap) == 0 and len(self.nsmaps) > 1:
-            # There are no new namespaces for this tag, but
-            # non-default namespaces are in play, so we need a
-            # separate tag stack to know when they end.
-            self.nsmaps.append(None)
-        elif len(nsmap) > 0:
-            # A new namespace mapping has come into play.
-
-            # First, Let the BeautifulSoup object know about it.
-            self._register_namespaces(nsmap)
-
-            # Then, add it to our running list of inverted namespace
-            # mappings.
-            self.nsmaps.append(_invert(nsmap))
-
-            # The currently active namespace prefixes have
-            # changed. Calculate the new mapping so it can be stored
-            # with all Tag objects created while these prefixes are in
-            # scope.
-            current_mapping = dict(self.active_namespace_prefixes[-1])
-            current_mapping.update(nsmap)
-
-            # We should not track un-prefixed namespaces as we can only hold one
-            # and it will be recognized as the default namespace by soupsieve,
-            # which may be confusing in some situations.
-            if "" in current_mapping:
-                del current_mapping[""]
-            self.active_namespace_prefixes.append(current_mapping)
-
-            # Also treat the namespace mapping as a set of attributes on the
-            # tag, so we can recreate it later.
-            for prefix, namespace in list(nsmap.items()):
-                attribute = NamespacedAttribute(
-                    "xmlns", prefix, "http://www.w3.org/2000/xmlns/"
-                )
-                new_attrs[attribute] = namespace
-
-        # Namespaces are in play. Find any attributes that came in
-        # from lxml with namespaces attached to their names, and
-        # turn then into NamespacedAttribute objects.
+        # Treat the namespace mapping as a set of attributes on the
+        # tag, so we can recreate it later.
+        for prefix, url in list(nsmap.items()):
+            attribute = NamespacedAttribute(
+                "xmlns", prefix, "http://www.w3.org/2000/xmlns/"
+            )
+            new_attrs[attribute] = url
+
+        # Find any attributes that came in from lxml with namespaces
+        # attached to their names, and turn then into
+        # NamespacedAttribute objects.
         final_attrs: AttributeDict = self.attribute_dict_class()
         for attr, value in list(new_attrs.items()):
             namespace, attr = self._getNsTag(attr)
             if namespace is None:
-                final_attrs[attr] = value
+                final_attrs[intern_string(attr)] = value
             else:
                 nsprefix = self._prefix_for_namespace(namespace)
                 attr = NamespacedAttribute(nsprefix, attr, namespace)
                 final_attrs[attr] = value
-
-        namespace, tag = self._getNsTag(tag)
-        nsprefix = self._prefix_for_namespace(namespace)
-        self.soup.handle_starttag(
-            tag,
-            namespace,
-            nsprefix,
-            final_attrs,
-            namespaces=self.active_namespace_prefixes[-1],
-        )
+        return final_attrs
 
     def _prefix_for_namespace(
         self, namespace: Optional[_NamespaceURL]
@@ -412,28 +646,30 @@ class LXMLTreeBuilderForXML(TreeBuilder):
     def end(self, name: str | bytes) -> None:
         assert self.soup is not None
         assert isinstance(name, str)
-        self.soup.endData()
-        namespace, name = self._getNsTag(name)
-        nsprefix = None
-        if namespace is not None:
-            for inverted_nsmap in reversed(self.nsmaps):
-                if inverted_nsmap is not None and namespace in inverted_nsmap:
-                    nsprefix = inverted_nsmap[namespace]
-                    break
-        self.soup.handle_endtag(name, nsprefix)
-        if len(self.nsmaps) > 1:
-            # This tag, or one of its parents, introduced a namespace
-            # mapping, so pop it off the stack.
-            out_of_scope_nsmap = self.nsmaps.pop()
-
-            if out_of_scope_nsmap is not None:
-                # This tag introduced a namespace mapping which is no
-                # longer in scope. Recalculate the currently active
-                # namespace prefixes.
-                self.active_namespace_prefixes.pop()
+        if self._strainer is not None and len(self.soup.tagStack) == 1:
+            # A Tag is only closed here if it was created, and Tags
+            # can only be created inside another Tag (other than the
+            # BeautifulSoup object itself) if the SoupStrainer
+            # accepted it. So this is the end of a tag that was
+            # rejected, and it can be ignored.
+            if self.soup.current_data:
+                self.soup.endData()
+        else:
+            self.soup.endData()
+            namespace, name = self._getNsTag(name)
+            nsprefix = None
+            if namespace is not None:
+                for inverted_nsmap in reversed(self.nsmaps):
+                    if inverted_nsmap is not None and namespace in inverted_nsmap:
+                        nsprefix = inverted_nsmap[namespace]
+                        break
+            self.soup.handle_endtag(name, nsprefix)
+        self._end_namespaces()
 
     def pi(self, target: str, data: str) -> None:
         assert self.soup is not None
+        if self._strainer_excludes_strings and len(self.soup.tagStack) == 1:
+            return
         self.soup.endData()
         data = target + " " + data
         self.soup.handle_data(data)
@@ -442,6 +678,10 @@ class LXMLTreeBuilderForXML(TreeBuilder):
     def data(self, data: str | bytes) -> None:
         assert self.soup is not None
         assert isinstance(data, str)
+        if self._strainer_excludes_strings and len(self.soup.tagStack) == 1:
+            # This string is outside any Tag the SoupStrainer
+            # accepted, and the SoupStrainer would reject it anyway.
+            return
         self.soup.handle_data(data)
 
     def doctype(self, name: str, pubid: str, system: str) -> None:
@@ -455,6 +695,8 @@ class LXMLTreeBuilderForXML(TreeBuilder):
         "Handle comments as Comment objects."
         assert self.soup is not None
         assert isinstance(text, str)
+        if self._strainer_excludes_strings and len(self.soup.tagStack) == 1:
+            return
         self.soup.endData()
         self.soup.handle_data(text)
         self.soup.endData(Comment)
@@ -475,16 +717,479 @@ class LXMLTreeBuilder(HTMLTreeBuilder, LXMLTreeBuilderForXML):
         return etree.HTMLParser
 
     def feed(self, markup: _RawMarkup) -> None:
+        if isinstance(markup, memoryview):
+            # Don't copy the whole buffer into a bytestring.
+            super(LXMLTreeBuilder, self).feed(markup)
+            return
+
         # We know self.soup is set by the time feed() is called.
         assert self.soup is not None
-        encoding = self.soup.original_encoding
-        try:
-            self.parser = self.parser_for(encoding)
-            self.parser.feed(markup)
-            self.parser.close()
-        except (UnicodeDecodeError, LookupError, etree.ParserError) as e:
-            raise ParserRejectedMarkup(e)
+        self.begin_feed(self.soup.original_encoding)
+        self.feed_chunk(markup)
+        self.end_feed()
 
     def test_fragment_to_document(self, fragment: str) -> str:
         """See `TreeBuilder`."""
         return "<html><body>%s</body></html>" % fragment
+
+
+#: Attributes that libxml2's HTML parser gives their own name as a
+#: value, when they show up with no value at all.
+#: :meta private:
+_HTML_BOOLEAN_ATTRIBUTES: Set[str] = set(
+    [
+        "checked",
+        "compact",
+        "declare",
+        "defer",
+        "disabled",
+        "ismap",
+        "multiple",
+        "nohref",
+        "noresize",
+        "noshade",
+        "nowrap",
+        "readonly",
+        "selected",
+    ]
+)
+
+
+class LXMLFastTreeBuilderForXML(LXMLTreeBuilderForXML):
+    """A tree builder that lets lxml build its own tree for the whole
+    document, then turns it into a Beautiful Soup parse tree in a
+    single pass.
+
+    This avoids a Python method call for every start tag, end tag and
+    string in the document, so it's quite a bit faster than
+    `LXMLTreeBuilderForXML`, and it creates the same parse tree. It's
+    only used when the whole document is parsed at once, with no
+    `SoupStrainer` or custom lxml parser; otherwise it works just like
+    `LXMLTreeBuilderForXML`.
+
+    lxml's tree doesn't record the position of a doctype relative to
+    comments and processing instructions that come before the root
+    element, and it expands entities that lxml's event interface
+    leaves out. When a document contains either of these, has no
+    root element, or is broken badly enough that libxml2 reports an
+    error not listed in `HARMLESS_ERRORS`, it's parsed again the usual
+    way. Markup that's broken in ways libxml2 doesn't report can still
+    come out slightly differently.
+    """
+
+    NAME: str = "lxml-xml-fast"
+    ALTERNATE_NAMES: Iterable[str] = ["xml-fast"]
+    features: Iterable[str] = [NAME] + list(ALTERNATE_NAMES)
+
+    #: Even with huge_tree set, libxml2 stops adding elements to its
+    #: tree once they're nested 2048 deep. Documents that go this
+    #: deep are parsed the usual way.
+    MAX_DEPTH: int = 2000
+
+    #: The errors libxml2 can run into without its tree ending up
+    #: different from the events it sends out. If it runs into any
+    #: other error, the document is parsed the usual way.
+    HARMLESS_ERRORS: Set[int] = set(
+        [
+            etree.ErrorTypes.ERR_DOCUMENT_END,
+            etree.ErrorTypes.ERR_ENTITYREF_SEMICOL_MISSING,
+            etree.ErrorTypes.ERR_HYPHEN_IN_COMMENT,
+            etree.ErrorTypes.ERR_INVALID_CHAR,
+            etree.ErrorTypes.ERR_INVALID_DEC_CHARREF,
+            etree.ErrorTypes.ERR_INVALID_HEX_CHARREF,
+            etree.ErrorTypes.ERR_TAG_NAME_MISMATCH,
+            etree.ErrorTypes.ERR_TAG_NOT_FINISHED,
+            etree.ErrorTypes.ERR_UNDECLARED_ENTITY,
+        ]
+    )
+
+    #: An HTML document whose first tag is an end tag, or a less-than
+    #: sign that doesn't start a tag. libxml2 gives an HTML document
+    #: like this a different tree from the one its events describe.
+    #: :meta private:
+    _UNTRUSTED_START = re.compile(
+        r"(?:[ \t\n\r]|<!--.*?-->|<![^>]*>|<\?[^>]*>)*<(?:/|(?![A-Za-z]))", re.S
+    )
+
+    #: Whitespace after an HTML document's closing </html> tag.
+    #: :meta private:
+    _TRAILING_WHITESPACE = re.compile(r"</html[ \t\n\r]*>([ \t\n\r]+)$", re.I)
+
+    #: The start of an HTML document's closing </html> tag.
+    #: :meta private:
+    _END_OF_HTML = re.compile("</html", re.I)
+    _END_OF_HTML_BYTES = re.compile(b"</html", re.I)
+
+    #: One of `_HTML_BOOLEAN_ATTRIBUTES`, followed by an equals sign.
+    #: :meta private:
+    _BOOLEAN_VALUE = re.compile(
+        r"(?<![\w-])(?:%s)[ \t\n\r]*=" % "|".join(sorted(_HTML_BOOLEAN_ATTRIBUTES)),
+        re.I,
+    )
+    _BOOLEAN_VALUE_BYTES = re.compile(_BOOLEAN_VALUE.pattern.encode("ascii"), re.I)
+
+    #: A closing </html> tag with nothing but whitespace after it.
+    #: :meta private:
+    _FINAL_END_OF_HTML = re.compile(r"</html[ \t\n\r]*>[ \t\n\r]*", re.I)
+
+    #: How much of the start and end of an HTML document to look at
+    #: for `_UNTRUSTED_START` and `_TRAILING_WHITESPACE`.
+    #: :meta private:
+    _SAMPLE_SIZE: int = 1024
+
+    #: Whether the document currently being fed to lxml should be
+    #: turned into an lxml tree rather than a series of events.
+    #: :meta private:
+    _adopting: bool = False
+
+    #: The root of the tree lxml built for the document, if it can be
+    #: trusted to hold what lxml's events would have.
+    #: :meta private:
+    _root: Optional[etree._Element] = None
+
+    def parser_for(self, encoding: Optional[_Encoding]) -> _LXMLParser:
+        """Instantiate an appropriate parser for the given encoding.
+
+        :param encoding: A string.
+        :return: A parser object such as an `etree.XMLParser`.
+        """
+        if not self._adopting:
+            return super(LXMLFastTreeBuilderForXML, self).parser_for(encoding)
+        # lxml's events aren't limited in how deeply tags can be
+        # nested, but its tree is, unless huge_tree is set.
+        if self.is_xml:
+            return etree.XMLParser(recover=True, encoding=encoding, huge_tree=True)
+        # Don't make up a doctype the document doesn't have.
+        return etree.HTMLParser(
+            recover=True, encoding=encoding, huge_tree=True, default_doctype=False
+        )
+
+    def feed(self, markup: _RawMarkup) -> None:
+        assert self.soup is not None
+        if (
+            self._default_parser is None
+            and self.soup.parse_only is None
+            and getattr(self.soup, "replacer", None) is None
+        ):
+            # The document is fed to lxml exactly as it would
+            # otherwise be, so lxml's tree and its events come from
+            # the same parse.
+            self._adopting = True
+            try:
+                super(LXMLFastTreeBuilderForXML, self).feed(markup)
+            finally:
+                self._adopting = False
+            root, self._root = self._root, None
+            if root is not None:
+                try:
+                    if self._adopt(root, markup):
+                        return
+                except UnicodeDecodeError as e:
+                    raise ParserRejectedMarkup(e)
+
+                # Start over.
+                self.soup.reset()
+                self.nsmaps = [self.DEFAULT_NSMAPS_INVERTED]
+                self.active_namespace_prefixes = [dict(self.DEFAULT_NSMAPS)]
+                self.initialize_soup(self.soup)
+
+        # Have lxml send us the document one event at a time.
+        super(LXMLFastTreeBuilderForXML, self).feed(markup)
+
+    def end_feed(self) -> None:
+        """Tell lxml there's no more markup coming."""
+        if not self._adopting:
+            super(LXMLFastTreeBuilderForXML, self).end_feed()
+            return
+        try:
+            self._feed_remainder()
+            root = self.parser.close()
+        except etree.XMLSyntaxError:
+            # lxml couldn't find a root element.
+            root = None
+        except (UnicodeDecodeError, LookupError, etree.ParserError) as e:
+            raise ParserRejectedMarkup(e)
+        for error in self.parser.feed_error_log:
+            if error.type not in self.HARMLESS_ERRORS:
+                root = None
+                break
+        self._root = root
+
+    def _adopt(self, root: etree._Element, markup: _RawMarkup) -> bool:
+        """Turn a tree built by lxml into the Beautiful Soup parse tree.
+
+        The `Tag` and `NavigableString` objects are the ones
+        `BeautifulSoup` would have created from lxml's events, but
+        they're linked to each other directly instead of by way of the
+        `BeautifulSoup` object's tag stack.
+
+        :param root: The root element of lxml's tree.
+        :param markup: The markup lxml parsed to build the tree.
+        :return: False if the tree doesn't hold everything needed to
+            reproduce what `LXMLTreeBuilderForXML` would have
+            created. The parse tree will need to be reset.
+        """
+        soup = self.soup
+        assert soup is not None
+
+        preceding = list(root.itersiblings(preceding=True))
+        if not self.is_xml and (
+            root.getnext() is not None
+            or self._UNTRUSTED_START.match(self._sample(markup[: self._SAMPLE_SIZE]))
+            or self._ends_early(markup)
+        ):
+            # libxml2 drops any text it finds outside the top-level
+            # HTML elements, instead of putting it in the tree.
+            return False
+        dtd = root.getroottree().docinfo.internalDTD
+        if dtd is not None:
+            if preceding:
+                # We can't tell whether these came before or after
+                # the doctype.
+                return False
+            for _ in dtd.iterentities():
+                # lxml expands these entities in its tree, but leaves
+                # them out of its events.
+                return False
+            self.doctype(dtd.name, dtd.external_id, dtd.system_url)
+        preceding.reverse()
+
+        # Work out ahead of time which classes to instantiate.
+        tag_class = cast(Type[Tag], soup.element_classes.get(Tag, Tag))
+        string_class = cast(
+            Type[NavigableString],
+            soup.element_classes.get(NavigableString, NavigableString),
+        )
+        comment_class = cast(
+            Type[NavigableString], soup.element_classes.get(Comment, Comment)
+        )
+        pi_class = cast(
+            Type[NavigableString],
+            soup.element_classes.get(
+                self.processing_instruction_class, self.processing_instruction_class
+            ),
+        )
+        spaces = soup.ASCII_SPACES
+        # lxml gives an HTML attribute like "disabled" its own name as
+        # a value if it has no value in the document. That's only
+        # ambiguous if the document gives one of these attributes a
+        # value somewhere.
+        booleans = None if self.is_xml else _HTML_BOOLEAN_ATTRIBUTES
+        spelled_out: Optional[bool] = None
+        events: Tuple[str, ...] = ("start", "end", "comment", "pi")
+        if self.is_xml:
+            events += ("start-ns",)
+
+        parent: Tag = soup
+        previous: Optional[PageElement] = soup._most_recent_element
+
+        # For each open tag: the class to use for the strings inside
+        # it, and whether its whitespace is preserved.
+        string_classes: List[Type[NavigableString]] = [string_class]
+        preserving: List[bool] = [False]
+
+        def add_string(text: str, container: Type[NavigableString]) -> None:
+            # Equivalent to BeautifulSoup.endData() followed by
+            # BeautifulSoup.object_was_parsed().
+            nonlocal previous
+            if not preserving[-1] and not text.strip(spaces):
+                text = "\n" if "\n" in text else " "
+            string = container(text)
+            string.parent = parent
+            if previous is not None:
+                string.previous_element = previous
+                previous.next_element = string
+            contents = parent.contents
+            if contents:
+                sibling = contents[-1]
+                string.previous_sibling = sibling
+                sibling.next_sibling = string
+            contents.append(string)
+            previous = string
+
+        nsmap: Dict[str, str] = {}
+        for top in itertools.chain(preceding, [root], root.itersiblings()):
+            if isinstance(top.tag, str):
+                walk: Iterable[Tuple[str, Any]] = etree.iterwalk(top, events)
+            elif top.tag is etree.Comment:
+                walk = [("comment", top)]
+            else:
+                walk = [("pi", top)]
+
+            for event, node in walk:
+                if event == "start":
+                    tag_name = node.tag
+                    if tag_name[0] == "{":
+                        namespace, tag_name = tag_name[1:].split("}", 1)
+                    else:
+                        namespace = None
+                    self._start_namespaces(nsmap)
+                    attrs: Any = node.items()
+                    if not nsmap and not any(k[0] == "{" for k, v in attrs):
+                        if booleans is not None and any(
+                            k == v and k in booleans for k, v in attrs
+                        ):
+                            if spelled_out is None:
+                                spelled_out = self._spells_out_booleans(markup)
+                            if spelled_out:
+                                # There's no telling whether this
+                                # attribute had a value in the document.
+                                return False
+                            attrs = tuple(
+                                [
+                                    (
+                                        intern_string(k),
+                                        "" if k == v and k in booleans else v,
+                                    )
+                                    for k, v in attrs
+                                ]
+                            )
+                        else:
+                            attrs = tuple([(intern_string(k), v) for k, v in attrs])
+                    else:
+                        attrs = self._namespaced_attributes(dict(attrs), nsmap)
+                        nsmap = {}
+                    tag = tag_class(
+                        soup,
+                        self,
+                        intern_string(tag_name),
+                        namespace,
+                        self._prefix_for_namespace(namespace),
+                        attrs,
+                        parent,
+                        previous,
+                        namespaces=self.active_namespace_prefixes[-1],
+                    )
+                    parent.contents.append(tag)
+                    parent = previous = tag
+                    if len(preserving) > self.MAX_DEPTH:
+                        # libxml2 won't build a tree this deep.
+                        return False
+
+                    profile = tag._profile
+                    preserving.append(preserving[-1] or profile.preserves_whitespace)
+                    if (
+                        profile.string_container is not None
+                        and string_class is NavigableString
+                    ):
+                        string_classes.append(profile.string_container)
+                    else:
+                        string_classes.append(string_classes[-1])
+                    text = node.text
+                    if text is not None:
+                        add_string(text, string_classes[-1])
+                    continue
+
+                if event == "start-ns":
+                    nsmap[node[0]] = node[1]
+                    continue
+
+                if event == "end":
+                    self._end_namespaces()
+                    preserving.pop()
+                    string_classes.pop()
+                    assert parent.parent is not None
+                    parent = parent.parent
+                elif event == "comment":
+                    add_string(node.text or "", comment_class)
+                else:
+                    add_string(node.target + " " + (node.text or ""), pi_class)
+                tail = node.tail
+                if tail is not None and parent is not soup:
+                    add_string(tail, string_classes[-1])
+
+        if not self.is_xml:
+            # Whitespace after the end of the document is another
+            # thing libxml2 doesn't put in the tree.
+            end = self._sample(markup[-self._SAMPLE_SIZE :])
+            match = self._TRAILING_WHITESPACE.search(end)
+            if match is not None and not (
+                isinstance(previous, NavigableString)
+                and previous.endswith(match.group(0))
+            ):
+                # The </html> tag wasn't inside something like a
+                # <script> tag, so it really did end the document.
+                add_string(match.group(1), string_class)
+
+        soup._most_recent_element = previous
+        return True
+
+    def _ends_early(self, markup: _RawMarkup) -> bool:
+        """Check whether an HTML document has a closing </html> tag
+        anywhere but at its very end.
+
+        libxml2 leaves whatever comes after such a tag out of its
+        tree, but not out of its events.
+        """
+        pattern: Pattern[Any] = (
+            self._END_OF_HTML if isinstance(markup, str) else self._END_OF_HTML_BYTES
+        )
+        match = pattern.search(markup)
+        if match is None:
+            return False
+        rest = markup[match.start() :]
+        return (
+            len(rest) > self._SAMPLE_SIZE
+            or self._FINAL_END_OF_HTML.fullmatch(self._sample(rest)) is None
+        )
+
+    def _spells_out_booleans(self, markup: _RawMarkup) -> bool:
+        """Check whether an HTML document might give a value to one of
+        the attributes in `_HTML_BOOLEAN_ATTRIBUTES`.
+
+        lxml's tree has ``disabled="disabled"`` for both ``<input
+        disabled>`` and ``<input disabled="disabled">``, but its
+        events only have a value for the second one.
+        """
+        pattern: Pattern[Any] = self._BOOLEAN_VALUE
+        if not isinstance(markup, str):
+            pattern = self._BOOLEAN_VALUE_BYTES
+        return pattern.search(markup) is not None
+
+    def _sample(self, markup: _RawMarkup) -> str:
+        """Convert part of a document to Unicode.
+
+        :param markup: A slice of the document being parsed.
+        """
+        assert self.soup is not None
+        if isinstance(markup, memoryview):
+            markup = markup.tobytes()
+        if isinstance(markup, bytes):
+            return markup.decode(self.soup.original_encoding or "utf8", "replace")
+        return markup
+
+
+class LXMLFastTreeBuilder(LXMLFastTreeBuilderForXML, LXMLTreeBuilder):
+    """An HTML tree builder that lets lxml build its own tree for the
+    whole document, then turns it into a Beautiful Soup parse tree in
+    a single pass.
+
+    This creates the same parse tree as `LXMLTreeBuilder`. lxml's
+    tree gives an attribute like ``disabled`` or ``selected`` its own
+    name as a value if it has no value in the document, so a document
+    that also has something like ``<input disabled="disabled">`` is
+    parsed the usual way.
+    """
+
+    NAME: str = "lxml-fast"
+    ALTERNATE_NAMES: Iterable[str] = ["lxml-html-fast"]
+    features: Iterable[str] = [NAME] + list(ALTERNATE_NAMES)
+
+    HARMLESS_ERRORS: Set[int] = set(
+        [
+            etree.ErrorTypes.ERR_ATTRIBUTE_REDEFINED,
+            etree.ErrorTypes.ERR_COMMENT_ABRUPTLY_ENDED,
+            etree.ErrorTypes.ERR_COMMENT_NOT_FINISHED,
+            etree.ErrorTypes.ERR_DOCTYPE_NOT_FINISHED,
+            etree.ErrorTypes.ERR_ENTITYREF_SEMICOL_MISSING,
+            etree.ErrorTypes.ERR_INVALID_CHAR,
+            etree.ErrorTypes.ERR_INVALID_DEC_CHARREF,
+            etree.ErrorTypes.ERR_INVALID_HEX_CHARREF,
+            etree.ErrorTypes.ERR_NAME_REQUIRED,
+            etree.ErrorTypes.ERR_PI_NOT_STARTED,
+            etree.ErrorTypes.ERR_SPACE_REQUIRED,
+            etree.ErrorTypes.ERR_TAG_NAME_MISMATCH,
+            etree.ErrorTypes.ERR_UNSUPPORTED_ENCODING,
+            etree.ErrorTypes.HTML_UNKNOWN_TAG,
+        ]
+    )
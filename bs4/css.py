@@ -14,13 +14,24 @@ selected against, since the `CSS` object is permanently scoped to that
 
 from __future__ import annotations
 
+from collections import OrderedDict
+import functools
+import re
+import threading
 from types import ModuleType
 from typing import (
     Any,
+    Callable,
     cast,
+    Dict,
+    Hashable,
     Iterable,
     Iterator,
+    List,
+    Mapping,
     Optional,
+    Sequence,
+    Tuple,
     TYPE_CHECKING,
 )
 import warnings
@@ -41,6 +52,363 @@ except ImportError:
     )
 
 
+class SelectorCache:
+    """Remember compiled CSS selectors, so that running the same
+    selector against many documents only compiles it once.
+
+    Selectors are keyed by the selector string, the namespace
+    mapping, the flags, and any other arguments (such as ``custom``)
+    that affect how the selector is compiled. The least recently used
+    selectors are forgotten once the cache is full. Lookups are
+    counted in `hits` and `misses`.
+
+    A `SelectorCache` can be shared between threads.
+
+    :param max_size: The most compiled selectors to keep.
+    """
+
+    max_size: int
+
+    #: The number of lookups that found a compiled selector.
+    hits: int
+
+    #: The number of lookups that didn't.
+    misses: int
+
+    _selectors: "OrderedDict[Hashable, SoupSieve]"
+    _lock: threading.Lock
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._selectors = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def __repr__(self) -> str:
+        return "<%s: %d entries, %d hits, %d misses>" % (
+            self.__class__.__name__,
+            len(self),
+            self.hits,
+            self.misses,
+        )
+
+    def __len__(self) -> int:
+        return len(self._selectors)
+
+    def reset_stats(self) -> None:
+        """Set `hits` and `misses` back to zero."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def clear(self) -> None:
+        """Forget every compiled selector. The statistics are left
+        alone.
+        """
+        with self._lock:
+            self._selectors.clear()
+
+    def resize(self, max_size: int) -> None:
+        """Change `max_size`, forgetting the least recently used
+        selectors if there are now too many.
+        """
+        with self._lock:
+            self.max_size = max_size
+            self._shrink()
+
+    @classmethod
+    def key(
+        cls,
+        select: str,
+        namespaces: Optional[_NamespaceMapping],
+        flags: int,
+        kwargs: Dict[str, Any],
+    ) -> Optional[Hashable]:
+        """Find the cache key for a selector.
+
+        :return: A key, or None if one of the arguments can't be
+            made hashable, in which case the selector shouldn't be
+            cached.
+        """
+        frozen_kwargs: Any = ()
+        if kwargs:
+            frozen_kwargs = tuple(
+                sorted((k, cls._freeze(v)) for k, v in kwargs.items())
+            )
+        key = (select, cls._freeze(namespaces), flags, frozen_kwargs)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    @classmethod
+    def _freeze(cls, value: Any) -> Any:
+        """Turn a dictionary or a list into a tuple that can be
+        hashed.
+        """
+        if value is None:
+            return None
+        if isinstance(value, (dict, Mapping)):
+            return tuple(sorted((k, cls._freeze(v)) for k, v in value.items()))
+        if isinstance(value, (list, set, frozenset)):
+            return tuple(value)
+        return value
+
+    def get(self, key: Hashable, compile: Callable[[], SoupSieve]) -> SoupSieve:
+        """Find a compiled selector, compiling and remembering it if
+        it's not in the cache.
+
+        :param key: A key obtained from `SelectorCache.key`.
+        :param compile: Compiles the selector.
+        """
+        with self._lock:
+            compiled = self._selectors.get(key)
+            if compiled is not None:
+                self.hits += 1
+                self._selectors.move_to_end(key)
+                return compiled
+            self.misses += 1
+
+        # Compiling is done outside the lock, so that a slow (or
+        # invalid) selector doesn't hold up other threads. Two
+        # threads might compile the same selector at once; one of the
+        # results will be kept.
+        compiled = compile()
+        with self._lock:
+            self._selectors[key] = compiled
+            self._selectors.move_to_end(key)
+            self._shrink()
+        return compiled
+
+    def _shrink(self) -> None:
+        while len(self._selectors) > max(self.max_size, 0):
+            self._selectors.popitem(last=False)
+
+
+# A compound selector that SimpleSelector can match: a tag name
+# (already converted to lowercase), and the ids and classes the tag
+# must have.
+_Compound = Tuple[Optional[str], Tuple[str, ...], Tuple[str, ...]]
+
+
+class SimpleSelector:
+    """A CSS selector simple enough to be matched without Soup Sieve.
+
+    A simple selector is made of compound selectors like ``a``,
+    ``.price``, ``#main`` or ``div.item``, joined by descendant
+    (``ul li``) or child (``ul > li``) combinators. Anything else,
+    including escapes, attribute selectors, pseudo-classes, the
+    universal selector and selector lists, is left to Soup Sieve.
+
+    A `SimpleSelector` finds exactly the same tags as Soup Sieve
+    would, in the same order, when run against an HTML document. It's
+    not used on XML documents, where tag names are case-sensitive and
+    namespaces come into play.
+
+    Use `SimpleSelector.parse` to get one.
+    """
+
+    #: Whitespace, as CSS sees it.
+    WHITESPACE: str = " \t\n\r\f"
+
+    #: One piece of a simple selector: a combinator, or a tag name, id
+    #: or class.
+    #:
+    #: :meta private:
+    TOKEN = re.compile(
+        r"(?P<combinator>[ \t\n\r\f]*>[ \t\n\r\f]*|[ \t\n\r\f]+)"
+        r"|(?P<prefix>[.#]?)(?P<identifier>-?[_a-zA-Z][-_a-zA-Z0-9]*)"
+    )
+
+    #: Soup Sieve splits a 'class' attribute that's a string (rather
+    #: than a list) into words on CSS whitespace only.
+    #:
+    #: :meta private:
+    CLASS_WORDS = re.compile(r"[^ \t\n\r\f]+")
+
+    #: The compound selectors, from left to right.
+    compounds: Tuple[_Compound, ...]
+
+    #: The combinator (" " or ">") between each compound selector and
+    #: the next.
+    combinators: Tuple[str, ...]
+
+    _document_class: type
+
+    def __init__(
+        self, compounds: Sequence[_Compound], combinators: Sequence[str]
+    ):
+        # Import here to avoid circular import
+        from bs4 import BeautifulSoup
+
+        self.compounds = tuple(compounds)
+        self.combinators = tuple(combinators)
+        self._document_class = BeautifulSoup
+
+    def __repr__(self) -> str:
+        parts = []
+        for i, (name, ids, classes) in enumerate(self.compounds):
+            if i and self.combinators[i - 1] != " ":
+                parts.append(self.combinators[i - 1])
+            parts.append(
+                (name or "")
+                + "".join("#" + id for id in ids)
+                + "".join("." + class_ for class_ in classes)
+            )
+        return "<%s: %s>" % (self.__class__.__name__, " ".join(parts))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def parse(select: str) -> Optional[SimpleSelector]:
+        """Turn a CSS selector into a `SimpleSelector`.
+
+        :return: A `SimpleSelector`, or None if the selector is not
+            simple enough.
+        """
+        select = select.strip(SimpleSelector.WHITESPACE)
+        compounds: List[_Compound] = []
+        combinators: List[str] = []
+        name: Optional[str] = None
+        ids: List[str] = []
+        classes: List[str] = []
+        empty = True
+        pos = 0
+        while pos < len(select):
+            match = SimpleSelector.TOKEN.match(select, pos)
+            if match is None:
+                return None
+            pos = match.end()
+            combinator = match.group("combinator")
+            if combinator is not None:
+                if empty:
+                    return None
+                compounds.append((name, tuple(ids), tuple(classes)))
+                combinators.append(">" if ">" in combinator else " ")
+                name, ids, classes, empty = None, [], [], True
+                continue
+            prefix = match.group("prefix")
+            identifier = match.group("identifier")
+            if prefix == "#":
+                ids.append(identifier)
+            elif prefix == ".":
+                classes.append(identifier)
+            elif empty:
+                name = identifier.lower()
+            else:
+                # A tag name can't come after an id or a class.
+                return None
+            empty = False
+        if empty:
+            return None
+        compounds.append((name, tuple(ids), tuple(classes)))
+        return SimpleSelector(compounds, combinators)
+
+    def match(self, tag: Tag) -> bool:
+        """Check whether a `element.Tag` matches this selector."""
+        return self._match(tag, len(self.compounds) - 1)
+
+    def select(self, scope: Tag, limit: int = 0) -> Iterator[Tag]:
+        """Find the `element.Tag` objects beneath ``scope`` that match
+        this selector, in document order.
+
+        If the document is indexed, tags are looked up in the
+        `TreeIndex` rather than by looking at every `element.Tag`
+        beneath ``scope``.
+
+        :param limit: After finding this number of results, stop
+            looking.
+        """
+        from bs4.element import Tag
+
+        candidates: Optional[Iterable[Any]] = None
+        if scope.contents:
+            index = scope._tree_index()
+            if index is not None:
+                name, ids, classes = self.compounds[-1]
+                attrs: Dict[str, Any] = {}
+                if ids:
+                    attrs["id"] = ids[0]
+                if classes:
+                    attrs["class"] = classes[0]
+                candidates = index.candidates(
+                    scope, name, attrs, {}, ignore_case=True
+                )
+        if candidates is None:
+            candidates = scope.descendants
+        last = len(self.compounds) - 1
+        found = 0
+        for candidate in candidates:
+            if isinstance(candidate, Tag) and self._match(candidate, last):
+                yield candidate
+                found += 1
+                if found == limit:
+                    break
+
+    def _match(self, tag: Tag, i: int) -> bool:
+        """Check whether a `element.Tag` matches the compound selector
+        at position ``i``, and its ancestors match everything to the
+        left of it.
+        """
+        if not self._match_compound(tag, self.compounds[i]):
+            return False
+        if i == 0:
+            return True
+        parent = self._parent(tag)
+        if self.combinators[i - 1] == ">":
+            return parent is not None and self._match(parent, i - 1)
+        while parent is not None:
+            if self._match(parent, i - 1):
+                return True
+            parent = self._parent(parent)
+        return False
+
+    def _parent(self, tag: Tag) -> Optional[Tag]:
+        """Find a `element.Tag`'s parent. The `BeautifulSoup` object
+        itself doesn't count.
+        """
+        parent = tag.parent
+        if isinstance(parent, self._document_class):
+            return None
+        return parent
+
+    @classmethod
+    def _match_compound(cls, tag: Tag, compound: _Compound) -> bool:
+        name, ids, classes = compound
+        if name is not None:
+            tag_name = tag.name
+            # HTML tag names are compared without regard to (ASCII)
+            # case.
+            if tag_name != name and (
+                not tag_name.isascii() or tag_name.lower() != name
+            ):
+                return False
+        if ids:
+            value = cls._attribute(tag, "id", "")
+            for id in ids:
+                if id != value:
+                    return False
+        if classes:
+            value = cls._attribute(tag, "class", [])
+            if isinstance(value, str):
+                value = cls.CLASS_WORDS.findall(value)
+            for class_ in classes:
+                if class_ not in value:
+                    return False
+        return True
+
+    @classmethod
+    def _attribute(cls, tag: Tag, name: str, default: Any) -> Any:
+        """Look up an attribute the way Soup Sieve does in an HTML
+        document: the attribute name is compared without regard to
+        (ASCII) case.
+        """
+        for key, value in tag.attrs.items():
+            if key == name or (key.isascii() and key.lower() == name):
+                return "" if value is None else value
+        return default
+
+
 class CSS(object):
     """A proxy object against the ``soupsieve`` library, to simplify its
     CSS selector API.
@@ -55,6 +423,16 @@ class CSS(object):
         intended for use in unit tests.
     """
 
+    #: Compiled selectors are kept here and shared by every `CSS`
+    #: object. Set this to None to compile every selector every time
+    #: it's used.
+    cache: Optional[SelectorCache] = SelectorCache()
+
+    #: If this is True, select(), select_one() and iselect() match
+    #: selectors that can be turned into a `SimpleSelector` without
+    #: going through Soup Sieve.
+    native_matching: bool = True
+
     def __init__(self, tag: element.Tag, api: Optional[ModuleType] = None):
         if api is None:
             api = soupsieve
@@ -88,6 +466,61 @@ class CSS(object):
             ns = self.tag._namespaces
         return ns
 
+    def _simple(
+        self,
+        select: str,
+        namespaces: Optional[_NamespaceMapping],
+        flags: int,
+        kwargs: Dict[str, Any],
+    ) -> Optional[SimpleSelector]:
+        """Find a `SimpleSelector` that does the same job as a call to
+        Soup Sieve, if there is one.
+        """
+        if (
+            not self.native_matching
+            or self.api is not soupsieve
+            or namespaces is not None
+            or flags
+            or kwargs
+            or not isinstance(select, str)
+            or self.tag._is_xml
+            or "" in self.tag._namespaces
+        ):
+            return None
+        return SimpleSelector.parse(select)
+
+    def _match_function(
+        self,
+        select: str,
+        namespaces: Optional[_NamespaceMapping] = None,
+        flags: int = 0,
+        **kwargs: Any,
+    ) -> Tuple[Optional[Callable[[Tag], bool]], Optional[str]]:
+        """Find a function that checks whether a `element.Tag` beneath
+        this one would be found by calling select() with the same
+        arguments.
+
+        :return: A 2-tuple (function, name). ``function`` is None if
+            there's no way to check one `element.Tag` at a time. If
+            ``name`` is not None, only a `element.Tag` whose name
+            lowercases to ``name`` can match.
+        """
+        simple = self._simple(select, namespaces, flags, kwargs)
+        if simple is not None:
+            return simple.match, simple.compounds[-1][0]
+        compiled = self.compile(select, namespaces, flags, **kwargs)
+        css_match = getattr(self.api, "css_match", None)
+        if css_match is None or not hasattr(css_match, "CSSMatch"):
+            return None, None
+        # This is the object Soup Sieve itself uses to run select().
+        # Making one and reusing it keeps the results the same (a
+        # selector like :scope depends on where the search started),
+        # and lets Soup Sieve cache what it learns about the tree.
+        match = css_match.CSSMatch(
+            compiled.selectors, self.tag, compiled.namespaces, compiled.flags
+        ).match
+        return cast(Callable[["Tag"], bool], match), None
+
     def _rs(self, results: Iterable[Tag]) -> ResultSet[Tag]:
         """Normalize a list of results to a py:class:`ResultSet`.
 
@@ -126,7 +559,14 @@ class CSS(object):
         :return: A precompiled selector object.
         :rtype: soupsieve.SoupSieve
         """
-        return self.api.compile(select, self._ns(namespaces, select), flags, **kwargs)
+        ns = self._ns(namespaces, select)
+        cache = self.cache
+        if cache is None or isinstance(select, self.api.SoupSieve):
+            return self.api.compile(select, ns, flags, **kwargs)
+        key = cache.key(select, ns, flags, kwargs)
+        if key is None:
+            return self.api.compile(select, ns, flags, **kwargs)
+        return cache.get(key, lambda: self.api.compile(select, ns, flags, **kwargs))
 
     def select_one(
         self,
@@ -154,9 +594,10 @@ class CSS(object):
         :param kwargs: Keyword arguments to be passed into Soup Sieve's
            `soupsieve.select_one() <https://facelessuser.github.io/soupsieve/api/#soupsieveselect_one>`_ method.
         """
-        return self.api.select_one(
-            select, self.tag, self._ns(namespaces, select), flags, **kwargs
-        )
+        simple = self._simple(select, namespaces, flags, kwargs)
+        if simple is not None:
+            return next(simple.select(self.tag, 1), None)
+        return self.compile(select, namespaces, flags, **kwargs).select_one(self.tag)
 
     def select(
         self,
@@ -189,10 +630,11 @@ class CSS(object):
         if limit is None:
             limit = 0
 
+        simple = self._simple(select, namespaces, flags, kwargs)
+        if simple is not None:
+            return self._rs(simple.select(self.tag, limit))
         return self._rs(
-            self.api.select(
-                select, self.tag, self._ns(namespaces, select), limit, flags, **kwargs
-            )
+            self.compile(select, namespaces, flags, **kwargs).select(self.tag, limit)
         )
 
     def iselect(
@@ -226,8 +668,11 @@ class CSS(object):
         :param kwargs: Keyword arguments to be passed into Soup Sieve's
            `soupsieve.iselect() <https://facelessuser.github.io/soupsieve/api/#soupsieveiselect>`_ method.
         """
-        return self.api.iselect(
-            select, self.tag, self._ns(namespaces, select), limit, flags, **kwargs
+        simple = self._simple(select, namespaces, flags, kwargs)
+        if simple is not None:
+            return simple.select(self.tag, limit)
+        return self.compile(select, namespaces, flags, **kwargs).iselect(
+            self.tag, limit
         )
 
     def closest(
@@ -258,9 +703,7 @@ class CSS(object):
            `soupsieve.closest() <https://facelessuser.github.io/soupsieve/api/#soupsieveclosest>`_ method.
 
         """
-        return self.api.closest(
-            select, self.tag, self._ns(namespaces, select), flags, **kwargs
-        )
+        return self.compile(select, namespaces, flags, **kwargs).closest(self.tag)
 
     def match(
         self,
@@ -295,9 +738,7 @@ class CSS(object):
         """
         return cast(
             bool,
-            self.api.match(
-                select, self.tag, self._ns(namespaces, select), flags, **kwargs
-            ),
+            self.compile(select, namespaces, flags, **kwargs).match(self.tag),
         )
 
     def filter(
@@ -331,8 +772,11 @@ class CSS(object):
             <https://facelessuser.github.io/soupsieve/api/#soupsievefilter>`_
             method.
         """
+        # Soup Sieve's type hints say filter() takes an iterable of
+        # tags, but given a single Tag it filters that tag's children,
+        # which is what's wanted here.
         return self._rs(
-            self.api.filter(
-                select, self.tag, self._ns(namespaces, select), flags, **kwargs
+            self.compile(select, namespaces, flags, **kwargs).filter(
+                cast("Iterable[element.Tag]", self.tag)
             )
         )
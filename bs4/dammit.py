@@ -13,14 +13,18 @@ to reflect a new encoding; that's the job of `TreeBuilder`.
 __license__ = "MIT"
 
 from html.entities import codepoint2name
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 import codecs
 from html.entities import html5
 import re
+import time
 from logging import Logger, getLogger
 from types import ModuleType
 from typing import (
+    Any,
+    Callable,
     Dict,
+    Hashable,
     Iterator,
     List,
     Optional,
@@ -68,12 +72,166 @@ except ImportError:
             pass
 
 
+class CharsetDetector:
+    """Guess at the encoding of a bytestring using a character set
+    detection library, while keeping the cost under control.
+
+    Instead of the whole bytestring, the library is given samples
+    taken from the beginning, the end, and evenly spaced points in
+    between. It starts out with a single ``sample_size`` sample,
+    and the amount of data is doubled each time, until the library
+    is at least ``confidence`` sure of its guess, or until
+    ``max_sample_size`` bytes have been examined.
+
+    The time spent and the number of bytes examined are added up in
+    `calls`, `seconds` and `bytes_examined`, so you can see what
+    detection is costing you.
+
+    :param name: A name for this detector.
+    :param detect: A function that takes a bytestring and returns a
+        2-tuple (encoding, confidence). The confidence is a number
+        between 0 and 1, or None if the library doesn't say.
+    :param sample_size: The size, in bytes, of each sample.
+    :param max_sample_size: The most data, in bytes, to give the
+        library for one bytestring.
+    :param confidence: Stop once the library is this confident.
+    """
+
+    name: str
+    sample_size: int
+    max_sample_size: int
+    confidence: float
+
+    #: The number of bytestrings this detector has looked at.
+    calls: int
+
+    #: The total time, in seconds, spent detecting encodings.
+    seconds: float
+
+    #: The total number of bytes passed into the library.
+    bytes_examined: int
+
+    def __init__(
+        self,
+        name: str,
+        detect: Callable[[bytes], Tuple[Optional[_Encoding], Optional[float]]],
+        sample_size: int = 4 * 1024,
+        max_sample_size: int = 64 * 1024,
+        confidence: float = 0.9,
+    ):
+        self.name = name
+        self._detect = detect
+        self.sample_size = sample_size
+        self.max_sample_size = max_sample_size
+        self.confidence = confidence
+        self.reset_stats()
+
+    @classmethod
+    def for_module(cls, module: ModuleType, **kwargs: Any) -> "CharsetDetector":
+        """Create a `CharsetDetector` that uses a library with the same
+        ``detect()`` function as chardet, such as cchardet or
+        charset-normalizer.
+
+        :param module: The library.
+        :param kwargs: Passed into the `CharsetDetector` constructor.
+        """
+
+        def detect(data: bytes) -> Tuple[Optional[_Encoding], Optional[float]]:
+            result = module.detect(data)
+            return result["encoding"], result.get("confidence")
+
+        return cls(module.__name__, detect, **kwargs)
+
+    def __repr__(self) -> str:
+        return "<%s %s>" % (self.__class__.__name__, self.name)
+
+    def reset_stats(self) -> None:
+        """Set `calls`, `seconds` and `bytes_examined` back to zero."""
+        self.calls = 0
+        self.seconds = 0.0
+        self.bytes_examined = 0
+
+    def samples(self, data: bytes) -> Iterator[bytes]:
+        """Yield larger and larger samples of a bytestring.
+
+        :param data: A bytestring.
+        :yield: A series of bytestrings, each about twice as large as
+            the last. If ``data`` isn't too big, the last one is
+            ``data`` itself.
+        """
+        piece = min(self.sample_size, self.max_sample_size)
+        total = piece
+        while True:
+            if total >= len(data):
+                yield data
+                return
+            count = total // piece
+            if count == 1:
+                yield data[:total]
+            else:
+                # The first piece, the last piece, and evenly spaced
+                # pieces in between.
+                step = (len(data) - piece) // (count - 1)
+                pieces = [data[i * step : i * step + piece] for i in range(count - 1)]
+                pieces.append(data[-piece:])
+                yield b"".join(pieces)
+            if total >= self.max_sample_size:
+                return
+            total = min(total * 2, self.max_sample_size)
+
+    def detect(self, data: bytes) -> Optional[_Encoding]:
+        """Guess at the encoding of a bytestring.
+
+        :param data: A bytestring.
+        :return: The name of an encoding, or None if the library
+            couldn't make a guess.
+        """
+        start = time.perf_counter()
+        encoding = None
+        try:
+            for sample in self.samples(data):
+                self.bytes_examined += len(sample)
+                encoding, confidence = self._detect(sample)
+                if (
+                    encoding is not None
+                    and confidence is not None
+                    and confidence >= self.confidence
+                ):
+                    break
+        finally:
+            self.calls += 1
+            self.seconds += time.perf_counter() - start
+        return encoding
+
+
+#: The `CharsetDetector` objects that are consulted, in order, when
+#: there's no other way to tell what encoding a document is in. Use
+#: `register_charset_detector` to add your own.
+charset_detectors: List[CharsetDetector] = []
+
+
+def register_charset_detector(detector: CharsetDetector) -> None:
+    """Make a `CharsetDetector` the first one consulted when a
+    document's encoding needs to be guessed.
+    """
+    charset_detectors.insert(0, detector)
+
+
+if chardet_module is not None:
+    register_charset_detector(CharsetDetector.for_module(chardet_module))
+
+
 def _chardet_dammit(s: bytes) -> Optional[str]:
-    """Try as hard as possible to detect the encoding of a bytestring."""
-    if chardet_module is None or isinstance(s, str):
+    """Try as hard as possible to detect the encoding of a bytestring,
+    using each of the `charset_detectors` in turn.
+    """
+    if isinstance(s, str):
         return None
-    module = chardet_module
-    return module.detect(s)["encoding"]
+    for detector in charset_detectors:
+        encoding = detector.detect(s)
+        if encoding is not None:
+            return encoding
+    return None
 
 
 # Build bytestring and Unicode versions of regular expressions for finding
@@ -680,6 +838,74 @@ class EncodingDetector:
             data = data[4:]
         return data, encoding
 
+    #: How many samples `decodes_samples` takes from across a document.
+    DECODING_SAMPLES: int = 8
+
+    #: The size, in bytes, of each sample `decodes_samples` takes.
+    DECODING_SAMPLE_SIZE: int = 4096
+
+    @classmethod
+    def decodes_samples(
+        cls, markup: Union[bytes, memoryview], encoding: _Encoding
+    ) -> bool:
+        """Quickly check whether a bytestring could be in the given encoding.
+
+        Instead of decoding the whole bytestring, this decodes a few
+        evenly spaced samples taken from all across it. That's enough
+        to rule out an encoding in most cases, at a tiny fraction of
+        the cost of parsing the document in that encoding and seeing
+        whether the parser gives up partway through.
+
+        :param markup: A bytestring or memoryview, with any byte-order
+            mark already stripped.
+        :param encoding: The name of an encoding.
+        :return: False if any sample can't be decoded with ``encoding``.
+            True if they all can, or if Python doesn't know the encoding.
+        """
+        encoding = UnicodeDammit.CHARSET_ALIASES.get(encoding, encoding)
+        try:
+            decoder_class = codecs.getincrementaldecoder(encoding)
+        except LookupError:
+            return True
+
+        for offset, sample in cls._samples(markup):
+            # A sample may start partway through a multibyte character
+            # in some other encoding, so try skipping a few bytes. A
+            # sample that ends partway through a character is fine,
+            # since it's not the final chunk of anything.
+            for skip in range(4 if offset else 1):
+                try:
+                    decoder_class("strict").decode(sample[skip:])
+                    break
+                except UnicodeDecodeError:
+                    continue
+            else:
+                return False
+        return True
+
+    @classmethod
+    def _samples(cls, markup: Union[bytes, memoryview]) -> Iterator[Tuple[int, bytes]]:
+        """Take the samples `decodes_samples` looks at.
+
+        :yield: A series of (offset, bytestring) 2-tuples.
+        """
+        size = cls.DECODING_SAMPLE_SIZE
+        count = cls.DECODING_SAMPLES
+        if len(markup) <= size * count:
+            # It's cheap enough to check the whole thing.
+            yield 0, bytes(markup)
+            return
+        step = (len(markup) - size) // (count - 1)
+        # Each sample starts at a multiple of four bytes, so it can't
+        # start partway through a UTF-16 or UTF-32 character.
+        offsets = [(i * step) & ~3 for i in range(count)]
+        for offset in offsets:
+            if offset == offsets[-1]:
+                # Rounding may have left a few bytes uncovered.
+                yield offset, bytes(markup[offset:])
+            else:
+                yield offset, bytes(markup[offset : offset + size])
+
     @classmethod
     def find_declared_encoding(
         cls,
@@ -731,6 +957,153 @@ class EncodingDetector:
         return None
 
 
+class EncodingCache:
+    """Remember which encoding worked for documents from a given
+    source, so the next document from that source can be decoded
+    without any guesswork.
+
+    Documents are told apart by a key supplied by the caller (a
+    hostname, say) combined with a fingerprint taken from the start
+    of the document: its byte-order mark, if any, and the encoding
+    declared in its first ``prefix_size`` bytes, if any. Two
+    documents with the same key are very likely to be in the same
+    encoding.
+
+    The least recently used entries are forgotten once the cache
+    is full. Lookups are counted in `hits` and `misses`.
+
+    :param max_size: The most entries to keep.
+    :param prefix_size: How many bytes from the start of a document
+        to search for a declared encoding.
+    """
+
+    max_size: int
+    prefix_size: int
+
+    #: The number of lookups that found an encoding.
+    hits: int
+
+    #: The number of lookups that didn't.
+    misses: int
+
+    _encodings: "OrderedDict[Hashable, _Encoding]"
+
+    def __init__(self, max_size: int = 1024, prefix_size: int = 1024):
+        self.max_size = max_size
+        self.prefix_size = prefix_size
+        self._encodings = OrderedDict()
+        self.reset_stats()
+
+    def __repr__(self) -> str:
+        return "<%s: %d entries, %d hits, %d misses>" % (
+            self.__class__.__name__,
+            len(self),
+            self.hits,
+            self.misses,
+        )
+
+    def __len__(self) -> int:
+        return len(self._encodings)
+
+    def reset_stats(self) -> None:
+        """Set `hits` and `misses` back to zero."""
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self) -> None:
+        """Forget every encoding. The statistics are left alone."""
+        self._encodings.clear()
+
+    def key(
+        self, source: Optional[Hashable], markup: Union[bytes, memoryview]
+    ) -> Hashable:
+        """Find the cache key for a document.
+
+        :param source: A key supplied by the caller, such as the
+            hostname the document came from.
+        :param markup: The document, as a bytestring or a
+            `memoryview`.
+        """
+        prefix = bytes(markup[: self.prefix_size])
+        prefix, sniffed_encoding = EncodingDetector.strip_byte_order_mark(prefix)
+        declared_encoding = EncodingDetector.find_declared_encoding(
+            prefix, is_html=True
+        )
+        return (source, sniffed_encoding, declared_encoding)
+
+    def get(
+        self, source: Optional[Hashable], markup: Union[bytes, memoryview]
+    ) -> Optional[_Encoding]:
+        """Find the encoding that last worked for a document like this
+        one, and count a hit or a miss.
+
+        A remembered encoding that obviously can't decode this
+        document (see `EncodingDetector.decodes_samples`) is
+        forgotten, and counts as a miss. So is a remembered encoding
+        other than UTF-8, if this document is valid UTF-8 and not
+        plain ASCII. An encoding like windows-1252 can decode any
+        bytestring, but a document that happens to be valid UTF-8 is
+        almost certainly UTF-8.
+
+        :param source: A key supplied by the caller.
+        :param markup: The document.
+        :return: An encoding, or None.
+        """
+        key = self.key(source, markup)
+        encoding = self._encodings.get(key)
+        if encoding is not None and (
+            not EncodingDetector.decodes_samples(markup, encoding)
+            or self._is_utf8_instead(markup, encoding)
+        ):
+            del self._encodings[key]
+            encoding = None
+        if encoding is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._encodings.move_to_end(key)
+        return encoding
+
+    @classmethod
+    def _is_utf8_instead(
+        cls, markup: Union[bytes, memoryview], encoding: _Encoding
+    ) -> bool:
+        """Is a document that was going to be decoded with ``encoding``
+        actually non-ASCII UTF-8?
+
+        Like `EncodingDetector.decodes_samples`, this only looks at
+        samples taken from across the document.
+        """
+        try:
+            if codecs.lookup(encoding).name in ("utf-8", "utf-8-sig"):
+                return False
+        except LookupError:
+            pass
+        if not EncodingDetector.decodes_samples(markup, "utf-8"):
+            return False
+        return any(
+            not sample.isascii() for offset, sample in EncodingDetector._samples(markup)
+        )
+
+    def put(
+        self,
+        source: Optional[Hashable],
+        markup: Union[bytes, memoryview],
+        encoding: _Encoding,
+    ) -> None:
+        """Remember the encoding that worked for a document.
+
+        :param source: A key supplied by the caller.
+        :param markup: The document.
+        :param encoding: The encoding that was used to decode it.
+        """
+        key = self.key(source, markup)
+        self._encodings[key] = encoding
+        self._encodings.move_to_end(key)
+        while len(self._encodings) > self.max_size:
+            self._encodings.popitem(last=False)
+
+
 class UnicodeDammit:
     """A class for detecting the encoding of a bytestring containing an
     HTML or XML document, and decoding it to Unicode. If the source
@@ -1406,3 +1779,165 @@ class UnicodeDammit:
             # Store the final chunk.
             byte_chunks.append(in_bytes[chunk_start:])
         return b"".join(byte_chunks)
+
+
+class IncrementalUnicodeDammit:
+    """Detect the encoding of a document that arrives a chunk at a
+    time, and (optionally) decode it to Unicode as it comes in.
+
+    Incoming bytes are held back until there are enough of them to
+    make a good guess at the document's encoding, using the same
+    rules as `EncodingDetector`. After that, each chunk is passed
+    through as soon as it arrives, and an incremental decoder
+    carries any partial multibyte character over into the next
+    chunk.
+
+    An encoding is chosen only if it can decode the held-back bytes
+    without errors. If no encoding can do that, the first usable
+    encoding is chosen and undecodable bytes are replaced with
+    REPLACEMENT CHARACTER.
+
+    :param known_definite_encodings: These encodings will be tried
+        first, in order. If any are given, the encoding is chosen
+        as soon as the first chunk arrives, instead of waiting to
+        see whether the document declares its own encoding.
+
+    :param is_html: If True, the document is treated as HTML.
+        Otherwise it's treated as XML.
+
+    :param exclude_encodings: These encodings will not be considered.
+
+    :param user_encodings: As with `EncodingDetector`.
+    """
+
+    #: Hold back this many bytes before guessing at the encoding. The
+    #: HTML standard says to look for a <meta> tag in the first 1024
+    #: bytes.
+    SNIFF_SIZE: int = 1024
+
+    def __init__(
+        self,
+        known_definite_encodings: Optional[_Encodings] = None,
+        is_html: bool = False,
+        exclude_encodings: Optional[_Encodings] = None,
+        user_encodings: Optional[_Encodings] = None,
+    ):
+        self.known_definite_encodings = list(known_definite_encodings or [])
+        self.is_html = is_html
+        self.exclude_encodings = exclude_encodings
+        self.user_encodings = user_encodings
+        self.original_encoding = None
+        self.declared_html_encoding = None
+        self.contains_replacement_characters = False
+        self._buffer = b""
+        self._decoder = None
+
+    #: The encoding that was chosen for the document, or None if
+    #: it hasn't been chosen yet.
+    original_encoding: Optional[_Encoding]
+
+    #: The encoding declared within an HTML document, if any.
+    declared_html_encoding: Optional[_Encoding]
+
+    #: This is True if any U+FFFD REPLACEMENT CHARACTER characters
+    #: were introduced while decoding the document.
+    contains_replacement_characters: bool
+
+    _buffer: bytes
+    _decoder: Optional[codecs.IncrementalDecoder]
+
+    def detect(self, chunk: bytes, final: bool = False) -> bytes:
+        """Pass along the next chunk of a document, holding it back if
+        the encoding hasn't been chosen yet.
+
+        Use this if something else (such as lxml) will be doing the
+        decoding, and only needs to be told `original_encoding`.
+
+        :param chunk: The next chunk of the document.
+        :param final: True if this is the last chunk of the document.
+        :return: Any bytes that can now be passed along. Any byte-order
+            mark will have been stripped.
+        """
+        if self._decoder is not None:
+            return chunk
+        markup, _ = self._choose_encoding(chunk, final)
+        return markup
+
+    def decode(self, chunk: bytes, final: bool = False) -> str:
+        """Convert the next chunk of a document to Unicode.
+
+        :param chunk: The next chunk of the document.
+        :param final: True if this is the last chunk of the document.
+        :return: As much of the document as can now be decoded. This
+            may be the empty string if the encoding hasn't been chosen
+            yet, or if ``chunk`` ends partway through a character.
+        """
+        if self._decoder is None:
+            _, text = self._choose_encoding(chunk, final)
+            return text
+        try:
+            return self._decoder.decode(chunk, final)
+        except UnicodeDecodeError:
+            # From this point on, replace any bytes that can't be decoded.
+            self.contains_replacement_characters = True
+            decoder = self._decoder_for(cast(str, self.original_encoding), "replace")
+            assert decoder is not None
+            decoder.setstate(self._decoder.getstate())
+            self._decoder = decoder
+            return decoder.decode(chunk, final)
+
+    def _decoder_for(
+        self, encoding: _Encoding, errors: str
+    ) -> Optional[codecs.IncrementalDecoder]:
+        encoding = UnicodeDammit.CHARSET_ALIASES.get(encoding, encoding)
+        try:
+            return codecs.getincrementaldecoder(encoding)(errors)
+        except LookupError:
+            return None
+
+    def _choose_encoding(self, chunk: bytes, final: bool) -> Tuple[bytes, str]:
+        """Add a chunk to the held-back bytes, and choose an encoding if
+        there's enough data to go on.
+
+        :return: A 2-tuple (bytes released, the same bytes decoded).
+            Both will be empty if the encoding wasn't chosen.
+        """
+        self._buffer += chunk
+        if (
+            not final
+            and not self.known_definite_encodings
+            and len(self._buffer) < self.SNIFF_SIZE
+        ):
+            return b"", ""
+
+        detector = EncodingDetector(
+            self._buffer,
+            self.known_definite_encodings,
+            self.is_html,
+            self.exclude_encodings,
+            self.user_encodings,
+        )
+        self._buffer = b""
+        markup = detector.markup
+        for errors in ("strict", "replace"):
+            for encoding in detector.encodings:
+                decoder = self._decoder_for(encoding, errors)
+                if decoder is None:
+                    continue
+                try:
+                    text = decoder.decode(markup, final)
+                except UnicodeDecodeError:
+                    continue
+                self._decoder = decoder
+                self.original_encoding = encoding.lower()
+                if self.is_html:
+                    self.declared_html_encoding = detector.declared_encoding
+                if errors == "replace":
+                    self.contains_replacement_characters = True
+                return markup, text
+
+        # Every encoding was excluded; there's nothing left to do
+        # but guess.
+        self._decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        self.original_encoding = "utf-8"
+        return markup, self._decoder.decode(markup, final)
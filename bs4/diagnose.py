@@ -4,6 +4,7 @@
 __license__ = "MIT"
 
 import cProfile
+import mmap
 from io import BytesIO
 from html.parser import HTMLParser
 import bs4
@@ -11,7 +12,6 @@ from bs4 import BeautifulSoup, __version__
 from bs4.builder import builder_registry
 from typing import (
     Any,
-    IO,
     List,
     Optional,
     Tuple,
@@ -25,6 +25,7 @@ import pstats
 import random
 import tempfile
 import time
+import tracemalloc
 import traceback
 import sys
 
@@ -102,7 +103,8 @@ def lxml_trace(data: "_IncomingMarkup", html: bool = True, **kwargs: Any) -> Non
     recover = kwargs.pop("recover", True)
     if isinstance(data, str):
         data = data.encode("utf8")
-    if not isinstance(data, IO):
+    reader: Any = data
+    if isinstance(data, (bytes, memoryview, mmap.mmap)):
         reader = BytesIO(data)
     for event, element in etree.iterparse(reader, html=html, recover=recover, **kwargs):
         print(("%s, %4s, %s" % (event, element.tag, element.text)))
@@ -219,7 +221,13 @@ def benchmark_parsers(num_elements: int = 100000) -> None:
     data = rdoc(num_elements)
     print(("Generated a large invalid HTML document (%d bytes)." % len(data)))
 
-    for parser_name in ["lxml", ["lxml", "html"], "html5lib", "html.parser"]:
+    for parser_name in [
+        "lxml",
+        "lxml-fast",
+        ["lxml", "html"],
+        "html5lib",
+        "html.parser",
+    ]:
         success = False
         try:
             a = time.time()
@@ -248,6 +256,176 @@ def benchmark_parsers(num_elements: int = 100000) -> None:
     print(("Raw html5lib parsed the markup in %.2fs." % (b - a)))
 
 
+def benchmark_memory(num_elements: int = 100000, parser: str = "html.parser") -> None:
+    """Measure how much memory a parse tree takes up, per node.
+
+    :param num_elements: Size of the randomly generated document.
+    :param parser: The tree builder to use.
+    """
+    data = rdoc(num_elements)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        soup = BeautifulSoup(data, parser)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    tags = strings = 0
+    for node in soup.descendants:
+        if isinstance(node, bs4.Tag):
+            tags += 1
+        else:
+            strings += 1
+    size = after - before
+    print(
+        "BS4+%s built %d tags and %d strings in %d bytes (%.1f bytes per node)."
+        % (parser, tags, strings, size, size / float(tags + strings))
+    )
+
+
+def benchmark_strainer(num_elements: int = 100000, parser: str = "lxml") -> None:
+    """Compare parsing a whole document with using a `SoupStrainer`
+    to pick out a few <link> tags.
+
+    :param num_elements: Size of the randomly generated document.
+    :param parser: The tree builder to use.
+    """
+    links = "".join('<link rel="stylesheet" href="/%d.css">' % i for i in range(20))
+    data = "<html><head>%s</head>%s" % (links, rdoc(num_elements)[len("<html>") :])
+    strainer = bs4.SoupStrainer("link")
+
+    a = time.time()
+    BeautifulSoup(data, parser)
+    b = time.time()
+    soup = BeautifulSoup(data, parser, parse_only=strainer)
+    c = time.time()
+    print(
+        "BS4+%s parsed the whole document in %.2fs, and found %d <link> tags with a SoupStrainer in %.2fs."
+        % (parser, b - a, len(soup.find_all("link")), c - b)
+    )
+
+
+def benchmark_selectors(num_elements: int = 10000, parser: str = "lxml") -> None:
+    """Compare running common shapes of CSS selector through Soup
+    Sieve, through `bs4.css.SimpleSelector`, and through
+    `bs4.css.SimpleSelector` with the help of a `bs4.index.TreeIndex`.
+
+    :param num_elements: The number of list items in the generated
+        document.
+    :param parser: The tree builder to use.
+    """
+    from bs4.css import CSS
+
+    items = "".join(
+        '<li class="row"><div class="item%s"><a href="/%d">%s</a>'
+        '<span class="price">%d</span><p>%s</p></div></li>'
+        % (" hot" if i % 50 == 0 else "", i, rword(), i, rsentence())
+        for i in range(num_elements)
+    )
+    data = (
+        '<html><body><div id="main"><ul>%s</ul></div>'
+        '<div id="footer"><a href="/">Home</a></div></body></html>' % items
+    )
+    soup = BeautifulSoup(data, parser)
+    indexed = BeautifulSoup(data, parser, indexed=True)
+    for doc in soup, indexed:
+        # Process every tag's attributes ahead of time, so the first
+        # selector to look at them doesn't pay for it.
+        for tag in doc.find_all(True):
+            if isinstance(tag, bs4.Tag):
+                tag.attrs
+    selectors = [
+        "a",
+        ".price",
+        "#footer",
+        "div.item",
+        "ul > li",
+        "#main a",
+        "li .hot a",
+        "div.item > span.price",
+    ]
+    native_matching = CSS.native_matching
+    try:
+        for selector in selectors:
+            timings = []
+            for native, doc in ((False, soup), (True, soup), (True, indexed)):
+                CSS.native_matching = native
+                a = time.time()
+                found = len(doc.select(selector))
+                timings.append(time.time() - a)
+            print(
+                "%-24s %6d found. Soup Sieve: %.4fs, native: %.4fs, native with index: %.4fs"
+                % (selector, found, timings[0], timings[1], timings[2])
+            )
+    finally:
+        CSS.native_matching = native_matching
+
+
+def benchmark_xpath(num_elements: int = 10000, parser: str = "lxml") -> None:
+    """Compare evaluating XPath expressions with `element.Tag.xpath`
+    to converting the document to an lxml tree and evaluating them
+    there.
+
+    :param num_elements: The number of list items in the generated
+        document.
+    :param parser: The tree builder to use.
+    """
+    import lxml.html
+
+    items = "".join(
+        '<li class="row"><div class="item"><a href="/%d">%s</a>'
+        '<span class="price">%d</span><p>%s</p></div></li>'
+        % (i, rword(), i, rsentence())
+        for i in range(num_elements)
+    )
+    data = "<html><body><ul>%s</ul></body></html>" % items
+    soup = BeautifulSoup(data, parser)
+    expressions = [
+        "//a[@href]",
+        "//li[@class='row']/div/span",
+        "//li[1]//a/@href",
+        "//span[. > 100]/preceding-sibling::a",
+        "count(//div[p])",
+    ]
+    for expression in expressions:
+        a = time.time()
+        soup.xpath(expression)
+        native = time.time() - a
+        a = time.time()
+        lxml.html.fromstring(soup.decode()).xpath(expression)
+        converted = time.time() - a
+        print(
+            "%-40s Tag.xpath: %.4fs, converted to lxml: %.4fs"
+            % (expression, native, converted)
+        )
+
+
+def benchmark_text(num_elements: int = 10000, parser: str = "lxml") -> None:
+    """Time calling `element.Tag.get_text` on every tag in a document,
+    the way content-extraction code often does, with and without
+    ``cache_text=True``.
+
+    :param num_elements: The number of elements in the generated
+        document.
+    :param parser: The tree builder to use.
+    """
+    data = rdoc(num_elements)
+    for cache_text in (False, True):
+        soup = BeautifulSoup(data, parser, cache_text=cache_text)
+        tags = soup.find_all(True)
+        a = time.time()
+        for tag in tags:
+            tag.get_text()
+        first = time.time() - a
+        a = time.time()
+        for tag in tags:
+            tag.get_text()
+        second = time.time() - a
+        print(
+            "cache_text=%s: %.4fs, then %.4fs again" % (cache_text, first, second)
+        )
+
+
 def profile(num_elements: int = 100000, parser: str = "lxml") -> None:
     """Use Python's profiler on a randomly generated document."""
     filehandle = tempfile.NamedTemporaryFile()
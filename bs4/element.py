@@ -3,8 +3,11 @@ from __future__ import annotations
 # Use of this source code is governed by the MIT license.
 __license__ = "MIT"
 
+import itertools
 import re
+import sys
 import warnings
+from collections import OrderedDict
 
 from bs4.css import CSS
 from bs4._deprecation import (
@@ -22,14 +25,17 @@ from bs4._warnings import AttributeResemblesVariableWarning
 from typing import (
     Any,
     Callable,
+    Container,
     Dict,
     Generic,
     Iterable,
     Iterator,
     List,
     Mapping,
+    NamedTuple,
     Optional,
     Pattern,
+    Sequence,
     Set,
     TYPE_CHECKING,
     Tuple,
@@ -37,9 +43,11 @@ from typing import (
     TypeVar,
     Union,
     cast,
+    overload,
 )
 from typing_extensions import (
     Self,
+    SupportsIndex,
     TypeAlias,
 )
 
@@ -47,6 +55,8 @@ if TYPE_CHECKING:
     from bs4 import BeautifulSoup
     from bs4.builder import TreeBuilder
     from bs4.filter import ElementFilter
+    from bs4.index import TreeIndex
+    from bs4.xpath import XPath
     from bs4.formatter import (
         _EntitySubstitutionFunction,
         _FormatterOrName,
@@ -57,13 +67,16 @@ if TYPE_CHECKING:
         _AttributeValues,
         _Encoding,
         _InsertableElement,
+        _LazyQueryResults,
         _OneElement,
+        _RawAttributePairs,
         _QueryResults,
         _RawOrProcessedAttributeValues,
         _StrainableElement,
         _StrainableAttribute,
         _StrainableAttributes,
         _StrainableString,
+        _XPathResult,
     )
 
 _OneOrMoreStringTypes: TypeAlias = Union[
@@ -97,6 +110,63 @@ DEFAULT_OUTPUT_ENCODING: str = "utf-8"
 #: A regular expression that can be used to split on whitespace.
 nonwhitespace_re: Pattern[str] = re.compile(r"\S+")
 
+#: The attributes a `bs4.index.TreeIndex` files tags under.
+_INDEXED_ATTRIBUTES = frozenset(["id", "class"])
+
+#: The largest number of distinct strings `intern_string` will keep
+#: track of. Once this many strings have been interned, the one that
+#: was used least recently is forgotten to make room for a new one.
+INTERNED_STRING_LIMIT: int = 10000
+
+#: The process-wide table used by `intern_string`, with the most
+#: recently used strings at the end.
+#: :meta private:
+_interned_strings: "OrderedDict[str, str]" = OrderedDict()
+
+
+def intern_string(value: str) -> str:
+    """Find the one copy of a string that's shared between every
+    parse tree in this process.
+
+    Tree builders use this on tag names and attribute names, which
+    tend to be repeated many times in every document, and which come
+    from a small vocabulary even across many documents. Sharing one
+    copy saves memory, and since the shared copy is also passed
+    through `sys.intern`, it's usually the very same object as a
+    string literal in your code, which makes comparisons fast.
+
+    The table is bounded by `INTERNED_STRING_LIMIT`. When it's full,
+    the least recently used string is forgotten, so a process that
+    moves on to documents with a different vocabulary will start
+    sharing the new names.
+
+    Attribute values aren't interned: there's no limit to how many
+    different ones a process might see, and they'd keep pushing the
+    names out of the table.
+
+    :param value: A string from a document being parsed.
+    :return: An equal string, shared if possible.
+    """
+    interned = _interned_strings.get(value)
+    if interned is not None:
+        try:
+            _interned_strings.move_to_end(value)
+        except KeyError:
+            # Another thread forgot this string in the meantime.
+            pass
+        return interned
+    if value.__class__ is not str:
+        # This is a str subclass (such as NamespacedAttribute) which
+        # can't be interned.
+        return value
+    interned = _interned_strings.setdefault(value, sys.intern(value))
+    while len(_interned_strings) > INTERNED_STRING_LIMIT:
+        try:
+            _interned_strings.popitem(last=False)
+        except KeyError:
+            break
+    return interned
+
 #: These encodings are recognized by Python (so `Tag.encode`
 #: could theoretically support them) but XML and HTML don't recognize
 #: them (so they should not show up in an XML or HTML document as that
@@ -220,21 +290,140 @@ class AttributeValueList(List[str]):
     list, but you can subclass it and pass it in to the TreeBuilder
     constructor as attribute_value_list_class, to have your subclass
     instantiated instead.
+
+    When the list is modified in place, the `Tag` it belongs to is told
+    about it, so that an indexed tree (see `bs4.index.TreeIndex`)
+    stays up to date.
     """
 
+    __slots__ = ("_tag",)
+
+    #: The `Tag` this list is an attribute value of. This is set the
+    #: first time it's needed, not when the list is created.
+    #: :meta private:
+    _tag: Optional[Tag]
+
+    def __getstate__(self) -> None:
+        # Copies and pickles don't belong to any Tag.
+        return None
+
+    def _changed(self) -> None:
+        tag = getattr(self, "_tag", None)
+        if tag is not None:
+            tag._attributes_changed()
+
+    def append(self, value: str) -> None:
+        super().append(value)
+        self._changed()
+
+    def extend(self, values: Iterable[str]) -> None:
+        super().extend(values)
+        self._changed()
+
+    def insert(self, index: SupportsIndex, value: str) -> None:
+        super().insert(index, value)
+        self._changed()
+
+    def remove(self, value: str) -> None:
+        super().remove(value)
+        self._changed()
+
+    def pop(self, index: SupportsIndex = -1) -> str:
+        value = super().pop(index)
+        self._changed()
+        return value
+
+    def clear(self) -> None:
+        super().clear()
+        self._changed()
+
+    def __setitem__(self, index: Any, value: Any) -> None:
+        super().__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index: Any) -> None:
+        super().__delitem__(index)
+        self._changed()
+
+    def __iadd__(self, values: Iterable[str]) -> Self:  # type: ignore[override, misc]
+        super().__iadd__(values)
+        self._changed()
+        return self
+
+    def __imul__(self, count: SupportsIndex) -> Self:
+        super().__imul__(count)
+        self._changed()
+        return self
+
 
 class AttributeDict(dict[Any,Any]):
     """Superclass for the dictionary used to hold a tag's
     attributes. You can use this, but it's just a regular dict with no
-    special logic.
+    special logic, except that the `Tag` it belongs to is told when
+    it's modified, so that an indexed tree (see `bs4.index.TreeIndex`)
+    stays up to date.
     """
 
+    __slots__ = ("_tag",)
+
+    #: The `Tag` these are the attributes of. This is set the first
+    #: time it's needed, not when the dictionary is created.
+    #: :meta private:
+    _tag: Optional[Tag]
+
+    def __getstate__(self) -> None:
+        # Copies and pickles don't belong to any Tag.
+        return None
+
+    def _changed(self) -> None:
+        tag = getattr(self, "_tag", None)
+        if tag is not None:
+            tag._attributes_changed()
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key: Any) -> None:
+        super().__delitem__(key)
+        self._changed()
+
+    def update(self, *args: Any, **kwargs: Any) -> None:
+        super().update(*args, **kwargs)
+        self._changed()
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        value = super().pop(key, *default)
+        self._changed()
+        return value
+
+    def popitem(self) -> Tuple[Any, Any]:
+        item = super().popitem()
+        self._changed()
+        return item
+
+    def clear(self) -> None:
+        super().clear()
+        self._changed()
+
+    def __ior__(self, other: Any) -> Self:  # type: ignore[misc]
+        self.update(other)
+        return self
+
 
 class XMLAttributeDict(AttributeDict):
     """A dictionary for holding a Tag's attributes, which processes
     incoming values for consistency with the HTML spec.
     """
 
+    __slots__ = ()
+
     def __setitem__(self, key: str, value: Any) -> None:
         """Set an attribute value, possibly modifying it to comply with
         the XML spec.
@@ -273,6 +462,8 @@ class HTMLAttributeDict(AttributeDict):
     around boolean attributes that XML doesn't have.
     """
 
+    __slots__ = ()
+
     def __setitem__(self, key: str, value: Any) -> None:
         """Set an attribute value, possibly modifying it to comply
         with the HTML spec,
@@ -373,6 +564,19 @@ class PageElement(object):
     #: Only the `BeautifulSoup` object itself is hidden.
     hidden: bool = False
 
+    #: The `TreeIndex` kept for the tree this element is the root of.
+    #: Only a `BeautifulSoup` object created with ``indexed=True`` has
+    #: one.
+    #: :meta private:
+    _index: Optional[TreeIndex] = None
+
+    #: Whether `Tag.get_text` and `Tag.strings` cache their results
+    #: for the tree this element is the root of. Only a
+    #: `BeautifulSoup` object created with ``cache_text=True`` does
+    #: this.
+    #: :meta private:
+    _caching_text: bool = False
+
     def setup(
         self,
         parent: Optional[Tag] = None,
@@ -593,6 +797,13 @@ class PageElement(object):
 
         :return: this `PageElement`, no longer part of the tree.
         """
+        if self.parent is not None:
+            self.parent._text_changed()
+            if isinstance(self, Tag):
+                index = self._tree_index()
+                if index is not None:
+                    index.removed(self)
+
         if self.parent is not None:
             if _self_index is None:
                 _self_index = self.parent.index(self)
@@ -632,6 +843,15 @@ class PageElement(object):
         self.previous_sibling = self.next_sibling = None
         return self
 
+    def _tree_index(self) -> Optional[TreeIndex]:
+        """Find the `TreeIndex`, if any, for the tree this element is
+        part of.
+        """
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        return root._index
+
     def decompose(self) -> None:
         """Recursively destroys this `PageElement` and its children.
 
@@ -650,6 +870,7 @@ class PageElement(object):
             next_up = e.next_element
             e.__dict__.clear()
             if isinstance(e, Tag):
+                e._clear_slots()
                 e.contents = []
             e._decomposed = True
             e = next_up
@@ -1087,7 +1308,79 @@ class PageElement(object):
         **kwargs: _StrainableAttribute,
     ) -> _QueryResults:
         """Iterates over a generator looking for things that match."""
+        string = self._check_search_arguments(string, kwargs, _stacklevel + 1)
+
+        from bs4.filter import ElementFilter
+
+        matcher: ElementFilter
+        if isinstance(name, ElementFilter):
+            matcher = name
+        else:
+            strainer = SoupStrainer(name, attrs, string, **kwargs)
+            if strainer._worth_compiling():
+                # This SoupStrainer was created just for this search,
+                # so its rules can't change in the middle of it.
+                strainer.compile()
+            matcher = strainer
+        if string is None and not limit and not attrs and not kwargs:
+            if name is True or name is None or isinstance(name, str):
+                return ResultSet(matcher, self._tags_named(name, generator))
+        return matcher.find_all(generator, limit)
+
+    def _ifind_all(
+        self,
+        name: _FindMethodName,
+        attrs: _StrainableAttributes,
+        string: Optional[_StrainableString],
+        limit: Optional[int],
+        generator: Iterator[PageElement],
+        _stacklevel: int = 3,
+        **kwargs: _StrainableAttribute,
+    ) -> _LazyQueryResults:
+        """Like `PageElement._find_all`, but the generator is only
+        advanced as far as it takes to answer questions about the
+        results.
+        """
+        string = self._check_search_arguments(string, kwargs, _stacklevel + 1)
+
+        from bs4.filter import ElementFilter
+
+        matcher: ElementFilter
+        if isinstance(name, ElementFilter):
+            matcher = name
+        else:
+            strainer = SoupStrainer(name, attrs, string, **kwargs)
+            if strainer._worth_compiling():
+                # This SoupStrainer was created just for this search,
+                # so its rules can't change in the middle of it.
+                strainer.compile()
+            matcher = strainer
+        result: Iterator[_OneElement]
+        if (
+            string is None
+            and not attrs
+            and not kwargs
+            and (name is True or name is None or isinstance(name, str))
+        ):
+            result = self._tags_named(name, generator)
+        else:
+            result = matcher.filter(generator)
+        if limit:
+            result = itertools.islice(result, limit)
+        return LazyResultSet(matcher, result)
 
+    def _check_search_arguments(
+        self,
+        string: Optional[_StrainableString],
+        kwargs: Dict[str, _StrainableAttribute],
+        _stacklevel: int,
+    ) -> Optional[_StrainableString]:
+        """Warn about deprecated or suspicious arguments to a
+        find_*() method.
+
+        :return: The ``string`` argument, which may have been passed
+            into ``kwargs`` under its old name.
+        """
         if string is None and "text" in kwargs:
             string = kwargs.pop("text")
             warnings.warn(
@@ -1106,41 +1399,37 @@ class PageElement(object):
                 AttributeResemblesVariableWarning,
                 stacklevel=_stacklevel,
             )
+        return string
 
-        from bs4.filter import ElementFilter
-
-        if isinstance(name, ElementFilter):
-            matcher = name
+    @classmethod
+    def _tags_named(
+        cls, name: Optional[Union[str, bool]], generator: Iterator[PageElement]
+    ) -> Iterator[_OneElement]:
+        """Optimization to find all tags, or all tags with a given
+        name, without going through an `ElementFilter`.
+        """
+        if name is True or name is None:
+            for element in generator:
+                if isinstance(element, Tag):
+                    yield element
+            return
+        assert isinstance(name, str)
+        if name.count(":") == 1:
+            # This is a name with a prefix. If this is a namespace-aware document,
+            # we need to match the local name against tag.name. If not,
+            # we need to match the fully-qualified name against tag.name.
+            prefix, local_name = name.split(":", 1)
         else:
-            matcher = SoupStrainer(name, attrs, string, **kwargs)
-
-        result: Iterable[_OneElement]
-        if string is None and not limit and not attrs and not kwargs:
-            if name is True or name is None:
-                # Optimization to find all tags.
-                result = (element for element in generator if isinstance(element, Tag))
-                return ResultSet(matcher, result)
-            elif isinstance(name, str):
-                # Optimization to find all tags with a given name.
-                if name.count(":") == 1:
-                    # This is a name with a prefix. If this is a namespace-aware document,
-                    # we need to match the local name against tag.name. If not,
-                    # we need to match the fully-qualified name against tag.name.
-                    prefix, local_name = name.split(":", 1)
-                else:
-                    prefix = None
-                    local_name = name
-                result = []
-                for element in generator:
-                    if not isinstance(element, Tag):
-                        continue
-                    if element.name == name or (
-                        element.name == local_name
-                        and (prefix is None or element.prefix == prefix)
-                    ):
-                        result.append(element)
-                return ResultSet(matcher, result)
-        return matcher.find_all(generator, limit)
+            prefix = None
+            local_name = name
+        for element in generator:
+            if not isinstance(element, Tag):
+                continue
+            if element.name == name or (
+                element.name == local_name
+                and (prefix is None or element.prefix == prefix)
+            ):
+                yield element
 
     # These generators can be used to navigate starting from both
     # NavigableStrings and Tags.
@@ -1288,6 +1577,17 @@ class NavigableString(str, PageElement):
     #: in an HTML comment.
     SUFFIX: str = ""
 
+    #: The attributes that connect a NavigableString to a parse tree.
+    #:
+    #: :meta private:
+    _TREE_ATTRIBUTES: Tuple[str, ...] = (
+        "parent",
+        "next_element",
+        "previous_element",
+        "next_sibling",
+        "previous_sibling",
+    )
+
     def __new__(cls, value: Union[str, bytes]) -> Self:
         """Create a new NavigableString.
 
@@ -1300,7 +1600,9 @@ class NavigableString(str, PageElement):
             u = str.__new__(cls, value)
         else:
             u = str.__new__(cls, value, DEFAULT_OUTPUT_ENCODING)
-        u.hidden = False
+        # `PageElement.hidden` is False by default, so it's not set
+        # here. Keeping this dictionary down to the five attributes
+        # set by setup() keeps it at its smallest possible size.
         u.setup()
         return u
 
@@ -1317,6 +1619,17 @@ class NavigableString(str, PageElement):
     def __getnewargs__(self) -> Tuple[str]:
         return (str(self),)
 
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        """Like a `Tag`, a pickled NavigableString is not connected to
+        any parse tree.
+        """
+        state = {
+            key: value
+            for key, value in self.__dict__.items()
+            if key not in self._TREE_ATTRIBUTES
+        }
+        return (type(self), (str(self),), state or None)
+
     @property
     def string(self) -> str:
         """Convenience property defined to match `Tag.string`.
@@ -1566,6 +1879,89 @@ class RubyParenthesisString(NavigableString):
     """
 
 
+class TagProfile(NamedTuple):
+    """Everything a `TreeBuilder` has to say about tags with a given name.
+
+    A `TreeBuilder` creates one of these the first time it sees a tag
+    name (see `TreeBuilder.tag_profile`), and every `Tag` with that
+    name shares it, rather than having its own copy of the
+    information. Since it's shared, it's immutable.
+    """
+
+    #: The name of the tag this profile describes.
+    name: str
+
+    #: Whether a tag with this name should be represented as <tag/>
+    #: when empty.
+    can_be_empty_element: Optional[bool]
+
+    #: Attributes whose values should be parsed as lists of strings.
+    cdata_list_attributes: Optional[Dict[str, Set[str]]]
+
+    #: Names of tags whose contents should have their whitespace
+    #: preserved.
+    preserve_whitespace_tags: Optional[Set[str]]
+
+    #: The types of strings considered by methods like `Tag.strings`.
+    interesting_string_types: Optional[Set[Type[NavigableString]]]
+
+    #: The `NavigableString` subclass used for strings found directly
+    #: inside a tag with this name, if it's not `NavigableString`.
+    string_container: Optional[Type[NavigableString]] = None
+
+    #: Whether whitespace inside a tag with this name is preserved.
+    preserves_whitespace: bool = False
+
+    #: Collections of the names of this tag's attributes whose values
+    #: are split into lists of strings: the ones that apply to every
+    #: tag, and the ones that apply to this tag in particular.
+    multi_valued_attributes: Tuple[Container[str], ...] = ()
+
+    #: The class used to hold this tag's attributes.
+    attribute_dict_class: Optional[Type[AttributeDict]] = None
+
+    @classmethod
+    def from_builder(cls, builder: TreeBuilder, name: str) -> TagProfile:
+        """Ask a `TreeBuilder` about tags with a certain name.
+
+        You probably want `TreeBuilder.tag_profile`, which only asks
+        once per name.
+        """
+        string_container = builder.string_containers.get(name)
+        interesting_string_types: Set[Type[NavigableString]]
+        if string_container is None:
+            interesting_string_types = Tag.MAIN_CONTENT_STRING_TYPES
+        else:
+            # This sort of tag uses a special string container
+            # subclass for most of its strings.
+            interesting_string_types = {string_container}
+        multi_valued_attributes: Tuple[Container[str], ...] = ()
+        if builder.cdata_list_attributes:
+            multi_valued_attributes = tuple(
+                names
+                for names in (
+                    builder.cdata_list_attributes.get("*", None),
+                    builder.cdata_list_attributes.get(name.lower(), None),
+                )
+                if names
+            )
+        return cls(
+            name,
+            builder.can_be_empty_element(name),
+            # For performance reasons, we store the whole data
+            # structure rather than asking the question of every
+            # tag. Asking would require building a new data structure
+            # every time, and we almost never need to check this.
+            builder.cdata_list_attributes,
+            builder.preserve_whitespace_tags,
+            interesting_string_types,
+            string_container,
+            name in builder.preserve_whitespace_tags,
+            multi_valued_attributes,
+            builder.attribute_dict_class,
+        )
+
+
 class Tag(PageElement):
     """An HTML or XML tag that is part of a parse tree, along with its
     attributes, contents, and relationships to other parts of the tree.
@@ -1583,7 +1979,9 @@ class Tag(PageElement):
     :param name: The name of the tag.
     :param namespace: The URI of this tag's XML namespace, if any.
     :param prefix: The prefix for this tag's XML namespace, if any.
-    :param attrs: A dictionary of attribute values.
+    :param attrs: A dictionary of attribute values. A `TreeBuilder`
+        may instead pass in a tuple of raw (name, value) pairs, which
+        won't be processed until the attributes are used.
     :param parent: The `Tag` to use as the parent of this `Tag`. May be
        the `BeautifulSoup` object itself.
     :param previous: The `PageElement` that was parsed immediately before
@@ -1615,6 +2013,33 @@ class Tag(PageElement):
 
     """
 
+    # The attributes every Tag has are stored in slots rather than
+    # in a per-instance dictionary, which saves a lot of memory on
+    # large trees. PageElement doesn't define __slots__, so a Tag
+    # still has a __dict__ (only allocated if it's actually used) and
+    # arbitrary attributes can be set on it, as always.
+    __slots__ = (
+        "parser_class",
+        "_name",
+        "namespace",
+        "_namespaces",
+        "prefix",
+        "sourceline",
+        "sourcepos",
+        "attribute_value_list_class",
+        "_attrs",
+        "known_xml",
+        "contents",
+        "hidden",
+        "_profile",
+        "_text_cache",
+        "parent",
+        "next_element",
+        "previous_element",
+        "next_sibling",
+        "previous_sibling",
+    )
+
     def __init__(
         self,
         parser: Optional[BeautifulSoup] = None,
@@ -1622,7 +2047,9 @@ class Tag(PageElement):
         name: Optional[str] = None,
         namespace: Optional[str] = None,
         prefix: Optional[str] = None,
-        attrs: Optional[_RawOrProcessedAttributeValues] = None,
+        attrs: Optional[
+            Union[_RawOrProcessedAttributeValues, _RawAttributePairs]
+        ] = None,
         parent: Optional[Union[BeautifulSoup, Tag]] = None,
         previous: _AtMostOneElement = None,
         is_xml: Optional[bool] = None,
@@ -1645,7 +2072,7 @@ class Tag(PageElement):
             self.parser_class = parser.__class__
         if name is None:
             raise ValueError("No value provided for new tag's name.")
-        self.name = name
+        self._name = name
         self.namespace = namespace
         self._namespaces = namespaces or {}
         self.prefix = prefix
@@ -1672,21 +2099,29 @@ class Tag(PageElement):
         self.attribute_value_list_class = attribute_value_list_class
 
         if attrs is None:
-            self.attrs = attr_dict_class()
+            self._attrs = attr_dict_class()
+        elif builder is not None and attrs.__class__ is tuple:
+            # These are raw (name, value) pairs straight from the
+            # TreeBuilder. Most attributes are never looked at, so
+            # they'll be processed the first time they're needed.
+            # See Tag.attrs.
+            self._attrs = cast("_RawAttributePairs", attrs)
         else:
+            attrs = cast("_RawOrProcessedAttributeValues", attrs)
             if builder is not None and builder.cdata_list_attributes:
-                self.attrs = builder._replace_cdata_list_attribute_values(
+                self._attrs = builder._replace_cdata_list_attribute_values(
                     self.name, attrs
                 )
             else:
-                self.attrs = attr_dict_class()
+                new_attrs = attr_dict_class()
                 # Make sure that the values of any multi-valued
                 # attributes (e.g. when a Tag is copied) are stored in
                 # new lists.
                 for k, v in attrs.items():
                     if isinstance(v, list):
                         v = v.__class__(v)
-                    self.attrs[k] = v
+                    new_attrs[k] = v
+                self._attrs = new_attrs
 
         # If possible, determine ahead of time whether this tag is an
         # XML tag.
@@ -1695,6 +2130,7 @@ class Tag(PageElement):
         else:
             self.known_xml = is_xml
         self.contents: List[PageElement] = []
+        self._text_cache = None
         self.setup(parent, previous)
         self.hidden = False
 
@@ -1702,59 +2138,167 @@ class Tag(PageElement):
             # In the absence of a TreeBuilder, use whatever values were
             # passed in here. They're probably None, unless this is a copy of some
             # other tag.
-            self.can_be_empty_element = can_be_empty_element
-            self.cdata_list_attributes = cdata_list_attributes
-            self.preserve_whitespace_tags = preserve_whitespace_tags
-            self.interesting_string_types = interesting_string_types
+            self._profile = TagProfile(
+                name,
+                can_be_empty_element,
+                cdata_list_attributes,
+                preserve_whitespace_tags,
+                interesting_string_types,
+            )
         else:
+            # Everything the TreeBuilder knows about tags with this
+            # name was worked out the first time it saw the name, and
+            # is shared between all those tags.
+            try:
+                self._profile = builder.tag_profile(name)
+            except AttributeError:
+                # This builder isn't a TreeBuilder subclass and
+                # doesn't keep profiles around.
+                self._profile = TagProfile.from_builder(builder, name)
+
             # Set up any substitutions for this tag, such as the charset in a META tag.
-            self.attribute_value_list_class = builder.attribute_value_list_class
             builder.set_up_substitutions(self)
 
-            # Ask the TreeBuilder whether this tag might be an empty-element tag.
-            self.can_be_empty_element = builder.can_be_empty_element(name)
-
-            # Keep track of the list of attributes of this tag that
-            # might need to be treated as a list.
-            #
-            # For performance reasons, we store the whole data structure
-            # rather than asking the question of every tag. Asking would
-            # require building a new data structure every time, and
-            # (unlike can_be_empty_element), we almost never need
-            # to check this.
-            self.cdata_list_attributes = builder.cdata_list_attributes
-
-            # Keep track of the names that might cause this tag to be treated as a
-            # whitespace-preserved tag.
-            self.preserve_whitespace_tags = builder.preserve_whitespace_tags
-
-            if self.name in builder.string_containers:
-                # This sort of tag uses a special string container
-                # subclass for most of its strings. We need to be able
-                # to look up the proper container subclass.
-                self.interesting_string_types = {builder.string_containers[self.name]}
-            else:
-                self.interesting_string_types = self.MAIN_CONTENT_STRING_TYPES
-
     parser_class: Optional[type[BeautifulSoup]]
-    name: str
+    _name: str
     namespace: Optional[str]
     prefix: Optional[str]
-    attrs: _AttributeValues
+    _attrs: Union[_AttributeValues, _RawAttributePairs]
     sourceline: Optional[int]
     sourcepos: Optional[int]
     known_xml: Optional[bool]
     contents: List[PageElement]
     hidden: bool
-    interesting_string_types: Optional[Set[Type[NavigableString]]]
+    _profile: TagProfile
 
-    can_be_empty_element: Optional[bool]
-    cdata_list_attributes: Optional[Dict[str, Set[str]]]
-    preserve_whitespace_tags: Optional[Set[str]]
+    #: The strings and text found beneath this `Tag` by
+    #: `Tag._all_strings` and `Tag.get_text`, if the tree is caching
+    #: text. Whenever a `Tag` has a cache, so does every `Tag` beneath
+    #: it, which lets `Tag._text_changed` stop at the first ancestor
+    #: that has nothing cached.
+    #: :meta private:
+    _text_cache: Optional[Dict[Tuple[Any, ...], Any]]
 
     #: :meta private:
     parserClass = _deprecated_alias("parserClass", "parser_class", "4.0.0")
 
+    @property
+    def name(self) -> str:
+        """The name of this tag, such as 'a' or 'p'."""
+        return self._name
+
+    @name.setter
+    def name(self, value: str) -> None:
+        self._name = value
+        index = self._tree_index()
+        if index is not None:
+            index.renamed(self)
+
+    @property
+    def attrs(self) -> _AttributeValues:
+        """A dictionary of this tag's attribute values."""
+        attrs = self._attrs
+        if attrs.__class__ is tuple:
+            attrs = self._attrs = self._process_attribute_pairs(
+                cast("_RawAttributePairs", attrs)
+            )
+            self._watch_attributes()
+        return cast("_AttributeValues", attrs)
+
+    @attrs.setter
+    def attrs(self, value: _AttributeValues) -> None:
+        self._attrs = value
+        self._attributes_changed()
+
+    def _watch_attributes(self) -> None:
+        """Have this tag's attribute dictionary, and any
+        `AttributeValueList` in it, call `Tag._attributes_changed`
+        when they're modified in place.
+        """
+        attrs = self._attrs
+        if isinstance(attrs, AttributeDict):
+            attrs._tag = self
+            for value in attrs.values():
+                if isinstance(value, AttributeValueList):
+                    value._tag = self
+
+    def _attributes_changed(self) -> None:
+        """Let the `TreeIndex` for this tag's tree, if there is one,
+        know that the tag's attributes have changed.
+        """
+        index = self._tree_index()
+        if index is not None:
+            index.attributes_changed(self)
+
+    def _process_attribute_pairs(self, pairs: _RawAttributePairs) -> _AttributeValues:
+        """Turn the raw (name, value) pairs passed in by a `TreeBuilder`
+        into this tag's attribute dictionary, splitting the values of
+        multi-valued attributes like 'class' into lists.
+        """
+        profile = self._profile
+        attrs = cast(Type[AttributeDict], profile.attribute_dict_class)()
+        if isinstance(attrs, AttributeDict):
+            # Nothing needs to know about the values being filled in.
+            attrs._tag = None
+        multi_valued = profile.multi_valued_attributes
+        for key, value in pairs:
+            if value is None:
+                # Change None attribute values to the empty string
+                # for consistency with the other tree builders.
+                value = ""
+            if multi_valued and any(key in names for names in multi_valued):
+                attrs[key] = self.attribute_value_list_class(
+                    nonwhitespace_re.findall(value)
+                )
+            else:
+                attrs[key] = value
+        return attrs
+
+    @property
+    def can_be_empty_element(self) -> Optional[bool]:
+        """If True, this tag should be represented as <tag/> when it has
+        no contents.
+        """
+        return self._profile.can_be_empty_element
+
+    @can_be_empty_element.setter
+    def can_be_empty_element(self, value: Optional[bool]) -> None:
+        self._profile = self._profile._replace(can_be_empty_element=value)
+
+    @property
+    def cdata_list_attributes(self) -> Optional[Dict[str, Set[str]]]:
+        """Attributes whose values should be parsed as lists of strings
+        if they show up on this tag.
+        """
+        return self._profile.cdata_list_attributes
+
+    @cdata_list_attributes.setter
+    def cdata_list_attributes(self, value: Optional[Dict[str, Set[str]]]) -> None:
+        self._profile = self._profile._replace(cdata_list_attributes=value)
+
+    @property
+    def preserve_whitespace_tags(self) -> Optional[Set[str]]:
+        """Names of tags whose contents should have their whitespace
+        preserved.
+        """
+        return self._profile.preserve_whitespace_tags
+
+    @preserve_whitespace_tags.setter
+    def preserve_whitespace_tags(self, value: Optional[Set[str]]) -> None:
+        self._profile = self._profile._replace(preserve_whitespace_tags=value)
+
+    @property
+    def interesting_string_types(self) -> Optional[Set[Type[NavigableString]]]:
+        """The types of strings considered by methods like `Tag.strings`."""
+        return self._profile.interesting_string_types
+
+    @interesting_string_types.setter
+    def interesting_string_types(
+        self, value: Optional[Set[Type[NavigableString]]]
+    ) -> None:
+        self._profile = self._profile._replace(interesting_string_types=value)
+        self._text_changed()
+
     def __deepcopy__(self, memo: Dict[Any, Any], recursive: bool = True) -> Self:
         """A deepcopy of a Tag is a new Tag, unconnected to the parse tree.
         Its contents are a copy of the old Tag's contents.
@@ -1781,6 +2325,68 @@ class Tag(PageElement):
                         tag_stack.append(cast(Tag, descendant_clone))
         return clone
 
+    def __reduce_ex__(self, protocol: Any) -> Any:
+        """A Tag is pickled using the compact format from
+        `bs4.serialize`. Like a copy, the unpickled Tag is not
+        connected to any parse tree.
+        """
+        from bs4.serialize import _dump, _load
+
+        # The tuple is pickled rather than marshalled, so the pickle
+        # can be loaded by any version of Python.
+        return (_load, (_dump(self),))
+
+    def __setstate__(self, state: Any) -> None:
+        """Load a `Tag` pickled by Beautiful Soup 4.13.0 or earlier.
+
+        Back then, a Tag was pickled along with its ``__dict__``,
+        which held attributes that now live in slots or in the Tag's
+        `TagProfile`.
+        """
+        if isinstance(state, tuple):
+            # The second item holds attributes that were in slots.
+            state, slot_state = state
+            state = dict(state or {}, **(slot_state or {}))
+        else:
+            state = dict(state)
+        state["_name"] = state.pop("name")
+        self._profile = TagProfile(
+            state["_name"],
+            state.pop("can_be_empty_element", None),
+            state.pop("cdata_list_attributes", None),
+            state.pop("preserve_whitespace_tags", None),
+            state.pop("interesting_string_types", None),
+        )
+        if "attrs" in state:
+            state["_attrs"] = state.pop("attrs")
+        self._text_cache = None
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def _clear_slots(self) -> None:
+        """Wipe out the attributes stored in slots, the way
+        `PageElement.decompose` wipes out ``__dict__``.
+
+        Attributes with class-level defaults in `PageElement` are
+        reset to those defaults, just as if they'd been removed from
+        ``__dict__``.
+        """
+        for cls in type(self).__mro__:
+            slots = cls.__dict__.get("__slots__", ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            for slot in slots:
+                if slot in ("__dict__", "__weakref__"):
+                    continue
+                try:
+                    delattr(self, slot)
+                except AttributeError:
+                    # This slot was never set.
+                    pass
+        self.hidden = PageElement.hidden
+        self.known_xml = PageElement.known_xml
+        self._text_cache = None
+
     def copy_self(self) -> Self:
         """Create a new Tag just like this one, but with no
         contents and unattached to any parse tree.
@@ -1805,8 +2411,9 @@ class Tag(PageElement):
             interesting_string_types=self.interesting_string_types,
             namespaces=self._namespaces,
         )
-        for attr in ("can_be_empty_element", "hidden"):
-            setattr(clone, attr, getattr(self, attr))
+        # The clone can share this tag's profile.
+        clone._profile = self._profile
+        clone.hidden = self.hidden
         return clone
 
     @property
@@ -1886,12 +2493,84 @@ class Tag(PageElement):
             considered. That means no comments, processing
             instructions, etc.
         """
+        types = self._string_types(types)
+        key = self._text_cache_key(strip, types)
+        if key is None or not self._caches_text():
+            return self._find_strings(strip, types)
+        strings, start, end = self._cached_strings(key, strip, types)
+        return iter(strings[start:end])
+
+    def get_text(
+        self,
+        separator: str = "",
+        strip: bool = False,
+        types: _OneOrMoreStringTypes = PageElement.default,
+    ) -> str:
+        """Get all child strings of this `Tag`, concatenated using the
+        given separator.
+
+        In a document created with ``cache_text=True``, the text is
+        remembered, and calling this method again is free until the
+        tree beneath this `Tag` changes.
+
+        :param separator: Strings will be concatenated using this separator.
+
+        :param strip: If True, strings will be stripped before being
+            concatenated.
+
+        :param types: A tuple of NavigableString subclasses. Any
+            strings of a subclass not found in this list will be
+            ignored. Although there are exceptions, the default
+            behavior in most cases is to consider only NavigableString
+            and CData objects. That means no comments, processing
+            instructions, etc.
+
+        :return: A string.
+        """
+        cache = self._text_cache
+        default_key: Optional[Tuple[Any, ...]] = None
+        if types is self.default:
+            # The text is also cached under the default value for
+            # ``types``, which is quicker to look up than the types it
+            # stands for.
+            default_key = (strip, types, separator)
+            if cache is not None:
+                text = cache.get(default_key)
+                if text is not None:
+                    return text
+
+        types = self._string_types(types)
+        key = self._text_cache_key(strip, types)
+        if key is None or not self._caches_text():
+            return separator.join([s for s in self._find_strings(strip, types)])
+        text_key = key + (separator,)
+        text = cache.get(text_key) if cache is not None else None
+        if text is None:
+            strings, start, end = self._cached_strings(key, strip, types)
+            text = separator.join(strings[start:end])
+        cache = cast(Dict[Tuple[Any, ...], Any], self._text_cache)
+        cache[text_key] = text
+        if default_key is not None:
+            cache[default_key] = text
+        return text
+
+    getText = get_text
+    text = property(get_text)
+
+    def _string_types(self, types: _OneOrMoreStringTypes) -> _OneOrMoreStringTypes:
+        """Decide which classes of string `Tag._all_strings` should
+        look at, if it was called with the default value for ``types``.
+        """
         if types is self.default:
             if self.interesting_string_types is None:
-                types = self.MAIN_CONTENT_STRING_TYPES
-            else:
-                types = self.interesting_string_types
+                return self.MAIN_CONTENT_STRING_TYPES
+            return self.interesting_string_types
+        return types
 
+    def _find_strings(self, strip: bool, types: _OneOrMoreStringTypes) -> Iterator[str]:
+        """Walk the tree beneath this `Tag`, yielding the strings
+        `Tag._all_strings` is looking for.
+        """
         for descendant in self.descendants:
             if not isinstance(descendant, NavigableString):
                 continue
@@ -1911,6 +2590,106 @@ class Tag(PageElement):
             else:
                 yield descendant
 
+    def _caches_text(self) -> bool:
+        """Is the text beneath this `Tag` cached?"""
+        if self._text_cache is not None:
+            return True
+        root: Tag = self
+        while root.parent is not None:
+            root = root.parent
+        return root._caching_text
+
+    @classmethod
+    def _text_cache_key(
+        cls, strip: bool, types: _OneOrMoreStringTypes
+    ) -> Optional[Tuple[Any, ...]]:
+        """The key under which the strings found by
+        ``_all_strings(strip, types)`` are cached, or None if ``types``
+        is an iterable that can't be used as part of a key.
+        """
+        if types is None or isinstance(types, type):
+            return (strip, types)
+        if isinstance(types, (set, frozenset, list, tuple)):
+            return (strip, frozenset(types))
+        return None
+
+    def _cached_strings(
+        self, key: Tuple[Any, ...], strip: bool, types: _OneOrMoreStringTypes
+    ) -> Tuple[List[str], int, int]:
+        """Find the strings `Tag._all_strings` is looking for, using
+        the cache if possible.
+
+        The strings beneath every `Tag` in this one are found in the
+        same pass over the tree, and cached along the way, as slices of
+        a single list. A `Tag` whose strings are already cached is
+        skipped over rather than walked again.
+
+        :return: A list, and the start and end of the slice of it
+            that holds this tag's strings.
+        """
+        cache = self._text_cache
+        if cache is not None:
+            found = cache.get(key)
+            if found is not None:
+                return found
+
+        strings: List[str] = []
+        # The tags being walked, each with the position in `strings`
+        # where its own strings start.
+        open_tags: List[Tuple[Tag, int]] = [(self, 0)]
+        stop = cast(PageElement, self._last_descendant()).next_element
+        current = self.contents[0] if self.contents else stop
+        while current is not stop and current is not None:
+            while open_tags[-1][0] is not current.parent:
+                tag, start = open_tags.pop()
+                tag._cache_text(key, (strings, start, len(strings)))
+            if isinstance(current, Tag):
+                found = (
+                    current._text_cache.get(key)
+                    if current._text_cache is not None
+                    else None
+                )
+                if found is not None:
+                    found_strings, start, end = found
+                    strings.extend(found_strings[start:end])
+                    current = cast(
+                        PageElement, current._last_descendant()
+                    ).next_element
+                    continue
+                open_tags.append((current, len(strings)))
+            elif isinstance(current, NavigableString):
+                current_type = type(current)
+                if isinstance(types, type):
+                    wanted = current_type is types
+                else:
+                    wanted = types is None or current_type in types
+                if wanted:
+                    if strip:
+                        stripped = current.strip()
+                        if stripped:
+                            strings.append(stripped)
+                    else:
+                        strings.append(current)
+            current = current.next_element
+        while open_tags:
+            tag, start = open_tags.pop()
+            tag._cache_text(key, (strings, start, len(strings)))
+        return (strings, 0, len(strings))
+
+    def _cache_text(self, key: Tuple[Any, ...], value: Any) -> None:
+        if self._text_cache is None:
+            self._text_cache = {}
+        self._text_cache[key] = value
+
+    def _text_changed(self) -> None:
+        """Forget the cached text of this `Tag` and every `Tag` above it,
+        because something beneath it was added or removed.
+        """
+        tag: Optional[Tag] = self
+        while tag is not None and tag._text_cache is not None:
+            tag._text_cache = None
+            tag = tag.parent
+
     strings = property(_all_strings)
 
     def insert(self, position: int, *new_children: _InsertableElement) -> List[PageElement]:
@@ -2017,6 +2796,12 @@ class Tag(PageElement):
             )
         self.contents.insert(position, new_child)
 
+        if isinstance(new_child, Tag):
+            index = self._tree_index()
+            if index is not None:
+                index.added(new_child)
+        self._text_changed()
+
         return [new_child]
 
     def unwrap(self) -> Self:
@@ -2224,10 +3009,14 @@ class Tag(PageElement):
         """Setting tag[key] sets the value of the 'key' attribute for the
         tag."""
         self.attrs[key] = value
+        if key in _INDEXED_ATTRIBUTES:
+            self._attributes_changed()
 
     def __delitem__(self, key: str) -> None:
         "Deleting tag[key] deletes all 'key' attributes for the tag."
         self.attrs.pop(key, None)
+        if key in _INDEXED_ATTRIBUTES:
+            self._attributes_changed()
 
     def __call__(
         self,
@@ -2737,9 +3526,7 @@ class Tag(PageElement):
         :param _stacklevel: Used internally to improve warning messages.
         :kwargs: Additional filters on attribute values.
         """
-        generator = self.descendants
-        if not recursive:
-            generator = self.children
+        generator = self._find_all_generator(name, attrs, recursive, string, kwargs)
         return self._find_all(
             name, attrs, string, limit, generator, _stacklevel=_stacklevel + 1, **kwargs
         )
@@ -2747,6 +3534,250 @@ class Tag(PageElement):
     findAll = _deprecated_function_alias("findAll", "find_all", "4.0.0")
     findChildren = _deprecated_function_alias("findChildren", "find_all", "3.0.0")
 
+    def ifind_all(
+        self,
+        name: _FindMethodName = None,
+        attrs: _StrainableAttributes = {},
+        recursive: bool = True,
+        string: Optional[_StrainableString] = None,
+        limit: Optional[int] = None,
+        _stacklevel: int = 2,
+        **kwargs: _StrainableAttribute,
+    ) -> _LazyQueryResults:
+        """The same as find_all(), but the search is only carried out
+        as far as it needs to go.
+
+        Iterating over the `LazyResultSet` finds matches one at a
+        time. Checking whether it's empty only looks for the first
+        match, and indexing or slicing it only looks for as many
+        matches as it takes. Only len() has to finish the search.
+
+        While iterating, you can extract, decompose, or replace each
+        element as it's found, and the search will pick up after it.
+        Don't make any other changes to the tree while a search is in
+        progress.
+
+        :param name: A filter on tag name.
+        :param attrs: Additional filters on attribute values.
+        :param recursive: If this is True, ifind_all() will perform a
+            recursive search of this PageElement's children. Otherwise,
+            only the direct children will be considered.
+        :param limit: Stop looking after finding this many results.
+        :param _stacklevel: Used internally to improve warning messages.
+        :kwargs: Additional filters on attribute values.
+        """
+        generator = self._find_all_generator(
+            name, attrs, recursive, string, kwargs, lazy=True
+        )
+        return self._ifind_all(
+            name, attrs, string, limit, generator, _stacklevel=_stacklevel + 1, **kwargs
+        )
+
+    def find_all_many(
+        self,
+        queries: Mapping[str, Union[ElementFilter, str]],
+        limit: Optional[int] = None,
+        limits: Optional[Mapping[str, int]] = None,
+    ) -> Dict[str, _QueryResults]:
+        """Run several searches beneath this `Tag` at once, looking at
+        each element only once.
+
+        Each search gives the same results as running it on its own:
+        passing an `ElementFilter` (such as a `SoupStrainer`) works
+        like find_all(), and passing a CSS selector works like
+        select().
+
+        :param queries: Maps a name of your choosing to a search: an
+            `ElementFilter`, or a string containing a CSS selector.
+        :param limit: Stop looking for results to a search after
+            finding this many.
+        :param limits: Maps a name in ``queries`` to a limit for that
+            search, overriding ``limit``.
+        :return: A dictionary mapping each name in ``queries`` to a
+            `ResultSet` of the elements found by that search, in
+            document order. Once every search has reached its limit,
+            the rest of the tree is skipped.
+        """
+        from bs4.filter import ElementFilter
+
+        # To avoid calling a match function that can't possibly
+        # match, searches are sorted by the kind of element they look
+        # for, and if possible, the tag name.
+        all_elements: List[_Search] = []
+        all_tags: List[_Search] = []
+        strings: List[_Search] = []
+        by_name: Dict[str, List[_Search]] = {}
+        by_lowercase_name: Dict[str, List[_Search]] = {}
+
+        results: Dict[str, _QueryResults] = {}
+        remaining = 0
+        for query_name, query in queries.items():
+            query_limit = (
+                limit if limits is None else limits.get(query_name, limit)
+            )
+            if isinstance(query, ElementFilter):
+                results[query_name] = ResultSet(query)
+                search = _Search(query.match, results[query_name], query_limit)
+                remaining += 1
+                if type(query) is not SoupStrainer:
+                    all_elements.append(search)
+                elif not (query.name_rules or query.attribute_rules):
+                    strings.append(search)
+                elif query.name_rules and all(
+                    rule.string is not None
+                    and rule.pattern is None
+                    and rule.function is None
+                    and rule.present is None
+                    for rule in query.name_rules
+                ):
+                    # File the search once under each name it might
+                    # match, even if the rules repeat a name.
+                    keys: Set[str] = set()
+                    for rule in query.name_rules:
+                        name = cast(str, rule.string)
+                        # "prefix:name" might be a namespaced tag
+                        # called "name".
+                        keys.update((name, name.split(":", 1)[-1]))
+                    for key in keys:
+                        by_name.setdefault(key, []).append(search)
+                else:
+                    all_tags.append(search)
+                continue
+
+            match, tag_name = self.css._match_function(query)
+            if match is None:
+                # This selector has to be run on its own.
+                results[query_name] = cast(
+                    "_QueryResults", self.select(query, limit=query_limit or 0)
+                )
+                continue
+            results[query_name] = ResultSet(None)
+            search = _Search(match, results[query_name], query_limit)
+            remaining += 1
+            if tag_name is None:
+                all_tags.append(search)
+            else:
+                by_lowercase_name.setdefault(tag_name, []).append(search)
+
+        for element in self.descendants:
+            if not remaining:
+                break
+            if not element:
+                # ElementFilter.filter() skips empty strings, too.
+                continue
+            groups: List[List[_Search]]
+            if isinstance(element, Tag):
+                name = element.name
+                groups = [
+                    all_elements,
+                    all_tags,
+                    by_name.get(name, []),
+                    by_lowercase_name.get(
+                        name if name.islower() else name.lower(), []
+                    ),
+                ]
+            else:
+                groups = [all_elements, strings]
+            finished = False
+            for group in groups:
+                for search in group:
+                    if search.finished or not search.match(element):
+                        continue
+                    found = search.found
+                    found.append(element)
+                    if search.limit and len(found) >= search.limit:
+                        search.finished = finished = True
+                        remaining -= 1
+            if finished:
+                # Stop trying the searches that are over.
+                for group in (
+                    all_elements,
+                    all_tags,
+                    strings,
+                    *by_name.values(),
+                    *by_lowercase_name.values(),
+                ):
+                    group[:] = [x for x in group if not x.finished]
+        return results
+
+    def _find_all_generator(
+        self,
+        name: _FindMethodName,
+        attrs: _StrainableAttributes,
+        recursive: bool,
+        string: Optional[_StrainableString],
+        kwargs: Dict[str, _StrainableAttribute],
+        lazy: bool = False,
+    ) -> Iterator[PageElement]:
+        """Choose the elements a find_all()-type search will look at:
+        this `Tag`'s children or descendants, or just the ones the
+        `TreeIndex` says are worth looking at.
+
+        :param lazy: If this is True, the search is being run by
+            ifind_all(), and each element it yields may be taken out
+            of the tree before the search goes on. The elements
+            beneath it will be skipped.
+        """
+        if not recursive:
+            if lazy:
+                return iter(list(self.contents))
+            return self.children
+        if self.contents and string is None and "text" not in kwargs:
+            index = self._tree_index()
+            if index is not None:
+                candidates = index.candidates(
+                    self, cast(Optional[str], name), attrs, kwargs
+                )
+                if candidates is not None:
+                    if lazy:
+                        return self._still_beneath(candidates)
+                    return iter(candidates)
+        if lazy:
+            return self._lazy_descendants()
+        return self.descendants
+
+    def _still_beneath(self, candidates: Iterable[Tag]) -> Iterator[Tag]:
+        """Yield the `Tag` objects in ``candidates`` that are still
+        beneath this one, even if some of them have been taken out of
+        the tree since the list was made.
+        """
+        for candidate in candidates:
+            if candidate.decomposed:
+                continue
+            parent = candidate.parent
+            while parent is not None and parent is not self:
+                parent = parent.parent
+            if parent is self:
+                yield candidate
+
+    def _lazy_descendants(self) -> Iterator[PageElement]:
+        """Like `Tag.descendants`, but each element that's yielded may
+        be taken out of the tree (by extracting it, decomposing it, or
+        replacing it with something else) before the next one is
+        requested. If that happens, the walk picks up after the
+        element and everything that used to be beneath it.
+        """
+        if not len(self.contents):
+            return
+        last_descendant = cast(PageElement, self._last_descendant(accept_self=True))
+        stop_node = last_descendant.next_element
+        current: _AtMostOneElement = self.contents[0]
+        while current is not stop_node and current is not None:
+            parent = current.parent
+            next_sibling = current.next_sibling
+            yield current
+            if not current.decomposed and current.parent is parent:
+                current = current.next_element
+                continue
+
+            # This element was taken out of the tree. Move on to its
+            # next sibling, or the next sibling of the closest parent
+            # that has one.
+            while next_sibling is None and parent is not None and parent is not self:
+                next_sibling = parent.next_sibling
+                parent = parent.parent
+            current = next_sibling
+
     # Generator methods
     @property
     def children(self) -> Iterator[PageElement]:
@@ -2826,6 +3857,43 @@ class Tag(PageElement):
         """Return an interface to the CSS selector API."""
         return CSS(self)
 
+    def xpath(
+        self,
+        expression: Union[str, XPath],
+        namespaces: Optional[Dict[str, str]] = None,
+        **variables: Any,
+    ) -> _XPathResult:
+        """Evaluate an XPath expression, with this `Tag` as the context
+        node.
+
+        Only a subset of XPath 1.0 is supported; see `bs4.xpath` for
+        the details.
+
+        :param expression: A string containing an XPath expression,
+           or an `XPath` object obtained from `XPath.compile`.
+
+        :param namespaces: A dictionary mapping namespace prefixes
+           used in the expression to namespace URIs. By default,
+           Beautiful Soup will use the prefixes it encountered while
+           parsing the document.
+
+        :param variables: Values for the variables used in the
+           expression. A variable whose value is an `ElementFilter`
+           can be used as a node test, as in ``//div/$links``.
+
+        :return: If the expression evaluates to a node-set, a list of
+           the matching `PageElement` objects (and attribute values) in
+           document order. Otherwise, a string, float or boolean.
+
+        :raise XPathError: If the expression is invalid or uses an
+           unsupported part of XPath.
+        """
+        from bs4.xpath import XPath
+
+        if isinstance(expression, str):
+            expression = XPath.compile(expression)
+        return expression.evaluate(self, namespaces, **variables)
+
     # Old names for backwards compatibility
     @_deprecated("children", "4.0.0")
     def childGenerator(self) -> Iterator[PageElement]:
@@ -2879,6 +3947,130 @@ class ResultSet(List[_PageElementT], Generic[_PageElementT]):
         )
 
 
+class _Search:
+    """One of the searches being run by `Tag.find_all_many`."""
+
+    __slots__ = ("match", "found", "limit", "finished")
+
+    match: Callable[[Any], bool]
+    found: _QueryResults
+    limit: Optional[int]
+    finished: bool
+
+    def __init__(
+        self, match: Callable[[Any], bool], found: _QueryResults, limit: Optional[int]
+    ):
+        self.match = match
+        self.found = found
+        self.limit = limit
+        self.finished = False
+
+
+class LazyResultSet(Sequence[_PageElementT], Generic[_PageElementT]):
+    """A `ResultSet` whose results are only found when they're needed.
+
+    Results are kept as they're found, so a `LazyResultSet` can be
+    iterated over more than once. Asking for its length, for a
+    negative index, or for a slice that counts from the end, means
+    finding every result.
+    """
+
+    source: Optional[ElementFilter]
+
+    _found: List[_PageElementT]
+    _search: Optional[Iterator[_PageElementT]]
+
+    def __init__(
+        self, source: Optional[ElementFilter], result: Iterable[_PageElementT] = ()
+    ) -> None:
+        self.source = source
+        self._found = []
+        self._search = iter(result)
+
+    def _find(self, count: Optional[int] = None) -> None:
+        """Keep searching until at least `count` results have been
+        found, or until the search is over.
+
+        :param count: Find this many results. If this is None,
+           find all of them.
+        """
+        search = self._search
+        if search is None:
+            return
+        found = self._found
+        if count is None:
+            found.extend(search)
+        else:
+            found.extend(itertools.islice(search, max(count - len(found), 0)))
+            if len(found) >= count:
+                return
+        self._search = None
+
+    def __iter__(self) -> Iterator[_PageElementT]:
+        found = self._found
+        i = 0
+        while True:
+            if i >= len(found):
+                self._find(i + 1)
+                if i >= len(found):
+                    return
+            yield found[i]
+            i += 1
+
+    def __len__(self) -> int:
+        self._find()
+        return len(self._found)
+
+    def __bool__(self) -> bool:
+        self._find(1)
+        return len(self._found) > 0
+
+    @overload
+    def __getitem__(self, index: int) -> _PageElementT:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> ResultSet[_PageElementT]:
+        ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[_PageElementT, ResultSet[_PageElementT]]:
+        if isinstance(index, slice):
+            start, stop, step = index.start, index.stop, index.step
+            if (
+                stop is not None
+                and stop >= 0
+                and (start is None or start >= 0)
+                and (step is None or step > 0)
+            ):
+                self._find(stop)
+            else:
+                self._find()
+            return ResultSet(self.source, self._found[index])
+        if index >= 0:
+            self._find(index + 1)
+        else:
+            self._find()
+        return self._found[index]
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (list, LazyResultSet)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    # Equal LazyResultSets might be hashed differently.
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        if self._search is None:
+            return repr(self._found)
+        # Show what's been found so far, without finding any more.
+        return repr(self._found)[:-1] + (", ...]" if self._found else "...]")
+
+    __getattr__ = ResultSet.__getattr__
+
+
 # Now that all the classes used by SoupStrainer have been defined,
 # import SoupStrainer itself into this module to preserve the
 # backwards compatibility of anyone who imports
@@ -13,6 +13,12 @@ class FeatureNotFound(ValueError):
     """
 
 
+class XPathError(ValueError):
+    """Exception raised when an XPath expression can't be compiled or
+    evaluated.
+    """
+
+
 class ParserRejectedMarkup(Exception):
     """An Exception to be raised when the underlying parser simply
     refuses to parse the given markup.
@@ -11,9 +11,11 @@ from typing import (
     List,
     Optional,
     Sequence,
+    Tuple,
     Type,
     Union,
 )
+from typing_extensions import Self
 import warnings
 
 from bs4._deprecation import _deprecated
@@ -94,6 +96,29 @@ class ElementFilter(object):
         """
         return False
 
+    @property
+    def excludes_strings(self) -> bool:
+        """Will this `ElementFilter` reject every string it's asked
+        about in `allow_string_creation`? If so, a tree builder can
+        skip over text that's not inside an allowed `Tag` without
+        collecting it.
+
+        The base `ElementFilter` implementation allows every string,
+        so this always returns `False`.
+        """
+        return False
+
+    def compile(self) -> Self:
+        """Do any work that will make it faster to match this
+        `ElementFilter` against a lot of elements.
+
+        The base `ElementFilter` has nothing to prepare, so this does
+        nothing.
+
+        :return: This `ElementFilter`.
+        """
+        return self
+
     def match(self, element: PageElement) -> bool:
         """Does the given PageElement match the rules set down by this
         ElementFilter?
@@ -111,13 +136,14 @@ class ElementFilter(object):
         Acts like Python's built-in `filter`, using
         `ElementFilter.match` as the filtering function.
         """
+        match = self.match
         while True:
             try:
                 i = next(generator)
             except StopIteration:
                 break
             if i:
-                if self.match(i):
+                if match(i):
                     yield cast("_OneElement", i)
 
     def find(self, generator: Iterator[PageElement]) -> _AtMostOneElement:
@@ -310,6 +336,85 @@ class StringMatchRule(MatchRule):
     function: Optional[_StringMatchFunction]
 
 
+#: Inline flags like "(?i)" apply to a whole regular expression, so a
+#: pattern that uses them can't be merged with other patterns.
+_GLOBAL_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+def _compile_rules(
+    rules: Iterable[MatchRule],
+) -> Tuple[Callable[[Any], bool], List[Callable[[Any], bool]]]:
+    """Combine a number of `MatchRule` into as few checks as possible.
+
+    Rules that match a literal string become a single set lookup, and
+    regular expressions that can be merged become a single
+    alternation.
+
+    :return: A 2-tuple (check, functions). ``check`` is a function
+        that applies every rule that doesn't call a function.
+        ``functions`` is a list of the rules' functions, which the
+        caller must call on its own, since the argument depends on
+        what kind of rule it is.
+    """
+    strings = set()
+    patterns: List[_RegularExpressionProtocol] = []
+    mergeable: Dict[int, List[str]] = defaultdict(list)
+    functions = []
+    present_true = present_false = False
+    for rule in rules:
+        if rule.present is True:
+            present_true = True
+        elif rule.present is False:
+            present_false = True
+        elif rule.string is not None:
+            strings.add(rule.string)
+        elif rule.pattern is not None:
+            pattern = rule.pattern
+            if (
+                isinstance(pattern, re.Pattern)
+                and isinstance(pattern.pattern, str)
+                and pattern.groups == 0
+                and not pattern.flags & re.VERBOSE
+                and _GLOBAL_FLAGS.search(pattern.pattern) is None
+            ):
+                mergeable[pattern.flags].append(pattern.pattern)
+            else:
+                patterns.append(pattern)
+        elif rule.function is not None:
+            functions.append(rule.function)
+    for flags, sources in mergeable.items():
+        if len(sources) > 1:
+            try:
+                patterns.append(
+                    re.compile("|".join(f"(?:{source})" for source in sources), flags)
+                )
+                continue
+            except re.error:
+                # Something in one of the patterns only makes sense on
+                # its own.
+                pass
+        patterns.extend(re.compile(source, flags) for source in sources)
+
+    literals = frozenset(strings)
+    if not (patterns or present_true or present_false):
+        def check_literals(value: Any) -> bool:
+            return isinstance(value, str) and value in literals
+
+        return check_literals, functions
+
+    def check(value: Any) -> bool:
+        if value is None:
+            return present_false
+        if present_true or (isinstance(value, str) and value in literals):
+            return True
+        for pattern in patterns:
+            if pattern.search(value) is not None:
+                return True
+        return False
+
+    return check, functions
+
+
 class SoupStrainer(ElementFilter):
     """The `ElementFilter` subclass used internally by Beautiful Soup.
 
@@ -342,6 +447,14 @@ class SoupStrainer(ElementFilter):
     attribute_rules: Dict[str, List[AttributeValueMatchRule]]
     string_rules: List[StringMatchRule]
 
+    # These are set by compile().
+    _tag_matcher: Optional[Callable[[Tag], bool]] = None
+    _tag_creation_matcher: Optional[
+        Callable[[Optional[str], str, Optional[_RawAttributeValues]], bool]
+    ] = None
+    _string_matcher: Optional[Callable[[str], bool]] = None
+    _element_matcher: Optional[Callable[[PageElement], bool]] = None
+
     def __init__(
         self,
         name: Optional[_StrainableElement] = None,
@@ -407,6 +520,13 @@ class SoupStrainer(ElementFilter):
             else False
         )
 
+    @property
+    def excludes_strings(self) -> bool:
+        """A `SoupStrainer` with name or attribute rules won't match
+        any strings. See `ElementFilter.excludes_strings`.
+        """
+        return bool(self.name_rules or self.attribute_rules)
+
     @property
     def string(self) -> Optional[_StrainableString]:
         ":meta private:"
@@ -472,6 +592,172 @@ class SoupStrainer(ElementFilter):
         else:
             yield rule_class(string=str(obj))
 
+    def compile(self) -> Self:
+        """Turn this `SoupStrainer`'s rules into a few functions that
+        can be run quickly against a lot of elements.
+
+        Rules that match literal tag names or attribute values become
+        a set lookup, and regular expressions are merged into a single
+        alternation where possible, so a `SoupStrainer` with fifty
+        names costs about the same as one with a single name.
+
+        `Tag.find_all` and the other find_* methods do this
+        automatically when there are several names, values or
+        regular expressions to check, and the `BeautifulSoup`
+        constructor always does it with its ``parse_only`` argument. If you change the rules of a
+        `SoupStrainer` after compiling it, call `compile` again.
+
+        :return: This `SoupStrainer`.
+        """
+        has_name_rules = bool(self.name_rules)
+        has_string_rules = bool(self.string_rules)
+        name_check, name_functions = _compile_rules(self.name_rules)
+        string_check, string_functions = _compile_rules(self.string_rules)
+        attribute_checks = [
+            (attr, self._compile_attribute_rules(rules))
+            for attr, rules in self.attribute_rules.items()
+        ]
+
+        def string_matches(string: str) -> bool:
+            if string_check(string):
+                return True
+            for function in string_functions:
+                if function(string):
+                    return True
+            return False
+
+        def attributes_match(get: Callable[[str], Any]) -> bool:
+            for attr, attribute_matches in attribute_checks:
+                if not attribute_matches(get(attr)):
+                    return False
+            return True
+
+        def tag_matches(tag: Tag) -> bool:
+            if has_name_rules:
+                name = tag.name
+                prefixed_name = f"{tag.prefix}:{name}" if tag.prefix else None
+                if not (
+                    name_check(name)
+                    or (prefixed_name is not None and name_check(prefixed_name))
+                ):
+                    for function in name_functions:
+                        if function(tag) or (
+                            prefixed_name is not None and function(prefixed_name)
+                        ):
+                            break
+                    else:
+                        return False
+            if attribute_checks and not attributes_match(tag.get):
+                return False
+            if has_string_rules:
+                string = tag.string
+                if string is None or not string_matches(string):
+                    return False
+            return True
+
+        def tag_creation_allowed(
+            nsprefix: Optional[str], name: str, attrs: Optional[_RawAttributeValues]
+        ) -> bool:
+            if has_name_rules:
+                prefixed_name = f"{nsprefix}:{name}" if nsprefix else None
+                if not (
+                    name_check(name)
+                    or (prefixed_name is not None and name_check(prefixed_name))
+                ):
+                    for function in name_functions:
+                        if function(name) or (
+                            prefixed_name is not None and function(prefixed_name)
+                        ):
+                            break
+                    else:
+                        return False
+            if attribute_checks:
+                return attributes_match((attrs or {}).get)
+            return True
+
+        if has_string_rules:
+            self._tag_creation_matcher = lambda nsprefix, name, attrs: False
+        else:
+            self._tag_creation_matcher = tag_creation_allowed
+
+        def tag_matches_element(element: PageElement) -> bool:
+            return isinstance(element, Tag) and tag_matches(element)
+
+        def string_matches_element(element: PageElement) -> bool:
+            return isinstance(element, NavigableString) and string_matches(element)
+
+        if has_name_rules or attribute_checks:
+            # Strings can only match a SoupStrainer with no name or
+            # attribute rules.
+            self._tag_matcher = tag_matches
+            self._string_matcher = lambda string: False
+            self._element_matcher = tag_matches_element
+        else:
+            # Tags can only match a SoupStrainer that has name or
+            # attribute rules.
+            self._tag_matcher = lambda tag: False
+            self._string_matcher = string_matches
+            self._element_matcher = string_matches_element
+        return self
+
+    def _worth_compiling(self) -> bool:
+        """Is `compile` likely to make this `SoupStrainer` faster?
+
+        Compiling takes several microseconds. It pays off when there
+        are several rules to be merged into one check, but a single
+        rule is matched about as fast without it.
+        """
+        if len(self.name_rules) > 1 or len(self.string_rules) > 1:
+            return True
+        for rules in self.attribute_rules.values():
+            if len(rules) > 1:
+                return True
+        return False
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The compiled functions can't be pickled. They'll be created
+        # again if they're needed.
+        state = dict(self.__dict__)
+        for attr in (
+            "_tag_matcher",
+            "_tag_creation_matcher",
+            "_string_matcher",
+            "_element_matcher",
+        ):
+            state.pop(attr, None)
+        return state
+
+    @staticmethod
+    def _compile_attribute_rules(
+        rules: Iterable[AttributeValueMatchRule],
+    ) -> Callable[[Optional[_AttributeValue]], bool]:
+        """Compile the rules for one attribute into a function that
+        works like `_attribute_match`.
+        """
+        check, functions = _compile_rules(rules)
+
+        def value_matches(value: Optional[str]) -> bool:
+            if check(value):
+                return True
+            for function in functions:
+                if function(value):
+                    return True
+            return False
+
+        def attribute_matches(attr_value: Optional[_AttributeValue]) -> bool:
+            if not isinstance(attr_value, list):
+                return value_matches(attr_value)
+            for value in attr_value:
+                if value_matches(value):
+                    return True
+            if len(attr_value) > 1:
+                # Try again but treat the attribute value as a single
+                # string.
+                return value_matches(" ".join(attr_value))
+            return False
+
+        return attribute_matches
+
     def matches_tag(self, tag: Tag) -> bool:
         """Do the rules of this `SoupStrainer` trigger a match against the
         given `Tag`?
@@ -487,6 +773,9 @@ class SoupStrainer(ElementFilter):
         but a `SoupStrainer` that *only* contains `StringMatchRule`
         cannot match a `Tag`, only a `NavigableString`.
         """
+        if self._tag_matcher is not None:
+            return self._tag_matcher(tag)
+
         # String rules cannot not match a Tag on their own.
         if not self.name_rules and not self.attribute_rules:
             return False
@@ -586,6 +875,8 @@ class SoupStrainer(ElementFilter):
         :param name: The name of the prospective tag.
         :param attrs: The attributes of the prospective tag.
         """
+        if self._tag_creation_matcher is not None:
+            return self._tag_creation_matcher(nsprefix, name, attrs)
         if self.string_rules:
             # A SoupStrainer that has string rules can't be used to
             # manage tag creation, because the string rule can't be
@@ -623,6 +914,10 @@ class SoupStrainer(ElementFilter):
         `SoupStrainer` will allow it to be instantiated as a
         `NavigableString` object, or whether it should be ignored.
         """
+        if self._tag_creation_matcher is not None:
+            if not self.string_rules:
+                return not (self.name_rules or self.attribute_rules)
+            return cast(Callable[[str], bool], self._string_matcher)(string)
         if self.name_rules or self.attribute_rules:
             # A SoupStrainer that has name or attribute rules won't
             # match any strings; it's designed to match tags with
@@ -656,6 +951,8 @@ class SoupStrainer(ElementFilter):
         :param element: A `PageElement`.
         :return: `True` if the element matches this `SoupStrainer`'s rules; `False` otherwise.
         """
+        if self._element_matcher is not None:
+            return self._element_matcher(element)
         if isinstance(element, Tag):
             return self.matches_tag(element)
         assert isinstance(element, NavigableString)
@@ -0,0 +1,367 @@
+"""Indexes that let `Tag.find_all` look up tags by name, id or class
+without walking the whole parse tree.
+
+Create a `BeautifulSoup` object with ``indexed=True`` and a
+`TreeIndex` is built as soon as the document has been parsed. From
+then on, it's kept up to date as the tree is modified with methods
+like `Tag.append`, `PageElement.extract` and `PageElement.decompose`,
+as tags are renamed, and as attributes are changed, whether that's
+with ``tag[attribute] = value`` or by modifying a `Tag.attrs`
+dictionary or an `AttributeValueList` in place.
+
+The one change that can't be noticed is modifying, in place, an
+attribute value that's a plain list rather than an
+`AttributeValueList`. If you do that, call `BeautifulSoup.reindex`
+afterwards.
+"""
+
+from __future__ import annotations
+
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    TYPE_CHECKING,
+)
+
+from bs4.element import (
+    PageElement,
+    Tag,
+)
+
+if TYPE_CHECKING:
+    from bs4._typing import _StrainableAttributes
+
+# A bucket maps id(tag) to a Tag, for every Tag filed under some
+# name, id or class. Tags can't be used as dictionary keys
+# themselves, because Tag.__hash__ serializes the Tag.
+_Bucket = Dict[int, Tag]
+
+# The keys a Tag was filed under: its name, and the words in its
+# 'id' and 'class' attributes.
+_Keys = Tuple[str, Tuple[str, ...], Tuple[str, ...]]
+
+
+class TreeIndex:
+    """Maps tag names, ids and classes to the `Tag` objects that have
+    them, for the `Tag` objects beneath a root `Tag` (generally a
+    `BeautifulSoup` object).
+
+    Each bucket keeps its `Tag` objects in document order, so the
+    results of a lookup can be returned as-is. Inserting a `Tag`
+    anywhere other than the very end of the document throws the
+    order off; the index is then rebuilt, in a single pass over the
+    tree, the next time it's used.
+
+    :param root: Index the `Tag` objects beneath this one.
+    """
+
+    root: Tag
+
+    #: The number of times the index has been built from scratch.
+    builds: int
+
+    _by_name: Dict[str, _Bucket]
+    _by_id: Dict[str, _Bucket]
+    _by_class: Dict[str, _Bucket]
+    _keys: Dict[int, _Keys]
+    _positions: Dict[int, int]
+    _next_position: int
+    _in_order: bool
+    _unsorted: Set[int]
+
+    def __init__(self, root: Tag):
+        self.root = root
+        self.builds = 0
+        self.rebuild()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def rebuild(self) -> None:
+        """Index the tree again from scratch."""
+        self._by_name = {}
+        self._by_id = {}
+        self._by_class = {}
+        self._keys = {}
+        self._positions = {}
+        self._next_position = 0
+        self._unsorted = set()
+        self._in_order = True
+        self.builds += 1
+        for element in self.root.descendants:
+            if isinstance(element, Tag):
+                self._add(element)
+
+    def added(self, element: PageElement) -> None:
+        """Index an element that was just inserted into the tree,
+        along with any `Tag` objects beneath it.
+        """
+        if not self._in_order:
+            # The whole index will be rebuilt before it's used again.
+            return
+        last = element._last_descendant()
+        if last is not None and last.next_element is not None:
+            # This element went somewhere in the middle of the
+            # document, so the tags after it have to be renumbered.
+            self._in_order = False
+            return
+        for tag in self._tags_in(element):
+            self._add(tag)
+
+    def removed(self, element: PageElement) -> None:
+        """Forget an element that's about to be extracted from the
+        tree, along with any `Tag` objects beneath it.
+        """
+        if not self._in_order:
+            return
+        for tag in self._tags_in(element):
+            self._remove(tag)
+
+    def renamed(self, tag: Tag) -> None:
+        """File a `Tag` under its current name."""
+        if not self._in_order:
+            return
+        key = id(tag)
+        old = self._keys.get(key)
+        if old is None:
+            return
+        old_name, ids, classes = old
+        name = tag.name
+        self._keys[key] = (name, ids, classes)
+        self._refile(tag, (old_name,), (name,), self._by_name)
+
+    def attributes_changed(self, tag: Tag) -> None:
+        """File a `Tag` under its current 'id' and 'class' attributes."""
+        if not self._in_order:
+            return
+        key = id(tag)
+        old = self._keys.get(key)
+        if old is None:
+            return
+        # The attribute dictionary, or a list in it, may be new.
+        tag._watch_attributes()
+        name, old_ids, old_classes = old
+        ids, classes = self._attribute_words(tag)
+        self._keys[key] = (name, ids, classes)
+        self._refile(tag, old_ids, ids, self._by_id)
+        self._refile(tag, old_classes, classes, self._by_class)
+
+    def candidates(
+        self,
+        within: Tag,
+        name: Optional[str],
+        attrs: _StrainableAttributes,
+        kwargs: Mapping[str, object],
+        ignore_case: bool = False,
+    ) -> Optional[List[Tag]]:
+        """Use the index to narrow down a search.
+
+        Only the simplest rules can be looked up: a tag name with no
+        namespace prefix, and a string value for the 'id' or 'class'
+        attribute. The smallest matching bucket is returned, and
+        every rule in the search (not just the one that was looked up)
+        still has to be checked against each `Tag` in it.
+
+        :param within: Only `Tag` objects beneath this one are
+            wanted.
+        :param name: The ``name`` argument to `Tag.find_all`.
+        :param attrs: The ``attrs`` argument to `Tag.find_all`.
+        :param kwargs: The keyword arguments to `Tag.find_all`.
+        :param ignore_case: If this is True, ``name`` is a lowercase
+            tag name that should match tag names without regard to
+            case. The name is then only looked up if no other tag name
+            lowercases to it.
+        :return: A list of `Tag` objects in document order, or None if
+            the index can't help with this search, or if it would be
+            quicker to look at every element beneath ``within``.
+        """
+        if not isinstance(attrs, dict):
+            # Passing something other than a dictionary as attrs is
+            # sugar for matching it against the 'class' attribute.
+            attrs = {"class": attrs}
+        ids: List[object] = []
+        classes: List[object] = []
+        for attrdict in attrs, kwargs:
+            for attr, value in attrdict.items():
+                if attr == "id":
+                    ids.append(value)
+                elif attr == "class" or (attr == "class_" and attrdict is kwargs):
+                    classes.append(value)
+
+        lookups: List[Tuple[str, str]] = []
+        if isinstance(name, str) and ":" not in name:
+            lookups.append(("_by_name", name))
+        for values, buckets in ((ids, "_by_id"), (classes, "_by_class")):
+            for value in values:
+                # A string value matches a tag only if it's one of the
+                # words in the tag's attribute value, or all of them
+                # put together. Either way, the tag was filed under
+                # the value's first word.
+                if isinstance(value, str):
+                    words = value.split()
+                    if words:
+                        lookups.append((buckets, words[0]))
+        if not lookups:
+            return None
+
+        if not self._in_order:
+            self.rebuild()
+        if ignore_case and isinstance(name, str):
+            if any(
+                other != name and other.lower() == name for other in self._by_name
+            ):
+                lookups.remove(("_by_name", name))
+                if not lookups:
+                    return None
+        best: Optional[_Bucket] = None
+        for buckets, key in lookups:
+            bucket = getattr(self, buckets).get(key)
+            if bucket is None:
+                return []
+            if best is None or len(bucket) < len(best):
+                best = bucket
+        assert best is not None
+        positions = self._positions
+        if id(best) in self._unsorted:
+            ordered = sorted(best.items(), key=lambda item: positions[item[0]])
+            best.clear()
+            best.update(ordered)
+            self._unsorted.discard(id(best))
+        if within is self.root:
+            return list(best.values())
+
+        # The tags beneath `within` are numbered consecutively,
+        # starting just after `within` itself.
+        start = positions.get(id(within))
+        if start is None:
+            return None
+        last = within._last_descendant()
+        while last is not None and not (
+            isinstance(last, Tag) and id(last) in positions
+        ):
+            last = last.previous_element
+        assert last is not None
+        end = positions[id(last)]
+        if end - start < len(best):
+            return None
+        return [tag for key, tag in best.items() if start < positions[key] <= end]
+
+    @classmethod
+    def _tags_in(cls, element: PageElement) -> Iterable[Tag]:
+        """Yield `element` and everything beneath it that's a `Tag`."""
+        if isinstance(element, Tag):
+            yield element
+            for descendant in element.descendants:
+                if isinstance(descendant, Tag):
+                    yield descendant
+
+    @classmethod
+    def _attribute_words(cls, tag: Tag) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """Find the words in a `Tag`'s 'id' and 'class' attributes,
+        without processing its attributes if they haven't been
+        processed yet.
+
+        Attribute names are compared without regard to case, since a
+        CSS selector like ``#main`` matches an 'ID' attribute in an
+        HTML document. A `Tag` that's filed under an attribute it
+        doesn't strictly have is weeded out by the search itself.
+        """
+        attrs = tag._attrs
+        if not attrs:
+            return (), ()
+        ids: Tuple[str, ...] = ()
+        classes: Tuple[str, ...] = ()
+        items = attrs if attrs.__class__ is tuple else attrs.items()  # type: ignore[union-attr]
+        for key, value in items:
+            if key == "id":
+                ids += cls._words(value)
+            elif key == "class":
+                classes += cls._words(value)
+            elif len(key) == 2 and key.lower() == "id":
+                ids += cls._words(value)
+            elif len(key) == 5 and key.lower() == "class":
+                classes += cls._words(value)
+        return ids, classes
+
+    @classmethod
+    def _words(cls, value: object) -> Tuple[str, ...]:
+        if not value:
+            return ()
+        if isinstance(value, str):
+            return tuple(value.split())
+        if isinstance(value, list):
+            return tuple(
+                word for item in value if isinstance(item, str) for word in item.split()
+            )
+        return ()
+
+    def _add(self, tag: Tag) -> None:
+        key = id(tag)
+        if key in self._keys:
+            return
+        tag._watch_attributes()
+        ids, classes = self._attribute_words(tag)
+        name = tag.name
+        self._keys[key] = (name, ids, classes)
+        self._positions[key] = self._next_position
+        self._next_position += 1
+        bucket = self._by_name.get(name)
+        if bucket is None:
+            bucket = self._by_name[name] = {}
+        bucket[key] = tag
+        for word in ids:
+            self._by_id.setdefault(word, {})[key] = tag
+        for word in classes:
+            self._by_class.setdefault(word, {})[key] = tag
+
+    def _remove(self, tag: Tag) -> None:
+        key = id(tag)
+        keys = self._keys.pop(key, None)
+        if keys is None:
+            return
+        del self._positions[key]
+        name, ids, classes = keys
+        self._discard(self._by_name, name, key)
+        for word in ids:
+            self._discard(self._by_id, word, key)
+        for word in classes:
+            self._discard(self._by_class, word, key)
+
+    def _discard(self, buckets: Dict[str, _Bucket], word: str, key: int) -> None:
+        bucket = buckets.get(word)
+        if bucket is None:
+            return
+        bucket.pop(key, None)
+        if not bucket:
+            del buckets[word]
+            self._unsorted.discard(id(bucket))
+
+    def _refile(
+        self,
+        tag: Tag,
+        old: Tuple[str, ...],
+        new: Tuple[str, ...],
+        buckets: Dict[str, _Bucket],
+    ) -> None:
+        """Move a `Tag` from the buckets for its old words to the
+        buckets for its new ones.
+        """
+        key = id(tag)
+        for word in old:
+            if word not in new:
+                self._discard(buckets, word, key)
+        position = self._positions[key]
+        for word in new:
+            bucket = buckets.setdefault(word, {})
+            if key in bucket:
+                continue
+            if bucket and self._positions[next(reversed(bucket))] > position:
+                # This tag belongs somewhere before the end of the
+                # bucket. Sort the bucket the next time it's used.
+                self._unsorted.add(id(bucket))
+            bucket[key] = tag
@@ -0,0 +1,616 @@
+"""A compact binary format for Beautiful Soup parse trees.
+
+`dumps` turns a `Tag` (or a whole `BeautifulSoup` object) into a
+bytestring, and `loads` turns the bytestring back into a parse tree.
+Unlike converting a tree to markup and parsing it again, `loads`
+doesn't run a parser: it rebuilds the `Tag` and `NavigableString`
+objects directly, so it's much faster. The same information is used
+when a `Tag` or `BeautifulSoup` object is pickled.
+
+The format records each element's class, name, namespace, prefix,
+attributes and position in the source document. Arbitrary Python
+attributes you've set on an element are not recorded, and the
+values of attributes are recorded as strings (or lists of strings,
+for multi-valued attributes like 'class').
+
+`dumps` uses the `marshal` module, whose format can change from
+one version of Python to the next, so `loads` only accepts data
+written by the same version of Python. Use pickle if you need to
+move a parse tree between Python versions.
+
+Only load data you trust: like pickle, `loads` will import the
+modules that define the classes mentioned in the data.
+"""
+
+from __future__ import annotations
+
+from array import array
+import importlib
+import marshal
+import sys
+from typing import (
+    Any,
+    cast,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TYPE_CHECKING,
+    TypeVar,
+)
+
+from bs4.element import (
+    CharsetMetaAttributeValue,
+    ContentMetaAttributeValue,
+    NamespacedAttribute,
+    NavigableString,
+    PageElement,
+    Tag,
+)
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
+    from bs4.builder import TreeBuilder
+
+#: Identifies data written by `dumps`.
+MAGIC: str = "bs4-tree"
+
+#: The version of the format written by `dumps`.
+VERSION: int = 1
+
+#: Identifies the version of Python that wrote data with `dumps`.
+#: The `marshal` format isn't guaranteed to be the same between
+#: versions, so `loads` refuses data written by any other version.
+PYTHON_VERSION: str = "%s-%d.%d" % (sys.implementation.name, *sys.version_info[:2])
+
+# The parse tree is stored as a flat array of integers, with
+# strings kept in separate lists. Each element starts with an
+# integer whose bottom two bits say what kind of record it is, and
+# whose other bits are flags.
+_TAG = 0
+_STRING = 1
+_END = 2
+_KIND_BITS = 2
+
+# Flags for a _TAG record. Each of the first six means that another
+# integer follows, either in the main array or (for positions in the
+# source document) in the array of positions.
+_CUSTOM_CLASS = 1 << 0
+_HAS_PREFIX = 1 << 1
+_HAS_NAMESPACE = 1 << 2
+_HAS_NAMESPACES = 1 << 3
+_HAS_SOURCELINE = 1 << 4
+_HAS_SOURCEPOS = 1 << 5
+_HIDDEN = 1 << 6
+_RAW_ATTRIBUTES = 1 << 7
+_KNOWN_XML_SHIFT = 8
+_EMPTY_ELEMENT_SHIFT = 10
+
+# Flags for each processed attribute.
+_NAMESPACED_KEY = 1 << 0
+_VALUE_SHIFT = 1
+_STRING_VALUE = 0
+_LIST_VALUE = 1
+_CHARSET_VALUE = 2
+_CONTENT_VALUE = 3
+
+# How None, False, and True are stored in two bits.
+_TRISTATE: Dict[Optional[bool], int] = {None: 0, False: 1, True: 2}
+_FROM_TRISTATE: Tuple[Optional[bool], ...] = (None, False, True)
+
+_T = TypeVar("_T")
+
+
+def dumps(element: Tag) -> bytes:
+    """Convert a `Tag` and everything inside it into a bytestring.
+
+    :param element: A `Tag`. If this is a `BeautifulSoup` object,
+        the whole document is stored, along with information about
+        how it was parsed.
+    :return: A bytestring that can be passed into `loads`, by this
+        version of Python.
+    """
+    return marshal.dumps(_dump(element))
+
+
+def loads(data: bytes) -> Tag:
+    """Rebuild a parse tree from a bytestring created by `dumps`.
+
+    :param data: A bytestring created by `dumps`, by this version of
+        Python.
+    :return: A `Tag` unconnected to any other parse tree, or a
+        `BeautifulSoup` object if a `BeautifulSoup` object was dumped.
+    """
+    try:
+        loaded = marshal.loads(data)
+    except (EOFError, ValueError, TypeError):
+        loaded = None
+    _check(loaded)
+    if loaded[2] != PYTHON_VERSION:
+        raise ValueError(
+            f"This parse tree was written by {loaded[2]}; it can only be loaded by the same version of Python."
+        )
+    return _load(loaded)
+
+
+def _dump(element: Tag) -> Tuple[Any, ...]:
+    """Store a `Tag` and everything inside it as a tuple of simple
+    Python objects. This is what `dumps` marshals, and what is pickled
+    when a `Tag` is pickled.
+    """
+    from bs4 import BeautifulSoup
+
+    builder: Optional[TreeBuilder]
+    if isinstance(element, BeautifulSoup):
+        soup_state: Optional[Dict[str, Any]] = dict(
+            soup_class=_class_reference(type(element)),
+            original_encoding=element.original_encoding,
+            declared_html_encoding=element.declared_html_encoding,
+            contains_replacement_characters=element.contains_replacement_characters,
+        )
+        builder = element.builder
+        include_root = False
+    else:
+        soup_state = None
+        builder = _builder_for(element)
+        include_root = True
+    builder_reference = None
+    if builder is not None:
+        builder_reference = _class_reference(type(builder))
+    parser_reference = None
+    if element.parser_class is not None:
+        parser_reference = _class_reference(element.parser_class)
+    return (
+        MAGIC,
+        VERSION,
+        PYTHON_VERSION,
+        sys.byteorder,
+        element._is_xml,
+        builder_reference,
+        parser_reference,
+        soup_state,
+    ) + _dump_tree(element, include_root)
+
+
+def _load(data: Tuple[Any, ...]) -> Tag:
+    """Rebuild a parse tree from a tuple created by `_dump`."""
+    from bs4 import BeautifulSoup
+    from bs4.builder import builder_registry
+
+    _check(data)
+    (
+        byteorder,
+        is_xml,
+        builder_reference,
+        parser_reference,
+        soup_state,
+    ) = data[3:8]
+    tree = data[8:]
+
+    builder_class: Optional[Type[TreeBuilder]] = None
+    if builder_reference is not None:
+        from bs4.builder import TreeBuilder
+
+        builder_class = _resolve(builder_reference, TreeBuilder)
+    parser_class = None
+    if parser_reference is not None:
+        parser_class = _resolve(parser_reference, BeautifulSoup)
+
+    if soup_state is not None:
+        soup_class = _resolve(soup_state["soup_class"], BeautifulSoup)
+        if builder_class is None:
+            soup = soup_class("")
+        else:
+            soup = soup_class("", builder=builder_class())
+        # Some tree builders (html5lib) create elements even for an
+        # empty document; get rid of them.
+        soup.reset()
+        for attribute in (
+            "original_encoding",
+            "declared_html_encoding",
+            "contains_replacement_characters",
+        ):
+            setattr(soup, attribute, soup_state[attribute])
+        _load_tree(tree, byteorder, soup, soup.builder, parser_class)
+        return soup
+
+    if builder_class is None:
+        # The tag wasn't part of a BeautifulSoup object, so we don't
+        # know how it was parsed. Pick a tree builder that can at
+        # least handle the right kind of markup.
+        builder_class = builder_registry.lookup("xml" if is_xml else "html")
+    if builder_class is None:
+        from bs4.builder._htmlparser import HTMLParserTreeBuilder
+
+        builder_class = HTMLParserTreeBuilder
+    root = _load_tree(tree, byteorder, None, builder_class(), parser_class)
+    assert root is not None
+    return root
+
+
+def _class_reference(cls: type) -> str:
+    """Find the name that `_resolve` can use to import a class."""
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _resolve(reference: str, superclass: Type[_T]) -> Type[_T]:
+    """Import a class named by `_class_reference`, making sure it's a
+    subclass of ``superclass``.
+    """
+    module_name, _, qualname = reference.partition(":")
+    value: Any = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        value = getattr(value, part)
+    if not (isinstance(value, type) and issubclass(value, superclass)):
+        raise ValueError(
+            f"{reference} is not a subclass of {superclass.__name__}."
+        )
+    return value
+
+
+def _builder_for(tag: Tag) -> Optional[TreeBuilder]:
+    """Find the tree builder that built the parse tree containing a
+    `Tag`, if there is one.
+    """
+    from bs4 import BeautifulSoup
+
+    top: PageElement = tag
+    while top.parent is not None:
+        top = top.parent
+    if isinstance(top, BeautifulSoup):
+        return top.builder
+    return None
+
+
+def _check(data: Any) -> None:
+    """Make sure ``data`` came from `_dump`."""
+    if not isinstance(data, tuple) or len(data) < 2 or data[0] != MAGIC:
+        raise ValueError("This isn't a parse tree created by bs4.serialize.dumps.")
+    if data[1] != VERSION:
+        raise ValueError(
+            f"Can't load version {data[1]} of the parse tree format; only version {VERSION} is supported."
+        )
+
+
+def _dump_tree(root: Tag, include_root: bool) -> Tuple[Any, ...]:
+    """Store a parse tree as a flat array of integers, plus lists of
+    the strings and other objects the integers refer to.
+
+    :param root: The `Tag` at the top of the tree.
+    :param include_root: Whether to store ``root`` itself, or just its
+        contents.
+    """
+    ints: List[int] = []
+    append = ints.append
+    # Positions in the source document can be large numbers, so they
+    # go into a separate array, to keep the main array small.
+    positions: List[int] = []
+    texts: List[Optional[str]] = []
+    add_text = texts.append
+    names: Dict[str, int] = {}
+    classes: Dict[type, int] = {}
+    namespace_maps: Dict[int, int] = {}
+    namespace_map_list: List[Dict[str, str]] = []
+
+    def name(value: str) -> int:
+        index = names.get(value)
+        if index is None:
+            index = names[value] = len(names)
+        return index
+
+    def class_index(cls: type) -> int:
+        index = classes.get(cls)
+        if index is None:
+            index = classes[cls] = len(classes)
+        return index
+
+    def dump_tag(tag: Tag) -> None:
+        flags = 0
+        extra = []
+        if tag.__class__ is not Tag:
+            flags |= _CUSTOM_CLASS
+            extra.append(class_index(tag.__class__))
+        if tag.prefix is not None:
+            flags |= _HAS_PREFIX
+            extra.append(name(tag.prefix))
+        if tag.namespace is not None:
+            flags |= _HAS_NAMESPACE
+            extra.append(name(tag.namespace))
+        if tag._namespaces:
+            flags |= _HAS_NAMESPACES
+            index = namespace_maps.get(id(tag._namespaces))
+            if index is None:
+                index = namespace_maps[id(tag._namespaces)] = len(
+                    namespace_map_list
+                )
+                namespace_map_list.append(dict(tag._namespaces))
+            extra.append(index)
+        if tag.sourceline is not None:
+            flags |= _HAS_SOURCELINE
+            positions.append(tag.sourceline)
+        if tag.sourcepos is not None:
+            flags |= _HAS_SOURCEPOS
+            positions.append(tag.sourcepos)
+        if tag.hidden:
+            flags |= _HIDDEN
+        flags |= _TRISTATE[tag.known_xml] << _KNOWN_XML_SHIFT
+        flags |= _TRISTATE[tag.can_be_empty_element] << _EMPTY_ELEMENT_SHIFT
+
+        attrs = tag._attrs
+        if isinstance(attrs, tuple):
+            # The attributes haven't been processed yet, and there's
+            # no need to process them now.
+            flags |= _RAW_ATTRIBUTES
+        append(_TAG | (flags << _KIND_BITS))
+        ints.extend(extra)
+        append(name(tag.name))
+        append(len(attrs))
+        if isinstance(attrs, tuple):
+            for raw_key, raw_value in attrs:
+                append(name(raw_key))
+                add_text(raw_value)
+            return
+        for key, value in attrs.items():
+            tokens: Optional[List[str]] = None
+            text: Optional[str] = None
+            if isinstance(value, list):
+                value_type = _LIST_VALUE
+                tokens = value
+            elif isinstance(value, CharsetMetaAttributeValue):
+                value_type = _CHARSET_VALUE
+                text = value.original_value
+            elif isinstance(value, ContentMetaAttributeValue):
+                value_type = _CONTENT_VALUE
+                text = value.original_value
+            else:
+                value_type = _STRING_VALUE
+                text = str(value)
+            if isinstance(key, NamespacedAttribute):
+                append(_NAMESPACED_KEY | (value_type << _VALUE_SHIFT))
+                # These three can be None, so they're stored as index + 1.
+                append(0 if key.prefix is None else name(key.prefix) + 1)
+                append(0 if key.name is None else name(key.name) + 1)
+                append(0 if key.namespace is None else name(key.namespace) + 1)
+            else:
+                append(value_type << _VALUE_SHIFT)
+                append(name(key))
+            if tokens is not None:
+                append(len(tokens))
+                for token in tokens:
+                    append(name(token))
+            else:
+                add_text(text)
+
+    if include_root:
+        dump_tag(root)
+
+    # Walk the tree without making recursive function calls, so
+    # that very deeply nested documents can be stored.
+    stack: List[Iterator[PageElement]] = [iter(root.contents)]
+    while stack:
+        for child in stack[-1]:
+            if isinstance(child, Tag):
+                dump_tag(child)
+                stack.append(iter(child.contents))
+                break
+            if child.__class__ is NavigableString:
+                append(_STRING)
+            else:
+                append(_STRING | (_CUSTOM_CLASS << _KIND_BITS))
+                append(class_index(child.__class__))
+            add_text(str(child))
+        else:
+            stack.pop()
+            if stack:
+                append(_END)
+
+    return (
+        [_class_reference(cls) for cls in classes],
+        list(names),
+        texts,
+        namespace_map_list,
+    ) + _pack(ints) + _pack(positions)
+
+
+def _pack(ints: List[int]) -> Tuple[str, bytes]:
+    """Store a list of non-negative integers using as few bytes per
+    integer as possible.
+
+    :return: An `array` typecode and the packed bytes.
+    """
+    largest = max(ints, default=0)
+    for typecode in "BHIL":
+        if largest < 1 << (8 * array(typecode).itemsize):
+            break
+    return typecode, array(typecode, ints).tobytes()
+
+
+def _unpack(typecode: str, data: bytes, byteorder: str) -> List[int]:
+    """Reverse `_pack`."""
+    ints = array(typecode)
+    ints.frombytes(data)
+    if byteorder != sys.byteorder:
+        ints.byteswap()
+    return ints.tolist()
+
+
+def _load_tree(
+    tree: Tuple[Any, ...],
+    byteorder: str,
+    soup: Optional[BeautifulSoup],
+    builder: TreeBuilder,
+    parser_class: Optional[Type[BeautifulSoup]],
+) -> Optional[Tag]:
+    """Rebuild a parse tree stored by `_dump_tree`.
+
+    :param soup: If this is a `BeautifulSoup` object, the tree's
+        contents are added to it. Otherwise the first element in
+        the tree is its root.
+    :param builder: Used to find out about tags with particular names.
+    :return: The root of the tree, or None if ``soup`` was provided.
+    """
+    (
+        class_references,
+        names,
+        texts,
+        namespace_maps,
+        typecode,
+        raw_ints,
+        positions_typecode,
+        raw_positions,
+    ) = tree
+    classes = [_resolve(reference, PageElement) for reference in class_references]
+    ints = _unpack(typecode, raw_ints, byteorder)
+    next_position = iter(_unpack(positions_typecode, raw_positions, byteorder)).__next__
+    texts_iter = iter(texts)
+    next_text = texts_iter.__next__
+
+    attribute_dict_class = builder.attribute_dict_class
+    attribute_value_list_class = builder.attribute_value_list_class
+    tag_profile = builder.tag_profile
+
+    root: Optional[Tag] = soup
+    stack: List[Tag] = []
+    if soup is not None:
+        stack.append(soup)
+    previous: Optional[PageElement] = soup
+
+    position = 0
+    end = len(ints)
+    while position < end:
+        record = ints[position]
+        position += 1
+        kind = record & 3
+        flags = record >> _KIND_BITS
+
+        if kind == _END:
+            stack.pop()
+            continue
+
+        node: PageElement
+        if kind == _STRING:
+            if flags & _CUSTOM_CLASS:
+                string_class = cast(Type[NavigableString], classes[ints[position]])
+                position += 1
+            else:
+                string_class = NavigableString
+            node = string_class(next_text())
+        else:
+            if flags & _CUSTOM_CLASS:
+                tag_class = cast(Type[Tag], classes[ints[position]])
+                position += 1
+            else:
+                tag_class = Tag
+            tag = tag_class.__new__(tag_class)
+            tag.parser_class = parser_class
+            prefix = namespace = sourceline = sourcepos = None
+            namespaces: Dict[str, str] = {}
+            if flags & _HAS_PREFIX:
+                prefix = names[ints[position]]
+                position += 1
+            if flags & _HAS_NAMESPACE:
+                namespace = names[ints[position]]
+                position += 1
+            if flags & _HAS_NAMESPACES:
+                namespaces = namespace_maps[ints[position]]
+                position += 1
+            if flags & _HAS_SOURCELINE:
+                sourceline = next_position()
+            if flags & _HAS_SOURCEPOS:
+                sourcepos = next_position()
+            tag.prefix = prefix
+            tag.namespace = namespace
+            tag._namespaces = namespaces
+            tag.sourceline = sourceline
+            tag.sourcepos = sourcepos
+            tag.hidden = bool(flags & _HIDDEN)
+            tag.known_xml = _FROM_TRISTATE[(flags >> _KNOWN_XML_SHIFT) & 3]
+            tag._name = tag_name = names[ints[position]]
+            profile = tag_profile(tag_name)
+            can_be_empty_element = _FROM_TRISTATE[(flags >> _EMPTY_ELEMENT_SHIFT) & 3]
+            if can_be_empty_element != profile.can_be_empty_element:
+                profile = profile._replace(can_be_empty_element=can_be_empty_element)
+            tag._profile = profile
+            tag.attribute_value_list_class = attribute_value_list_class
+            tag.contents = []
+            tag._text_cache = None
+
+            attribute_count = ints[position + 1]
+            position += 2
+            if flags & _RAW_ATTRIBUTES:
+                pairs = []
+                for i in range(attribute_count):
+                    pairs.append((names[ints[position]], next_text()))
+                    position += 1
+                tag._attrs = tuple(pairs)
+            else:
+                attrs = attribute_dict_class()
+                for i in range(attribute_count):
+                    attribute_flags = ints[position]
+                    position += 1
+                    key: str
+                    if attribute_flags & _NAMESPACED_KEY:
+                        key = NamespacedAttribute(
+                            *[
+                                None if index == 0 else names[index - 1]
+                                for index in ints[position : position + 3]
+                            ]
+                        )
+                        position += 3
+                    else:
+                        key = names[ints[position]]
+                        position += 1
+                    value_type = attribute_flags >> _VALUE_SHIFT
+                    value: Any
+                    if value_type == _LIST_VALUE:
+                        count = ints[position]
+                        position += 1
+                        value = attribute_value_list_class(
+                            [names[index] for index in ints[position : position + count]]
+                        )
+                        position += count
+                    elif value_type == _CHARSET_VALUE:
+                        value = CharsetMetaAttributeValue(next_text())
+                    elif value_type == _CONTENT_VALUE:
+                        value = ContentMetaAttributeValue(next_text())
+                    else:
+                        value = next_text()
+                    dict.__setitem__(attrs, key, value)
+                tag._attrs = attrs
+            node = tag
+
+        # Connect the new element to the rest of the tree.
+        if stack:
+            parent = stack[-1]
+            contents = parent.contents
+            if contents:
+                previous_sibling = contents[-1]
+                previous_sibling.next_sibling = node
+                node.previous_sibling = previous_sibling
+            else:
+                node.previous_sibling = None
+            node.parent = parent
+            contents.append(node)
+        else:
+            # This is the root of the tree.
+            node.parent = None
+            node.previous_sibling = None
+            root = cast(Tag, node)
+        node.next_sibling = None
+        node.previous_element = previous
+        if previous is not None:
+            previous.next_element = node
+        previous = node
+
+        if kind == _TAG:
+            stack.append(cast(Tag, node))
+
+    if previous is not None:
+        previous.next_element = None
+    if soup is not None:
+        soup._most_recent_element = None if previous is soup else previous
+        return None
+    return root
+
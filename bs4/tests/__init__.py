@@ -7,9 +7,10 @@ __license__ = "MIT"
 import pickle
 import importlib
 import copy
+from contextlib import contextmanager
 import warnings
 import pytest
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, dammit
 from bs4.element import (
     AttributeValueList,
     CharsetMetaAttributeValue,
@@ -34,6 +35,8 @@ from bs4.builder._htmlparser import HTMLParserTreeBuilder
 from typing import (
     Any,
     Iterable,
+    Iterator,
+    List,
     Optional,
     Tuple,
     Type,
@@ -61,6 +64,24 @@ except ImportError:
 
 default_builder: Type[TreeBuilder] = HTMLParserTreeBuilder
 
+
+@contextmanager
+def no_charset_detectors() -> Iterator[List[dammit.CharsetDetector]]:
+    """Unregister every charset detector for the duration of a test,
+    so an installed library like chardet can't add its own guesses
+    to the encodings Beautiful Soup tries.
+
+    :yield: The now-empty list of registered detectors, which the
+        test may add to. The original detectors are put back
+        afterwards.
+    """
+    detectors = list(dammit.charset_detectors)
+    del dammit.charset_detectors[:]
+    try:
+        yield dammit.charset_detectors
+    finally:
+        dammit.charset_detectors[:] = detectors
+
 BAD_DOCUMENT: str = """A bare string
 <!DOCTYPE xsl:stylesheet SYSTEM "htmlent.dtd">
 <!DOCTYPE xsl:stylesheet PUBLIC "htmlent.dtd">
@@ -503,6 +524,22 @@ class HTMLTreeBuilderSmokeTest(TreeBuilderSmokeTest):
         # Test a namespaced doctype with a public id.
         self.assertDoctypeHandled('xsl:stylesheet PUBLIC "htmlent.dtd"')
 
+    def test_names_are_shared_between_documents(self):
+        from bs4.element import _interned_strings
+
+        markup = '<div class="card big unique-class-value" data-id="1">text</div>'
+        div1 = self.soup(markup).div
+        div2 = self.soup(markup).div
+        assert div1.name is div2.name
+        key1, key2 = list(div1.attrs)[1], list(div2.attrs)[1]
+        assert "data-id" == key1
+        assert key1 is key2
+
+        # Attribute values are left alone, so they can't fill up the
+        # table of shared strings.
+        assert ["card", "big", "unique-class-value"] == div1["class"]
+        assert "unique-class-value" not in _interned_strings
+
     def test_real_xhtml_document(self):
         """A real XHTML document should come out more or less the same as it went in."""
         markup = b"""<?xml version="1.0" encoding="utf-8"?>
@@ -1278,6 +1315,10 @@ class HTML5TreeBuilderSmokeTest(HTMLTreeBuilderSmokeTest):
         # XHTML documents in any particular way.
         pass
 
+    def test_names_are_shared_between_documents(self):
+        # html5lib's tree builder doesn't share names between documents.
+        pass
+
     def test_html_tags_have_namespace(self):
         markup = "<a>"
         soup = self.soup(markup)
@@ -1,6 +1,11 @@
 import pytest
 from unittest.mock import patch
 from bs4.builder import DetectsXMLParsedAsHTML
+from bs4.builder._htmlparser import HTMLParserTreeBuilder
+from bs4.element import (
+    Script,
+    Tag,
+)
 
 
 class TestDetectsXMLParsedAsHTML:
@@ -26,3 +31,31 @@ class TestDetectsXMLParsedAsHTML:
                 else:
                     assert not mock.called
                 mock.reset_mock()
+
+
+class TestTagProfile:
+    def test_profile_is_cached_per_name(self):
+        builder = HTMLParserTreeBuilder()
+        profile = builder.tag_profile("script")
+        assert profile is builder.tag_profile("script")
+        assert profile is not builder.tag_profile("pre")
+
+        assert "script" == profile.name
+        assert False is profile.can_be_empty_element
+        assert Script is profile.string_container
+        assert {Script} == profile.interesting_string_types
+        assert False is profile.preserves_whitespace
+        assert builder.cdata_list_attributes is profile.cdata_list_attributes
+
+        pre = builder.tag_profile("pre")
+        assert True is pre.preserves_whitespace
+        assert None is pre.string_container
+        assert Tag.MAIN_CONTENT_STRING_TYPES is pre.interesting_string_types
+
+        assert True is builder.tag_profile("br").can_be_empty_element
+
+    def test_profiles_are_per_builder(self):
+        builder1 = HTMLParserTreeBuilder()
+        builder2 = HTMLParserTreeBuilder(string_containers={})
+        assert builder1.tag_profile("script") is not builder2.tag_profile("script")
+        assert None is builder2.tag_profile("script").string_container
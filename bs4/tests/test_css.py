@@ -5,6 +5,11 @@ from bs4 import (
     BeautifulSoup,
     ResultSet,
 )
+from bs4.css import (
+    CSS,
+    SelectorCache,
+    SimpleSelector,
+)
 
 from typing import (
     Any,
@@ -16,12 +21,14 @@ from typing import (
 from packaging.version import Version
 
 from . import (
+    LXML_PRESENT,
     SoupTest,
     SOUP_SIEVE_PRESENT,
 )
 
 SOUPSIEVE_EXCEPTION_ON_UNSUPPORTED_PSEUDOCLASS: Type[Exception]
 if SOUP_SIEVE_PRESENT:
+    import soupsieve
     from soupsieve import __version__, SelectorSyntaxError
 
     # Some behavior changes in soupsieve 2.6 that affects one of our
@@ -534,3 +541,237 @@ class TestCSSSelectors(SoupTest):
         assert m(".foo#bar") == "\\.foo\\#bar"
         assert m("()[]{}") == "\\(\\)\\[\\]\\{\\}"
         assert m(".foo") == self._soup.css.escape(".foo")
+
+
+@pytest.mark.skipif(not SOUP_SIEVE_PRESENT, reason="Soup Sieve not installed")
+class TestSelectorCache(SoupTest):
+    """Test the cache of compiled selectors shared by CSS objects."""
+
+    @pytest.fixture(autouse=True)
+    def cache(self, monkeypatch):
+        cache = SelectorCache(max_size=3)
+        monkeypatch.setattr(CSS, "cache", cache)
+        # Simple selectors would otherwise never be compiled.
+        monkeypatch.setattr(CSS, "native_matching", False)
+        return cache
+
+    def test_selectors_are_compiled_once(self, cache):
+        soup = self.soup("<p class='a'>1</p><p>2</p>")
+        other = self.soup("<p class='a'>3</p>")
+        assert ["1"] == [p.string for p in soup.select("p.a")]
+        assert "1" == soup.select_one("p.a").string
+        assert ["3"] == [p.string for p in other.css.iselect("p.a")]
+        assert soup.p.css.match("p.a")
+        assert soup.p is soup.p.string.parent.css.closest("p.a")
+        assert ["1"] == [p.string for p in soup.css.filter("p.a")]
+        assert (1, 5) == (cache.misses, cache.hits)
+        assert 1 == len(cache)
+        assert soup.css.compile("p.a") is other.css.compile("p.a")
+
+    def test_key(self, cache):
+        soup = self.soup("<p class='a'>1</p>")
+        soup.select("p.a")
+        soup.select("p.a", namespaces={"ns": "http://example.com/"})
+        soup.select("p.a", flags=1)
+        soup.select(":--a", custom={":--a": "p.a"})
+        assert 4 == cache.misses
+        assert 0 == cache.hits
+        soup.select(":--a", custom={":--a": "p.a"})
+        assert 1 == cache.hits
+        assert 3 == len(cache)
+
+    def test_unhashable_arguments_are_not_cached(self, cache):
+        custom = {":--a": bytearray(b"p.a")}
+        assert None is SelectorCache.key("p", None, 0, dict(custom=custom))
+
+    def test_precompiled_selectors_are_not_cached(self, cache):
+        soup = self.soup("<p class='a'>1</p>")
+        compiled = soupsieve.compile("p.a")
+        assert ["1"] == [p.string for p in soup.select(compiled)]
+        assert 0 == len(cache)
+        assert (0, 0) == (cache.misses, cache.hits)
+
+    def test_size_and_stats(self, cache):
+        soup = self.soup("<p class='a'>1</p>")
+        for selector in ("a", "b", "c", "d"):
+            soup.select(selector)
+        assert 3 == len(cache)
+        soup.select("a")
+        assert (5, 0) == (cache.misses, cache.hits)
+        assert "<SelectorCache: 3 entries, 0 hits, 5 misses>" == repr(cache)
+
+        cache.resize(1)
+        assert 1 == len(cache)
+        soup.select("a")
+        assert 1 == cache.hits
+
+        cache.reset_stats()
+        assert (0, 0) == (cache.misses, cache.hits)
+        cache.clear()
+        assert 0 == len(cache)
+
+    def test_invalid_selector_is_not_cached(self, cache):
+        soup = self.soup("<p>")
+        with pytest.raises(SelectorSyntaxError):
+            soup.select("p[")
+        assert 0 == len(cache)
+
+    def test_cache_can_be_turned_off(self, monkeypatch):
+        monkeypatch.setattr(CSS, "cache", None)
+        soup = self.soup("<p class='a'>1</p>")
+        assert "1" == soup.select_one("p.a").string
+
+
+@pytest.mark.skipif(not SOUP_SIEVE_PRESENT, reason="Soup Sieve not installed")
+class TestSimpleSelector(SoupTest):
+    """Test the native matcher for simple selectors."""
+
+    @pytest.mark.parametrize(
+        "select,compounds,combinators",
+        [
+            ("a", [("a", (), ())], []),
+            (" DIV.item ", [("div", (), ("item",))], []),
+            ("#main", [(None, ("main",), ())], []),
+            (".a.b#c", [(None, ("c",), ("a", "b"))], []),
+            (
+                "ul > li a",
+                [("ul", (), ()), ("li", (), ()), ("a", (), ())],
+                [">", " "],
+            ),
+            ("ul>li", [("ul", (), ()), ("li", (), ())], [">"]),
+        ],
+    )
+    def test_parse(self, select, compounds, combinators):
+        simple = SimpleSelector.parse(select)
+        assert tuple(compounds) == simple.compounds
+        assert tuple(combinators) == simple.combinators
+
+    @pytest.mark.parametrize(
+        "select",
+        [
+            "",
+            "*",
+            "a, b",
+            "a + b",
+            "a ~ b",
+            "a:first-child",
+            "a[href]",
+            "ns|a",
+            "> a",
+            "a >",
+            "a > > b",
+            ".1a",
+            "#a\\62",
+            ".a-é",
+        ],
+    )
+    def test_parse_rejects_anything_else(self, select):
+        assert None is SimpleSelector.parse(select)
+
+    def assert_same_as_soupsieve(self, scope, select, **kwargs):
+        assert CSS.native_matching
+        assert None is not SimpleSelector.parse(select)
+        native = scope.select(select, **kwargs)
+        CSS.native_matching = False
+        try:
+            expect = scope.select(select, **kwargs)
+            assert expect[:1] == [x for x in [scope.select_one(select)] if x]
+        finally:
+            CSS.native_matching = True
+        assert len(expect) == len(native)
+        for x, y in zip(expect, native):
+            assert x is y
+        assert native[:1] == [x for x in [scope.select_one(select)] if x]
+        return native
+
+    @pytest.mark.parametrize(
+        "select",
+        [
+            "p",
+            "P",
+            "h2",
+            "#main",
+            "#inner",
+            ".dashed",
+            ".class1.class3",
+            "p.onep",
+            "div p",
+            "div > p",
+            "body > div > div p",
+            "span a",
+            "span > a",
+            "span.s1 > a",
+            "div#main div span a",
+            "x > z",
+            "#nosuchid",
+            "html",
+            "body",
+        ],
+    )
+    def test_same_results_as_soupsieve(self, select):
+        soup = BeautifulSoup(TestCSSSelectors.HTML, "html.parser")
+        self.assert_same_as_soupsieve(soup, select)
+        self.assert_same_as_soupsieve(soup, select, limit=2)
+        self.assert_same_as_soupsieve(soup.find(id="inner"), select)
+        self.assert_same_as_soupsieve(
+            BeautifulSoup(TestCSSSelectors.HTML, "html.parser", indexed=True), select
+        )
+
+    def test_ancestors_outside_the_scope(self):
+        # The scope itself, and tags above it, can match the left-hand
+        # side of a selector.
+        soup = self.soup("<div><p><a>1</a></p></div>")
+        for select in ("div a", "p a", "div > p > a", "a a"):
+            self.assert_same_as_soupsieve(soup.p, select)
+        assert ["1"] == [a.string for a in soup.p.select("div a")]
+
+    def test_html_case_insensitivity(self):
+        soup = self.soup("<p>1</p>")
+        tag = soup.new_tag("DIV", attrs={"ID": "x", "Class": "y z"})
+        tag.append(soup.new_tag("P", string="2"))
+        soup.append(tag)
+        indexed = self.soup(soup.decode(), indexed=True)
+        indexed.append(
+            indexed.new_tag("SPAN", attrs={"ID": "x", "Class": "y"}, string="3")
+        )
+        for doc in soup, indexed:
+            self.assert_same_as_soupsieve(doc, "div")
+            self.assert_same_as_soupsieve(doc, "#x")
+            self.assert_same_as_soupsieve(doc, ".y")
+            self.assert_same_as_soupsieve(doc, "div > p")
+        assert 2 == len(indexed.select("#x"))
+
+    def test_class_as_string(self):
+        soup = self.soup("<p>1</p>", multi_valued_attributes=None)
+        soup.p["class"] = "a b c"
+        self.assert_same_as_soupsieve(soup, ".c")
+        self.assert_same_as_soupsieve(soup, ".a")
+
+    def test_iselect_is_lazy(self):
+        soup = self.soup("<a>1</a><a>2</a>")
+        gen = soup.css.iselect("a")
+        assert isinstance(gen, types.GeneratorType)
+        assert "1" == next(gen).string
+        assert ["2"] == [a.string for a in gen]
+
+    @pytest.mark.skipif(not LXML_PRESENT, reason="lxml seems not to be present")
+    def test_not_used_for_xml(self, monkeypatch):
+        def fail(*args):
+            raise AssertionError("SimpleSelector should not be used.")
+
+        monkeypatch.setattr(SimpleSelector, "select", fail)
+        soup = BeautifulSoup("<A><b>1</b></A>", "xml")
+        assert [] == soup.select("a")
+        assert ["A"] == [x.name for x in soup.select("A")]
+
+    def test_not_used_with_soupsieve_options(self, monkeypatch):
+        def fail(*args):
+            raise AssertionError("SimpleSelector should not be used.")
+
+        monkeypatch.setattr(SimpleSelector, "select", fail)
+        soup = self.soup("<a>1</a>")
+        assert 1 == len(soup.select("a", flags=soupsieve.DEBUG))
+        assert 1 == len(soup.select("a", namespaces={}))
+        assert 1 == len(soup.select("a", custom={":--x": "b"}))
+        monkeypatch.setattr(CSS, "native_matching", False)
+        assert 1 == len(soup.select("a"))
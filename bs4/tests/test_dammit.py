@@ -1,14 +1,19 @@
 # encoding: utf-8
 import pytest
 import logging
+import types
 import warnings
 import bs4
 from bs4 import BeautifulSoup
 from bs4.dammit import (
+    CharsetDetector,
+    EncodingCache,
     EntitySubstitution,
     EncodingDetector,
+    IncrementalUnicodeDammit,
     UnicodeDammit,
 )
+from . import no_charset_detectors
 
 
 class TestUnicodeDammit(object):
@@ -279,6 +284,218 @@ class TestEncodingDetector(object):
         assert m(b" " + xml_bytes, search_entire_document=True) == "iso-8859-1"
         assert m(b"a" + xml_bytes, search_entire_document=True) is None
 
+    def test_decodes_samples(self):
+        m = EncodingDetector.decodes_samples
+        text = "\u65e5\u672c\u8a9e \u30c6\u30ad\u30b9\u30c8 " * 20000
+        for encoding in ("utf-8", "utf-16le", "utf-32be", "shift_jis", "euc-jp"):
+            data = text.encode(encoding)
+            assert m(data, encoding)
+            assert m(memoryview(data), encoding)
+            assert not m(data, "ascii")
+
+        # Only samples are checked, but they always include the very
+        # beginning and the very end of the document.
+        ascii = b"a" * 100000
+        assert m(ascii, "ascii")
+        assert not m(b"\xe9" + ascii, "ascii")
+        assert not m(ascii + b"\xe9", "ascii")
+
+        # An encoding Python doesn't know about can't be ruled out.
+        assert m(b"\xff", "no-such-encoding")
+
+
+class TestCharsetDetector(object):
+    def detector(self, confidence_for=lambda data: 1.0, **kwargs):
+        seen = []
+
+        def detect(data):
+            seen.append(data)
+            return "windows-1252", confidence_for(data)
+
+        return CharsetDetector("test", detect, **kwargs), seen
+
+    def test_small_document_is_examined_whole(self):
+        detector, seen = self.detector()
+        assert "windows-1252" == detector.detect(b"<p>caf\xe9</p>")
+        assert [b"<p>caf\xe9</p>"] == seen
+        assert 1 == detector.calls
+        assert len(seen[0]) == detector.bytes_examined
+
+    def test_samples(self):
+        detector, _ = self.detector(sample_size=4, max_sample_size=16)
+        data = b"abcdefghijklmnopqrstuvwxyz0123456789"
+        assert [
+            b"abcd",
+            b"abcd6789",
+            b"abcdklmnuvwx6789",
+        ] == list(detector.samples(data))
+
+        # A sample as large as the document is the document itself.
+        assert [b"abcd", b"abcdefgh"] == list(detector.samples(b"abcdefgh"))
+
+    def test_confident_guess_stops_detection(self):
+        data = b"a" * 100000
+        detector, seen = self.detector()
+        detector.detect(data)
+        assert 1 == len(seen)
+        assert detector.sample_size == detector.bytes_examined
+
+        # An unconfident library sees more and more of the document,
+        # but never more than max_sample_size at once.
+        detector, seen = self.detector(lambda data: 0.5)
+        assert "windows-1252" == detector.detect(data)
+        assert [4096, 8192, 16384, 32768, 65536] == [len(x) for x in seen]
+        assert sum(len(x) for x in seen) == detector.bytes_examined
+
+        detector.reset_stats()
+        assert 0 == detector.calls
+        assert 0 == detector.bytes_examined
+        assert 0 == detector.seconds
+
+    def test_for_module(self):
+        module = types.ModuleType("fakechardet")
+        module.detect = lambda data: dict(encoding="ascii", confidence=1.0)
+
+        detector = CharsetDetector.for_module(module, sample_size=1)
+        assert "fakechardet" == detector.name
+        assert 1 == detector.sample_size
+        assert "ascii" == detector.detect(b"abc")
+        assert 1 == detector.bytes_examined
+
+    def test_registered_detectors_are_consulted_in_order(self):
+        with no_charset_detectors():
+            assert None is bs4.dammit._chardet_dammit(b"\xe9")
+            unsure = CharsetDetector("unsure", lambda data: (None, None))
+            sure = CharsetDetector("sure", lambda data: ("euc-jp", 1.0))
+            bs4.dammit.register_charset_detector(sure)
+            bs4.dammit.register_charset_detector(unsure)
+            assert [unsure, sure] == bs4.dammit.charset_detectors
+            assert "euc-jp" == bs4.dammit._chardet_dammit(b"\xe9")
+            assert 1 == unsure.calls
+            assert 1 == sure.calls
+            assert "euc-jp" == UnicodeDammit(b"\xa4\xa2").original_encoding
+
+
+class TestEncodingCache(object):
+    def test_key(self):
+        cache = EncodingCache(prefix_size=40)
+        key = cache.key
+        assert ("a", None, None) == key("a", b"<p>Page 1</p>")
+        assert key("a", b"<p>Page 1</p>") == key("a", b"<p>Page 2</p>")
+        assert key("a", b"<p>Page 1</p>") != key("b", b"<p>Page 1</p>")
+        assert ("a", "utf-8", None) == key("a", b"\xef\xbb\xbf<p>")
+        assert ("a", None, "euc-jp") == key(
+            "a", memoryview(b'<meta charset="euc-jp"><p>')
+        )
+
+        # Only the start of the document is searched.
+        assert ("a", None, None) == key("a", b" " * 40 + b'<meta charset="euc-jp">')
+
+    def test_get_and_put(self):
+        cache = EncodingCache()
+        data = "caf\xe9".encode("utf-8")
+        assert None is cache.get("a", data)
+        cache.put("a", data, "utf-8")
+        assert "utf-8" == cache.get("a", data)
+        assert (1, 1) == (cache.hits, cache.misses)
+
+        # An encoding that can't decode the document is forgotten.
+        cache.put("a", data, "ascii")
+        assert None is cache.get("a", data)
+        assert 0 == len(cache)
+        assert (1, 2) == (cache.hits, cache.misses)
+
+        # So is an encoding that can decode the document, if the
+        # document is valid UTF-8 and UTF-8 isn't what was cached.
+        cache.put("a", data, "windows-1252")
+        assert None is cache.get("a", data)
+        cache.put("a", b"cafe", "windows-1252")
+        assert "windows-1252" == cache.get("a", b"cafe")
+        cache.put("a", data, "utf-8-sig")
+        assert "utf-8-sig" == cache.get("a", data)
+        assert (3, 3) == (cache.hits, cache.misses)
+
+        cache.reset_stats()
+        assert (0, 0) == (cache.hits, cache.misses)
+        cache.put("a", data, "utf-8")
+        cache.clear()
+        assert 0 == len(cache)
+
+    def test_least_recently_used_entry_is_forgotten(self):
+        cache = EncodingCache(max_size=2)
+        cache.put("a", b"", "utf-8")
+        cache.put("b", b"", "utf-8")
+        cache.get("a", b"")
+        cache.put("c", b"", "utf-8")
+        assert 2 == len(cache)
+        assert "utf-8" == cache.get("a", b"")
+        assert None is cache.get("b", b"")
+        assert "utf-8" == cache.get("c", b"")
+
+    def test_large_document_is_sampled(self):
+        cache = EncodingCache()
+        size = EncodingDetector.DECODING_SAMPLE_SIZE
+        ascii = b"a" * (size * EncodingDetector.DECODING_SAMPLES * 4)
+        utf8 = "caf\xe9".encode("utf-8")
+
+        # Non-ASCII UTF-8 inside a sample means the cached encoding
+        # is forgotten.
+        data = utf8 + ascii
+        cache.put("a", data, "windows-1252")
+        assert None is cache.get("a", data)
+
+        # Non-ASCII UTF-8 between the samples isn't noticed.
+        data = ascii[: size * 2] + utf8 + ascii
+        cache.put("a", data, "windows-1252")
+        assert "windows-1252" == cache.get("a", data)
+
+        # Neither is a document that isn't UTF-8.
+        data = "caf\xe9".encode("windows-1252") + ascii
+        cache.put("a", data, "windows-1252")
+        assert "windows-1252" == cache.get("a", data)
+
+
+class TestIncrementalUnicodeDammit(object):
+    def decode_in_chunks(self, dammit, data, size):
+        pieces = [dammit.decode(data[i : i + size]) for i in range(0, len(data), size)]
+        pieces.append(dammit.decode(b"", final=True))
+        return "".join(pieces)
+
+    def test_multibyte_characters_split_across_chunks(self):
+        text = "Räksmörgås \N{SNOWMAN}" * 100
+        dammit = IncrementalUnicodeDammit()
+        assert text == self.decode_in_chunks(dammit, text.encode("utf8"), 3)
+        assert "utf-8" == dammit.original_encoding
+        assert False is dammit.contains_replacement_characters
+
+    def test_bytes_held_back_until_encoding_is_known(self):
+        data = b'<meta charset="iso-8859-1">' + b"Sacr\xe9 bleu!" + b" " * 2000
+        dammit = IncrementalUnicodeDammit(is_html=True)
+        assert "" == dammit.decode(data[:100])
+        assert None is dammit.original_encoding
+        rest = dammit.decode(data[100:])
+        assert "iso-8859-1" == dammit.original_encoding
+        assert "iso-8859-1" == dammit.declared_html_encoding
+        assert "Sacr\xe9 bleu!" in rest
+
+    def test_known_definite_encoding_needs_no_sniffing(self):
+        dammit = IncrementalUnicodeDammit(["utf-16le"])
+        assert "a" == dammit.decode("ab".encode("utf-16le")[:3])
+        assert "utf-16le" == dammit.original_encoding
+
+    def test_detect_strips_byte_order_mark(self):
+        dammit = IncrementalUnicodeDammit()
+        assert b"" == dammit.detect(b"\xef\xbb\xbf<a>")
+        assert b"<a></a>" == dammit.detect(b"</a>", final=True)
+        assert "utf-8" == dammit.original_encoding
+        assert b"more" == dammit.detect(b"more")
+
+    def test_bad_bytes_after_sniffing_are_replaced(self):
+        dammit = IncrementalUnicodeDammit(["utf-8"])
+        assert "caf\xe9 " == dammit.decode("café ".encode("utf8"))
+        assert "\N{REPLACEMENT CHARACTER}!" == dammit.decode(b"\xff!", final=True)
+        assert True is dammit.contains_replacement_characters
+
 
 class TestEntitySubstitution(object):
     """Standalone tests of the EntitySubstitution class."""
@@ -5,6 +5,7 @@ are tested in separate files.
 """
 
 import pytest
+from collections import OrderedDict
 from bs4.element import (
     HTMLAttributeDict,
     XMLAttributeDict,
@@ -12,7 +13,9 @@ from bs4.element import (
     ContentMetaAttributeValue,
     NamespacedAttribute,
     ResultSet,
+    intern_string,
 )
+from bs4 import element
 
 class TestNamedspacedAttribute:
     def test_name_may_be_none_or_missing(self):
@@ -127,6 +130,36 @@ class TestAttributeDicts:
         assert d[attribute] == "name"
 
 
+class TestInternString:
+    def test_equal_strings_are_shared(self):
+        a = "".join(["intern", "ed-string"])
+        b = "".join(["intern", "ed-string"])
+        assert a is not b
+        assert intern_string(a) is intern_string(b)
+
+        # The shared copy is the same object as a string literal.
+        literal = "div"
+        assert intern_string("".join(["d", "iv"])) is literal
+
+    def test_str_subclass_is_not_interned(self):
+        value = NamespacedAttribute("xlink", "href")
+        assert intern_string(value) is value
+
+    def test_table_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(element, "_interned_strings", OrderedDict())
+        monkeypatch.setattr(element, "INTERNED_STRING_LIMIT", 2)
+        first = intern_string("".join(["fir", "st"]))
+        intern_string("".join(["sec", "ond"]))
+        assert intern_string("".join(["fir", "st"])) is first
+
+        # The table is full, so the least recently used string is
+        # forgotten to make room for a new one.
+        third = intern_string("".join(["thi", "rd"]))
+        assert ["first", "third"] == list(element._interned_strings)
+        assert intern_string("".join(["thi", "rd"])) is third
+        assert intern_string("".join(["fir", "st"])) is first
+
+
 class TestResultSet:
     def test_getattr_exception(self):
         rs = ResultSet(None)
@@ -1,3 +1,4 @@
+import pickle
 import pytest
 import re
 import warnings
@@ -618,6 +619,109 @@ class TestSoupStrainer(SoupTest):
         # The average SoupStrainer has excludes_everything=False
         assert not SoupStrainer().excludes_everything
 
+    def test_excludes_strings(self):
+        assert not ElementFilter().excludes_strings
+        assert not SoupStrainer().excludes_strings
+        assert not SoupStrainer(string="a string").excludes_strings
+        assert SoupStrainer("a").excludes_strings
+        assert SoupStrainer(id="an-id").excludes_strings
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            dict(name="b"),
+            dict(name=["a", "b", "ns:c", re.compile("^d"), re.compile("x$")]),
+            dict(name=[re.compile("A", re.I), re.compile("(?i)b"), re.compile("(c)\\1")]),
+            dict(name=lambda x: getattr(x, "name", x) in ("b", "ns:c")),
+            dict(name=True),
+            dict(attrs={"class": ["foo", re.compile("^ba")]}),
+            dict(attrs={"class": [re.compile("fo  # c", re.X), re.compile("ba", re.X)]}),
+            dict(attrs={"class": "foo bar"}),
+            dict(attrs={"id": True, "class": False}),
+            dict(id=None),
+            dict(name="b", attrs={"id": lambda value: value == "1"}),
+            dict(string="one"),
+            dict(string=[re.compile("tw"), "three"]),
+            dict(name="b", string="one"),
+            dict(),
+        ],
+    )
+    def test_compiled_strainer_matches_the_same_things(self, kwargs):
+        markup = (
+            '<b id="1">one</b><a class="foo bar">two</a><c class="baz">three</c>'
+            '<ns:c id="2"></ns:c><d class="">four</d><ax></ax><B id=""></B>'
+        )
+        soup = self.soup(markup)
+        elements = list(soup.descendants)
+        tag_specs = [
+            (tag.prefix, tag.name, tag.attrs)
+            for tag in elements
+            if isinstance(tag, Tag)
+        ] + [("ns", "c", {}), (None, "ns:c", {"class": "foo"})]
+        strings = ["one", "two", "four", " "]
+
+        strainer = SoupStrainer(**kwargs)
+        expect_match = [strainer.match(x) for x in elements]
+        expect_creation = [strainer.allow_tag_creation(*x) for x in tag_specs]
+        expect_strings = [strainer.allow_string_creation(x) for x in strings]
+
+        assert strainer is strainer.compile()
+        assert expect_match == [strainer.match(x) for x in elements]
+        assert expect_creation == [strainer.allow_tag_creation(*x) for x in tag_specs]
+        assert expect_strings == [strainer.allow_string_creation(x) for x in strings]
+
+    def test_compile_merges_rules(self):
+        strainer = SoupStrainer(
+            ["a", "b", re.compile("^c"), re.compile("d$"), re.compile("(e)")]
+        ).compile()
+        assert strainer.allow_tag_creation(None, "b", None)
+        assert strainer.allow_tag_creation(None, "cat", None)
+        assert strainer.allow_tag_creation(None, "bed", None)
+        assert strainer.allow_tag_creation(None, "ee", None)
+        assert not strainer.allow_tag_creation(None, "ab", None)
+
+    def test_compile_does_not_merge_verbose_patterns(self):
+        # A comment in a verbose pattern runs to the end of the line,
+        # so it would swallow the end of a merged pattern.
+        soup = self.soup('<a class="foo">1</a><a class="bar">2</a>')
+        found = soup.find_all(
+            "a", class_=[re.compile("foo  # c", re.X), re.compile("bar", re.X)]
+        )
+        assert ["1", "2"] == [a.string for a in found]
+
+    def test_compile_again_after_changing_rules(self):
+        strainer = SoupStrainer("a").compile()
+        tag = Tag(name="b")
+        assert not strainer.match(tag)
+        strainer.name_rules.append(TagNameMatchRule(string="b"))
+        strainer.compile()
+        assert strainer.match(tag)
+
+    def test_compiled_strainer_can_be_pickled(self):
+        strainer = SoupStrainer("a", id="1").compile()
+        loaded = pickle.loads(pickle.dumps(strainer))
+        assert loaded.name_rules == strainer.name_rules
+        assert loaded.match(Tag(name="a", attrs={"id": "1"}))
+
+    @pytest.mark.parametrize(
+        "kwargs, worth_compiling",
+        [
+            (dict(name="a"), False),
+            (dict(name="a", href=True, string="x"), False),
+            (dict(name=["a", "b"]), True),
+            (dict(class_=[re.compile("^a"), re.compile("b$")]), True),
+            (dict(string=["one", "two"]), True),
+        ],
+    )
+    def test_worth_compiling(self, kwargs, worth_compiling):
+        # A strainer is only compiled for a find_*() method if it has
+        # several rules that can be merged into one check.
+        assert SoupStrainer(**kwargs)._worth_compiling() == worth_compiling
+
+    def test_element_filter_compile(self):
+        selector = ElementFilter()
+        assert selector is selector.compile()
+
     def test_documentation_examples(self):
         """Medium-weight real-world tests based on the Beautiful Soup
         documentation.
@@ -123,6 +123,31 @@ class TestHTML5LibBuilder(HTML5TreeBuilderSmokeTest):
         assert final_aftermath == target.next_element
         assert target == final_aftermath.previous_element
 
+    def test_foster_parented_table_stays_connected(self):
+        # The <table> is moved out of the way while html5lib handles
+        # the misnested formatting tags, but it's still part of the
+        # document.
+        soup = self.soup("<table><b><u><button></b>")
+        assert (
+            "<body><b><u></u></b><u><button><b></b></button></u><table></table></body>"
+            == soup.body.decode()
+        )
+        assert soup.table in soup.descendants
+        assert soup.table is soup.button.b.next_element
+
+    def test_noahs_ark_clause(self):
+        # Only the three most recent identical formatting elements are
+        # reopened once the <p> tag is closed.
+        soup = self.soup("<p>" + '<b class="x">' * 4 + "a</p>b")
+        assert 4 == len(soup.p.find_all("b"))
+        assert 7 == len(soup.find_all("b"))
+
+    def test_many_strings_merged(self):
+        # html5lib sends each of these characters separately, but they
+        # all end up in one string.
+        soup = self.soup("a</a>" * 1000)
+        assert ["a" * 1000] == soup.body.contents
+
     def test_processing_instruction(self):
         """Processing instructions become comments."""
         markup = b"""<?PITarget PIContent?>"""
@@ -198,12 +223,6 @@ class TestHTML5LibBuilder(HTML5TreeBuilderSmokeTest):
         assert None is soup.p.sourceline
         assert None is soup.p.sourcepos
 
-    def test_special_string_containers(self):
-        # The html5lib tree builder doesn't support this standard feature,
-        # because there's no way of knowing, when a string is created,
-        # where in the tree it will eventually end up.
-        pass
-
     def test_html5_attributes(self):
         # The html5lib TreeBuilder can convert any entity named in
         # the HTML5 spec to a sequence of Unicode characters, and
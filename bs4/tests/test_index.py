@@ -0,0 +1,224 @@
+"""Tests of the tag indexes in bs4.index."""
+
+import copy
+import pickle
+
+import pytest
+
+from bs4 import BeautifulSoup
+from bs4.index import TreeIndex
+from . import SoupTest
+
+HTML = """<div id="main" class="box">
+<p class="item first">One <a href="/1">link</a></p>
+<p class="item">Two <a href="/2" id="second">link</a><b>bold</b></p>
+<section><p class="other item">Three</p><a class="item">A</a></section>
+</div><p id="last">Four</p>"""
+
+
+class TestTreeIndex(SoupTest):
+    def indexed(self, markup=HTML):
+        return self.soup(markup, indexed=True)
+
+    def assert_same_results(self, soup, *args, **kwargs):
+        """find_all() gives the same answers whether or not the
+        index is used.
+        """
+        expect = soup.find_all(*args, **kwargs)
+        assert soup._index is not None
+        index, soup._index = soup._index, None
+        try:
+            assert list(expect) == list(soup.find_all(*args, **kwargs))
+        finally:
+            soup._index = index
+        for x, y in zip(expect, soup.find_all(*args, **kwargs)):
+            assert x is y
+        return expect
+
+    def test_index_is_only_built_on_request(self):
+        assert None is self.soup(HTML)._index
+        soup = self.indexed()
+        assert isinstance(soup._index, TreeIndex)
+        assert len(list(soup.find_all(True))) == len(soup._index)
+
+    @pytest.mark.parametrize(
+        "args,kwargs",
+        [
+            (("p",), {}),
+            (("a",), {}),
+            (("nosuchtag",), {}),
+            ((), dict(id="second")),
+            ((), dict(id="nosuchid")),
+            ((), dict(class_="item")),
+            ((), dict(class_="other item")),
+            ((), dict(class_="item other")),
+            (("p", "item"), {}),
+            (("p",), dict(attrs={"class": "first"})),
+            (("a",), dict(class_="item")),
+            (("a",), dict(href="/2")),
+            (("a",), dict(limit=1)),
+            (("p",), dict(id=True)),
+        ],
+    )
+    def test_results_are_the_same(self, args, kwargs):
+        self.assert_same_results(self.indexed(), *args, **kwargs)
+
+    def test_results_are_in_document_order(self):
+        soup = self.indexed()
+        assert ["One link", "Two linkbold", "Three", "A"] == [
+            x.get_text() for x in self.assert_same_results(soup, class_="item")
+        ]
+        assert "second" == soup.find(id="second")["id"]
+
+    def test_search_within_a_tag(self):
+        soup = self.indexed()
+        section = soup.section
+        assert ["A"] == [x.string for x in section.find_all("a")]
+        assert 2 == len(section.find_all(class_="item"))
+        assert [] == soup.b.find_all("b")
+        assert 3 == len(soup.div.find_all("p"))
+
+    def test_unsupported_queries_fall_back(self):
+        soup = self.indexed()
+        # A name with a prefix, and a list of names, can't be
+        # looked up.
+        assert [] == soup.find_all("ns:p")
+        assert 4 == len(soup.find_all(["a", "b"]))
+        assert ["Three"] == [x.string for x in soup.find_all("p", string="Three")]
+
+    def test_tree_modifications(self):
+        soup = self.indexed()
+        p = soup.new_tag("p", id="new")
+        soup.append(p)
+        assert p is soup.find(id="new")
+        assert p is soup.find_all("p")[-1]
+
+        # Inserting a tag in the middle of the document puts the index
+        # out of order, so it's rebuilt the next time it's used.
+        builds = soup._index.builds
+        soup.div.insert(0, soup.new_tag("p", attrs={"class": "item"}))
+        assert builds == soup._index.builds
+        self.assert_same_results(soup, class_="item")
+        assert builds + 1 == soup._index.builds
+
+        # Moving a tag.
+        soup.section.append(p)
+        assert p is soup.section.find(id="new")
+
+        soup.find(id="second").extract()
+        assert None is soup.find(id="second")
+        soup.section.decompose()
+        assert [] == soup.find_all("section")
+        assert None is soup.find(id="new")
+        self.assert_same_results(soup, "p")
+        self.assert_same_results(soup, class_="item")
+
+    def test_attribute_changes(self):
+        soup = self.indexed()
+        b = soup.b
+        b["id"] = "bold"
+        b["class"] = ["item", "b"]
+        assert b is soup.find(id="bold")
+        assert b is soup.find(class_="b")
+        # The index gives back results in document order, even though
+        # <b> was the last tag filed under 'item'.
+        self.assert_same_results(soup, class_="item")
+
+        del b["id"]
+        assert None is soup.find(id="bold")
+        b.attrs = {"id": "replaced"}
+        assert b is soup.find(id="replaced")
+        assert None is soup.find(class_="b")
+
+    def test_attribute_names_are_filed_without_regard_to_case(self):
+        # A CSS selector like #x matches an 'ID' attribute in an HTML
+        # document, so the tag is filed under 'x', but find_all()
+        # still checks for an 'id' attribute.
+        soup = self.indexed()
+        tag = soup.new_tag("b", attrs={"ID": "x", "CLASS": "y"})
+        soup.append(tag)
+        assert [] == self.assert_same_results(soup, id="x")
+        assert [] == self.assert_same_results(soup, class_="y")
+        assert [tag] == soup._index.candidates(soup, None, {"id": "x"}, {})
+        assert [tag] == soup._index.candidates(soup, None, {"class": "y"}, {})
+
+    def test_candidates_ignoring_case(self):
+        soup = self.indexed()
+        index = soup._index
+        assert 3 == len(index.candidates(soup, "a", {}, {}, ignore_case=True))
+        soup.append(soup.new_tag("A"))
+        # Tags named 'A' aren't filed under 'a', so the name can't be
+        # looked up.
+        assert None is index.candidates(soup, "a", {}, {}, ignore_case=True)
+        assert 3 == len(index.candidates(soup, "a", {}, {}))
+        assert 1 == len(
+            index.candidates(soup, "a", {"id": "second"}, {}, ignore_case=True)
+        )
+
+    def test_renames_and_changes_in_place(self):
+        soup = self.indexed()
+        b = soup.b
+        b.name = "a"
+        assert [] == soup.find_all("b")
+        assert b in self.assert_same_results(soup, "a")
+        assert b in soup.select("a")
+
+        p = soup.find("p", class_="first")
+        p["class"].append("e")
+        assert [p] == self.assert_same_results(soup, class_="e")
+        p["class"].remove("first")
+        assert [] == soup.find_all(class_="first")
+        p["class"][0] = "replaced"
+        assert [p] == soup.find_all(class_="replaced")
+
+        div = soup.div
+        div.attrs["id"] = "q"
+        assert div is soup.find(id="q")
+        assert None is soup.find(id="main")
+        div.attrs.update(id="main", **{"class": "box2"})
+        assert div is soup.find(class_="box2")
+        assert div is soup.find(id="main")
+        del div.attrs["id"]
+        assert None is soup.find(id="main")
+        div.attrs.setdefault("id", "again")
+        assert div is soup.find(id="again")
+        div.attrs.clear()
+        self.assert_same_results(soup, id="again")
+        self.assert_same_results(soup, class_="box2")
+
+        # A list value that replaced the original is watched too.
+        last = soup.find(id="last")
+        last.attrs["class"] = last.attribute_value_list_class(["x"])
+        last["class"].append("y")
+        assert last is soup.find(class_="y")
+
+    def test_changes_that_need_reindex(self):
+        # A plain list can't say when it's been changed.
+        soup = self.indexed()
+        tag = soup.find(id="last")
+        tag["class"] = ["plain"]
+        tag["class"].append("changed")
+        assert None is soup.find(class_="changed")
+        soup.reindex()
+        assert "Four" == soup.find(class_="changed").string
+
+        with pytest.raises(ValueError):
+            self.soup("<a>").reindex()
+
+    def test_copy_and_pickle(self):
+        soup = self.indexed()
+        for other in (copy.copy(soup), pickle.loads(pickle.dumps(soup))):
+            assert other.indexed
+            assert other._index is not soup._index
+            assert other._index.root is other
+            assert "second" == other.find(id="second")["id"]
+            self.assert_same_results(other, class_="item")
+
+    def test_feed(self):
+        soup = BeautifulSoup(features="html.parser", indexed=True)
+        soup.feed("<p id='a'>1</p><p>")
+        soup.feed("2</p>")
+        soup.close()
+        assert isinstance(soup._index, TreeIndex)
+        assert "1" == soup.find(id="a").string
+        self.assert_same_results(soup, "p")
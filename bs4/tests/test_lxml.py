@@ -1,20 +1,29 @@
 """Tests to ensure that the lxml tree builder generates good trees."""
 
+import mmap
 import pickle
 import pytest
 import warnings
 from . import LXML_PRESENT, LXML_VERSION
 
 if LXML_PRESENT:
-    from bs4.builder._lxml import LXMLTreeBuilder, LXMLTreeBuilderForXML
+    from bs4.builder._lxml import (
+        LXMLFastTreeBuilder,
+        LXMLFastTreeBuilderForXML,
+        LXMLTreeBuilder,
+        LXMLTreeBuilderForXML,
+    )
 
 from bs4 import (
+    BeautifulSoup,
     BeautifulStoneSoup,
 )
+from bs4.filter import SoupStrainer
 from . import (
     HTMLTreeBuilderSmokeTest,
     XMLTreeBuilderSmokeTest,
     SOUP_SIEVE_PRESENT,
+    no_charset_detectors,
 )
 
 
@@ -29,6 +38,32 @@ class TestLXMLTreeBuilder(HTMLTreeBuilderSmokeTest):
     def default_builder(self):
         return LXMLTreeBuilder
 
+    def test_strained_out_tags_skip_the_beautifulsoup_object(self):
+        markup = (
+            "<html><head><link rel='a'><!--comment--></head><body><div>text"
+            "<a href='1'>link <b>text</b></a><link rel='b'></div>tail</body></html>"
+        )
+        calls = []
+
+        class Soup(BeautifulSoup):
+            def handle_starttag(self, name, *args, **kwargs):
+                calls.append(name)
+                return super().handle_starttag(name, *args, **kwargs)
+
+        for strainer, expect in (
+            ("link", '<link rel="a"/><link rel="b"/>'),
+            ("a", '<a href="1">link <b>text</b></a>'),
+        ):
+            calls = []
+            soup = Soup(markup, builder=self.default_builder, parse_only=SoupStrainer(strainer))
+            assert expect == soup.decode()
+            # Only the tags that made it into the tree were passed along.
+            assert [tag.name for tag in soup.descendants if tag.name] == calls
+
+        # A SoupStrainer that looks at strings sees all of them.
+        soup = self.soup(markup, parse_only=SoupStrainer(string="tail"))
+        assert "tail" == soup.decode()
+
     def test_out_of_range_entity(self):
         self.assert_soup("<p>foo&#10000000000000;bar</p>", "<p>foobar</p>")
         self.assert_soup("<p>foo&#x10000000000000;bar</p>", "<p>foobar</p>")
@@ -77,6 +112,53 @@ class TestLXMLTreeBuilder(HTMLTreeBuilderSmokeTest):
         assert None is soup.p.sourceline
         assert None is soup.p.sourcepos
 
+    @pytest.mark.parametrize(
+        "encoding,text",
+        [
+            # libxml2 knows this one as "iso8859-1".
+            ("latin-1", "caf\xe9"),
+            # libxml2 doesn't know these at all, so Python decodes them.
+            ("mac-roman", "caf\xe9\u2014"),
+            ("euc_kr", "\ud55c\uad6d\uc5b4"),
+        ],
+    )
+    def test_encoding_unknown_to_libxml2(self, encoding, text):
+        markup = '<meta charset="%s"><p>%s</p>' % (encoding, text)
+        soup = self.soup(markup.encode(encoding))
+        assert encoding == soup.original_encoding
+        assert text == soup.p.string
+
+    def test_encodings_that_cannot_decode_the_document_are_tried_last(self):
+        # utf-8 would normally be tried first, but it can't decode
+        # this document.
+        data = b"<p>" + b"a" * 100000 + b"caf\xe9</p>"
+        builder = self.default_builder()
+
+        # Keep an installed charset detection library from adding
+        # its own guess to the list.
+        with no_charset_detectors():
+            assert ["windows-1252", "utf-8"] == [
+                encoding for _, encoding, _, _ in builder.prepare_markup(data)
+            ]
+            soup = self.soup(data)
+            assert "windows-1252" == soup.original_encoding
+            assert soup.p.string.endswith("caf\xe9")
+
+            # If the user asks for an encoding, it's still tried first.
+            assert ["utf-8", "windows-1252"] == [
+                encoding
+                for _, encoding, _, _ in builder.prepare_markup(data, "utf-8")
+            ]
+
+    def test_encoding_unknown_to_libxml2_fed_in_chunks(self):
+        data = '<meta charset="euc_kr"><p>\ud55c\uad6d\uc5b4</p>'.encode("euc_kr")
+        soup = self.soup("")
+        # Chunks end partway through multibyte characters.
+        for i in range(len(data)):
+            soup.feed(data[i : i + 1])
+        soup.close()
+        assert "\ud55c\uad6d\uc5b4" == soup.p.string
+
 
 @pytest.mark.skipif(
     not LXML_PRESENT,
@@ -89,6 +171,38 @@ class TestLXMLXMLTreeBuilder(XMLTreeBuilderSmokeTest):
     def default_builder(self):
         return LXMLTreeBuilderForXML
 
+    def test_strainer_with_namespaces(self):
+        # Tags that are rejected by a SoupStrainer still define
+        # namespace prefixes for the tags that aren't.
+        markup = (
+            '<root xmlns:ns="http://example.com/"><ns:a ns:key="v">1<b/></ns:a>'
+            '<a>2</a><c><a ns:key="w">3</a></c></root>'
+        )
+        soup = self.soup(markup, parse_only=SoupStrainer("a"))
+        assert (
+            '<ns:a ns:key="v">1<b/></ns:a><a>2</a><a ns:key="w">3</a>'
+            == soup.decode().split("\n", 1)[1]
+        )
+        [key] = list(soup.find("a").attrs)
+        assert "http://example.com/" == key.namespace
+
+        soup = self.soup(markup, parse_only=SoupStrainer(attrs={"ns:key": "w"}))
+        assert '<a ns:key="w">3</a>' == soup.decode().split("\n", 1)[1]
+
+    def test_declared_encoding_is_tried_first_despite_a_bad_byte(self):
+        # The document says it's UTF-8, and it is, apart from one
+        # stray byte. That's not enough to make windows-1252 a better
+        # guess.
+        data = (
+            b'<?xml version="1.0" encoding="utf-8"?>'
+            b"<root><a>caf\xc3\xa9</a><b>stray \xff byte</b></root>"
+        )
+        builder = self.default_builder()
+        assert "utf-8" == next(builder.prepare_markup(data))[1]
+        soup = self.soup(data)
+        assert "utf-8" == soup.original_encoding
+        assert "caf\xe9" == soup.a.string
+
     def test_namespace_indexing(self):
         soup = self.soup(
             '<?xml version="1.1"?>\n'
@@ -194,3 +308,164 @@ class TestLXMLXMLTreeBuilder(XMLTreeBuilderSmokeTest):
         assert "some markup" == unpickled.a.string
         assert unpickled.builder != soup.builder
         assert isinstance(unpickled.builder, self.default_builder)
+
+    def test_memory_mapped_input(self, tmp_path):
+        # A file given by path, or as an open binary filehandle, is
+        # memory-mapped rather than read into a bytestring.
+        path = tmp_path / "doc.xml"
+        path.write_bytes(
+            b'\xef\xbb\xbf<?xml version="1.0" encoding="utf-8"?><root>'
+            + "<a>Räksmörgås</a>".encode("utf8") * 1000
+            + b"</root>"
+        )
+
+        soup = self.soup(path, chunk_size=100)
+        assert 1000 == len(soup.find_all("a"))
+        assert "Räksmörgås" == soup.a.string
+        assert "utf-8" == soup.original_encoding
+
+        with open(path, "rb") as fh:
+            # The file is mapped starting from the current position.
+            fh.read(3)
+            soup = self.soup(fh)
+        assert 1000 == len(soup.find_all("a"))
+
+        with open(path, "rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            soup = self.soup(mapped)
+            assert 1000 == len(soup.find_all("a"))
+
+            # Once parsing is done, Beautiful Soup holds no references
+            # into the map, so it can be closed.
+            del soup
+            mapped.close()
+
+    def test_memoryview_input(self):
+        data = b"<root>" + b"<a>text</a>" * 100 + b"</root>"
+        soup = self.soup(memoryview(data), chunk_size=7)
+        assert 100 == len(soup.find_all("a"))
+        assert None is soup.markup
+
+    def test_empty_file(self, tmp_path):
+        # An empty file can't be memory-mapped, so it's read instead.
+        path = tmp_path / "empty.xml"
+        path.write_bytes(b"")
+        soup = self.soup(path)
+        assert [] == soup.contents
+
+    def test_chunk_size(self):
+        builder = self.default_builder(chunk_size=10)
+        assert 10 == builder.chunk_size
+        assert LXMLTreeBuilderForXML.CHUNK_SIZE == self.default_builder().chunk_size
+
+    def test_attributes_processed_lazily(self):
+        soup = self.soup(
+            '<root xmlns:a="http://example.com/"><item x="1" y="2"/>'
+            '<item a:z="3"/></root>'
+        )
+        plain, namespaced = soup.find_all("item")
+
+        # Attributes with no namespaces are kept as raw pairs until
+        # they're used.
+        assert (("x", "1"), ("y", "2")) == plain._attrs
+        assert {"x": "1", "y": "2"} == plain.attrs
+        assert isinstance(plain._attrs, dict)
+
+        # A namespaced attribute has to be processed immediately.
+        assert isinstance(namespaced._attrs, dict)
+        assert "a:z" == list(namespaced.attrs)[0]
+
+
+@pytest.mark.skipif(
+    not LXML_PRESENT,
+    reason="lxml seems not to be present, not testing its tree builder.",
+)
+class TestLXMLFastTreeBuilder(TestLXMLTreeBuilder):
+    """Run the lxml HTML tests against `LXMLFastTreeBuilder`."""
+
+    @property
+    def default_builder(self):
+        return LXMLFastTreeBuilder
+
+    @pytest.mark.parametrize(
+        "markup",
+        [
+            "<input disabled><input checked>",
+            '<input disabled="disabled"><option SELECTED = selected>',
+            '<input disabled><input disabled="disabled"><input checked="CHECKED">',
+            '<input data-disabled="disabled" disabled>',
+        ],
+    )
+    def test_boolean_attributes(self, markup):
+        # lxml's tree gives a valueless attribute like "disabled" its
+        # own name as a value, but that doesn't show up in the parse
+        # tree.
+        assert BeautifulSoup(markup, "lxml").decode() == self.soup(markup).decode()
+
+    def test_spells_out_booleans(self):
+        builder = self.default_builder()
+        assert not builder._spells_out_booleans("<input disabled>")
+        assert not builder._spells_out_booleans('<input data-disabled="x">')
+        assert builder._spells_out_booleans('<input disabled="disabled">')
+        assert builder._spells_out_booleans(b"<option SELECTED =selected>")
+
+    def test_whitespace_after_end_of_document(self):
+        markup = "<html><body><p>text</p></body></html>\n"
+        assert BeautifulSoup(markup, "lxml").decode() == self.soup(markup).decode()
+
+    def test_whitespace_after_end_of_document_in_the_middle(self):
+        # libxml2 leaves the whitespace after this </html> tag out of
+        # its tree, so the tree can't be used.
+        markup = "<p>a</p></html>\n<p>b</p>\n"
+        soup = self.soup(markup)
+        assert soup.decode() == BeautifulSoup(markup, "lxml").decode()
+        assert soup.decode().endswith("</html>\n")
+
+        builder = self.default_builder()
+        builder.soup = soup
+        assert builder._ends_early(markup)
+        assert builder._ends_early(markup.encode("utf8"))
+        assert not builder._ends_early("<p>a</p></HTML>\n")
+        assert not builder._ends_early("<p>a</p>")
+
+    def test_deeply_nested_document_falls_back(self):
+        markup = "<div>" * 3000 + "text"
+        soup = self.soup(markup)
+        assert "text" == soup.find(string=True)
+        assert soup.decode() == BeautifulSoup(markup, "lxml").decode()
+
+    def test_text_outside_the_document_falls_back(self):
+        markup = "</p>text<p>more</p>"
+        soup = self.soup(markup)
+        assert soup.decode() == BeautifulSoup(markup, "lxml").decode()
+
+
+@pytest.mark.skipif(
+    not LXML_PRESENT,
+    reason="lxml seems not to be present, not testing its XML tree builder.",
+)
+class TestLXMLFastXMLTreeBuilder(TestLXMLXMLTreeBuilder):
+    """Run the lxml XML tests against `LXMLFastTreeBuilderForXML`."""
+
+    @property
+    def default_builder(self):
+        return LXMLFastTreeBuilderForXML
+
+    def test_internal_entity_falls_back(self):
+        markup = '<!DOCTYPE r [<!ENTITY e "expanded">]><r>&e;</r>'
+        soup = self.soup(markup)
+        assert soup.decode() == BeautifulSoup(markup, "xml").decode()
+
+    def test_comment_before_doctype_falls_back(self):
+        markup = "<!--comment--><!DOCTYPE r><r>text</r>"
+        soup = self.soup(markup)
+        assert soup.decode() == BeautifulSoup(markup, "xml").decode()
+        assert soup.contents[0] == "comment"
+
+    def test_namespaces(self):
+        markup = '<r xmlns="http://a/" xmlns:b="http://b/"><b:c b:d="e"/></r>'
+        soup = self.soup(markup)
+        expect = BeautifulSoup(markup, "xml")
+        assert soup.decode() == expect.decode()
+        assert "http://b/" == soup.find("c").namespace
+        assert "b" == soup.find("c").prefix
@@ -1,15 +1,20 @@
 """Tests of the bs4.element.PageElement class"""
 
 import copy
+import copyreg
 import pickle
 import pytest
 import sys
+from unittest.mock import patch
 import warnings
 
 from bs4 import BeautifulSoup
 from bs4.element import (
     AttributeValueList,
     Comment,
+    HTMLAttributeDict,
+    NavigableString,
+    Tag,
 )
 from bs4.filter import SoupStrainer
 from . import (
@@ -349,6 +354,49 @@ class TestPersistence(SoupTest):
         loaded = pickle.loads(dumped)
         assert loaded.decode() == soup.decode()
 
+    def test_old_tag_pickles_can_be_loaded(self):
+        # Beautiful Soup 4.13.0 pickled a Tag along with its
+        # __dict__. Pickle a Tag the same way.
+        state = dict(
+            parser_class=BeautifulSoup,
+            name="pre",
+            namespace=None,
+            _namespaces={},
+            prefix=None,
+            sourceline=1,
+            sourcepos=0,
+            attribute_value_list_class=AttributeValueList,
+            attrs=HTMLAttributeDict(
+                {"class": AttributeValueList(["a", "b"]), "id": "x"}
+            ),
+            known_xml=False,
+            contents=[],
+            parent=None,
+            previous_element=None,
+            next_element=None,
+            next_sibling=None,
+            previous_sibling=None,
+            hidden=False,
+            can_be_empty_element=False,
+            cdata_list_attributes={"*": {"class"}},
+            preserve_whitespace_tags={"pre"},
+            interesting_string_types={NavigableString},
+            custom="value",
+        )
+        old_way = (copyreg.__newobj__, (Tag,), state)
+        for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+            with patch.object(Tag, "__reduce_ex__", lambda self, protocol: old_way):
+                dumped = pickle.dumps(Tag(name="pre"), protocol)
+            loaded = pickle.loads(dumped)
+            assert isinstance(loaded, Tag)
+            assert '<pre class="a b" id="x"></pre>' == loaded.decode()
+            assert ["a", "b"] == loaded["class"]
+            assert {"pre"} == loaded.preserve_whitespace_tags
+            assert {NavigableString} == loaded.interesting_string_types
+            assert "value" == loaded.custom
+            loaded.append("text")
+            assert loaded.get_text() == "text"
+
     def test_copy_navigablestring_is_not_attached_to_tree(self):
         html = "<b>Foo<a></a></b><b>Bar</b>"
         soup = self.soup(html)
@@ -361,6 +409,22 @@ class TestPersistence(SoupTest):
         assert None is s2.next_sibling
         assert None is s2.previous_element
 
+    def test_pickle_navigablestring_is_not_attached_to_tree(self):
+        soup = self.soup("<b>Foo<a></a></b><b><!--Bar--></b>")
+        for original in soup.find_all(string=True):
+            original.custom = "value"
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                loaded = pickle.loads(pickle.dumps(original, protocol))
+                assert original == loaded
+                assert original.__class__ is loaded.__class__
+                assert None is loaded.parent
+                assert None is loaded.next_element
+                assert None is loaded.previous_element
+                assert None is loaded.next_sibling
+                assert None is loaded.previous_sibling
+                # Other attributes survive the trip.
+                assert "value" == loaded.custom
+
     def test_copy_navigablestring_subclass_has_same_type(self):
         html = "<b><!--Foo--></b>"
         soup = self.soup(html)
@@ -0,0 +1,217 @@
+"""Tests of the compact parse tree format in bs4.serialize."""
+
+import marshal
+import pickle
+import sys
+
+import pytest
+
+from bs4 import BeautifulSoup
+from bs4.element import (
+    AttributeValueList,
+    CharsetMetaAttributeValue,
+    Comment,
+    ContentMetaAttributeValue,
+    NamespacedAttribute,
+    Script,
+    Tag,
+)
+from bs4.serialize import (
+    MAGIC,
+    PYTHON_VERSION,
+    VERSION,
+    dumps,
+    loads,
+)
+from . import (
+    HTML5LIB_PRESENT,
+    LXML_PRESENT,
+    SoupTest,
+)
+
+HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf8">
+<meta http-equiv="Content-type" content="text/html; charset=utf8">
+<title>A title</title><script>var x = 1;</script></head>
+<body><p class="a b" id="first">Some <b>bold</b> text<!--a comment--></p>
+<p>Another<br>paragraph</p></body></html>"""
+
+XML = """<?xml version="1.0" encoding="utf-8"?>
+<root xmlns="http://example.com/" xmlns:ns="http://example.com/ns">
+<ns:item ns:attr="value" plain="yes"><![CDATA[some data]]></ns:item>
+<item/></root>"""
+
+PARSERS = ["html.parser"]
+if LXML_PRESENT:
+    PARSERS.extend(["lxml", "xml"])
+if HTML5LIB_PRESENT:
+    PARSERS.append("html5lib")
+
+
+def assert_same_tree(original, loaded):
+    """Make sure two parse trees are the same, down to the classes of
+    their elements and the links between them.
+    """
+    assert original.decode() == loaded.decode()
+    original_elements = list(original.descendants)
+    loaded_elements = list(loaded.descendants)
+    assert len(original_elements) == len(loaded_elements)
+    for o, l in zip(original_elements, loaded_elements):
+        assert o.__class__ is l.__class__
+        if isinstance(o, Tag):
+            assert o.name == l.name
+            assert o.prefix == l.prefix
+            assert o.namespace == l.namespace
+            assert o.attrs == l.attrs
+            assert o.sourceline == l.sourceline
+            assert o.sourcepos == l.sourcepos
+            assert o.can_be_empty_element == l.can_be_empty_element
+            assert o._namespaces == l._namespaces
+
+    # Going backwards through the tree works as well as going forwards.
+    last = loaded._last_descendant()
+    backwards = []
+    while last is not loaded:
+        backwards.append(last)
+        last = last.previous_element
+    assert loaded_elements == list(reversed(backwards))
+
+
+class TestSerialize(SoupTest):
+    @pytest.mark.parametrize("parser", PARSERS)
+    def test_round_trip(self, parser):
+        markup = XML if parser == "xml" else HTML
+        soup = BeautifulSoup(markup, parser)
+        loaded = loads(dumps(soup))
+        assert isinstance(loaded, BeautifulSoup)
+        assert type(soup.builder) is type(loaded.builder)
+        assert_same_tree(soup, loaded)
+
+    @pytest.mark.parametrize("parser", PARSERS)
+    def test_pickle(self, parser):
+        markup = XML if parser == "xml" else HTML
+        soup = BeautifulSoup(markup, parser)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            loaded = pickle.loads(pickle.dumps(soup, protocol))
+            assert_same_tree(soup, loaded)
+
+    def test_element_classes_and_attribute_values(self):
+        soup = self.soup(HTML)
+        soup.p["class"]
+        loaded = loads(dumps(soup))
+        assert isinstance(loaded.p["class"], AttributeValueList)
+        assert ["a", "b"] == loaded.p["class"]
+        assert isinstance(loaded.meta["charset"], CharsetMetaAttributeValue)
+        assert "utf8" == loaded.meta["charset"].original_value
+        content = loaded.find_all("meta")[1]["content"]
+        assert isinstance(content, ContentMetaAttributeValue)
+        assert isinstance(loaded.script.string, Script)
+        assert isinstance(loaded.find(string="a comment"), Comment)
+
+    def test_unprocessed_attributes_stay_unprocessed(self):
+        soup = self.soup('<a class="foo bar" download>')
+        loaded = loads(dumps(soup))
+        assert (("class", "foo bar"), ("download", None)) == loaded.a._attrs
+        assert {"class": ["foo", "bar"], "download": ""} == loaded.a.attrs
+
+    @pytest.mark.skipif(not LXML_PRESENT, reason="lxml seems not to be present")
+    def test_namespaced_attribute(self):
+        soup = BeautifulSoup(XML, "xml")
+        loaded = loads(dumps(soup))
+        key = list(loaded.find("item").attrs)[0]
+        assert isinstance(key, NamespacedAttribute)
+        assert ("ns", "attr", "http://example.com/ns") == (
+            key.prefix,
+            key.name,
+            key.namespace,
+        )
+
+    def test_soup_information_is_kept(self):
+        soup = self.soup(b"<p>\xe9</p>", from_encoding="latin-1")
+        loaded = loads(dumps(soup))
+        assert "latin-1" == loaded.original_encoding
+        assert "<p>\xe9</p>" == loaded.decode()
+
+        # The loaded soup can be modified like any other.
+        loaded.p.append(loaded.new_tag("b"))
+        assert "<p>\xe9<b></b></p>" == loaded.decode()
+
+    def test_tag(self):
+        soup = self.soup(HTML)
+        p = soup.p
+        loaded = loads(dumps(p))
+        assert isinstance(loaded, Tag)
+        assert None is loaded.parent
+        assert None is loaded.previous_element
+        assert None is loaded._last_descendant().next_element
+        assert p.decode() == loaded.decode()
+        assert BeautifulSoup is loaded.parser_class
+
+        # Pickling a Tag works the same way.
+        loaded = pickle.loads(pickle.dumps(p))
+        assert None is loaded.parent
+        assert p.decode() == loaded.decode()
+
+    def test_tag_without_soup(self):
+        tag = Tag(name="a", attrs={"href": "/"})
+        tag.append("text")
+        loaded = loads(dumps(tag))
+        assert '<a href="/">text</a>' == loaded.decode()
+
+    def test_deeply_nested_document(self):
+        limit = sys.getrecursionlimit() + 1
+        soup = self.soup("<span>" * limit)
+        loaded = loads(dumps(soup))
+        assert soup.decode() == loaded.decode()
+        pickle.loads(pickle.dumps(soup.span))
+
+    def test_old_pickles_can_be_loaded(self):
+        # Older versions of Beautiful Soup pickled the document as
+        # markup.
+        soup = self.soup(HTML)
+        state = soup.__getstate__()
+        del state["_serialized_tree"]
+        del state["_serialized_tree_byteorder"]
+        state["markup"] = soup.decode()
+        loaded = BeautifulSoup.__new__(BeautifulSoup)
+        loaded.__setstate__(state)
+        assert soup.decode() == loaded.decode()
+
+    def test_bad_data(self):
+        with pytest.raises(ValueError):
+            loads(b"not a tree")
+        with pytest.raises(ValueError):
+            loads(marshal.dumps(("something else", 1)))
+        data = marshal.loads(dumps(self.soup("<a>")))
+        data = (MAGIC, VERSION + 1) + data[2:]
+        with pytest.raises(ValueError):
+            loads(marshal.dumps(data))
+
+    def test_data_from_another_python_version(self):
+        # The marshal format can change between Python versions, so
+        # loads() refuses data written by a different version.
+        data = marshal.loads(dumps(self.soup("<a>")))
+        assert PYTHON_VERSION == data[2]
+        data = data[:2] + ("otherpython-2.7",) + data[3:]
+        with pytest.raises(ValueError) as exc_info:
+            loads(marshal.dumps(data))
+        assert "otherpython-2.7" in str(exc_info.value)
+
+    def test_pickled_tag_does_not_depend_on_python_version(self, monkeypatch):
+        # A pickled Tag doesn't contain any marshal data, so a pickle
+        # made by one Python version can be loaded by another.
+        from bs4 import serialize
+
+        tag = self.soup(HTML).p
+        monkeypatch.setattr(serialize, "PYTHON_VERSION", "otherpython-2.7")
+        pickled = pickle.dumps(tag)
+        monkeypatch.undo()
+        assert tag.decode() == pickle.loads(pickled).decode()
+
+    def test_classes_must_be_page_elements(self):
+        data = list(marshal.loads(dumps(self.soup("<!--comment-->"))))
+        # Replace the Comment class with something that's not a
+        # PageElement.
+        data[8] = ["os:system"]
+        with pytest.raises(ValueError):
+            loads(marshal.dumps(tuple(data)))
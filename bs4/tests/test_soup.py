@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 """Tests of Beautiful Soup as a whole."""
 
+from io import BytesIO, StringIO
 import logging
 import pickle
 import pytest
@@ -8,8 +9,11 @@ from typing import Iterable
 
 from bs4 import (
     BeautifulSoup,
+    EncodingCache,
     GuessedAtParserWarning,
     dammit,
+    parse_many,
+    parse_records,
 )
 from bs4.builder import (
     TreeBuilder,
@@ -35,10 +39,14 @@ from . import (
     default_builder,
     LXML_PRESENT,
     SoupTest,
+    no_charset_detectors,
 )
 import warnings
 from typing import Type
 
+PARSERS_FOR_ENCODING_CACHE = ["html.parser"]
+if LXML_PRESENT:
+    PARSERS_FOR_ENCODING_CACHE.append("lxml")
 
 class TestConstructor(SoupTest):
     def test_short_unicode_input(self):
@@ -56,6 +64,91 @@ class TestConstructor(SoupTest):
         soup = self.soup(utf8_data, exclude_encodings=["utf-8"])
         assert "windows-1252" == soup.original_encoding
 
+    def test_encoding_cache(self):
+        cache = EncodingCache()
+        latin1 = "<p>Caf\xe9</p>".encode("latin-1")
+        latin1_2 = "<p>Cr\xe8me br\xfbl\xe9e</p>".encode("latin-1")
+        utf8 = "<p>R\xe4ksm\xf6rg\xe5s \u65e5\u672c</p>".encode("utf-8")
+
+        soup = self.soup(latin1, encoding_cache=cache, encoding_cache_key="a")
+        assert "windows-1252" == soup.original_encoding
+        assert (0, 1, 1) == (cache.hits, cache.misses, len(cache))
+
+        # The encoding that worked for the first document from this
+        # source is used for the next one.
+        soup = self.soup(latin1_2, encoding_cache=cache, encoding_cache_key="a")
+        assert "windows-1252" == soup.original_encoding
+        assert "Cr\xe8me br\xfbl\xe9e" == soup.p.string
+        assert (1, 1) == (cache.hits, cache.misses)
+
+        # It's not used for a document from another source, or if
+        # it's been excluded, or if the document declares a different
+        # encoding.
+        soup = self.soup(latin1_2, encoding_cache=cache, encoding_cache_key="b")
+        assert (1, 2, 2) == (cache.hits, cache.misses, len(cache))
+        soup = self.soup(
+            latin1_2,
+            encoding_cache=cache,
+            encoding_cache_key="a",
+            exclude_encodings=["windows-1252"],
+        )
+        assert "windows-1252" != soup.original_encoding
+        declared = b'<meta charset="utf-8">' + utf8
+        soup = self.soup(declared, encoding_cache=cache, encoding_cache_key="a")
+        assert "utf-8" == soup.original_encoding
+        assert (2, 3, 3) == (cache.hits, cache.misses, len(cache))
+
+        # A cached encoding that can't decode the document is
+        # forgotten.
+        soup = self.soup(latin1, encoding_cache=cache, encoding_cache_key="c")
+        assert "windows-1252" == soup.original_encoding
+        soup = self.soup(utf8, encoding_cache=cache, encoding_cache_key="c")
+        soup = self.soup(latin1, encoding_cache=cache, encoding_cache_key="c")
+        assert "windows-1252" == soup.original_encoding
+        assert (2, 6) == (cache.hits, cache.misses)
+        assert "windows-1252" == cache.get("c", latin1)
+
+        # Unicode markup has no encoding to remember.
+        self.soup("<p>Caf\xe9</p>", encoding_cache=cache, encoding_cache_key="d")
+        assert (3, 6, 4) == (cache.hits, cache.misses, len(cache))
+
+    @pytest.mark.parametrize("parser", PARSERS_FOR_ENCODING_CACHE)
+    def test_encoding_cache_with_documents_in_different_encodings(self, parser):
+        # windows-1252 can decode any bytestring, so having worked for
+        # one document from a source doesn't make it right for the
+        # next. A document that's valid UTF-8 is decoded as UTF-8.
+        cache = EncodingCache()
+        latin1 = "<p>Caf\xe9</p>".encode("latin-1")
+        utf8 = "<p>caf\xe9 \u2014 \u65e5\u672c</p>".encode("utf-8")
+        for markup, encoding in (
+            (latin1, "windows-1252"),
+            (utf8, "utf-8"),
+            (latin1, "windows-1252"),
+            (utf8, "utf-8"),
+        ):
+            soup = BeautifulSoup(
+                markup, parser, encoding_cache=cache, encoding_cache_key="a"
+            )
+            assert encoding == soup.original_encoding
+            assert markup.decode(encoding) == soup.p.decode()
+
+        # A document that's all ASCII is the same in either encoding.
+        cache.put("a", latin1, "windows-1252")
+        soup = BeautifulSoup(
+            b"<p>plain</p>", parser, encoding_cache=cache, encoding_cache_key="a"
+        )
+        assert "windows-1252" == soup.original_encoding
+
+    def test_path_and_buffer_input(self, tmp_path):
+        # html.parser can't parse out of a buffer, so the document is
+        # copied into a bytestring first.
+        data = "<p>Räksmörgås</p>".encode("utf8")
+        path = tmp_path / "doc.html"
+        path.write_bytes(data)
+        for markup in (path, memoryview(data), bytearray(data)):
+            soup = self.soup(markup)
+            assert "Räksmörgås" == soup.p.string
+
     def test_custom_builder_class(self):
         # Verify that you can pass in a custom Builder class and
         # it'll be instantiated with the appropriate keyword arguments.
@@ -465,6 +558,298 @@ class TestSelectiveParsing(SoupTest):
         assert soup.encode() == b"<b>Yes</b><b>Yes <c>Yes</c></b>"
 
 
+class TestPushParsing(SoupTest):
+    """Test BeautifulSoup.feed() and BeautifulSoup.close()."""
+
+    document = (
+        '<html><head><meta charset="iso-8859-1"></head><body>'
+        + "<p>Sacr\xe9 bleu!</p>" * 100
+        + "</body></html>"
+    )
+
+    def feed_in_chunks(self, soup, data, size):
+        for i in range(0, len(data), size):
+            soup.feed(data[i : i + size])
+        soup.close()
+
+    def test_push_parse_bytes(self):
+        soup = BeautifulSoup(features="html.parser")
+        self.feed_in_chunks(soup, self.document.encode("latin-1"), 7)
+        assert "iso-8859-1" == soup.original_encoding
+        assert "iso-8859-1" == soup.declared_html_encoding
+        assert 100 == len(soup.find_all("p"))
+        assert "Sacr\xe9 bleu!" == soup.p.string
+        assert soup.builder.soup is None
+
+    def test_push_parse_unicode(self):
+        soup = BeautifulSoup(features="html.parser")
+        self.feed_in_chunks(soup, self.document, 5)
+        assert soup.decode() == self.soup(self.document).decode()
+        assert None is soup.original_encoding
+
+    def test_tree_is_built_as_chunks_arrive(self):
+        soup = BeautifulSoup(features="html.parser")
+        soup.feed("<p>one</p><p>tw")
+        assert "one" == soup.p.string
+        soup.feed("o</p><p>three")
+        soup.close()
+        assert ["one", "two", "three"] == [p.string for p in soup.find_all("p")]
+
+    def test_from_encoding(self):
+        data = "<p>\N{SNOWMAN}</p>".encode("utf-16le")
+        soup = BeautifulSoup(features="html.parser", from_encoding="utf-16le")
+        self.feed_in_chunks(soup, data, 3)
+        assert "\N{SNOWMAN}" == soup.p.string
+        assert "utf-16le" == soup.original_encoding
+
+    def test_feed_replaces_existing_tree(self):
+        soup = self.soup("<a>old</a>")
+        soup.feed("<b>new</b>")
+        soup.close()
+        assert "<b>new</b>" == soup.decode()
+
+    def test_close_without_feed(self):
+        soup = self.soup("<a>old</a>")
+        soup.close()
+        assert "<a>old</a>" == soup.decode()
+
+    @pytest.mark.skipif(not LXML_PRESENT, reason="lxml not installed")
+    def test_push_parse_with_lxml(self):
+        # An XML parser ignores the <meta> tag, but either way the
+        # document is decoded correctly.
+        with no_charset_detectors():
+            for features, encoding in (
+                ("lxml", "iso-8859-1"),
+                ("xml", "windows-1252"),
+            ):
+                soup = BeautifulSoup(features=features)
+                self.feed_in_chunks(soup, self.document.encode("latin-1"), 7)
+                assert encoding == soup.original_encoding
+                assert 100 == len(soup.find_all("p"))
+                assert "Sacr\xe9 bleu!" == soup.p.string
+
+
+class TestIterparse(SoupTest):
+    """Test the BeautifulSoup.iterparse() method."""
+
+    def rows(self, count: int) -> bytes:
+        return b"<table>" + b"".join(
+            b'<tr id="%d"><td>row %d</td></tr>\n' % (i, i) for i in range(count)
+        ) + b"</table>"
+
+    def test_yields_completed_tags(self):
+        fh = BytesIO(self.rows(50))
+        tags = list(
+            BeautifulSoup.iterparse(
+                fh, "html.parser", parse_only=SoupStrainer("tr"), chunk_size=10
+            )
+        )
+        assert [str(i) for i in range(50)] == [tag["id"] for tag in tags]
+        assert "row 49" == tags[-1].td.string
+
+        # Each tag was extracted from the tree once we were done with it.
+        for tag in tags:
+            assert tag.parent is None
+            assert tag.previous_element is None
+            assert tag._last_descendant().next_element is None
+
+    def test_tags_are_yielded_before_end_of_document(self):
+        fh = BytesIO(self.rows(1000))
+        for tag in BeautifulSoup.iterparse(
+            fh, "html.parser", parse_only=SoupStrainer("tr"), chunk_size=100
+        ):
+            assert tag["id"] == "0"
+            break
+        assert fh.tell() < 2000
+
+    def test_tree_does_not_grow(self):
+        fh = BytesIO(self.rows(1000))
+        sizes = []
+        for tag in BeautifulSoup.iterparse(
+            fh, "html.parser", parse_only=SoupStrainer("tr"), chunk_size=10
+        ):
+            # Reach up into the generator's BeautifulSoup object.
+            sizes.append(len(list(tag.parent.descendants)))
+
+        # The first few rows were held back while the encoding was
+        # being detected, but after that rows were yielded as they
+        # came in.
+        assert max(sizes) < 200
+        assert max(sizes[-100:]) <= 4
+
+    def test_unicode_source_and_decomposition(self):
+        fh = StringIO("<a>1</a>junk<a>2</a><b>3</b>")
+        names = []
+        for tag in BeautifulSoup.iterparse(fh, "html.parser", chunk_size=3):
+            names.append(tag.name)
+            tag.decompose()
+        assert ["a", "a", "b"] == names
+
+    def test_filename_and_encoding(self, tmp_path):
+        path = tmp_path / "doc.html"
+        path.write_bytes(
+            '<meta charset="iso-8859-1"><p>Sacr\xe9 bleu!</p>'.encode("latin-1")
+        )
+        [meta, p] = BeautifulSoup.iterparse(path, "html.parser")
+        assert "Sacr\xe9 bleu!" == p.string
+
+    @pytest.mark.skipif(not LXML_PRESENT, reason="lxml not installed")
+    def test_lxml_xml(self):
+        markup = b'<?xml version="1.0"?><posts>' + b"".join(
+            b'<row Id="%d" Score="%d"/>' % (i, i * 2) for i in range(100)
+        ) + b"</posts>"
+        tags = list(
+            BeautifulSoup.iterparse(
+                BytesIO(markup), "xml", parse_only=SoupStrainer("row"), chunk_size=64
+            )
+        )
+        assert 100 == len(tags)
+        assert "198" == tags[-1]["Score"]
+        assert all(tag.parent is None for tag in tags)
+
+    def test_builder_must_support_incremental_parsing(self):
+        class OneShotBuilder(TreeBuilder):
+            def feed(self, markup):
+                pass
+
+        with pytest.raises(NotImplementedError) as exc_info:
+            list(BeautifulSoup.iterparse(BytesIO(b"<a>"), builder=OneShotBuilder))
+        assert "can't parse a document incrementally" in str(exc_info.value)
+
+
+def _title(soup):
+    # An extract function for parse_many(). It has to be defined at
+    # the module level so it can be pickled.
+    return str(soup.title.string)
+
+
+class TestParseMany(SoupTest):
+    markups = ["<title>%d</title><p>paragraph</p>" % i for i in range(10)]
+
+    @pytest.mark.parametrize("workers", [0, 2])
+    def test_extract(self, workers):
+        results = parse_many(
+            self.markups, "html.parser", extract=_title, workers=workers, chunksize=3
+        )
+        assert [str(i) for i in range(10)] == list(results)
+
+    def test_unordered(self):
+        results = parse_many(
+            self.markups, "html.parser", extract=_title, workers=2, ordered=False
+        )
+        assert set(str(i) for i in range(10)) == set(results)
+
+    def test_soups_are_returned_without_extract(self):
+        strainer = SoupStrainer("p")
+        soups = list(
+            parse_many(self.markups[:2], "html.parser", parse_only=strainer, workers=2)
+        )
+        assert 2 == len(soups)
+        for soup in soups:
+            assert isinstance(soup, BeautifulSoup)
+            assert "<p>paragraph</p>" == soup.decode()
+
+    def test_markup_is_read_only_as_needed(self):
+        consumed = []
+
+        def markups():
+            for markup in self.markups:
+                consumed.append(markup)
+                yield markup
+
+        results = parse_many(
+            markups(), "html.parser", extract=_title, workers=1, max_pending=1
+        )
+        assert "0" == next(results)
+        assert len(consumed) <= 2
+        assert [str(i) for i in range(1, 10)] == list(results)
+
+    def test_errors_are_propagated(self):
+        with pytest.raises(AttributeError):
+            list(parse_many(["<p>no title</p>"], "html.parser", extract=_title))
+
+    def test_bad_chunksize(self):
+        with pytest.raises(ValueError):
+            list(parse_many(self.markups, chunksize=0))
+
+
+def _record_id(record):
+    # An extract function for parse_records().
+    return record["Id"]
+
+
+@pytest.mark.skipif(not LXML_PRESENT, reason="lxml seems not to be present")
+class TestParseRecords(SoupTest):
+    markup = """<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE posts [<!ENTITY me "Me">]>
+<posts xmlns:ns="http://example.com/"><!-- a comment -->
+<row Id="1" a="x > y" b='/>'/>
+<row Id="2"><ns:title>&me;<![CDATA[</row>]]></ns:title><empty/></row>
+<?processing instruction?>
+<row Id="3"/>
+</posts>"""
+
+    def expected(self):
+        soup = BeautifulSoup(self.markup, "xml")
+        return [str(row) for row in soup.posts.find_all(recursive=False)]
+
+    @pytest.mark.parametrize("records_per_chunk", [1, 2, 1000])
+    def test_records_are_split_at_the_top_level(self, records_per_chunk):
+        records = list(
+            parse_records(
+                self.markup, workers=0, records_per_chunk=records_per_chunk
+            )
+        )
+        assert self.expected() == [str(record) for record in records]
+        for record in records:
+            assert isinstance(record, Tag)
+            assert None is record.parent
+
+        # Namespace prefixes defined on the root element still work.
+        title = records[1].find("title")
+        assert "ns" == title.prefix
+        assert "http://example.com/" == title.namespace
+
+    def test_worker_processes(self):
+        records = list(parse_records(self.markup, records_per_chunk=2, workers=2))
+        assert self.expected() == [str(record) for record in records]
+
+        ids = parse_records(self.markup, extract=_record_id, workers=2)
+        assert ["1", "2", "3"] == list(ids)
+
+    def test_file_and_encoded_input(self, tmp_path):
+        path = tmp_path / "posts.xml"
+        path.write_bytes(self.markup.encode("utf-8"))
+        assert ["1", "2", "3"] == list(
+            parse_records(path, extract=_record_id, workers=0)
+        )
+        with open(path, "rb") as fh:
+            assert ["1", "2", "3"] == list(
+                parse_records(fh, extract=_record_id, workers=0)
+            )
+
+        # An encoding that's not compatible with ASCII needs a
+        # byte-order mark.
+        markup = self.markup.replace("utf-8", "utf-16").encode("utf-16")
+        assert ["1", "2", "3"] == list(
+            parse_records(markup, extract=_record_id, workers=0)
+        )
+
+    def test_no_records(self):
+        assert [] == list(parse_records("<posts/>", workers=0))
+        assert [] == list(parse_records("<posts>\n</posts>", workers=0))
+
+    def test_truncated_document(self):
+        markup = '<posts><row Id="1"/><row Id="2"/>'
+        assert ["1", "2"] == list(
+            parse_records(markup, extract=_record_id, workers=0)
+        )
+
+    def test_bad_records_per_chunk(self):
+        with pytest.raises(ValueError):
+            list(parse_records(self.markup, records_per_chunk=0))
+
+
 class TestNewTag(SoupTest):
     """Test the BeautifulSoup.new_tag() method."""
 
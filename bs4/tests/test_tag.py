@@ -1,7 +1,12 @@
+import copy
+import pickle
 import warnings
+from bs4 import BeautifulSoup
 from bs4.element import (
+    AttributeValueList,
     Comment,
     NavigableString,
+    Script,
 )
 from . import SoupTest
 
@@ -11,6 +16,42 @@ class TestTag(SoupTest):
     need their own classes.
     """
 
+    def test_attributes_are_stored_in_slots(self):
+        soup = self.soup("<a href='foo'>text</a>")
+        tag = soup.a
+        # The standard attributes don't go into the instance dictionary...
+        assert {} == tag.__dict__
+        assert "a" == tag.name
+        assert {"href": "foo"} == tag.attrs
+
+        # ...but arbitrary attributes can still be set.
+        tag.custom = "value"
+        assert "value" == tag.custom
+        assert {"custom": "value"} == tag.__dict__
+
+        # Slotted Tags can still be copied.
+        clone = copy.copy(tag)
+        assert clone == tag
+        assert clone.name == "a"
+
+    def test_tags_with_the_same_name_share_a_profile(self):
+        soup = self.soup("<p>1</p><p>2</p><pre>3</pre>")
+        p1, p2 = soup.find_all("p")
+        assert p1._profile is p2._profile
+        assert p1._profile is not soup.pre._profile
+
+        # Changing one tag's settings doesn't affect the others.
+        p1.can_be_empty_element = True
+        p1.preserve_whitespace_tags = {"p"}
+        assert True is p1.can_be_empty_element
+        assert False is p2.can_be_empty_element
+        assert {"p"} == p1.preserve_whitespace_tags
+        assert soup.builder.preserve_whitespace_tags == p2.preserve_whitespace_tags
+        assert "<p>1</p>" == p1.decode()
+
+        # A copy shares the profile of the original.
+        assert copy.copy(p2)._profile is p2._profile
+
     def test__should_pretty_print(self):
         # Test the rules about when a tag should be pretty-printed.
         tag = self.soup("").new_tag("a_tag")
@@ -197,6 +238,30 @@ class TestMultiValuedAttributes(SoupTest):
         soup = self.soup("<a class='foo\tbar'>")
         assert b'<a class="foo bar"></a>' == soup.a.encode()
 
+    def test_attributes_processed_lazily(self):
+        soup = self.soup("<a class='foo bar' href='x' download>")
+        a = soup.a
+        # The raw attributes from the parser are stored until they're
+        # needed.
+        assert (("class", "foo bar"), ("href", "x"), ("download", None)) == a._attrs
+
+        assert {"class": ["foo", "bar"], "href": "x", "download": ""} == a.attrs
+        assert isinstance(a.attrs["class"], AttributeValueList)
+        assert a.attrs is a.attrs
+
+        # Modifying the attributes works the same way.
+        soup = self.soup("<a class='foo bar'>")
+        soup.a["id"] = "baz"
+        assert {"class": ["foo", "bar"], "id": "baz"} == soup.a.attrs
+
+        soup = self.soup("<a class='foo bar'>")
+        soup.a.attrs = {"id": "baz"}
+        assert '<a id="baz"></a>' == soup.a.decode()
+
+    def test_duplicate_attributes_processed_immediately(self):
+        soup = self.soup("<a class='foo' class='bar'>")
+        assert {"class": ["bar"]} == soup.a._attrs
+
     def test_get_attribute_list(self):
         soup = self.soup("<a id='abc def'>")
         assert ["abc def"] == soup.a.get_attribute_list("id")
@@ -239,3 +304,132 @@ class TestMultiValuedAttributes(SoupTest):
         soup = self.soup('<div id="1"><span id="2">a string</span></div>')
         soup.span.hidden = True
         assert '<div id="1">a string</div>' == str(soup.div)
+
+
+class TestTextCache(SoupTest):
+    HTML = "<div><p>One <b>bold</b> two</p><p> Three <!--c--></p></div><p>Four</p>"
+
+    def cached(self, markup=HTML):
+        return self.soup(markup, cache_text=True)
+
+    def test_cache_is_only_kept_on_request(self):
+        soup = self.soup(self.HTML)
+        assert "One bold two" == soup.p.get_text()
+        assert None is soup.p._text_cache
+
+        soup = self.cached()
+        assert None is soup.p._text_cache
+        assert "One bold two Three Four" == soup.get_text()
+        # Getting the text of the whole document cached the text of
+        # every tag in it.
+        for tag in soup.find_all(True):
+            assert tag._text_cache is not None
+        assert "One bold two" == soup.p.text
+
+    def test_results_are_the_same(self):
+        soup = self.cached()
+        plain = self.soup(self.HTML)
+        for kwargs in [
+            dict(),
+            dict(separator="|"),
+            dict(strip=True),
+            dict(separator="|", strip=True),
+            dict(types=(NavigableString, Comment)),
+            dict(types=[Comment]),
+            dict(types=Comment),
+            dict(types=None),
+        ]:
+            for tag, plain_tag in zip(
+                [soup] + soup.find_all(True), [plain] + plain.find_all(True)
+            ):
+                # Ask twice, so the second answer comes from the cache.
+                for i in range(2):
+                    assert plain_tag.get_text(**kwargs) == tag.get_text(**kwargs)
+                    strip = kwargs.get("strip", False)
+                    types = kwargs.get("types", tag.default)
+                    assert list(plain_tag._all_strings(strip, types)) == list(
+                        tag._all_strings(strip, types)
+                    )
+
+        # The strings themselves are cached, not copies of them.
+        b_string = soup.b.string
+        assert any(x is b_string for x in soup.div.strings)
+
+    def test_types_that_cannot_be_cached(self):
+        soup = self.cached()
+        # A dictionary works as a collection of types, but it's not
+        # worth making a cache key out of it.
+        types = {NavigableString: True}
+        assert "One bold two Three Four" == soup.get_text(types=types)
+        assert None is soup._text_cache
+
+    def test_tags_with_their_own_string_types(self):
+        soup = self.cached("<div>a<script>b</script><style>c</style></div>")
+        assert "a" == soup.div.get_text()
+        assert "b" == soup.script.get_text()
+        assert ["c"] == list(soup.style.strings)
+        soup.div.interesting_string_types = {NavigableString, Script}
+        assert "ab" == soup.div.get_text()
+
+    def test_tree_modifications(self):
+        soup = self.cached()
+        div, b = soup.div, soup.b
+        soup.get_text()
+
+        b.append(" face")
+        assert "bold face" == b.get_text()
+        assert "One bold face two Three" == div.get_text(" ", strip=True)
+        assert "One bold face two Three Four" == soup.text
+
+        b.contents[0].replace_with("italic")
+        assert "One italic face two Three Four" == soup.text
+        b.string = "strong"
+        assert "One strong two Three Four" == soup.text
+
+        b.extract()
+        assert "One  two Three Four" == soup.text
+        assert "strong" == b.text
+        div.find_all("p")[1].replace_with(b)
+        assert "One  twostrongFour" == soup.text
+
+        b.unwrap()
+        assert "One  twostrongFour" == soup.text
+        assert ["One ", " two", "strong", "Four"] == list(soup.strings)
+        div.smooth()
+        assert ["One  two", "strong", "Four"] == list(soup.strings)
+
+        div.p.decompose()
+        assert "strongFour" == soup.text
+        div.clear()
+        assert "Four" == soup.text
+        assert "" == div.text
+        div.insert(0, soup.new_tag("i", string="new"))
+        assert "newFour" == soup.text
+
+    def test_moving_a_tag(self):
+        soup = self.cached()
+        soup.get_text()
+        last = soup.find_all("p")[-1]
+        soup.b.append(last)
+        assert "One boldFour two Three " == soup.text
+        assert "boldFour" == soup.b.text
+
+    def test_feed(self):
+        soup = BeautifulSoup(features="html.parser", cache_text=True)
+        soup.feed("<p>1")
+        soup.feed("2</p>")
+        assert None is soup.p._text_cache
+        soup.close()
+        assert "12" == soup.p.get_text()
+        assert soup.p._text_cache is not None
+
+    def test_copy_and_pickle(self):
+        soup = self.cached()
+        soup.get_text()
+        for other in (copy.copy(soup), pickle.loads(pickle.dumps(soup))):
+            assert other.cache_text
+            assert None is other._text_cache
+            assert "One bold two Three Four" == other.text
+            other.b.string = "changed"
+            assert "One changed two Three Four" == other.text
+            assert "One bold two Three Four" == soup.text
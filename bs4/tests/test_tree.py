@@ -18,11 +18,17 @@ from bs4.element import (
     AttributeResemblesVariableWarning,
     CData,
     Comment,
+    LazyResultSet,
     NavigableString,
+    ResultSet,
     Tag,
 )
-from bs4.filter import SoupStrainer
+from bs4.filter import (
+    ElementFilter,
+    SoupStrainer,
+)
 from . import (
+    SOUP_SIEVE_PRESENT,
     SoupTest,
 )
 
@@ -122,6 +128,288 @@ class TestFindAll(SoupTest):
         assert hasattr(result, "source")
 
 
+class TestIFindAll(SoupTest):
+    """Tests of ifind_all(), which only searches as far as it has to."""
+
+    def counting_soup(self):
+        """Make a soup whose searches keep track of how many elements
+        they've looked at.
+        """
+        soup = self.soup("<a>1</a><b>2</b><a>3</a><b>4</b><a>5</a>")
+        seen = []
+        soup._find_all_generator = lambda *args, **kwargs: (
+            seen.append(x) or x for x in soup._lazy_descendants()
+        )
+        return soup, seen
+
+    def test_same_results_as_find_all(self):
+        soup = self.soup("<a>1</a><b>2<a id='foo'>3</a></b>text")
+        for args, kwargs in [
+            ((), {}),
+            (("a",), {}),
+            (("a",), dict(limit=1)),
+            ((), dict(id="foo")),
+            ((), dict(string=True)),
+            ((["a", "b"],), dict(recursive=False)),
+        ]:
+            result = soup.ifind_all(*args, **kwargs)
+            assert isinstance(result, LazyResultSet)
+            assert result.source is not None
+            assert soup.find_all(*args, **kwargs) == result
+
+    def test_search_is_lazy(self):
+        soup, seen = self.counting_soup()
+        result = soup.ifind_all("b")
+        assert [] == seen
+        assert "[...]" == repr(result)
+
+        assert result
+        assert 3 == len(seen)
+        assert "[<b>2</b>, ...]" == repr(result)
+
+        assert "2" == result[0].string
+        assert "4" == next(x for x in result if x.string == "4").string
+        assert 7 == len(seen)
+        assert any(result)
+        assert 7 == len(seen)
+
+        assert 2 == len(result)
+        assert 10 == len(seen)
+        assert "[<b>2</b>, <b>4</b>]" == repr(result)
+
+        # Once everything has been found, the search doesn't run again.
+        assert ["2", "4"] == [x.string for x in result]
+        assert 10 == len(seen)
+
+    def test_limit(self):
+        soup, seen = self.counting_soup()
+        result = soup.ifind_all("a", limit=2)
+        assert ["1", "3"] == [x.string for x in result]
+        assert 5 == len(seen)
+        assert 2 == len(result)
+        assert 5 == len(seen)
+
+    def test_slicing_and_indexing(self):
+        soup, seen = self.counting_soup()
+        result = soup.ifind_all("a")
+        first_two = result[:2]
+        assert isinstance(first_two, ResultSet)
+        assert first_two.source is result.source
+        assert ["1", "3"] == [x.string for x in first_two]
+        assert 5 == len(seen)
+
+        assert "5" == result[-1].string
+        assert ["1", "5"] == [x.string for x in result[::2]]
+        assert ["3"] == [x.string for x in result[1:-1]]
+        with pytest.raises(IndexError):
+            result[3]
+
+    def test_nothing_found(self):
+        soup = self.soup("<a>1</a>")
+        result = soup.ifind_all("b")
+        assert not result
+        assert "[]" == repr(result)
+        assert [] == result
+        assert [] == result[:1]
+        with pytest.raises(IndexError):
+            result[0]
+
+    @pytest.mark.parametrize("indexed", [False, True])
+    @pytest.mark.parametrize("method", ["extract", "decompose", "replace_with"])
+    def test_found_elements_can_be_removed(self, indexed, method):
+        markup = "<a>1<b>2</b></a><p><a>3<a>4</a></a></p><a>5</a>"
+        soup = self.soup(markup, indexed=indexed)
+        found = []
+        for a in soup.ifind_all("a"):
+            found.append(a.get_text())
+            if method == "replace_with":
+                a.replace_with(soup.new_tag("a", string="new"))
+            else:
+                getattr(a, method)()
+
+        # The search skips over the removed elements, and whatever
+        # took their place.
+        assert ["12", "34", "5"] == found
+        if method == "replace_with":
+            assert "<a>new</a><p><a>new</a></p><a>new</a>" == soup.decode()
+        else:
+            assert "<p></p>" == soup.decode()
+
+    def test_found_strings_can_be_removed(self):
+        soup = self.soup("<a>1<b>2</b></a>3")
+        for string in soup.ifind_all(string=True):
+            string.extract()
+        assert "<a><b></b></a>" == soup.decode()
+
+    def test_found_children_can_be_removed(self):
+        soup = self.soup("<a>1</a><b>2</b><a>3</a>")
+        for tag in soup.ifind_all(recursive=False):
+            tag.decompose()
+        assert "" == soup.decode()
+
+    def test_helpful_error_for_element_methods(self):
+        soup = self.soup("<a>1</a>")
+        with pytest.raises(AttributeError) as e:
+            soup.ifind_all("a").string
+        assert "ResultSet object has no attribute" in str(e.value)
+
+    def test_text_argument_warning(self):
+        soup = self.soup("<a>1</a>")
+        with warnings.catch_warnings(record=True) as w:
+            assert ["1"] == soup.ifind_all(text="1")
+        [warning] = w
+        assert warning.filename == __file__
+
+
+class TestFindAllMany(SoupTest):
+    """Tests of find_all_many(), which runs several searches at once."""
+
+    MARKUP = """<ul><li class="row"><a href="/1">One</a><span class="price">1</span></li>
+<li class="row"><a href="/2">Two</a><span class="price">2</span></li>
+<li><a>Three</a></li></ul><p id="footer">The <a href="/">end</a></p>"""
+
+    def assert_same(self, expect, results):
+        assert len(expect) == len(results)
+        for x, y in zip(expect, results):
+            assert x is y
+
+    def test_element_filters(self):
+        soup = self.soup(self.MARKUP)
+        queries = dict(
+            links=SoupStrainer("a", href=True),
+            strings=SoupStrainer(string=re.compile("T")),
+            spans=ElementFilter(lambda x: isinstance(x, Tag) and x.name == "span"),
+        )
+        results = soup.find_all_many(queries)
+        assert list(queries) == list(results)
+        for name, query in queries.items():
+            assert query is results[name].source
+            self.assert_same(soup.find_all(query), results[name])
+        assert ["/1", "/2", "/"] == [a["href"] for a in results["links"]]
+
+    @pytest.mark.skipif(not SOUP_SIEVE_PRESENT, reason="Soup Sieve not installed")
+    def test_css_selectors(self):
+        soup = self.soup(self.MARKUP)
+        selectors = [".price", "li.row > a", "#footer a", "li:nth-child(2) a", "a[href]"]
+        results = soup.find_all_many({s: s for s in selectors})
+        for selector in selectors:
+            self.assert_same(soup.select(selector), results[selector])
+
+        # :scope means the tag the search started from.
+        ul = soup.ul
+        results = ul.find_all_many({"scope": ":scope > li", "a": "a"})
+        self.assert_same(ul.select(":scope > li"), results["scope"])
+        self.assert_same(ul.select("a"), results["a"])
+
+    def test_limits(self):
+        soup = self.soup(self.MARKUP)
+        results = soup.find_all_many(
+            dict(a=SoupStrainer("a"), li=SoupStrainer("li"), span=SoupStrainer("span")),
+            limit=2,
+            limits=dict(a=1, span=0),
+        )
+        self.assert_same(soup.find_all("a", limit=1), results["a"])
+        self.assert_same(soup.find_all("li", limit=2), results["li"])
+        self.assert_same(soup.find_all("span"), results["span"])
+
+    def test_stops_once_every_search_is_satisfied(self):
+        soup = self.soup(self.MARKUP)
+        seen = []
+
+        def spy(element):
+            seen.append(element)
+            return isinstance(element, Tag) and element.name == "a"
+
+        results = soup.find_all_many(
+            dict(spy=ElementFilter(spy), li=SoupStrainer("li")), limit=2
+        )
+        self.assert_same(soup.find_all("a", limit=2), results["spy"])
+        self.assert_same(soup.find_all("li", limit=2), results["li"])
+        # Nothing after the second <a> tag was looked at.
+        assert results["spy"][-1] is seen[-1]
+
+        # A search that's satisfied is dropped; the others keep going.
+        seen[:] = []
+        results = soup.find_all_many(
+            dict(spy=ElementFilter(spy), span=SoupStrainer("span")),
+            limits=dict(spy=1),
+        )
+        assert 1 == len(results["spy"])
+        assert 2 == len(results["span"])
+        assert soup.a is seen[-1]
+
+    def test_search_that_finishes_does_not_affect_the_others(self):
+        # When one search reaches its limit, the searches after it
+        # are still tried against the same element.
+        soup = self.soup("<p class='a'>1</p><p class='a'>2</p>")
+        queries = [
+            SoupStrainer("p"),
+            SoupStrainer(class_="a"),
+            SoupStrainer(string=re.compile(".")),
+        ]
+        if SOUP_SIEVE_PRESENT:
+            queries.append("p.a")
+        for query in queries:
+            results = soup.find_all_many(
+                {"first": query, "all": query, "also": query}, limits={"first": 1}
+            )
+            assert 1 == len(results["first"])
+            assert ["1", "2"] == [x.get_text() for x in results["all"]]
+            assert ["1", "2"] == [x.get_text() for x in results["also"]]
+
+    def test_repeated_names(self):
+        # A search whose names overlap still finds each tag once, the
+        # same as find_all().
+        soup = self.soup("<a>1</a><b>2</b>")
+        queries = {
+            "q": SoupStrainer(["a", "x:a"]),
+            "r": SoupStrainer(["b", "b"]),
+        }
+        results = soup.find_all_many(queries)
+        for key, query in queries.items():
+            assert soup.find_all(query) == results[key]
+        assert ["1"] == [x.string for x in results["q"]]
+        assert ["2"] == [x.string for x in results["r"]]
+
+    def test_no_queries(self):
+        assert {} == self.soup(self.MARKUP).find_all_many({})
+
+    @pytest.mark.skipif(not SOUP_SIEVE_PRESENT, reason="Soup Sieve not installed")
+    def test_searches_that_only_match_certain_names(self):
+        # Searches for a specific tag name are only tried against tags
+        # with that name, but a CSS selector still matches tag names
+        # without regard to case.
+        soup = self.soup(self.MARKUP)
+        soup.find_all("a")[1].name = "A"
+        prefixed = Tag(name="a", prefix="ns", namespace="http://ns/")
+        soup.p.append(prefixed)
+        queries = dict(
+            css="a",
+            strainer=SoupStrainer("a"),
+            prefixed=SoupStrainer("ns:a"),
+            either=SoupStrainer(["span", "A"]),
+            strings=SoupStrainer(string="One"),
+        )
+        results = soup.find_all_many(queries)
+        self.assert_same(soup.select("a"), results["css"])
+        assert 5 == len(results["css"])
+        for name in "strainer", "prefixed", "either", "strings":
+            self.assert_same(soup.find_all(queries[name]), results[name])
+        assert [prefixed] == results["prefixed"]
+
+    @pytest.mark.skipif(not SOUP_SIEVE_PRESENT, reason="Soup Sieve not installed")
+    def test_selectors_that_must_be_run_separately(self, monkeypatch):
+        # If a selector can't be checked one tag at a time, it's run
+        # on its own.
+        from bs4.css import CSS
+
+        monkeypatch.setattr(CSS, "_match_function", lambda *args: (None, None))
+        soup = self.soup(self.MARKUP)
+        results = soup.find_all_many({"odd": "li:nth-child(odd)", "a": "a"}, limit=1)
+        self.assert_same(soup.select("li:nth-child(odd)", limit=1), results["odd"])
+        self.assert_same(soup.select("a", limit=1), results["a"])
+
+
 class TestFindAllBasicNamespaces(SoupTest):
     def test_find_by_namespaced_name(self):
         soup = self.soup('<mathml:msqrt>4</mathml:msqrt><a svg:fill="red">')
@@ -1359,6 +1647,20 @@ class TestTreeModification(SoupTest):
         # p2 is unaffected.
         assert False is p2.decomposed
 
+    def test_decompose_clears_slots(self):
+        # Most of a Tag's attributes are stored in slots rather than
+        # in __dict__; decompose() wipes those out too.
+        soup = self.soup("<p><a href='foo'>String</a></p>")
+        a = soup.a
+        a.custom = "value"
+        soup.p.decompose()
+        assert True is a.decomposed
+        assert [] == a.contents
+        assert False is a.hidden
+        for attr in ("name", "attrs", "parent", "next_element", "custom"):
+            assert attr not in a.__dict__
+            assert not hasattr(a, attr) or getattr(a, attr) is None
+
     def test_decompose_string(self):
         soup = self.soup("<div><p>String 1</p><p>String 2</p></p>")
         div = soup.div
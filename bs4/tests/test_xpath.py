@@ -0,0 +1,204 @@
+"""Tests of the XPath evaluator in bs4.xpath."""
+
+import math
+
+import pytest
+
+from bs4 import (
+    BeautifulSoup,
+    XPathError,
+)
+from bs4.element import Comment
+from bs4.filter import (
+    ElementFilter,
+    SoupStrainer,
+)
+from bs4.xpath import XPath
+from . import (
+    LXML_PRESENT,
+    SoupTest,
+)
+
+HTML = """<div id="a" class="x y"><p>One <b>bold</b> two</p><p class="c">Three</p><!--note--><a href="/1">L1</a></div>
+<div id="b"><p>Four</p><span>5</span><span>7</span><a href="/2" title="t">L2</a><div><p>nested</p><a>L3</a></div></div>
+<ul><li>1</li><li>2</li><li>3</li><li>4</li></ul>"""
+
+
+class TestXPath(SoupTest):
+    def texts(self, results):
+        return [x.get_text() if hasattr(x, "get_text") else x for x in results]
+
+    @pytest.mark.parametrize(
+        "expression,expect",
+        [
+            ("//p", ["One bold two", "Three", "Four", "nested"]),
+            ("/div/p", ["One bold two", "Three", "Four"]),
+            ("//div[@id='b']/p", ["Four"]),
+            ("//div/*[2]", ["Three", "5", "L3"]),
+            ("//p[1]", ["One bold two", "Four", "nested"]),
+            ("(//p)[1]", ["One bold two"]),
+            ("//p[last()]", ["Three", "Four", "nested"]),
+            ("//li[position() mod 2 = 0]", ["2", "4"]),
+            ("//li[last() - 1]", ["3"]),
+            ("//li[. > 2]", ["3", "4"]),
+            ("//a/@href", ["/1", "/2"]),
+            ("//div[@class='x y']/@id", ["a"]),
+            ("//a[@href='/1' or @title]", ["L1", "L2"]),
+            ("//p/text()", ["One ", " two", "Three", "Four", "nested"]),
+            ("//p[contains(., 'o')]", ["One bold two", "Four"]),
+            ("//p[starts-with(text(), 'F')]", ["Four"]),
+            ("//div[.//a[not(@href)]]/@id", ["b"]),
+            ("//p[b]", ["One bold two"]),
+            ("//span | //b", ["bold", "5", "7"]),
+            ("//p/..", ["One bold twoThreeL1", "Four57L2nestedL3", "nestedL3"]),
+        ],
+    )
+    def test_expressions(self, expression, expect):
+        soup = self.soup(HTML)
+        assert expect == self.texts(soup.xpath(expression))
+
+    def test_axes(self):
+        soup = self.soup(HTML)
+        b = soup.b
+        assert ["div", "p"] == [x.name for x in b.xpath("ancestor::*")]
+        assert ["p"] == [x.name for x in b.xpath("ancestor::*[1]")]
+        assert [soup] == b.xpath("ancestor::node()[last()]")
+        assert ["div", "p", "b"] == [x.name for x in b.xpath("ancestor-or-self::*")]
+
+        span = soup.span
+        assert ["7", "L2", "nestedL3"] == self.texts(
+            span.xpath("following-sibling::*")
+        )
+        assert ["Four"] == self.texts(span.xpath("preceding-sibling::*"))
+        assert ["2"] == self.texts(soup.xpath("//li[3]/preceding-sibling::li[1]"))
+        assert ["3"] == self.texts(soup.xpath("//li[1]/following-sibling::li[2]"))
+        assert ["L2", "L3"] == self.texts(span.xpath("following::a"))
+        assert ["One bold two", "Three", "Four"] == self.texts(
+            span.xpath("preceding::p")
+        )
+        assert [span] == span.xpath("self::span")
+        assert [] == span.xpath("self::p")
+        assert ["nested"] == self.texts(soup.xpath("//div/div/descendant::p"))
+        assert 3 == len(soup.div.xpath("descendant-or-self::*[self::div or self::p]"))
+
+    def test_node_types(self):
+        soup = self.soup(HTML)
+        [comment] = soup.xpath("//comment()")
+        assert isinstance(comment, Comment)
+        assert ["note"] == soup.xpath("//div/comment()")
+        assert ["One ", "bold", " two"] == soup.xpath("(//p)[1]//text()")
+        assert 5 == len(soup.p.xpath("descendant-or-self::node()"))
+
+        # The BeautifulSoup object is the document node, not an
+        # element.
+        assert soup not in soup.xpath("//*")
+        assert [soup] == soup.xpath("/")
+
+    def test_functions(self):
+        soup = self.soup(HTML)
+        assert 4.0 == soup.xpath("count(//li)")
+        assert 10.0 == soup.xpath("sum(//li)")
+        assert "One bold two" == soup.xpath("string(//p)")
+        assert "a b" == soup.xpath("normalize-space('  a   b ')")
+        assert "ab1" == soup.xpath("concat('a', 'b', 1)")
+        assert "234" == soup.xpath("substring('12345', 2, 3)")
+        assert "a" == soup.xpath("substring-before('a/b', '/')")
+        assert "b" == soup.xpath("substring-after('a/b', '/')")
+        assert "" == soup.xpath("substring-before('a/b', '-')")
+        assert "Ac" == soup.xpath("translate('abc', 'ab', 'A')")
+        assert 3.0 == soup.xpath("string-length('abc')")
+        assert 3.0 == soup.xpath("round(2.5)")
+        assert -2.0 == soup.xpath("floor(-1.5)")
+        assert True is soup.xpath("not(//table)")
+        assert "div" == soup.xpath("name(//*[@id='b'])")
+        assert ["5", "7"] == self.texts(soup.xpath("//*[local-name() = 'span']"))
+        assert math.isinf(soup.xpath("1 div 0"))
+        assert math.isnan(soup.xpath("number('x')"))
+
+    def test_variables(self):
+        soup = self.soup(HTML)
+        assert ["L2"] == self.texts(soup.xpath("//a[@href = $href]", href="/2"))
+        assert ["2"] == self.texts(soup.xpath("//li[$i]", i=2))
+        assert ["Four", "nested"] == self.texts(
+            soup.xpath("$divs//p", divs=soup.find_all("div", id="b"))
+        )
+        with pytest.raises(XPathError):
+            soup.xpath("//li[$missing]")
+
+    def test_element_filter_as_node_test(self):
+        soup = self.soup(HTML)
+        links = SoupStrainer("a", href=True)
+        assert ["L1", "L2"] == self.texts(soup.xpath("//div/$links", links=links))
+        assert ["L2"] == self.texts(
+            soup.xpath("//div[@id='b']/descendant::$links", links=links)
+        )
+        assert ["Four"] == soup.xpath(
+            "//$strings", strings=SoupStrainer(string="Four")
+        )
+        spans = ElementFilter(lambda x: getattr(x, "name", None) == "span")
+        assert ["7"] == self.texts(soup.xpath("//$s[last()]", s=spans))
+
+        # A variable that's used as a node test has to be an
+        # ElementFilter, and vice versa.
+        with pytest.raises(XPathError):
+            soup.xpath("//$s", s="span")
+        with pytest.raises(XPathError):
+            soup.xpath("$s", s=spans)
+
+    def test_context_node(self):
+        soup = self.soup(HTML)
+        div = soup.find(id="b")
+        assert ["Four"] == self.texts(div.xpath("p"))
+        assert ["Four", "nested"] == self.texts(div.xpath(".//p"))
+        # An absolute path starts at the root of the tree.
+        assert 4 == len(div.xpath("//p"))
+
+    def test_results_come_back_in_document_order(self):
+        soup = self.soup("<div><div><p>1</p></div><p>2</p></div>")
+        assert ["1", "2"] == self.texts(soup.xpath("//div//p"))
+        assert ["1", "2"] == self.texts(soup.xpath("//div/p | //div/div/p"))
+
+    def test_indexed_document(self):
+        soup = self.soup(HTML, indexed=True)
+        plain = self.soup(HTML)
+        for expression in ("//p", "//div//a[@href]", "//div[@id='b']//p"):
+            assert self.texts(plain.xpath(expression)) == self.texts(
+                soup.xpath(expression)
+            )
+
+    @pytest.mark.skipif(not LXML_PRESENT, reason="lxml seems not to be present")
+    def test_namespaces(self):
+        xml = """<root xmlns="http://d/" xmlns:ns="http://n/">
+<ns:item ns:attr="v" plain="p">a<![CDATA[b]]></ns:item><item/><other:x xmlns:other="http://n/"/></root>"""
+        soup = BeautifulSoup(xml, "xml")
+        assert ["item", "item"] == [x.name for x in soup.xpath("//item")]
+        assert [soup.find("item")] == soup.xpath("//ns:item")
+        # A prefix means a namespace, not the prefix that happens to
+        # be used in the document.
+        assert 2 == len(soup.xpath("//ns:*"))
+        assert [soup.find_all("item")[1]] == soup.xpath(
+            "//d:item", namespaces={"d": "http://d/"}
+        )
+        assert ["v"] == soup.xpath("//ns:item/@ns:attr")
+        # Namespace declarations aren't attributes.
+        assert ["v", "p"] == soup.xpath("//@*")
+        assert "ns:item" == soup.xpath("name(//ns:item)")
+        assert "item" == soup.xpath("local-name(//ns:item)")
+        assert "http://n/" == soup.xpath("namespace-uri(//ns:item)")
+        assert "ab" == soup.xpath("string(//ns:item)")
+
+    @pytest.mark.parametrize(
+        "expression",
+        ["", "//p[", "//p]", "foo(1)", "//bogus::p", "1 +", "@@a", "a b", "count(1)"],
+    )
+    def test_invalid_expressions(self, expression):
+        with pytest.raises(XPathError):
+            self.soup(HTML).xpath(expression)
+
+    def test_compiled_expressions_are_cached(self):
+        compiled = XPath.compile("//li[2]")
+        assert compiled is XPath.compile("//li[2]")
+        assert "<XPath '//li[2]'>" == repr(compiled)
+        soup = self.soup(HTML)
+        assert ["2"] == self.texts(soup.xpath(compiled))
+        assert soup.xpath("//li[2]") == soup.xpath(compiled)
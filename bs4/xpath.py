@@ -0,0 +1,1365 @@
+"""An evaluator for a subset of XPath 1.0 that works directly on a
+Beautiful Soup parse tree.
+
+Call `element.Tag.xpath` on the element that should be the context
+node for the expression. There's no need to convert the document to
+an lxml tree first: the expression is evaluated by following the
+links between `element.PageElement` objects.
+
+What's supported:
+
+* Location paths, absolute and relative, including the ``//``, ``.``,
+  ``..`` and ``@`` abbreviations.
+* The child, descendant, descendant-or-self, self, parent, ancestor,
+  ancestor-or-self, following-sibling, preceding-sibling, following,
+  preceding and attribute axes.
+* Name tests (``a``, ``*``, ``prefix:name``, ``prefix:*``) and the
+  node(), text(), comment() and processing-instruction() node tests.
+* Predicates, including positional predicates like ``[1]`` and
+  ``[last()]``.
+* The operators ``or``, ``and``, ``=``, ``!=``, ``<``, ``<=``,
+  ``>``, ``>=``, ``+``, ``-``, ``*``, ``div``, ``mod`` and ``|``.
+* The XPath 1.0 core functions, except for id() and lang().
+* Variables, passed in as keyword arguments.
+
+Beyond XPath 1.0, a variable whose value is an `filter.ElementFilter`
+(such as a `filter.SoupStrainer`) can be used as a node test, after
+an axis or a slash: ``//div/$links`` or ``descendant::$links``.
+
+A name test without a prefix matches a tag with that name, whatever
+its namespace. A name test with a prefix is checked against the
+namespace the prefix stands for, if it's known, and otherwise against
+the prefix the tag was created with.
+"""
+
+from __future__ import annotations
+
+import functools
+import itertools
+import math
+import operator
+import re
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+from typing_extensions import TypeGuard
+
+from bs4.element import (
+    CData,
+    Comment,
+    NamespacedAttribute,
+    NavigableString,
+    PageElement,
+    PreformattedString,
+    ProcessingInstruction,
+    Tag,
+)
+from bs4.exceptions import XPathError
+from bs4.filter import ElementFilter
+from bs4._typing import (
+    _NamespaceMapping,
+    _XPathResult,
+)
+
+
+class _Attribute(object):
+    """An attribute node. Beautiful Soup doesn't represent attributes
+    as objects in the tree, so these are created as needed.
+    """
+
+    __slots__ = ("parent", "name", "value")
+
+    parent: Tag
+    name: str
+    value: str
+
+    def __init__(self, parent: Tag, name: str, value: Any):
+        self.parent = parent
+        self.name = name
+        if isinstance(value, list):
+            value = " ".join(value)
+        self.value = value
+
+
+#: Anything that can be in a node-set.
+_Node = Union[PageElement, _Attribute]
+
+#: The four types of XPath value: node-set, string, number and boolean.
+_Value = Union[List[_Node], str, float, bool]
+
+
+def _key(node: _Node) -> Tuple[int, str]:
+    """A key identifying a node, for removing duplicates from a
+    node-set.
+    """
+    if isinstance(node, _Attribute):
+        return id(node.parent), node.name
+    return id(node), ""
+
+
+def _is_text(node: object) -> TypeGuard[NavigableString]:
+    return isinstance(node, NavigableString) and (
+        not isinstance(node, PreformattedString) or isinstance(node, CData)
+    )
+
+
+def _string_value(node: _Node) -> str:
+    if isinstance(node, _Attribute):
+        return node.value
+    if isinstance(node, Tag):
+        return "".join(x for x in node.descendants if _is_text(x))
+    if isinstance(node, ProcessingInstruction):
+        # The target isn't part of the value.
+        return "".join(node.split(None, 1)[1:])
+    return str(node)
+
+
+_NUMBER = re.compile(r"\s*-?(\d+(\.\d*)?|\.\d+)\s*$")
+
+
+def _to_number(value: _Value) -> float:
+    if isinstance(value, float):
+        return value
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, list):
+        value = _to_string(value)
+    if _NUMBER.match(value) is None:
+        return math.nan
+    return float(value)
+
+
+def _to_string(value: _Value) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "Infinity" if value > 0 else "-Infinity"
+        if value.is_integer():
+            return str(int(value))
+        return repr(value)
+    if not value:
+        return ""
+    return _string_value(value[0])
+
+
+def _to_boolean(value: _Value) -> bool:
+    if isinstance(value, float):
+        return not (value == 0 or math.isnan(value))
+    return bool(value)
+
+
+def _to_node_set(value: _Value, what: str) -> List[_Node]:
+    if not isinstance(value, list):
+        raise XPathError("%s must be a node-set, not %r" % (what, value))
+    return value
+
+
+class _Evaluation(object):
+    """The state shared by everything involved in evaluating an
+    expression against one context node.
+    """
+
+    root: PageElement
+
+    #: The `BeautifulSoup` object at the root of the tree, if there
+    #: is one. It's the document node, not an element.
+    document: Optional[PageElement]
+
+    namespaces: _NamespaceMapping
+    variables: Mapping[str, Any]
+    _positions: Optional[Dict[int, int]]
+
+    def __init__(
+        self,
+        node: PageElement,
+        namespaces: _NamespaceMapping,
+        variables: Mapping[str, Any],
+    ):
+        root = node
+        while root.parent is not None:
+            root = root.parent
+        from bs4 import BeautifulSoup
+
+        self.root = root
+        self.document = root if isinstance(root, BeautifulSoup) else None
+        self.namespaces = namespaces
+        self.variables = variables
+        self._positions = None
+
+    def variable(self, name: str) -> Any:
+        try:
+            return self.variables[name]
+        except KeyError:
+            raise XPathError("Undefined variable: $%s" % name)
+
+    def in_document_order(self, nodes: List[_Node]) -> List[_Node]:
+        """Remove duplicates from a list of nodes, and put them in
+        document order.
+        """
+        unique: Dict[Tuple[int, str], _Node] = {}
+        for node in nodes:
+            unique.setdefault(_key(node), node)
+        if len(unique) < 2:
+            return list(unique.values())
+        if self._positions is None:
+            # Number every element in the tree, once.
+            self._positions = {id(self.root): 0}
+            if isinstance(self.root, Tag):
+                for i, element in enumerate(self.root.descendants, 1):
+                    self._positions[id(element)] = i
+        positions = self._positions
+        # Nodes from some other tree (passed in as a variable) go
+        # at the end.
+        end = len(positions)
+
+        def sort_key(node: _Node) -> Tuple[int, int]:
+            if isinstance(node, _Attribute):
+                # An element's attributes come after the element
+                # itself, but before its children.
+                attributes = list(node.parent.attrs)
+                return (
+                    positions.get(id(node.parent), end),
+                    attributes.index(node.name) + 1,
+                )
+            return positions.get(id(node), end), 0
+
+        return sorted(unique.values(), key=sort_key)
+
+
+class _Expression(object):
+    """Part of a compiled XPath expression."""
+
+    def evaluate(
+        self, node: _Node, position: int, size: int, evaluation: _Evaluation
+    ) -> _Value:
+        """Evaluate this expression.
+
+        :param node: The context node.
+        :param position: The context position.
+        :param size: The context size.
+        """
+        raise NotImplementedError()
+
+    def uses_position(self) -> bool:
+        """Does this expression call position() or last() on its own
+        context?
+        """
+        return False
+
+    def may_be_number(self) -> bool:
+        """Might this expression evaluate to a number?"""
+        return False
+
+    def is_positional(self) -> bool:
+        """As a predicate, does this expression depend on the position
+        of the node it's testing? If not, the predicate can be checked
+        without knowing the full list of nodes.
+        """
+        return self.may_be_number() or self.uses_position()
+
+
+class _Literal(_Expression):
+    def __init__(self, value: Union[str, float]):
+        self.value = value
+
+    def evaluate(
+        self, node: _Node, position: int, size: int, evaluation: _Evaluation
+    ) -> _Value:
+        return self.value
+
+    def may_be_number(self) -> bool:
+        return isinstance(self.value, float)
+
+
+class _Variable(_Expression):
+    def __init__(self, name: str):
+        self.name = name
+
+    def evaluate(
+        self, node: _Node, position: int, size: int, evaluation: _Evaluation
+    ) -> _Value:
+        value = evaluation.variable(self.name)
+        if isinstance(value, (bool, str, float)):
+            return value
+        if isinstance(value, int):
+            return float(value)
+        if isinstance(value, PageElement):
+            return [value]
+        if isinstance(value, ElementFilter):
+            raise XPathError(
+                "$%s is an ElementFilter, so it can only be used as a node test"
+                % self.name
+            )
+        if isinstance(value, (list, tuple)):
+            return evaluation.in_document_order(list(value))
+        raise XPathError("$%s has an unsupported value: %r" % (self.name, value))
+
+    def may_be_number(self) -> bool:
+        return True
+
+
+class _Negate(_Expression):
+    def __init__(self, operand: _Expression):
+        self.operand = operand
+
+    def evaluate(
+        self, node: _Node, position: int, size: int, evaluation: _Evaluation
+    ) -> _Value:
+        return -_to_number(self.operand.evaluate(node, position, size, evaluation))
+
+    def uses_position(self) -> bool:
+        return self.operand.uses_position()
+
+    def may_be_number(self) -> bool:
+        return True
+
+
+def _divide(x: float, y: float) -> float:
+    if y == 0:
+        if x == 0 or math.isnan(x):
+            return math.nan
+        return math.copysign(math.inf, x) * math.copysign(1, y)
+    return x / y
+
+
+def _modulo(x: float, y: float) -> float:
+    if y == 0:
+        return math.nan
+    return math.fmod(x, y)
+
+
+_ARITHMETIC: Dict[str, Callable[[float, float], float]] = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "div": _divide,
+    "mod": _modulo,
+}
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+# What a relational operator turns into when its operands are swapped.
+_SWAPPED = {"<": ">", "<=": ">=", ">": "<", ">=": "<=", "=": "=", "!=": "!="}
+
+
+def _compare(op: str, left: _Value, right: _Value) -> bool:
+    """Compare two values according to the rules in section 3.4 of
+    the XPath 1.0 specification.
+    """
+    compare = _COMPARISONS[op]
+    equality = op in ("=", "!=")
+    if isinstance(left, list) or isinstance(right, list):
+        if not isinstance(left, list):
+            op = _SWAPPED[op]
+            compare = _COMPARISONS[op]
+            left, right = right, left
+        assert isinstance(left, list)
+        strings = [_string_value(node) for node in left]
+        if isinstance(right, list):
+            others = [_string_value(node) for node in right]
+            if equality:
+                return any(compare(x, y) for x in strings for y in others)
+            numbers = [_to_number(y) for y in others]
+            return any(compare(_to_number(x), y) for x in strings for y in numbers)
+        if isinstance(right, bool):
+            return compare(bool(left), right)
+        if isinstance(right, float) or not equality:
+            number = _to_number(right)
+            return any(compare(_to_number(x), number) for x in strings)
+        return any(compare(x, right) for x in strings)
+
+    if not equality:
+        return compare(_to_number(left), _to_number(right))
+    if isinstance(left, bool) or isinstance(right, bool):
+        return compare(_to_boolean(left), _to_boolean(right))
+    if isinstance(left, float) or isinstance(right, float):
+        return compare(_to_number(left), _to_number(right))
+    return compare(left, right)
+
+
+class _Binary(_Expression):
+    def __init__(self, op: str, left: _Expression, right: _Expression):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    def evaluate(
+        self, node: _Node, position: int, size: int, evaluation: _Evaluation
+    ) -> _Value:
+        op = self.op
+        left = self.left.evaluate(node, position, size, evaluation)
+        if op == "or":
+            return _to_boolean(left) or _to_boolean(
+                self.right.evaluate(node, position, size, evaluation)
+            )
+        if op == "and":
+            return _to_boolean(left) and _to_boolean(
+                self.right.evaluate(node, position, size, evaluation)
+            )
+        right = self.right.evaluate(node, position, size, evaluation)
+        if op == "|":
+            return evaluation.in_document_order(
+                _to_node_set(left, "Each side of |")
+                + _to_node_set(right, "Each side of |")
+            )
+        if op in _ARITHMETIC:
+            return _ARITHMETIC[op](_to_number(left), _to_number(right))
+        return _compare(op, left, right)
+
+    def uses_position(self) -> bool:
+        return self.left.uses_position() or self.right.uses_position()
+
+    def may_be_number(self) -> bool:
+        return self.op in _ARITHMETIC
+
+
+def _substring(value: str, start: float, length: float = math.inf) -> str:
+    # Positions are counted from 1, and rounded.
+    first = _round(start)
+    last = first + _round(length)
+    if math.isnan(first) or math.isnan(last):
+        return ""
+    return "".join(
+        char for i, char in enumerate(value, 1) if first <= i < last
+    )
+
+
+def _split(value: _Value, separator: _Value) -> Tuple[str, str]:
+    """Split a string around the first occurrence of a separator. If
+    the separator isn't there, both halves are empty.
+    """
+    string = _to_string(value)
+    index = string.find(_to_string(separator))
+    if index == -1:
+        return "", ""
+    return string[:index], string[index + len(_to_string(separator)) :]
+
+
+def _round(value: float) -> float:
+    if math.isnan(value) or math.isinf(value):
+        return value
+    return float(math.floor(value + 0.5))
+
+
+def _translate(value: str, source: str, replacement: str) -> str:
+    table: Dict[int, Optional[str]] = {}
+    for i, char in enumerate(source):
+        if ord(char) not in table:
+            table[ord(char)] = replacement[i] if i < len(replacement) else None
+    return value.translate(table)
+
+
+def _name(node: _Node, local: bool) -> str:
+    if isinstance(node, _Attribute):
+        name = node.name
+        if isinstance(name, NamespacedAttribute) and name.name:
+            return name.name if local else str(name)
+    elif isinstance(node, Tag):
+        if node.prefix and not local:
+            return node.prefix + ":" + node.name
+        name = node.name
+    elif isinstance(node, ProcessingInstruction):
+        name = str(node).split(None, 1)[0] if str(node).strip() else ""
+    else:
+        return ""
+    if local:
+        return name.rsplit(":", 1)[-1]
+    return name
+
+
+def _namespace_uri(node: _Node) -> str:
+    if isinstance(node, Tag):
+        return node.namespace or ""
+    if isinstance(node, _Attribute) and isinstance(node.name, NamespacedAttribute):
+        return node.name.namespace or ""
+    return ""
+
+
+# Each function is called with the context node, the context position,
+# the context size, and the values of its arguments.
+_Function = Callable[..., _Value]
+
+
+def _first_node(
+    function: Callable[[_Node], _Value], empty: _Value
+) -> _Function:
+    """Make a function that takes an optional node-set, and is called
+    on the first node in it (or on the context node).
+    """
+
+    def call(node: _Node, position: int, size: int, *args: _Value) -> _Value:
+        if args:
+            nodes = _to_node_set(args[0], "The argument")
+            if not nodes:
+                return empty
+            node = nodes[0]
+        return function(node)
+
+    return call
+
+
+def _string_argument(function: Callable[[str], _Value]) -> _Function:
+    """Make a function that takes an optional string, which defaults
+    to the string-value of the context node.
+    """
+
+    def call(node: _Node, position: int, size: int, *args: _Value) -> _Value:
+        if args:
+            return function(_to_string(args[0]))
+        return function(_string_value(node))
+
+    return call
+
+
+#: The XPath 1.0 core function library: for each function, the
+#: implementation, the smallest and largest number of arguments,
+#: and whether it returns a number.
+_FUNCTIONS: Dict[str, Tuple[_Function, int, Optional[int], bool]] = {
+    "last": (lambda node, position, size: float(size), 0, 0, True),
+    "position": (lambda node, position, size: float(position), 0, 0, True),
+    "count": (
+        lambda node, position, size, nodes: float(
+            len(_to_node_set(nodes, "The argument to count()"))
+        ),
+        1,
+        1,
+        True,
+    ),
+    "name": (_first_node(lambda node: _name(node, False), ""), 0, 1, False),
+    "local-name": (_first_node(lambda node: _name(node, True), ""), 0, 1, False),
+    "namespace-uri": (_first_node(_namespace_uri, ""), 0, 1, False),
+    "string": (
+        lambda node, position, size, *args: (
+            _to_string(args[0]) if args else _string_value(node)
+        ),
+        0,
+        1,
+        False,
+    ),
+    "concat": (
+        lambda node, position, size, *args: "".join(_to_string(x) for x in args),
+        2,
+        None,
+        False,
+    ),
+    "starts-with": (
+        lambda node, position, size, x, y: _to_string(x).startswith(_to_string(y)),
+        2,
+        2,
+        False,
+    ),
+    "contains": (
+        lambda node, position, size, x, y: _to_string(y) in _to_string(x),
+        2,
+        2,
+        False,
+    ),
+    "substring-before": (
+        lambda node, position, size, x, y: _split(x, y)[0],
+        2,
+        2,
+        False,
+    ),
+    "substring-after": (
+        lambda node, position, size, x, y: _split(x, y)[1],
+        2,
+        2,
+        False,
+    ),
+    "substring": (
+        lambda node, position, size, x, *args: _substring(
+            _to_string(x), *[_to_number(arg) for arg in args]
+        ),
+        2,
+        3,
+        False,
+    ),
+    "string-length": (
+        _string_argument(lambda value: float(len(value))),
+        0,
+        1,
+        True,
+    ),
+    "normalize-space": (
+        _string_argument(lambda value: " ".join(value.split())),
+        0,
+        1,
+        False,
+    ),
+    "translate": (
+        lambda node, position, size, x, y, z: _translate(
+            _to_string(x), _to_string(y), _to_string(z)
+        ),
+        3,
+        3,
+        False,
+    ),
+    "boolean": (lambda node, position, size, x: _to_boolean(x), 1, 1, False),
+    "not": (lambda node, position, size, x: not _to_boolean(x), 1, 1, False),
+    "true": (lambda node, position, size: True, 0, 0, False),
+    "false": (lambda node, position, size: False, 0, 0, False),
+    "number": (
+        lambda node, position, size, *args: _to_number(
+            args[0] if args else _string_value(node)
+        ),
+        0,
+        1,
+        True,
+    ),
+    "sum": (
+        lambda node, position, size, nodes: float(
+            sum(
+                _to_number(_string_value(x))
+                for x in _to_node_set(nodes, "The argument to sum()")
+            )
+        ),
+        1,
+        1,
+        True,
+    ),
+    "floor": (
+        lambda node, position, size, x: _whole(math.floor, _to_number(x)),
+        1,
+        1,
+        True,
+    ),
+    "ceiling": (
+        lambda node, position, size, x: _whole(math.ceil, _to_number(x)),
+        1,
+        1,
+        True,
+    ),
+    "round": (lambda node, position, size, x: _round(_to_number(x)), 1, 1, True),
+}
+
+
+def _whole(function: Callable[[float], int], value: float) -> float:
+    if math.isnan(value) or math.isinf(value):
+        return value
+    return float(function(value))
+
+
+class _FunctionCall(_Expression):
+    def __init__(self, name: str, arguments: List[_Expression]):
+        if name not in _FUNCTIONS:
+            raise XPathError("Unsupported function: %s()" % name)
+        self.function, least, most, self.returns_number = _FUNCTIONS[name]
+        if len(arguments) < least or (most is not None and len(arguments) > most):
+            raise XPathError("Wrong number of arguments to %s()" % name)
+        self.name = name
+        self.arguments = arguments
+
+    def evaluate(
+        self, node: _Node, position: int, size: int, evaluation: _Evaluation
+    ) -> _Value:
+        return self.function(
+            node,
+            position,
+            size,
+            *[x.evaluate(node, position, size, evaluation) for x in self.arguments],
+        )
+
+    def uses_position(self) -> bool:
+        return self.name in ("position", "last") or any(
+            x.uses_position() for x in self.arguments
+        )
+
+    def may_be_number(self) -> bool:
+        return self.returns_number
+
+
+# A node test is called with a node and the evaluation it's part of.
+_NodeTest = Callable[[_Node, _Evaluation], bool]
+
+
+def _name_test(prefix: Optional[str], local: str, attribute: bool) -> _NodeTest:
+    """Make a node test that checks the name of an element (or an
+    attribute, if the axis is the attribute axis).
+    """
+    qualified = local if prefix is None else prefix + ":" + local
+
+    def test(node: _Node, evaluation: _Evaluation) -> bool:
+        if attribute:
+            if not isinstance(node, _Attribute):
+                return False
+            name = node.name
+            if prefix is None:
+                return local == "*" or name == local
+            node_prefix = getattr(name, "prefix", None)
+            node_name = getattr(name, "name", None) or name
+            namespace = getattr(name, "namespace", None)
+        else:
+            if not isinstance(node, Tag) or node is evaluation.document:
+                return False
+            name = node.name
+            if prefix is None:
+                return local == "*" or name == local
+            node_prefix = node.prefix
+            node_name = name
+            namespace = node.namespace
+        if local != "*" and node_name != local:
+            # An element created by a parser that doesn't understand
+            # namespaces might be called "prefix:name".
+            return name == qualified
+        uri = evaluation.namespaces.get(prefix)
+        if uri is not None:
+            return namespace == uri
+        return node_prefix == prefix
+
+    return test
+
+
+def _any_node(node: _Node, evaluation: _Evaluation) -> bool:
+    return True
+
+
+def _type_test(node_type: str, target: Optional[str] = None) -> _NodeTest:
+    """Make a node test like text() or comment()."""
+    if node_type == "node":
+        return _any_node
+    if node_type == "text":
+        return lambda node, evaluation: _is_text(node)
+    if node_type == "comment":
+        return lambda node, evaluation: isinstance(node, Comment)
+
+    def test(node: _Node, evaluation: _Evaluation) -> bool:
+        if not isinstance(node, ProcessingInstruction):
+            return False
+        return target is None or _name(node, False) == target
+
+    return test
+
+
+def _filter_test(variable: str) -> _NodeTest:
+    """Make a node test that delegates to an `ElementFilter` passed
+    in as a variable.
+    """
+
+    def test(node: _Node, evaluation: _Evaluation) -> bool:
+        element_filter = evaluation.variable(variable)
+        if not isinstance(element_filter, ElementFilter):
+            raise XPathError(
+                "$%s is used as a node test, but it's not an ElementFilter"
+                % variable
+            )
+        return isinstance(node, PageElement) and element_filter.match(node)
+
+    return test
+
+
+def _following(node: PageElement) -> Iterator[PageElement]:
+    last = node._last_descendant()
+    following = last.next_element if last is not None else None
+    while following is not None:
+        yield following
+        following = following.next_element
+
+
+def _preceding(node: PageElement) -> Iterator[PageElement]:
+    ancestors = set(id(x) for x in node.parents)
+    for element in node.previous_elements:
+        if id(element) not in ancestors:
+            yield element
+
+
+def _attributes(node: PageElement) -> Iterator[_Node]:
+    if isinstance(node, Tag):
+        xml = node._is_xml
+        for name, value in node.attrs.items():
+            if xml and (name == "xmlns" or name.startswith("xmlns:")):
+                # A namespace declaration isn't an attribute.
+                continue
+            yield _Attribute(node, name, value)
+
+
+def _along_axis(axis: str, node: _Node) -> Iterable[_Node]:
+    """Find the nodes along an axis, starting from a node, in the
+    order the axis goes in.
+    """
+    if axis == "self":
+        return (node,)
+    if isinstance(node, _Attribute):
+        # An attribute has a parent, but it's not one of the parent's
+        # children.
+        parent = node.parent
+        if axis == "parent":
+            return (parent,)
+        if axis == "ancestor":
+            return itertools.chain((parent,), parent.parents)
+        if axis == "ancestor-or-self":
+            return itertools.chain((node, parent), parent.parents)
+        if axis == "descendant-or-self":
+            return (node,)
+        if axis == "following":
+            return itertools.chain(parent.descendants, _following(parent))
+        if axis == "preceding":
+            return _preceding(parent)
+        return ()
+
+    if axis == "child":
+        return node.contents if isinstance(node, Tag) else ()
+    if axis == "descendant":
+        return node.descendants if isinstance(node, Tag) else ()
+    if axis == "descendant-or-self":
+        if isinstance(node, Tag):
+            # Not self_and_descendants, which leaves out a hidden Tag
+            # like the BeautifulSoup object.
+            return itertools.chain((node,), node.descendants)
+        return (node,)
+    if axis == "attribute":
+        return _attributes(node)
+    if axis == "parent":
+        return () if node.parent is None else (node.parent,)
+    if axis == "ancestor":
+        return node.parents
+    if axis == "ancestor-or-self":
+        return itertools.chain((node,), node.parents)
+    if axis == "following-sibling":
+        return node.next_siblings
+    if axis == "preceding-sibling":
+        return node.previous_siblings
+    if axis == "following":
+        return _following(node)
+    assert axis == "preceding"
+    return _preceding(node)
+
+
+#: Axes that go backwards through the document. A position in a
+#: predicate counts back from the context node.
+_REVERSE_AXES = set(["ancestor", "ancestor-or-self", "preceding", "preceding-sibling"])
+
+_AXES = _REVERSE_AXES | set(
+    [
+        "attribute",
+        "child",
+        "descendant",
+        "descendant-or-self",
+        "following",
+        "following-sibling",
+        "parent",
+        "self",
+    ]
+)
+
+
+def _apply_predicate(
+    nodes: Iterable[_Node], predicate: _Expression, evaluation: _Evaluation
+) -> List[_Node]:
+    """Keep the nodes that pass a predicate."""
+    if isinstance(predicate, _Literal) and isinstance(predicate.value, float):
+        # [3] picks out the third node; nothing past it needs to be
+        # looked at.
+        index = predicate.value
+        if not index.is_integer() or index < 1:
+            return []
+        return list(itertools.islice(nodes, int(index) - 1, int(index)))
+    if not predicate.is_positional():
+        # The position doesn't matter, and neither does the size.
+        return [
+            node
+            for node in nodes
+            if _to_boolean(predicate.evaluate(node, 0, 0, evaluation))
+        ]
+    nodes = list(nodes)
+    size = len(nodes)
+    kept = []
+    for position, node in enumerate(nodes, 1):
+        value = predicate.evaluate(node, position, size, evaluation)
+        if isinstance(value, float):
+            if value == position:
+                kept.append(node)
+        elif _to_boolean(value):
+            kept.append(node)
+    return kept
+
+
+class _Step(object):
+    """One step in a location path, like ``child::a[@href]``."""
+
+    axis: str
+    test: _NodeTest
+    predicates: List[_Expression]
+
+    #: If this is not None, the step can only match a `Tag` with this
+    #: name (and no prefix).
+    name: Optional[str]
+
+    def __init__(
+        self,
+        axis: str,
+        test: _NodeTest,
+        predicates: List[_Expression],
+        name: Optional[str] = None,
+    ):
+        self.axis = axis
+        self.test = test
+        self.predicates = predicates
+        self.name = name
+
+    def select(self, node: _Node, evaluation: _Evaluation) -> List[_Node]:
+        """Take this step from a single context node.
+
+        :return: A list of nodes in document order.
+        """
+        test = self.test
+        candidates: Iterable[_Node]
+        if self.axis == "descendant" and self.name is not None:
+            # Only tags with the right name will pass the node test;
+            # if the tree has an index, let it find them.
+            if not isinstance(node, Tag):
+                return []
+            candidates = node._find_all_generator(self.name, {}, True, None, {})
+        else:
+            candidates = _along_axis(self.axis, node)
+        nodes: Iterable[_Node] = (x for x in candidates if test(x, evaluation))
+        for predicate in self.predicates:
+            nodes = _apply_predicate(nodes, predicate, evaluation)
+        nodes = list(nodes)
+        if self.axis in _REVERSE_AXES:
+            nodes.reverse()
+        return nodes
+
+
+class _Path(_Expression):
+    """A location path, or a filter expression followed by a location
+    path.
+
+    :param start: Where the path starts: "/" for the root of the
+        tree, None for the context node, or an expression that
+        evaluates to a node-set.
+    """
+
+    def __init__(
+        self, start: Union[None, str, _Expression], steps: List[_Step]
+    ):
+        self.start = start
+        self.steps = steps
+
+    def evaluate(
+        self, node: _Node, position: int, size: int, evaluation: _Evaluation
+    ) -> _Value:
+        nodes: List[_Node]
+        if self.start is None:
+            nodes = [node]
+        elif self.start == "/":
+            nodes = [evaluation.root]
+        else:
+            assert isinstance(self.start, _Expression)
+            nodes = _to_node_set(
+                self.start.evaluate(node, position, size, evaluation),
+                "The start of a path",
+            )
+        for step in self.steps:
+            if len(nodes) == 1:
+                nodes = step.select(nodes[0], evaluation)
+            else:
+                nodes = evaluation.in_document_order(
+                    [x for context in nodes for x in step.select(context, evaluation)]
+                )
+            if not nodes:
+                break
+        return nodes
+
+    def uses_position(self) -> bool:
+        return isinstance(self.start, _Expression) and self.start.uses_position()
+
+
+class _Filter(_Expression):
+    """An expression, like ``(//a)[1]``, that filters a node-set with
+    predicates.
+    """
+
+    def __init__(self, primary: _Expression, predicates: List[_Expression]):
+        self.primary = primary
+        self.predicates = predicates
+
+    def evaluate(
+        self, node: _Node, position: int, size: int, evaluation: _Evaluation
+    ) -> _Value:
+        nodes = _to_node_set(
+            self.primary.evaluate(node, position, size, evaluation),
+            "An expression with a predicate",
+        )
+        for predicate in self.predicates:
+            nodes = _apply_predicate(nodes, predicate, evaluation)
+        return nodes
+
+    def uses_position(self) -> bool:
+        return self.primary.uses_position()
+
+
+_TOKEN = re.compile(
+    r"""\s*(?:
+    (?P<number>\d+(?:\.\d*)?|\.\d+)
+    |(?P<string>"[^"]*"|'[^']*')
+    |\$(?P<variable>{name}(?::{name})?)
+    |(?P<name>(?:{name}:)?(?:{name}|\*))
+    |(?P<op>//|::|\.\.|!=|<=|>=|[/()\[\]@,|=<>.+\-])
+    )""".format(name=r"[^\W\d][\w.\-]*"),
+    re.VERBOSE,
+)
+
+_NODE_TYPES = set(["comment", "text", "processing-instruction", "node"])
+
+_OPERATOR_NAMES = set(["and", "or", "mod", "div"])
+
+# After one of these tokens, * is a name test and "and" is a tag
+# name. After anything else, they're operators.
+_BEFORE_OPERAND = (
+    set(["@", "::", "(", "[", ",", "/", "//", "|", "+", "-", "*"])
+    | set(_COMPARISONS)
+    | _OPERATOR_NAMES
+)
+
+
+def _tokenize(expression: str) -> List[Tuple[str, str]]:
+    tokens: List[Tuple[str, str]] = []
+    position = 0
+    end = len(expression.rstrip())
+    while position < end:
+        match = _TOKEN.match(expression, position)
+        if match is None or match.end() == position:
+            raise XPathError(
+                "Invalid XPath expression %r at position %d" % (expression, position)
+            )
+        position = match.end()
+        kind = match.lastgroup
+        assert kind is not None
+        value = match.group(kind)
+        if kind == "name" and tokens:
+            last_kind, last_value = tokens[-1]
+            if not (last_kind == "op" and last_value in _BEFORE_OPERAND):
+                # This has to be an operator.
+                if value == "*" or value in _OPERATOR_NAMES:
+                    kind = "op"
+                else:
+                    raise XPathError(
+                        "Invalid XPath expression %r: unexpected %r"
+                        % (expression, value)
+                    )
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser(object):
+    """A recursive-descent parser for XPath 1.0 expressions."""
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self.tokens = _tokenize(expression)
+        self.index = 0
+
+    def parse(self) -> _Expression:
+        if not self.tokens:
+            raise XPathError("Empty XPath expression")
+        expression = self.parse_or()
+        if self.index < len(self.tokens):
+            self.error("unexpected %r" % self.tokens[self.index][1])
+        return expression
+
+    def error(self, message: str) -> None:
+        raise XPathError("Invalid XPath expression %r: %s" % (self.expression, message))
+
+    def peek(self, offset: int = 0) -> Tuple[Optional[str], Optional[str]]:
+        index = self.index + offset
+        if index < len(self.tokens):
+            return self.tokens[index]
+        return None, None
+
+    def next(self) -> Tuple[Optional[str], Optional[str]]:
+        token = self.peek()
+        self.index += 1
+        return token
+
+    def accept(self, *ops: str) -> Optional[str]:
+        """Consume the next token if it's one of the given operators."""
+        kind, value = self.peek()
+        if kind == "op" and value in ops:
+            self.index += 1
+            return value
+        return None
+
+    def expect(self, op: str) -> None:
+        if self.accept(op) is None:
+            kind, value = self.peek()
+            self.error(
+                "expected %r, found %s" % (op, "the end" if value is None else repr(value))
+            )
+
+    def parse_binary(
+        self, ops: Tuple[str, ...], operand: Callable[[], _Expression]
+    ) -> _Expression:
+        expression = operand()
+        while True:
+            op = self.accept(*ops)
+            if op is None:
+                return expression
+            expression = _Binary(op, expression, operand())
+
+    def parse_or(self) -> _Expression:
+        return self.parse_binary(("or",), self.parse_and)
+
+    def parse_and(self) -> _Expression:
+        return self.parse_binary(("and",), self.parse_equality)
+
+    def parse_equality(self) -> _Expression:
+        return self.parse_binary(("=", "!="), self.parse_relational)
+
+    def parse_relational(self) -> _Expression:
+        return self.parse_binary(("<", "<=", ">", ">="), self.parse_additive)
+
+    def parse_additive(self) -> _Expression:
+        return self.parse_binary(("+", "-"), self.parse_multiplicative)
+
+    def parse_multiplicative(self) -> _Expression:
+        return self.parse_binary(("*", "div", "mod"), self.parse_unary)
+
+    def parse_unary(self) -> _Expression:
+        if self.accept("-"):
+            return _Negate(self.parse_unary())
+        return self.parse_binary(("|",), self.parse_path)
+
+    def parse_path(self) -> _Expression:
+        kind, value = self.peek()
+        next_kind, next_value = self.peek(1)
+        if kind == "op" and value in ("/", "//"):
+            self.index += 1
+            steps: List[_Step] = []
+            if value == "//":
+                steps.append(_Step("descendant-or-self", _any_node, []))
+                self.parse_steps(steps)
+            elif self.starts_step():
+                self.parse_steps(steps)
+            return _Path("/", self.optimize(steps))
+
+        if (
+            kind in ("number", "string", "variable")
+            or (kind == "op" and value == "(")
+            or (
+                kind == "name"
+                and next_kind == "op"
+                and next_value == "("
+                and value not in _NODE_TYPES
+            )
+        ):
+            # A filter expression, possibly followed by a path.
+            expression = self.parse_primary()
+            predicates = self.parse_predicates()
+            if predicates:
+                expression = _Filter(expression, predicates)
+            op = self.accept("/", "//")
+            if op is None:
+                return expression
+            steps = []
+            if op == "//":
+                steps.append(_Step("descendant-or-self", _any_node, []))
+            self.parse_steps(steps)
+            return _Path(expression, self.optimize(steps))
+
+        if not self.starts_step():
+            self.error(
+                "unexpected %s" % ("end" if value is None else repr(value))
+            )
+        steps = []
+        self.parse_steps(steps)
+        return _Path(None, self.optimize(steps))
+
+    def starts_step(self) -> bool:
+        kind, value = self.peek()
+        if kind in ("name", "variable"):
+            return True
+        return kind == "op" and value in (".", "..", "@")
+
+    def parse_steps(self, steps: List[_Step]) -> None:
+        """Parse a relative location path, adding its steps to `steps`."""
+        while True:
+            steps.append(self.parse_step())
+            op = self.accept("/", "//")
+            if op is None:
+                return
+            if op == "//":
+                steps.append(_Step("descendant-or-self", _any_node, []))
+
+    def parse_step(self) -> _Step:
+        if self.accept("."):
+            return _Step("self", _any_node, [])
+        if self.accept(".."):
+            return _Step("parent", _any_node, [])
+        axis = "child"
+        if self.accept("@"):
+            axis = "attribute"
+        else:
+            kind, value = self.peek()
+            next_kind, next_value = self.peek(1)
+            if kind == "name" and next_kind == "op" and next_value == "::":
+                if value not in _AXES:
+                    self.error("unsupported axis %r" % value)
+                assert value is not None
+                axis = value
+                self.index += 2
+
+        kind, value = self.next()
+        name: Optional[str] = None
+        if kind == "variable":
+            assert value is not None
+            test = _filter_test(value)
+        elif kind == "name":
+            assert value is not None
+            if self.accept("("):
+                if value not in _NODE_TYPES:
+                    self.error("%r is not a node type" % value)
+                target = None
+                if value == "processing-instruction":
+                    string_kind, string = self.peek()
+                    if string_kind == "string":
+                        assert string is not None
+                        target = string[1:-1]
+                        self.index += 1
+                self.expect(")")
+                test = _type_test(value, target)
+            else:
+                prefix: Optional[str] = None
+                local = value
+                if ":" in value:
+                    prefix, local = value.split(":", 1)
+                test = _name_test(prefix, local, axis == "attribute")
+                if prefix is None and local != "*" and axis != "attribute":
+                    name = local
+        else:
+            self.error(
+                "expected a node test, found %s"
+                % ("the end" if value is None else repr(value))
+            )
+        return _Step(axis, test, self.parse_predicates(), name)
+
+    def parse_predicates(self) -> List[_Expression]:
+        predicates = []
+        while self.accept("["):
+            predicates.append(self.parse_or())
+            self.expect("]")
+        return predicates
+
+    def parse_primary(self) -> _Expression:
+        kind, value = self.next()
+        assert value is not None
+        if kind == "number":
+            return _Literal(float(value))
+        if kind == "string":
+            return _Literal(value[1:-1])
+        if kind == "variable":
+            return _Variable(value)
+        if kind == "op" and value == "(":
+            expression = self.parse_or()
+            self.expect(")")
+            return expression
+        # A function call.
+        self.expect("(")
+        arguments = []
+        if not self.accept(")"):
+            arguments.append(self.parse_or())
+            while self.accept(","):
+                arguments.append(self.parse_or())
+            self.expect(")")
+        return _FunctionCall(value, arguments)
+
+    @classmethod
+    def optimize(cls, steps: List[_Step]) -> List[_Step]:
+        """Turn ``//a`` (that is,
+        ``descendant-or-self::node()/child::a``) into
+        ``descendant::a``. They mean the same thing as long as the
+        second step has no positional predicates, and the second one
+        doesn't gather up every node in the tree along the way.
+        """
+        optimized: List[_Step] = []
+        for step in steps:
+            if (
+                optimized
+                and optimized[-1].axis == "descendant-or-self"
+                and optimized[-1].test is _any_node
+                and not optimized[-1].predicates
+                and step.axis == "child"
+                and not any(x.is_positional() for x in step.predicates)
+            ):
+                step = _Step("descendant", step.test, step.predicates, step.name)
+                optimized[-1] = step
+            else:
+                optimized.append(step)
+        return optimized
+
+
+class XPath(object):
+    """A compiled XPath expression.
+
+    Use `XPath.compile` to get one; compiled expressions are cached,
+    so compiling the same expression again costs almost nothing.
+    """
+
+    #: The original expression.
+    expression: str
+
+    _compiled: _Expression
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        self._compiled = _Parser(expression).parse()
+
+    def __repr__(self) -> str:
+        return "<XPath %r>" % self.expression
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def compile(expression: str) -> XPath:
+        """Compile an XPath expression, or find it in the cache of
+        recently compiled expressions.
+
+        :raise XPathError: If the expression is invalid or unsupported.
+        """
+        return XPath(expression)
+
+    def evaluate(
+        self,
+        node: PageElement,
+        namespaces: Optional[_NamespaceMapping] = None,
+        **variables: Any,
+    ) -> _XPathResult:
+        """Evaluate this expression.
+
+        :param node: The context node.
+        :param namespaces: A dictionary mapping namespace prefixes
+           used in the expression to namespace URIs. By default,
+           Beautiful Soup will use the prefixes it encountered while
+           parsing the document.
+        :param variables: Values for the variables used in the
+           expression.
+        :return: If the expression evaluates to a node-set, a list of
+           the nodes in document order, with attributes represented
+           by their values. Otherwise, a string, float or boolean.
+        """
+        if namespaces is None:
+            namespaces = getattr(node, "_namespaces", None) or {}
+        evaluation = _Evaluation(node, namespaces, variables)
+        value = self._compiled.evaluate(node, 1, 1, evaluation)
+        if not isinstance(value, list):
+            return value
+        return [x.value if isinstance(x, _Attribute) else x for x in value]